@@ -0,0 +1,6 @@
+"""
+أدوات قياس الأداء
+
+- generate_archive: توليد أرشيف اصطناعي (قاعدة بيانات + مجلدات سنوات + صور JPEG)
+- run_benchmarks: تشغيل مجموعة القياسات على أرشيف وكتابة النتائج بصيغة JSON
+"""
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+توليد أرشيف اصطناعي لقياس الأداء
+
+يُنشئ قاعدة بيانات بالمخطط الفعلي (DatabaseManager) ومجلد documents/ بنفس
+بنية التطبيق: documents/<السنة>/doc_<المعرف>/image_0001.jpg
+مع عناوين وجهات عربية واقعية وملاحظات مرفقات بصيغة الاستيراد.
+
+الاستخدام:
+    python -m benchmarks.generate_archive --output bench_archive --documents 10000
+    python -m benchmarks.generate_archive --output big --documents 1000000 --no-images
+    python -m benchmarks.generate_archive --output mid --documents 100000 --page-pool 200
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import sqlite3
+import argparse
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / 'src'))
+
+from database.db_manager import DatabaseManager
+from database.query_builder import date_key
+
+
+SUMMARY_FILENAME = 'archive.json'
+DB_FILENAME = 'documents.db'
+BATCH_SIZE = 5000
+
+# صفحة A4 بدقة 150 نقطة/بوصة - أصغر من المسح الفعلي لكنها تحافظ على النسب
+PAGE_SIZE = (1240, 1754)
+PAGE_DPI = 150
+
+DEPARTMENTS = [
+    'شعبة أمن الأفراد عنة', 'قسم أمن الأفراد الأنبار', 'مديرية الموارد البشرية',
+    'مديرية السجلات والوثائق', 'قسم الشؤون القانونية', 'مديرية الشؤون الإدارية',
+    'قسم الحسابات', 'شعبة التدريب', 'مكتب المدير العام', 'قسم التخطيط والمتابعة',
+]
+CLASSIFICATIONS = ['سري', 'سري للغاية', 'شخصي', 'عادي', 'محدود']
+LEGAL_PARAGRAPHS = [
+    'الفقرة (1) من المادة (5)', 'الفقرة (2) من المادة (7)', 'المادة (12)',
+    'الفقرة (3) من المادة (9)', 'البند (4) من التعليمات', '',
+]
+TITLE_SUBJECTS = [
+    'نقل', 'تعيين', 'ترقية', 'إجازة', 'عقوبة', 'شكر وتقدير', 'تدقيق', 'إحالة',
+    'مباشرة', 'انفكاك', 'تصحيح', 'تمديد', 'إلغاء', 'تعميم', 'طلب معلومات',
+]
+TITLE_OBJECTS = [
+    'منتسب', 'ضابط', 'موظف مدني', 'ملفات الخدمة', 'الأوامر الإدارية', 'الرواتب',
+    'الدورات التدريبية', 'الإجازات الاعتيادية', 'الكتب الرسمية', 'الهويات',
+]
+TITLE_QUALIFIERS = [
+    'حسب الضوابط', 'لغرض الاطلاع', 'مع التقدير', 'للعام الحالي', 'بموجب الأمر الوزاري',
+    'وفق الصلاحيات', 'لغرض التنفيذ', '',
+]
+
+
+def random_title(rng):
+    """عنوان (مضمون) عربي من عدة كلمات"""
+    parts = [rng.choice(TITLE_SUBJECTS), rng.choice(TITLE_OBJECTS), rng.choice(TITLE_QUALIFIERS)]
+    return ' '.join(part for part in parts if part)
+
+
+def random_date(rng, year):
+    """تاريخ بالصيغة المستخدمة في أسماء الوثائق: يوم-شهر-سنة"""
+    return f'{rng.randint(1, 28)}-{rng.randint(1, 12)}-{year}'
+
+
+def attachment_notes(rng, year):
+    """ملاحظات مرفق بنفس صيغة الاستيراد: 'رقم: .. | تاريخ: .. | مضمون: ..'"""
+    parts = [
+        f'رقم: {rng.randint(1, 9999)}',
+        f'تاريخ: {random_date(rng, year)}',
+        f'مضمون: {random_title(rng)}',
+    ]
+    if rng.random() < 0.5:
+        parts.append(f'جهة: {rng.choice(DEPARTMENTS)}')
+    return ' | '.join(parts)
+
+
+def render_page(path, rng, dpi=PAGE_DPI):
+    """رسم صفحة ممسوحة اصطناعية (ترويسة وأسطر نص وختم) وحفظها JPEG"""
+    width, height = PAGE_SIZE
+    img = Image.new('L', PAGE_SIZE, 245)
+    draw = ImageDraw.Draw(img)
+
+    # ترويسة وشعار
+    draw.ellipse((width // 2 - 70, 60, width // 2 + 70, 200), outline=40, width=6)
+    for line in range(4):
+        x = width - 120 - rng.randint(200, 380)
+        draw.rectangle((x, 70 + line * 34, width - 120, 88 + line * 34), fill=60)
+
+    # أسطر النص من اليمين إلى اليسار بأطوال متفاوتة
+    y = 320
+    while y < height - 300:
+        x = width - 110
+        while x > 200:
+            word = rng.randint(30, 140)
+            draw.rectangle((x - word, y, x, y + 16), fill=rng.randint(20, 70))
+            x -= word + rng.randint(12, 24)
+        y += rng.choice((34, 34, 34, 60))
+
+    # ختم وتوقيع
+    cx, cy = rng.randint(200, 500), height - 220
+    draw.ellipse((cx - 90, cy - 90, cx + 90, cy + 90), outline=90, width=5)
+    draw.line((width - 450, height - 200, width - 160, height - 240), fill=30, width=4)
+
+    # ضجيج المسح
+    img = img.filter(ImageFilter.GaussianBlur(0.6))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    img.save(path, 'JPEG', quality=75, dpi=(dpi, dpi))
+
+
+def place_page(pool_path, path):
+    """نسخ صفحة من مجموعة الصفحات الجاهزة (رابط صلب إن أمكن)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(pool_path, path)
+    except OSError:
+        shutil.copyfile(pool_path, path)
+
+
+def generate_archive(output_dir, documents=10000, min_images=1, max_images=20,
+                     years=None, attachment_ratio=0.1, images=True, page_pool=None,
+                     seed=0, progress=None):
+    """
+    توليد أرشيف اصطناعي
+
+    Args:
+        output_dir: مجلد الأرشيف (يحتوي documents.db و documents/)
+        documents: عدد الوثائق
+        min_images, max_images: مدى عدد صور كل وثيقة
+        years: سنوات المجلدات (الافتراضي: آخر 7 سنوات حتى 2025)
+        attachment_ratio: نسبة الصور التي تحمل ملاحظات مرفق
+        images: إنشاء ملفات الصور على القرص (False = قاعدة البيانات فقط)
+        page_pool: عدد الصفحات المرسومة فعلاً وتُعاد بروابط صلبة (None = رسم كل صفحة)
+        progress: دالة تُستدعى (الوثائق المنجزة، الإجمالي)
+
+    Returns:
+        dict: ملخص الأرشيف (يُحفظ أيضاً في archive.json)
+    """
+    rng = random.Random(seed)
+    output_dir = Path(output_dir).resolve()
+    storage_dir = output_dir / 'documents'
+    storage_dir.mkdir(parents=True, exist_ok=True)
+    years = list(years or range(2019, 2026))
+    db_path = output_dir / DB_FILENAME
+    if db_path.exists():
+        raise FileExistsError(f'الأرشيف موجود مسبقاً: {db_path}')
+
+    # المخطط الفعلي للتطبيق ثم إدراج مجمّع باتصال واحد
+    DatabaseManager(str(db_path))
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=OFF')
+
+    pool = []
+    if images and page_pool:
+        pool_dir = output_dir / '_page_pool'
+        for index in range(page_pool):
+            path = pool_dir / f'page_{index:04d}.jpg'
+            render_page(path, rng)
+            pool.append(path)
+
+    doc_rows, image_rows = [], []
+    total_images = 0
+    attachments = 0
+    next_image_id = 1
+
+    def flush():
+        conn.executemany(
+            'INSERT INTO documents (id, doc_name, doc_date, doc_title, issuing_dept, '
+            'doc_classification, legal_paragraph, year, date_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', doc_rows
+        )
+        conn.executemany(
+            'INSERT INTO images (id, document_id, image_path, original_filename, page_number, '
+            'image_number, sides, notes, year) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', image_rows
+        )
+        conn.commit()
+        doc_rows.clear()
+        image_rows.clear()
+
+    for doc_id in range(1, documents + 1):
+        year = rng.choice(years)
+        doc_date = random_date(rng, year)
+        doc_number = rng.randint(1, 9999)
+        department = rng.choice(DEPARTMENTS)
+        doc_rows.append((
+            doc_id, f'{doc_number} في {doc_date}', doc_date, random_title(rng), department,
+            rng.choice(CLASSIFICATIONS), rng.choice(LEGAL_PARAGRAPHS), str(year), date_key(doc_date)
+        ))
+
+        doc_dir = storage_dir / str(year) / f'doc_{doc_id}'
+        for page in range(1, rng.randint(min_images, max_images) + 1):
+            path = doc_dir / f'image_{page:04d}.jpg'
+            notes = None
+            if page > 1 and rng.random() < attachment_ratio:
+                notes = attachment_notes(rng, year)
+                attachments += 1
+            image_rows.append((
+                next_image_id, doc_id, str(path), f'{doc_number}-{page}.jpg',
+                page, str(page), 1, notes, str(year)
+            ))
+            if images:
+                if pool:
+                    place_page(rng.choice(pool), path)
+                else:
+                    render_page(path, rng)
+            next_image_id += 1
+            total_images += 1
+
+        if len(doc_rows) >= BATCH_SIZE:
+            flush()
+            if progress:
+                progress(doc_id, documents)
+    flush()
+    # الإدراج المجمّع يملأ سجل التغييرات عبر المشغلات؛ الأرشيف المولَّد يبدأ بسجل فارغ
+    conn.execute('DELETE FROM document_changes')
+    conn.commit()
+    conn.execute('PRAGMA journal_mode=DELETE')
+    conn.close()
+    if progress:
+        progress(documents, documents)
+
+    summary = {
+        'documents': documents,
+        'images': total_images,
+        'attachments': attachments,
+        'years': years,
+        'image_files': bool(images),
+        'page_pool': page_pool,
+        'seed': seed,
+        'db_path': str(db_path),
+        'storage_dir': str(storage_dir),
+    }
+    (output_dir / SUMMARY_FILENAME).write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding='utf-8')
+    return summary
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='توليد أرشيف اصطناعي لقياس الأداء')
+    parser.add_argument('--output', required=True, help='مجلد الأرشيف الناتج')
+    parser.add_argument('--documents', type=int, default=10000, help='عدد الوثائق (مثلاً 10000 أو 100000 أو 1000000)')
+    parser.add_argument('--min-images', type=int, default=1, help='أقل عدد صور للوثيقة')
+    parser.add_argument('--max-images', type=int, default=20, help='أكبر عدد صور للوثيقة')
+    parser.add_argument('--years', type=int, nargs='+', default=None, help='سنوات المجلدات')
+    parser.add_argument('--attachment-ratio', type=float, default=0.1, help='نسبة الصور ذات ملاحظات مرفق')
+    parser.add_argument('--no-images', action='store_true', help='قاعدة البيانات فقط دون ملفات صور')
+    parser.add_argument('--page-pool', type=int, default=None,
+                        help='رسم هذا العدد من الصفحات فقط وإعادة استخدامها بروابط صلبة')
+    parser.add_argument('--seed', type=int, default=0, help='بذرة المولد العشوائي')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    def progress(done, total):
+        print(f"[BENCH] {done}/{total} وثيقة...")
+
+    summary = generate_archive(
+        args.output, documents=args.documents, min_images=args.min_images,
+        max_images=args.max_images, years=args.years, attachment_ratio=args.attachment_ratio,
+        images=not args.no_images, page_pool=args.page_pool, seed=args.seed, progress=progress
+    )
+    print(f"[BENCH] اكتمل: {summary['documents']} وثيقة، {summary['images']} صورة، "
+          f"{summary['attachments']} مرفق في {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
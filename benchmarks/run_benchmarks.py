@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+مجموعة قياسات الأداء من البداية إلى النهاية
+
+تعمل على أرشيف مولَّد بـ generate_archive (أو أرشيف حقيقي) بعد نسخ قاعدة
+البيانات إلى مجلد مؤقت، لأن البحث يكتب في سجل البحث. تُكتب النتائج بصيغة
+JSON مع رقم الإيداع في git لمقارنتها بين الإيداعات.
+
+الاستخدام:
+    python -m benchmarks.run_benchmarks --archive bench_archive --output results.json
+    python -m benchmarks.run_benchmarks --archive bench_archive --only search --compare old.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / 'src'))
+
+from database import shards
+from database.db_manager import DatabaseManager
+from database.query_builder import DocumentQuery
+
+from .generate_archive import DB_FILENAME, SUMMARY_FILENAME
+
+
+SEARCH_FIELDS = ['doc_name', 'doc_date', 'doc_title', 'issuing_dept', 'doc_classification']
+
+# تسجيل القياسات بالترتيب: (الاسم، الدالة)
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """تسجيل دالة قياس؛ تستقبل السياق وتُرجع قاموس نتيجة"""
+    def register(func):
+        BENCHMARKS.append((name, func))
+        return func
+    return register
+
+
+def measure(func, repeat=5, warmup=1):
+    """
+    قياس زمن دالة عدة مرات
+
+    Returns:
+        dict: إحصاءات بالميلي ثانية (min, median, mean, p95, max, runs)
+    """
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'min_ms': round(timings[0], 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'max_ms': round(timings[-1], 3),
+        'runs': repeat,
+    }
+
+
+def throughput(func, items):
+    """تنفيذ func لكل عنصر وإرجاع المعدل بالعناصر في الثانية"""
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    elapsed = time.perf_counter() - start
+    return {
+        'items': len(items),
+        'seconds': round(elapsed, 3),
+        'items_per_sec': round(len(items) / elapsed, 2) if elapsed else None,
+    }
+
+
+class BenchmarkContext:
+    """أرشيف القياس: نسخة مؤقتة من قاعدة البيانات وعينات ثابتة من الوثائق والصور"""
+
+    def __init__(self, archive_dir, work_dir, repeat=5, sample_size=200, seed=0):
+        self.archive_dir = Path(archive_dir).resolve()
+        self.work_dir = Path(work_dir)
+        self.repeat = repeat
+        summary_path = self.archive_dir / SUMMARY_FILENAME
+        self.summary = json.loads(summary_path.read_text(encoding='utf-8')) if summary_path.exists() else {}
+
+        db_path = self.work_dir / DB_FILENAME
+        shutil.copyfile(self.archive_dir / DB_FILENAME, db_path)
+        # ملفات السنوات المغلقة (documents_years) تُنسخ بجانب القاعدة، بلا صلاحية القراءة فقط
+        source_shards = shards.shard_dir(self.archive_dir / DB_FILENAME)
+        if os.path.isdir(source_shards):
+            shutil.copytree(source_shards, shards.shard_dir(db_path), copy_function=shutil.copyfile)
+        self.db = DatabaseManager(str(db_path))
+
+        rng = random.Random(seed)
+        documents = self.db.get_all_documents()
+        self.document_count = len(documents)
+        self.doc_sample = rng.sample(documents, min(sample_size, len(documents)))
+        self.years = sorted(self.summary.get('years') or [])
+
+        image_paths = [
+            img.image_path for doc in self.doc_sample[:50]
+            for img in self.db.get_document_images(doc.id)
+        ]
+        self.image_sample = [path for path in image_paths if os.path.exists(path)][:sample_size]
+
+
+# ----------------------------------------------------------------------
+# قاعدة البيانات
+# ----------------------------------------------------------------------
+
+@benchmark('db.get_all_documents')
+def bench_get_all_documents(ctx):
+    return measure(ctx.db.get_all_documents, ctx.repeat)
+
+
+@benchmark('db.stream_documents')
+def bench_stream_documents(ctx):
+    return measure(lambda: sum(1 for _ in ctx.db.stream_documents()), ctx.repeat)
+
+
+@benchmark('db.get_document_by_id')
+def bench_get_document_by_id(ctx):
+    ids = [doc.id for doc in ctx.doc_sample]
+    result = measure(lambda: [ctx.db.get_document_by_id(doc_id) for doc_id in ids], ctx.repeat)
+    result['calls_per_run'] = len(ids)
+    return result
+
+
+@benchmark('db.get_document_images')
+def bench_get_document_images(ctx):
+    ids = [doc.id for doc in ctx.doc_sample]
+    result = measure(lambda: [ctx.db.get_document_images(doc_id) for doc_id in ids], ctx.repeat)
+    result['calls_per_run'] = len(ids)
+    return result
+
+
+@benchmark('db.get_document_ids_by_image_year')
+def bench_ids_by_year(ctx):
+    if not ctx.years:
+        return None
+    year = ctx.years[len(ctx.years) // 2]
+    return measure(lambda: ctx.db.get_document_ids_by_image_year(year), ctx.repeat)
+
+
+@benchmark('db.get_years')
+def bench_get_years(ctx):
+    return measure(ctx.db.get_years, ctx.repeat)
+
+
+# ----------------------------------------------------------------------
+# عرض القائمة الرئيسية
+# ----------------------------------------------------------------------
+
+def list_documents(db, year=None):
+    """ما يفعله MainWindow.load_documents دون الواجهة: صفحات الوثائق وعدد صور كل صفحة"""
+    rows = 0
+    for page in db.iter_document_pages(year=year, page_size=200):
+        image_counts = db.get_image_counts([doc.id for doc in page])
+        rows += len([(doc, image_counts.get(doc.id, 0)) for doc in page])
+    return rows
+
+
+@benchmark('listing.load_documents')
+def bench_listing_all(ctx):
+    return measure(lambda: list_documents(ctx.db), max(1, ctx.repeat // 5), warmup=0)
+
+
+@benchmark('listing.load_documents_year')
+def bench_listing_year(ctx):
+    if not ctx.years:
+        return None
+    year = ctx.years[len(ctx.years) // 2]
+    return measure(lambda: list_documents(ctx.db, year), max(1, ctx.repeat // 5), warmup=0)
+
+
+# ----------------------------------------------------------------------
+# البحث
+# ----------------------------------------------------------------------
+
+def _search_terms(ctx, field):
+    value = getattr(ctx.doc_sample[0], field) or ''
+    if field == 'doc_name' or field == 'doc_title':
+        return value.split()[0]
+    if field == 'doc_date':
+        return value.rsplit('-', 1)[-1]
+    return value
+
+
+def _make_search_benchmark(field):
+    def bench(ctx):
+        if not ctx.doc_sample:
+            return None
+        term = _search_terms(ctx, field)
+        result = measure(lambda: ctx.db.search_documents_and_attachments(term, field), ctx.repeat)
+        result['term'] = term
+        result['results'] = len(ctx.db.search_documents_and_attachments(term, field))
+        return result
+    return bench
+
+
+for _field in SEARCH_FIELDS:
+    benchmark(f'search.{_field}')(_make_search_benchmark(_field))
+
+
+@benchmark('search.faceted_query')
+def bench_faceted_query(ctx):
+    """فلترة متعددة الشروط: الصفحة الأولى مع الوجوه ثم الصفحة الثانية بالمفتاح"""
+    if not ctx.doc_sample or not ctx.years:
+        return None
+    doc = ctx.doc_sample[0]
+    query = DocumentQuery(
+        departments=[doc.issuing_dept], year_from=ctx.years[0], year_to=ctx.years[-1], sort='date'
+    )
+
+    def run():
+        page = ctx.db.query_documents(query, limit=100, facets=True)
+        if page['next']:
+            ctx.db.query_documents(query, limit=100, after=page['next'])
+        return page
+
+    result = measure(run, ctx.repeat)
+    result['results'] = run()['total']
+    return result
+
+
+# ----------------------------------------------------------------------
+# الاستيراد والصور المصغرة و OCR
+# ----------------------------------------------------------------------
+
+@benchmark('import.images')
+def bench_import(ctx):
+    """حفظ الصورة في مجلد السنة وإدراج الوثيقة والصورة وتحليل البيانات الوصفية"""
+    from app.image_manager import ImageManager
+    from app.image_analysis import analyze_image
+
+    if not ctx.image_sample:
+        return None
+    manager = ImageManager(str(ctx.work_dir / 'import_storage'), thumbnails_max_bytes=1 << 40)
+
+    def import_one(item):
+        index, source = item
+        doc_id = ctx.db.add_document(f'{index} في 1-1-2025', '1-1-2025', 'قياس', 'قياس', 'عادي', '')
+        saved = manager.save_image(source, doc_id, image_number=1, year=2025)
+        image_id = ctx.db.add_image(doc_id, saved, os.path.basename(source), 1, '1', 1)
+        metadata = analyze_image(saved, manager.thumbnails_dir, ('icon',))
+        ctx.db.update_images_metadata([(image_id, metadata)])
+
+    result = throughput(import_one, list(enumerate(ctx.image_sample[:100], start=1)))
+    manager.thumbnails.shutdown()
+    return result
+
+
+@benchmark('thumbnails.create')
+def bench_thumbnails(ctx):
+    from app.thumbnails import ThumbnailStore
+
+    if not ctx.image_sample:
+        return None
+    store = ThumbnailStore(ctx.work_dir / 'thumbnails', max_bytes=1 << 40)
+    result = throughput(lambda path: store.create(path, force=True), ctx.image_sample[:100])
+    result['sizes'] = list(store.sizes)
+    store.shutdown()
+    return result
+
+
+@benchmark('ocr.extract_text')
+def bench_ocr(ctx):
+    from app.ocr_extractor import OCRExtractor
+
+    extractor = OCRExtractor()
+    if not ctx.image_sample or not extractor.is_available():
+        return None
+    return throughput(extractor.extract_text, ctx.image_sample[:10])
+
+
+# ----------------------------------------------------------------------
+# التشغيل والمقارنة
+# ----------------------------------------------------------------------
+
+def git_revision():
+    """رقم الإيداع الحالي (مع علامة إن وُجدت تعديلات غير مودعة)"""
+    try:
+        revision = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+        dirty = subprocess.check_output(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT_DIR, text=True,
+            stderr=subprocess.DEVNULL
+        ).strip()
+        return f'{revision}-dirty' if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(archive_dir, repeat=5, only=None, progress=None):
+    """
+    تشغيل القياسات المسجلة
+
+    Args:
+        only: بادئات أسماء القياسات المطلوبة (مثلاً ['search', 'db'])
+
+    Returns:
+        dict: {'meta': {...}, 'results': {الاسم: النتيجة أو {'skipped': True}}}
+    """
+    with tempfile.TemporaryDirectory(prefix='bench_') as work_dir:
+        ctx = BenchmarkContext(archive_dir, work_dir, repeat=repeat)
+        results = {}
+        for name, func in BENCHMARKS:
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            try:
+                result = func(ctx)
+            except Exception as e:
+                result = {'error': str(e)}
+            results[name] = result if result is not None else {'skipped': True}
+            if progress:
+                progress(name, results[name])
+
+        return {
+            'meta': {
+                'revision': git_revision(),
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'archive': str(Path(archive_dir).resolve()),
+                'documents': ctx.document_count,
+                'archive_summary': ctx.summary,
+                'repeat': repeat,
+            },
+            'results': results,
+        }
+
+
+def headline(result):
+    """القيمة الرئيسية للمقارنة: الوسيط بالميلي ثانية أو المعدل بالعناصر في الثانية"""
+    if 'median_ms' in result:
+        return result['median_ms'], 'ms'
+    if 'items_per_sec' in result:
+        return result['items_per_sec'], '/s'
+    return None, ''
+
+
+def compare(current, previous):
+    """أسطر مقارنة نتيجتين (النسبة > 1 تعني أبطأ في القياسات الزمنية)"""
+    lines = []
+    old_results = previous.get('results', {})
+    for name, result in current['results'].items():
+        value, unit = headline(result)
+        old_value, _ = headline(old_results.get(name, {}))
+        if value is None or not old_value:
+            continue
+        ratio = value / old_value if unit == 'ms' else old_value / value
+        lines.append(f'{name:40s} {old_value:>12.2f} -> {value:>12.2f} {unit:3s} ×{ratio:.2f}')
+    return lines
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='قياس أداء أرشيف الوثائق')
+    parser.add_argument('--archive', required=True, help='مجلد الأرشيف (من generate_archive)')
+    parser.add_argument('--output', default=None, help='ملف نتائج JSON')
+    parser.add_argument('--repeat', type=int, default=5, help='عدد تكرارات القياسات الزمنية')
+    parser.add_argument('--only', nargs='+', default=None, help='بادئات القياسات المطلوبة (db, listing, search, import, thumbnails, ocr)')
+    parser.add_argument('--compare', default=None, help='ملف نتائج سابق للمقارنة')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    def progress(name, result):
+        value, unit = headline(result)
+        status = f'{value} {unit}' if value is not None else ('تخطي' if result.get('skipped') else result.get('error'))
+        print(f"[BENCH] {name}: {status}")
+
+    report = run_benchmarks(args.archive, repeat=args.repeat, only=args.only, progress=progress)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding='utf-8')
+        print(f"[BENCH] تم حفظ النتائج في {args.output}")
+    else:
+        print(text)
+
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        print(f"[BENCH] مقارنة مع {previous.get('meta', {}).get('revision')}:")
+        for line in compare(report, previous):
+            print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
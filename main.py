@@ -1,3 +1,6 @@
+import time
+_PROCESS_START = time.perf_counter()
+
 import sys
 import os
 import tempfile
@@ -8,9 +11,10 @@ from PyQt6.QtWidgets import (
     QTableWidgetItem, QPushButton, QLineEdit, QLabel, QFileDialog,
     QDialog, QDialogButtonBox, QComboBox, QSpinBox, QMessageBox,
     QTabWidget, QGroupBox, QFormLayout, QTextEdit, QListWidget,
-    QListWidgetItem, QProgressBar, QProgressDialog, QCheckBox
+    QListWidgetItem, QProgressBar, QProgressDialog, QCheckBox, QStyledItemDelegate
 )
 from PyQt6.QtCore import Qt, QSize, pyqtSignal, QTimer
+from PyQt6 import sip
 from PyQt6.QtGui import QIcon, QFont, QColor
 from PyQt6.QtWidgets import QApplication
 # test
@@ -20,46 +24,34 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 src_path = os.path.join(current_dir, 'src')
 sys.path.insert(0, src_path)
 
-# التحقق من توفر مكتبة السكانر
-SCANNER_AVAILABLE = False
-SCANNER_COUNT = 0
-try:
-    import win32com.client
-    SCANNER_AVAILABLE = True
-    # التحقق من عدد السكانرات المتصلة
-    try:
-        _wia_manager = win32com.client.Dispatch("WIA.DeviceManager")
-        SCANNER_COUNT = _wia_manager.DeviceInfos.Count
-    except:
-        SCANNER_COUNT = 0
-except ImportError:
-    SCANNER_AVAILABLE = False
-    SCANNER_COUNT = 0
-
+# فحص السكانر و OCR يجري في الخلفية بعد ظهور النافذة (app.startup)،
+# ونوافذ الحوار وعارض الوثائق وتحليل الصور تُستورد عند أول استخدام
 from database.db_manager import DatabaseManager
+from database.records import DocumentRecord
 from app.filename_parser import FilenameParser, ImageSequenceHandler
 from app.ui_styles import MAIN_STYLESHEET
 from app.constants import COLORS, FONT_SIZES, DIMENSIONS, ICONS
 from app.image_manager import ImageManager
-from app.document_viewer import DocumentViewerWindow
 from app.helpers import ValidationHelper, DateHelper, ExportHelper, DatabaseBackupHelper
-
-# استيراد نوافذ الحوار من الوحدة الجديدة
-from app.dialogs import (
-    AddDocumentDialog,
-    AttachmentDetailsDialog,
-    ImportImagesDialog,
-    DestructionFormDialog
-)
+from app import startup
+from app import first_screen
+from app.backup_scheduler import BackupScheduler
+from app.file_gc import FileCollector
+from app import tracing
+from app.settings import get_settings
 from app.dialogs.utils import choose_year_folder
 
-# استيراد OCR اختياري
-try:
-    from app.ocr_extractor import OCRExtractor
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
-    print("[WARNING] مكتبة easyocr غير مثبتة - ميزة استخراج المضمون غير متاحة")
+
+class SequenceNumberDelegate(QStyledItemDelegate):
+    """
+    يعرض رقم الصف الحالي في عمود التسلسل وقت الرسم، فلا يلزم إعادة ترقيم
+    الصفوف التالية عند إدراج صف أو حذفه أثناء التحديث التدريجي
+    """
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        if option.text:
+            option.text = str(index.row() + 1)
 
 
 # =========================================================================
@@ -69,6 +61,15 @@ except ImportError:
 class MainWindow(QMainWindow):
     """النافذة الرئيسية للتطبيق"""
     
+    # عدد الصفوف المؤقتة المعروضة قبل تحميل الوثائق
+    SKELETON_ROWS = 12
+    # أكثر من هذا العدد من الوثائق المتغيرة يُعاد تحميل الجدول كاملاً
+    INCREMENTAL_REFRESH_LIMIT = 500
+    # عدد الوثائق في كل صفحة من نتائج الفلترة المتقدمة
+    QUERY_PAGE_SIZE = 300
+    # عدد الوثائق المقروءة في كل صفحة عند ملء الجدول (تُعالج الأحداث بين الصفحات)
+    TABLE_PAGE_SIZE = 200
+    
     def __init__(self):
         super().__init__()
         self.db = DatabaseManager('documents.db')
@@ -81,9 +82,179 @@ class MainWindow(QMainWindow):
         self.setStyleSheet(MAIN_STYLESHEET)
         
         self.init_ui()
-        # تحديث قائمة السنوات قبل تحميل الوثائق
-        self.refresh_years()
-        self.load_documents()
+        # جدول هيكلي يظهر فوراً، وتُحمَّل السنوات والوثائق بعد أول رسم للنافذة
+        self._startup_pending = True
+        self._probe_worker = None
+        self._live_worker = None
+        self._backup_scheduler = None
+        self._file_collector = None
+        self._load_generation = 0  # يزداد مع كل إعادة ملء للجدول
+        self._row_doc_ids = None  # معرفات وثائق الصفوف بالترتيب (None = الجدول يعرض نتائج بحث)
+        self._seen_change_seq = 0  # آخر رقم في سجل التغييرات انعكس على الجدول
+        self.active_query = None  # DocumentQuery للفلترة المتقدمة (None = بلا فلترة)
+        self._query_next = None  # مفتاح الصفحة التالية من نتائج الفلترة
+        self._query_generation = None
+        self._snapshot_rows = None
+        self._snapshot_generation = None
+        settings = get_settings()
+        self._snapshot_enabled = settings.get('startup.snapshot', True)
+        self._snapshot_size = settings.get('startup.snapshot_rows', first_screen.DEFAULT_SNAPSHOT_ROWS)
+        self._snapshot_path = first_screen.snapshot_path(self.db.db_path)
+        self._trash_undo_seconds = settings.get('storage.trash_undo_hours', 24) * 3600
+        self._show_skeleton_rows()
+    
+    def _show_skeleton_rows(self):
+        """صفوف مؤقتة رمادية تُعرض حتى اكتمال تحميل الوثائق"""
+        placeholder_color = QColor(COLORS.BORDER)
+        self.documents_table.setUpdatesEnabled(False)
+        self.documents_table.setRowCount(self.SKELETON_ROWS)
+        for row in range(self.SKELETON_ROWS):
+            for column in range(self.documents_table.columnCount()):
+                item = QTableWidgetItem('░░░░░░' if column > 1 else '')
+                item.setFlags(Qt.ItemFlag.NoItemFlags)
+                item.setForeground(placeholder_color)
+                self.documents_table.setItem(row, column, item)
+        self.documents_table.setUpdatesEnabled(True)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._startup_pending:
+            self._startup_pending = False
+            QTimer.singleShot(0, self._finish_startup)
+    
+    def _finish_startup(self):
+        """إكمال الإقلاع بعد ظهور النافذة: رسم الهيكل، تحميل البيانات، فحص الأجهزة"""
+        # رسم متزامن يضمن ظهور الجدول الهيكلي قبل بدء التحميل
+        self.repaint()
+        startup.mark('first_paint')
+        
+        # لقطة آخر جلسة: تُعرض فوراً إذا لم تتغير القاعدة منذ حفظها
+        snapshot = None
+        if self._snapshot_enabled:
+            snapshot = first_screen.load_snapshot(self._snapshot_path, self.db)
+        
+        if snapshot is None:
+            with tracing.span('startup.load_initial_data'):
+                # تحديث قائمة السنوات قبل تحميل الوثائق
+                self.refresh_years()
+                self.load_documents()
+            self._on_startup_data_ready()
+            return
+        
+        with tracing.span('startup.paint_snapshot', rows=len(snapshot['rows'])):
+            self._set_year_items(snapshot['years'])
+            self._load_generation += 1
+            self.documents_table.setRowCount(0)
+            self._row_doc_ids = []
+            self.documents_table.setUpdatesEnabled(False)
+            for row in snapshot['rows']:
+                self._append_document_row(DocumentRecord._make(row[:-1]), row[-1])
+            self.documents_table.setUpdatesEnabled(True)
+        self._snapshot_rows = snapshot['rows']
+        self._snapshot_generation = self._load_generation
+        startup.mark('snapshot_paint')
+        
+        # بداية القائمة الحية تُقرأ في الخلفية ثم تُطابَق مع المعروض
+        self._live_worker = first_screen.LiveDocumentsWorker(self.db, len(snapshot['rows']))
+        self._live_worker.load_finished.connect(self._reconcile_snapshot)
+        self._live_worker.start()
+    
+    def _reconcile_snapshot(self, success, message):
+        """مطابقة الصفوف المعروضة من اللقطة مع القائمة الحية من القاعدة"""
+        worker = self._live_worker
+        snapshot_rows = self._snapshot_rows
+        self._snapshot_rows = None
+        
+        if not success:
+            print(f"[STARTUP] فشل تحميل الوثائق في الخلفية: {message}")
+            self.refresh_years()
+            self.load_documents()
+        elif self._load_generation != self._snapshot_generation:
+            # المستخدم بحث أو غيّر السنة أثناء التحميل - المعروض ليس اللقطة
+            self.refresh_years()
+        else:
+            with tracing.span('startup.reconcile_snapshot') as reconcile_span:
+                self.refresh_years()
+                head = first_screen.snapshot_rows(worker.documents, worker.image_counts)
+                if head == snapshot_rows and self._load_generation == self._snapshot_generation:
+                    # بداية القائمة مطابقة: تُضاف الوثائق الأقدم فقط، صفحةً صفحة بعد آخر صف
+                    after = self.db.document_key(worker.documents[-1]) if worker.documents else None
+                    self._seen_change_seq = worker.change_seq
+                    appended = self._append_document_pages(
+                        self.db.iter_document_pages(page_size=self.TABLE_PAGE_SIZE, after=after)
+                    )
+                    reconcile_span.set(appended=appended)
+                elif self._load_generation == self._snapshot_generation:
+                    self.load_documents()
+                    reconcile_span.set(reloaded=True)
+        self._on_startup_data_ready()
+    
+    def _on_startup_data_ready(self):
+        data_ready = startup.mark('data_ready')
+        print(f"[STARTUP] أول رسم بعد {startup.marks()['first_paint']:.0f} ms، "
+              f"البيانات جاهزة بعد {data_ready:.0f} ms")
+        
+        if startup.profile_requested():
+            startup.emit_profile()
+            QApplication.instance().quit()
+            return
+        
+        # فحص السكانر و OCR في الخلفية (win32com و Tesseract بطيئان في التهيئة)
+        self._probe_worker = startup.StartupProbeWorker()
+        self._probe_worker.probe_finished.connect(self._on_startup_probe_finished)
+        self._probe_worker.start()
+        
+        # النسخ الاحتياطي الدوري للقاعدة في الخلفية
+        settings = get_settings()
+        self._backup_scheduler = BackupScheduler(
+            self.db.db_path,
+            settings.get('storage.backup_folder', 'backups'),
+            settings.get('database.backup_interval', 7),
+            keep=settings.get('database.backup_keep', 10),
+            parent=self
+        )
+        self._backup_scheduler.start()
+        
+        # حذف ملفات الوثائق المحذوفة بعد انتهاء مهلة التراجع
+        self._file_collector = FileCollector(self.db, self.image_manager.thumbnails, parent=self)
+        self._file_collector.start()
+    
+    def _on_startup_probe_finished(self, result):
+        startup.mark('probe_finished')
+        tracing.debug('نتيجة فحص الأجهزة: %s', result)
+    
+    def _save_first_screen_snapshot(self):
+        """حفظ أحدث الوثائق وقائمة السنوات لعرضها فوراً في الإقلاع التالي"""
+        try:
+            documents = self.db.get_recent_documents(self._snapshot_size)
+            image_counts = self.db.get_image_counts([doc.id for doc in documents])
+            first_screen.save_snapshot(
+                self._snapshot_path, self.db,
+                first_screen.snapshot_rows(documents, image_counts),
+                self._year_items()
+            )
+        except Exception as e:
+            print(f"[STARTUP] تعذر حفظ لقطة الشاشة الأولى: {str(e)}")
+    
+    def closeEvent(self, event):
+        # نسخة احتياطية جارية تُلغى (لا يبقى منها ملف ناقص) وتُعاد في الإقلاع التالي
+        if self._backup_scheduler is not None:
+            self._backup_scheduler.stop()
+        if self._file_collector is not None:
+            self._file_collector.stop()
+        self.image_manager.thumbnails.shutdown()
+        # انتظار الخيوط الخلفية الجارية قبل إغلاق التطبيق
+        for worker in (self._probe_worker, self._live_worker):
+            if worker is not None and worker.isRunning():
+                worker.wait(3000)
+        startup.wait_detached_probes()
+        try:
+            self.db.prune_document_changes()
+        except Exception as e:
+            print(f"[DB] تعذر تقليم سجل التغييرات: {str(e)}")
+        if self._snapshot_enabled:
+            self._save_first_screen_snapshot()
+        super().closeEvent(event)
     
     def init_ui(self):
         """إنشاء واجهة المستخدم"""
@@ -194,6 +365,16 @@ class MainWindow(QMainWindow):
         self.years_combo.currentTextChanged.connect(self.on_year_changed)
         toolbar_layout.addWidget(self.years_combo)
         
+        self.filter_btn = QPushButton('🧮 فلترة متقدمة')
+        self.filter_btn.setToolTip('فلترة بعدة شروط معاً (الجهة، التصنيف، التاريخ، السنوات، المضمون)')
+        self.filter_btn.clicked.connect(self.open_advanced_filter)
+        toolbar_layout.addWidget(self.filter_btn)
+        
+        export_year_btn = QPushButton('🔎 تصدير السنة PDF')
+        export_year_btn.setToolTip('تصدير وثائق السنة المختارة كملفات PDF قابلة للبحث (OCR)')
+        export_year_btn.clicked.connect(self.export_year_searchable_pdf)
+        toolbar_layout.addWidget(export_year_btn)
+        
         toolbar_layout.addStretch()
         
         select_all_btn = QPushButton('✓ تحديد الكل')
@@ -204,6 +385,16 @@ class MainWindow(QMainWindow):
         deselect_all_btn.clicked.connect(self.deselect_all_documents)
         toolbar_layout.addWidget(deselect_all_btn)
         
+        export_selected_btn = QPushButton('📦 تصدير المحددة')
+        export_selected_btn.setToolTip('تصدير الوثائق المحددة في ملف ZIP واحد أو ملف PDF لكل وثيقة')
+        export_selected_btn.clicked.connect(self.export_selected_documents)
+        toolbar_layout.addWidget(export_selected_btn)
+        
+        print_selected_btn = QPushButton('🖨️ طباعة المحددة')
+        print_selected_btn.setToolTip('طباعة صور الوثائق المحددة في مهمة طباعة واحدة')
+        print_selected_btn.clicked.connect(self.print_selected_documents)
+        toolbar_layout.addWidget(print_selected_btn)
+        
         delete_selected_btn = QPushButton('🗑️ حذف المحددة')
         delete_selected_btn.clicked.connect(self.delete_selected_documents)
         toolbar_layout.addWidget(delete_selected_btn)
@@ -211,6 +402,11 @@ class MainWindow(QMainWindow):
         refresh_btn = QPushButton('🔄 تحديث')
         refresh_btn.clicked.connect(self.load_documents)
         toolbar_layout.addWidget(refresh_btn)
+        
+        diagnostics_btn = QPushButton('📊')
+        diagnostics_btn.setToolTip('تشخيص الأداء: زمن العمليات والعدادات وتصدير التتبع')
+        diagnostics_btn.clicked.connect(self.open_diagnostics)
+        toolbar_layout.addWidget(diagnostics_btn)
         main_layout.addLayout(toolbar_layout)
 
         # محتوى رئيسي: جدول الوثائق بعرض كامل
@@ -238,6 +434,7 @@ class MainWindow(QMainWindow):
         
         # تحسين مظهر الجدول مع حدود بارزة
         self.documents_table.verticalHeader().setVisible(False)  # إخفاء الرقم التسلسلي الافتراضي
+        self.documents_table.setItemDelegateForColumn(0, SequenceNumberDelegate(self.documents_table))
         self.documents_table.setShowGrid(True)  # عرض الشبكة
         self.documents_table.setGridStyle(Qt.PenStyle.SolidLine)  # نمط خطوط الشبكة
         
@@ -274,6 +471,8 @@ class MainWindow(QMainWindow):
         self.documents_table.setRowHeight(0, 35)  # زيادة ارتفاع الصفوف
         
         self.documents_table.selectionModel().selectionChanged.connect(self.on_row_selection_changed)
+        # صفحات نتائج الفلترة التالية تُقرأ عند الاقتراب من نهاية الجدول
+        self.documents_table.verticalScrollBar().valueChanged.connect(self._on_table_scrolled)
         
         # ضع الجدول داخل تخطيط عمودي (للسماح بعناصر إضافية إن لزم)
         right_layout = QVBoxLayout()
@@ -285,132 +484,289 @@ class MainWindow(QMainWindow):
         central_widget.setLayout(main_layout)
     
     def load_documents(self, year_filter=None):
-        """تحميل قائمة الوثائق. يستخدم self.current_year للفلترة حسب السنة المختارة."""
+        """
+        تحميل قائمة الوثائق. يستخدم self.current_year للفلترة حسب السنة المختارة.
+        
+        الوثائق وعدد صورها تُقرأ صفحةً صفحة (iter_document_pages) فلا تُحمَّل
+        القائمة كاملة في الذاكرة ولا يبقى قفل قراءة مفتوحاً أثناء الملء.
+        """
+        if self.active_query is not None:
+            self.load_filtered_documents()
+            return
+        
+        load_span = tracing.start_span('ui.load_documents')
+        self._load_generation += 1
         self.documents_table.setRowCount(0)
-        documents = self.db.get_all_documents()
-
+        self._row_doc_ids = []
+        
         # استخدام السنة المختارة حالياً من ComboBox
         active_year = getattr(self, 'current_year', None) or year_filter
         
-        # إذا تم تحديد سنة، احصل على معرفات الوثائق التي تحتوي صورها في مجلد تلك السنة
-        filter_ids = None
-        if active_year:
-            filter_ids = set(self.db.get_document_ids_by_image_year(active_year))
+        # الرقم يُقرأ قبل القائمة حتى لا يفوت تغيير يقع بينهما
+        self._seen_change_seq = self.db.get_change_sequence()
         
+        # فلتر السنة يُنفَّذ في SQL عبر فهرس السنة
+        populate_span = tracing.start_span('ui.populate_table', source='list')
+        documents = self._append_document_pages(
+            self.db.iter_document_pages(year=active_year, page_size=self.TABLE_PAGE_SIZE)
+        )
+        rows = self.documents_table.rowCount()
+        tracing.count('ui.rows_populated', rows)
+        populate_span.set(rows=rows)
+        populate_span.finish()
+        load_span.set(documents=documents, year=active_year)
+        load_span.finish()
+    
+    def _append_document_pages(self, pages):
+        """
+        إضافة صفحات وثائق في نهاية الجدول مع عدد صور كل صفحة
+        
+        تُعالج الأحداث بين الصفحات لإبقاء الواجهة مستجيبة، ويتوقف الملء إذا
+        أُعيد ملء الجدول أثناء ذلك (بحث أو تغيير السنة).
+        
+        Returns:
+            int: عدد الوثائق المضافة
+        """
+        generation = self._load_generation
+        appended = 0
         # Disable updates for better performance
         self.documents_table.setUpdatesEnabled(False)
+        for page in pages:
+            image_counts = self.db.get_image_counts([doc.id for doc in page])
+            for doc in page:
+                self._append_document_row(doc, image_counts.get(doc.id, 0))
+            appended += len(page)
+            QApplication.processEvents()
+            if self._load_generation != generation:
+                break
+        self.documents_table.setUpdatesEnabled(True)
+        return appended
+    
+    def load_filtered_documents(self):
+        """عرض الصفحة الأولى من نتائج الفلترة المتقدمة (self.active_query)"""
+        self._load_generation += 1
+        self._query_generation = self._load_generation
+        self._query_next = None
+        self.documents_table.setRowCount(0)
+        # الجدول لا يعكس كل الوثائق، فالتحديث بعد التعديل يعيد تنفيذ الفلترة
+        self._row_doc_ids = None
+        self._seen_change_seq = self.db.get_change_sequence()
+        self._load_query_page()
+    
+    def _load_query_page(self):
+        """إضافة الصفحة التالية من نتائج الفلترة في نهاية الجدول"""
+        with tracing.span('ui.load_query_page') as page_span:
+            page = self.db.query_documents(
+                self.active_query, limit=self.QUERY_PAGE_SIZE, after=self._query_next,
+                facets=self._query_next is None
+            )
+            image_counts = self.db.get_image_counts([doc.id for doc in page['documents']])
+            self.documents_table.setUpdatesEnabled(False)
+            for doc in page['documents']:
+                self._append_document_row(doc, image_counts.get(doc.id, 0))
+            self.documents_table.setUpdatesEnabled(True)
+            page_span.set(rows=len(page['documents']))
+        self._query_next = page['next']
+        if page['total'] is not None:
+            self.filter_btn.setText(f"🧮 فلترة متقدمة ({page['total']})")
+    
+    def _on_table_scrolled(self, value):
+        if self._query_next is None or self._query_generation != self._load_generation:
+            return
+        if value >= self.documents_table.verticalScrollBar().maximum() - 5:
+            self._load_query_page()
+    
+    def open_advanced_filter(self):
+        """فتح نافذة الفلترة المتقدمة وتطبيق شروطها على الجدول"""
+        from app.dialogs import AdvancedFilterDialog
+        dialog = AdvancedFilterDialog(self, self.db, self.active_query)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        query = dialog.query()
+        self.active_query = None if query.is_empty() and query.sort == 'created' and query.descending else query
+        if self.active_query is None:
+            self.filter_btn.setText('🧮 فلترة متقدمة')
+        self.search_input.blockSignals(True)
+        self.search_input.clear()
+        self.search_input.blockSignals(False)
+        self.load_documents()
+    
+    def refresh_documents(self):
+        """
+        تطبيق تغييرات القاعدة منذ آخر تحميل على الجدول (إضافة/تعديل/حذف صفوف)
         
-        for idx, doc in enumerate(documents):
-            # إذا يوجد فلتر سنة وتوثيقة غير موجودة ضمن تلك السنة، تجاهلها
-            if filter_ids is not None and doc[0] not in filter_ids:
-                continue
-            row = self.documents_table.rowCount()
-            self.documents_table.insertRow(row)
-            
-            # تحسين ارتفاع الصف الجديد
-            self.documents_table.setRowHeight(row, 38)  # ارتفاع مناسب لقابلية القراءة
-            
-            # عمود التسلسل (عموح 0) - مع خلفية أغمق
-            sequence_item = QTableWidgetItem(str(row + 1))
-            sequence_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
-            sequence_item.setBackground(QColor(COLORS.SECONDARY_DARK))  # خلفية أغمق
-            sequence_item.setForeground(QColor(COLORS.TEXT_PRIMARY))
-            self.documents_table.setItem(row, 0, sequence_item)
-            
-            # Checkbox column (عمود 1) - مع تحسين المظهر
-            checkbox = QCheckBox()
-            checkbox.setStyleSheet(f"""
-                QCheckBox::indicator {{
-                    width: 20px;
-                    height: 20px;
-                }}
-                QCheckBox::indicator:unchecked {{
-                    background-color: {COLORS.BACKGROUND_WHITE};
-                    border: 2px solid {COLORS.BORDER_DARK};
-                    border-radius: 4px;
-                }}
-                QCheckBox::indicator:checked {{
-                    background-color: {COLORS.SUCCESS};
-                    border: 2px solid {COLORS.SUCCESS};
-                    border-radius: 4px;
-                }}
-            """)
-            checkbox.stateChanged.connect(lambda state, row=row: self.on_checkbox_changed(row, state))
-            self.documents_table.setCellWidget(row, 1, checkbox)
-            
-            # رقم الوثيقة (من اسم الوثيقة) - عمود 2
-            doc_name = doc[1] or ''
-            # استخراج الرقم من اسم الوثيقة (مثل: "65 في 23-3-2025" -> "65")
-            doc_number = doc_name.split()[0] if doc_name else ''
-            item = QTableWidgetItem(doc_number)
-            item.setData(Qt.ItemDataRole.UserRole, doc[0])  # احفظ معرف الوثيقة
-            # تحسين محاذاة رقم الوثيقة
-            item.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
-            self.documents_table.setItem(row, 2, item)
-            
-            # التاريخ - عمود 3
-            date_item = QTableWidgetItem(doc[2] or '')
-            date_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
-            self.documents_table.setItem(row, 3, date_item)
-            
-            # المضمون (العنوان) - عمود 4
-            content_item = QTableWidgetItem(doc[3] or '')
-            content_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.documents_table.setItem(row, 4, content_item)
-            
-            # جهة الإصدار - عمود 5
-            issuer_item = QTableWidgetItem(doc[4] or '')
-            issuer_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.documents_table.setItem(row, 5, issuer_item)
-            
-            # التصنيف - عمود 6
-            category_item = QTableWidgetItem(doc[5] or '')
-            category_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
-            self.documents_table.setItem(row, 6, category_item)
-            
-            # المادة القانونية - عمود 7
-            legal_item = QTableWidgetItem(doc[6] or '')
-            legal_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            self.documents_table.setItem(row, 7, legal_item)
-            
-            # عدد الصور - عمود 8
-            images = self.db.get_document_images(doc[0])
-            images_item = QTableWidgetItem(str(len(images)))
-            images_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
-            self.documents_table.setItem(row, 8, images_item)
+        يقرأ سجل document_changes بعد آخر رقم رآه الجدول، فتكون الكلفة بعدد
+        التغييرات لا بحجم الأرشيف. يُعاد التحميل الكامل إذا كان الجدول يعرض
+        نتائج بحث أو كانت التغييرات كثيرة أو قُلِّم السجل.
+        """
+        if self._row_doc_ids is None:
+            self.load_documents()
+            return
+        
+        result = self.db.get_changes_since(self._seen_change_seq)
+        if result is None or len(result[1]) > self.INCREMENTAL_REFRESH_LIMIT:
+            self.load_documents()
+            return
+        last_seq, changes = result
+        if not changes:
+            self._seen_change_seq = last_seq
+            return
+        
+        with tracing.span('ui.refresh_documents', changes=len(changes)):
+            live_ids = [doc_id for doc_id, op in changes.items() if op != 'delete']
+            documents = {doc.id: doc for doc in self.db.get_documents_by_ids(live_ids)}
+            if self.current_year and documents:
+                # الوثائق التي لم تعد ضمن السنة المعروضة تُحذف من الجدول
+                in_year = set(self.db.get_document_ids_by_image_year(self.current_year, documents.keys()))
+                documents = {doc_id: doc for doc_id, doc in documents.items() if doc_id in in_year}
+            image_counts = self.db.get_image_counts(documents.keys())
             
-            # Process events every 50 rows to keep UI responsive
-            if idx % 50 == 0:
-                QApplication.processEvents()
+            self.documents_table.setUpdatesEnabled(False)
+            # حذف الصفوف المحذوفة أو الخارجة عن الفلتر
+            for doc_id in changes:
+                row = self._document_row(doc_id)
+                if doc_id not in documents and row is not None:
+                    self.documents_table.removeRow(row)
+                    del self._row_doc_ids[row]
+            # تعديل الصفوف الموجودة في مكانها
+            new_documents = []
+            for doc_id, doc in documents.items():
+                row = self._document_row(doc_id)
+                if row is not None:
+                    self._fill_document_row(row, doc, image_counts.get(doc_id, 0))
+                else:
+                    new_documents.append(doc)
+            # الوثائق الجديدة في أعلى الجدول (الأحدث أولاً كما في التحميل الكامل)
+            for doc in reversed(new_documents):
+                self._insert_document_row(0, doc, image_counts.get(doc.id, 0))
+            self.documents_table.setUpdatesEnabled(True)
         
-        # Re-enable updates
-        self.documents_table.setUpdatesEnabled(True)
+        self._seen_change_seq = last_seq
+        tracing.count('ui.rows_refreshed', len(changes))
+        # قد تظهر سنة جديدة بالاستيراد أو تختفي بالحذف
+        self.refresh_years()
+    
+    def _document_row(self, doc_id):
+        """رقم صف الوثيقة في الجدول أو None"""
+        try:
+            return self._row_doc_ids.index(doc_id)
+        except ValueError:
+            return None
+    
+    def _append_document_row(self, doc, image_count):
+        """إضافة صف وثيقة في نهاية الجدول (doc: DocumentRecord)"""
+        self._insert_document_row(self.documents_table.rowCount(), doc, image_count)
+    
+    def _insert_document_row(self, row, doc, image_count):
+        """إدراج صف وثيقة في الموضع row"""
+        self.documents_table.insertRow(row)
+        if self._row_doc_ids is not None:
+            self._row_doc_ids.insert(row, doc.id)
+        
+        # تحسين ارتفاع الصف الجديد
+        self.documents_table.setRowHeight(row, 38)  # ارتفاع مناسب لقابلية القراءة
+        
+        # عمود التسلسل (عموح 0) - مع خلفية أغمق
+        sequence_item = QTableWidgetItem(str(row + 1))
+        sequence_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
+        sequence_item.setBackground(QColor(COLORS.SECONDARY_DARK))  # خلفية أغمق
+        sequence_item.setForeground(QColor(COLORS.TEXT_PRIMARY))
+        self.documents_table.setItem(row, 0, sequence_item)
+        
+        # Checkbox column (عمود 1) - مع تحسين المظهر
+        checkbox = QCheckBox()
+        checkbox.setStyleSheet(f"""
+            QCheckBox::indicator {{
+                width: 20px;
+                height: 20px;
+            }}
+            QCheckBox::indicator:unchecked {{
+                background-color: {COLORS.BACKGROUND_WHITE};
+                border: 2px solid {COLORS.BORDER_DARK};
+                border-radius: 4px;
+            }}
+            QCheckBox::indicator:checked {{
+                background-color: {COLORS.SUCCESS};
+                border: 2px solid {COLORS.SUCCESS};
+                border-radius: 4px;
+            }}
+        """)
+        # رقم الصف يُحسب عند الإشارة لأن الصفوف قد تُزاح بالتحديث التدريجي
+        checkbox.stateChanged.connect(
+            lambda state, checkbox=checkbox: self.on_checkbox_changed(self._cell_widget_row(checkbox), state)
+        )
+        self.documents_table.setCellWidget(row, 1, checkbox)
+        self._fill_document_row(row, doc, image_count)
+    
+    def _cell_widget_row(self, widget):
+        return self.documents_table.indexAt(widget.pos()).row()
+    
+    def _fill_document_row(self, row, doc, image_count):
+        """تعبئة أعمدة بيانات الوثيقة في صف موجود"""
+        # رقم الوثيقة (من اسم الوثيقة) - عمود 2
+        doc_name = doc.doc_name or ''
+        # استخراج الرقم من اسم الوثيقة (مثل: "65 في 23-3-2025" -> "65")
+        doc_number = doc_name.split()[0] if doc_name else ''
+        item = QTableWidgetItem(doc_number)
+        item.setData(Qt.ItemDataRole.UserRole, doc.id)  # احفظ معرف الوثيقة
+        # تحسين محاذاة رقم الوثيقة
+        item.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
+        self.documents_table.setItem(row, 2, item)
+        
+        # التاريخ - عمود 3
+        date_item = QTableWidgetItem(doc.doc_date or '')
+        date_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
+        self.documents_table.setItem(row, 3, date_item)
+        
+        # المضمون (العنوان) - عمود 4
+        content_item = QTableWidgetItem(doc.doc_title or '')
+        content_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        self.documents_table.setItem(row, 4, content_item)
+        
+        # جهة الإصدار - عمود 5
+        issuer_item = QTableWidgetItem(doc.issuing_dept or '')
+        issuer_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        self.documents_table.setItem(row, 5, issuer_item)
+        
+        # التصنيف - عمود 6
+        category_item = QTableWidgetItem(doc.doc_classification or '')
+        category_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
+        self.documents_table.setItem(row, 6, category_item)
+        
+        # المادة القانونية - عمود 7
+        legal_item = QTableWidgetItem(doc.legal_paragraph or '')
+        legal_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        self.documents_table.setItem(row, 7, legal_item)
+        
+        # عدد الصور - عمود 8
+        images_item = QTableWidgetItem(str(image_count))
+        images_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
+        self.documents_table.setItem(row, 8, images_item)
 
     def refresh_years(self):
         """تحديث قائمة السنوات في قائمة اختيار أنيقة"""
-        from pathlib import Path
-        import os
-        docs_dir = Path(self.image_manager.storage_dir)
+        # السنوات من فهرس السنة في القاعدة (تنازلياً) بدل قراءة مجلد الوثائق
+        self._set_year_items(self.db.get_years())
+    
+    def _set_year_items(self, years):
+        """
+        إعادة بناء قائمة السنوات (years بترتيب العرض) مع استعادة الاختيار السابق
         
+        لا تُعاد تحميل الوثائق إلا إذا تغيرت السنة المختارة فعلاً
+        """
         # حفظ الاختيار الحالي
         current_selection = self.years_combo.currentText()
         
+        self.years_combo.blockSignals(True)
         # مسح قائمة اختيار السنوات
         self.years_combo.clear()
         
         # إضافة خيار "جميع السنوات"
         self.years_combo.addItem("🌐 جميع السنوات")
         
-        # الحصول على السنوات من مجلد الوثائق
-        if docs_dir.exists():
-            years = []
-            for d in docs_dir.iterdir():
-                if d.is_dir() and d.name.isdigit():
-                    years.append(d.name)
-            
-            # ترتيب تنازلي (الأحدث أولاً)
-            for year in sorted(years, reverse=True):
-                self.years_combo.addItem(f"📅 {year}")
+        # ترتيب تنازلي (الأحدث أولاً)
+        for year in years:
+            self.years_combo.addItem(f"📅 {year}")
         
         # استعادة الاختيار السابق إذا أمكن
         if current_selection:
@@ -419,7 +775,15 @@ class MainWindow(QMainWindow):
                 self.years_combo.setCurrentIndex(index)
             else:
                 self.years_combo.setCurrentIndex(0)  # جميع السنوات
-
+        self.years_combo.blockSignals(False)
+        
+        if current_selection and self.years_combo.currentText() != current_selection:
+            self.on_year_changed(self.years_combo.currentText())
+    
+    def _year_items(self):
+        """السنوات المعروضة في القائمة (دون خيار جميع السنوات)"""
+        return [self.years_combo.itemText(i).replace("📅 ", "") for i in range(1, self.years_combo.count())]
+    
     def on_year_changed(self, year_text):
         """معالج تغيير اختيار السنة من قائمة الاختيار"""
         if not year_text:
@@ -431,11 +795,17 @@ class MainWindow(QMainWindow):
             # استخراج رقم السنة من النص
             self.current_year = year_text.replace("📅 ", "")
         
+        # اختيار سنة يلغي الفلترة المتقدمة (لها مدى سنوات خاص بها)
+        if self.active_query is not None:
+            self.active_query = None
+            self.filter_btn.setText('🧮 فلترة متقدمة')
+        
         # إعادة تحميل الوثائق
         self.load_documents()
     
     def add_document(self):
         """إضافة وثيقة جديدة"""
+        from app.dialogs import AddDocumentDialog
         dialog = AddDocumentDialog(self, self.db, self.image_manager)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             data = dialog.get_data()
@@ -459,9 +829,9 @@ class MainWindow(QMainWindow):
             # حيث المفتاح 1 = المرفق الأول (الصورة الثانية، فهرس 1 في scanned_images)
             attachment_details_dict = data.get('attachment_details_dict', {})
             
-            print(f"[DEBUG] add_document: عدد الصور = {len(scanned_images)}")
-            print(f"[DEBUG] add_document: attachment_details_dict = {attachment_details_dict}")
-            print(f"[DEBUG] add_document: مفاتيح القاموس = {list(attachment_details_dict.keys())}")
+            tracing.debug('add_document: عدد الصور = %s', len(scanned_images))
+            tracing.debug('add_document: attachment_details_dict = %s', attachment_details_dict)
+            tracing.debug('add_document: مفاتيح القاموس = %s', list(attachment_details_dict.keys()))
             
             if scanned_images:
                 saved_count = 0
@@ -479,12 +849,14 @@ class MainWindow(QMainWindow):
                 # scanned_images[1] = الصورة الثانية = المرفق الأول -> attachment_details_dict[1]
                 # scanned_images[2] = الصورة الثالثة = المرفق الثاني -> attachment_details_dict[2]
                 
+                from app.image_analysis import ImageAnalysisPool
+                analysis_pool = ImageAnalysisPool(self.image_manager.thumbnails_dir)
                 for idx, image_path in enumerate(scanned_images):
                     if os.path.exists(image_path):
                         try:
                             notes_text = None
                             
-                            print(f"[DEBUG] معالجة الصورة idx={idx}")
+                            tracing.debug('معالجة الصورة idx=%s', idx)
                             
                             # الصورة الأولى (idx=0) هي الوثيقة الرئيسية - تستخدم بيانات الوثيقة الرئيسية
                             # الصورة الثانية (idx=1) هي المرفق الأول - بياناتها في attachment_details_dict[1]
@@ -492,7 +864,7 @@ class MainWindow(QMainWindow):
                             
                             if idx == 0:
                                 # الوثيقة الرئيسية - استخدم بيانات data
-                                print(f"[DEBUG] idx=0: الوثيقة الرئيسية")
+                                tracing.debug('idx=0: الوثيقة الرئيسية')
                                 merged_data = {
                                     'doc_name': data['doc_name'],
                                     'doc_date': data['doc_date'],
@@ -504,7 +876,7 @@ class MainWindow(QMainWindow):
                             else:
                                 # هذا مرفق - ابحث عن بياناته في القاموس
                                 attachment_info = attachment_details_dict.get(idx, {})
-                                print(f"[DEBUG] idx={idx}: المرفق {idx}, attachment_info = {attachment_info}")
+                                tracing.debug('idx=%s: المرفق %s, attachment_info = %s', idx, idx, attachment_info)
                                 
                                 # تحقق هل هناك بيانات مخصصة
                                 has_custom_data = False
@@ -514,7 +886,7 @@ class MainWindow(QMainWindow):
                                         for v in attachment_info.values()
                                     )
                                 
-                                print(f"[DEBUG] has_custom_data للمرفق {idx}: {has_custom_data}")
+                                tracing.debug('has_custom_data للمرفق %s: %s', idx, has_custom_data)
                                 
                                 if has_custom_data:
                                     # المرفق له بيانات مخصصة - استخدمها
@@ -526,7 +898,7 @@ class MainWindow(QMainWindow):
                                         'doc_classification': attachment_info.get('doc_classification') or data.get('doc_classification', ''),
                                         'notes': attachment_info.get('notes', '')
                                     }
-                                    print(f"[DEBUG] استخدام بيانات مخصصة للمرفق {idx}")
+                                    tracing.debug('استخدام بيانات مخصصة للمرفق %s', idx)
                                 else:
                                     # المرفق ليس له بيانات مخصصة - استخدم بيانات الوثيقة الرئيسية
                                     merged_data = {
@@ -537,9 +909,9 @@ class MainWindow(QMainWindow):
                                         'doc_classification': data.get('doc_classification', ''),
                                         'notes': ''
                                     }
-                                    print(f"[DEBUG] استخدام بيانات الوثيقة الرئيسية للمرفق {idx}")
+                                    tracing.debug('استخدام بيانات الوثيقة الرئيسية للمرفق %s', idx)
                             
-                            print(f"[DEBUG] البيانات النهائية للصورة {idx}: {merged_data}")
+                            tracing.debug('البيانات النهائية للصورة %s: %s', idx, merged_data)
                             
                             # إنشاء نص الملاحظات
                             notes_parts = []
@@ -567,10 +939,10 @@ class MainWindow(QMainWindow):
                                 year=selected_year
                             )
                             
-                            print(f"[DEBUG] ✅ حفظ الصورة {idx} بـ notes: {notes_text}")
+                            tracing.debug('✅ حفظ الصورة %s بـ notes: %s', idx, notes_text)
                             
                             # حفظ في قاعدة البيانات
-                            self.db.add_image(
+                            image_id = self.db.add_image(
                                 doc_id,
                                 saved_path,
                                 os.path.basename(image_path),
@@ -579,12 +951,15 @@ class MainWindow(QMainWindow):
                                 1,
                                 notes_text
                             )
+                            analysis_pool.submit(image_id, saved_path)
                             
                             saved_count += 1
                                 
                         except Exception as e:
                             print(f"خطأ في حفظ الصورة {idx}: {str(e)}")
                 
+                self._store_images_metadata(analysis_pool)
+                
                 if saved_count > 0:
                     msg = f'تم الحفظ بنجاح!\n\n'
                     msg += f'الوثيقة الرئيسية مع {saved_count} صورة/مرفق'
@@ -626,11 +1001,12 @@ class MainWindow(QMainWindow):
             else:
                 QMessageBox.information(self, 'نجح', 'تم إضافة الوثيقة بنجاح')
             
-            self.load_documents()
+            self.refresh_documents()
     
     def import_images(self):
         """استيراد الصور"""
-        dialog = ImportImagesDialog(self)
+        from app.dialogs import ImportImagesDialog
+        dialog = ImportImagesDialog(self, self.db)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             files = dialog.get_files()
             if not files:
@@ -640,11 +1016,12 @@ class MainWindow(QMainWindow):
             extract_title = False
             ocr = None
             
-            if OCR_AVAILABLE:
-                # محاولة تهيئة OCR أولاً للتحقق من توفره
+            # نتيجة الفحص الخلفي عند الإقلاع (أو فحص فوري إن لم يكتمل بعد)
+            ocr_module, ocr_engine = startup.ocr_status()
+            if ocr_module:
                 try:
-                    test_ocr = OCRExtractor()
-                    if test_ocr.reader:
+                    if ocr_engine:
+                        from app.ocr_extractor import OCRExtractor
                         extract_title = QMessageBox.question(
                             self, 'استخراج المضمون',
                             '🔍 هل تريد استخراج المضمون (الموضوع) تلقائياً من الصور؟\n\n'
@@ -655,7 +1032,7 @@ class MainWindow(QMainWindow):
                         ) == QMessageBox.StandardButton.Yes
                         
                         if extract_title:
-                            ocr = test_ocr
+                            ocr = OCRExtractor()
                     else:
                         # Tesseract غير مثبت - عرض رسالة للمستخدم
                         QMessageBox.information(
@@ -833,6 +1210,11 @@ class MainWindow(QMainWindow):
             current_progress = 0
             extracted_titles_count = 0
             
+            # تحليل الصور (الأبعاد، الدقة، البصمات، الأيقونات) بالتوازي مع النسخ
+            from app.image_analysis import ImageAnalysisPool
+            analysis_pool = ImageAnalysisPool(self.image_manager.thumbnails_dir)
+            import_span = tracing.start_span('import.images', total=total_images, ocr=bool(extract_title))
+            
             for doc_key, doc_info in documents_to_add.items():
                 if progress.wasCanceled():
                     break
@@ -853,6 +1235,7 @@ class MainWindow(QMainWindow):
                             print(f"[OCR] محاولة استخراج المضمون من الصورة {img_idx + 1}...")
                             
                             extracted_info = ocr.extract_document_info(image_path)
+                            tracing.count('ocr.pages')
                             if extracted_info and extracted_info.get('doc_title'):
                                 doc_title = extracted_info['doc_title']
                                 doc_info['data']['doc_title'] = doc_title
@@ -872,23 +1255,23 @@ class MainWindow(QMainWindow):
                 doc_number = doc_name_parts[0].strip() if doc_name_parts else ''
                 doc_date = doc_info['data']['doc_date']
                 
-                print(f"[DEBUG] البحث عن وثيقة: رقم={doc_number}, تاريخ={doc_date}, اسم={doc_info['data']['doc_name']}")
+                tracing.debug('البحث عن وثيقة: رقم=%s, تاريخ=%s, اسم=%s', doc_number, doc_date, doc_info['data']['doc_name'])
                 
                 # تحقق من وجود الوثيقة بنفس الرقم والتاريخ
                 existing = None
                 if doc_number and doc_date:
                     existing = self.db.find_document_by_number_and_date(doc_number, doc_date)
-                    print(f"[DEBUG] نتيجة البحث: {len(existing) if existing else 0} وثيقة")
+                    tracing.debug('نتيجة البحث: %s وثيقة', len(existing) if existing else 0)
                 
                 if existing:
-                    doc_id = existing[0][0]
-                    print(f"[DEBUG] تم إيجاد وثيقة موجودة: ID={doc_id}")
+                    doc_id = existing[0].id
+                    tracing.debug('تم إيجاد وثيقة موجودة: ID=%s', doc_id)
                     # تحديث المضمون إذا تم استخراجه
                     if doc_title:
                         self.db.update_document(doc_id, doc_title=doc_title)
                 else:
                     # أنشئ وثيقة جديدة
-                    print(f"[DEBUG] إنشاء وثيقة جديدة...")
+                    tracing.debug('إنشاء وثيقة جديدة...')
                     doc_id = self.db.add_document(
                         doc_info['data']['doc_name'],
                         doc_info['data']['doc_date'],
@@ -897,11 +1280,11 @@ class MainWindow(QMainWindow):
                         doc_info['data']['doc_classification'],
                         doc_info['data']['legal_paragraph']
                     )
-                    print(f"[DEBUG] تم إنشاء وثيقة جديدة: ID={doc_id}")
+                    tracing.debug('تم إنشاء وثيقة جديدة: ID=%s', doc_id)
                 
                 # الحصول على عدد الصور الموجودة مسبقاً في الوثيقة
-                existing_images = self.db.get_document_images(doc_id)
-                start_img_idx = len(existing_images) + 1  # البدء من بعد آخر صورة
+                existing_images = self.db.get_image_counts([doc_id]).get(doc_id, 0)
+                start_img_idx = existing_images + 1  # البدء من بعد آخر صورة
                 
                 # حفظ الصور
                 for img_idx, img_info in enumerate(doc_info['images'], start_img_idx):
@@ -922,7 +1305,7 @@ class MainWindow(QMainWindow):
                         )
                         
                         # أضف معلومات الصورة في قاعدة البيانات
-                        self.db.add_image(
+                        image_id = self.db.add_image(
                             doc_id,
                             saved_path,
                             img_info['filename'],
@@ -931,13 +1314,19 @@ class MainWindow(QMainWindow):
                             1,
                             None
                         )
+                        analysis_pool.submit(image_id, saved_path)
                         
                         imported_count += 1
+                        tracing.count('import.images')
                     
                     except Exception as e:
                         print(f"[ERROR] خطأ في حفظ الصورة {img_info['filename']}: {str(e)}")
             
-            progress.setValue(total_images)
+            self._store_images_metadata(analysis_pool, progress)
+            import_span.set(imported=imported_count)
+            import_span.finish()
+            
+            progress.setValue(progress.maximum())
             progress.close()
             
             # الرسالة النهائية
@@ -951,7 +1340,41 @@ class MainWindow(QMainWindow):
                 msg += f"\n\n⚠️ تم تخطي {len(unrecognized)} ملف"
             
             QMessageBox.information(self, 'نجح', msg)
-            self.load_documents()
+            self.refresh_documents()
+    
+    @tracing.traced('import.store_metadata')
+    def _store_images_metadata(self, analysis_pool, progress=None):
+        """جمع نتائج تحليل الصور من مجموعة العمليات وحفظها دفعة واحدة"""
+        total = analysis_pool.pending_count()
+        if not total:
+            analysis_pool.close()
+            return
+        
+        if progress:
+            progress.setLabelText('جاري تحليل الصور...')
+            progress.setMaximum(total)
+            progress.setValue(0)
+        
+        metadata_rows = []
+        thumbnails = []
+        try:
+            for done, (image_id, metadata, error) in enumerate(analysis_pool.results(), 1):
+                if metadata:
+                    metadata_rows.append((image_id, metadata))
+                    thumbnails.extend(
+                        (metadata['content_hash'], size_name, path)
+                        for size_name, path in metadata['thumbnails']
+                    )
+                else:
+                    print(f"[ERROR] خطأ في تحليل الصورة {image_id}: {error}")
+                if progress:
+                    progress.setValue(done)
+                    QApplication.processEvents()
+        finally:
+            analysis_pool.close()
+        
+        self.db.update_images_metadata(metadata_rows)
+        self.image_manager.thumbnails.register(thumbnails)
     
     def view_document(self):
         """عرض تفاصيل الوثيقة والصور"""
@@ -967,6 +1390,11 @@ class MainWindow(QMainWindow):
             return
         
         doc_id = doc_id_item.data(Qt.ItemDataRole.UserRole)
+        with tracing.span('ui.view_document', document_id=doc_id):
+            self._open_viewer(doc_id)
+    
+    def _open_viewer(self, doc_id):
+        """جمع بيانات صور الوثيقة وفتح نافذة العرض"""
         doc = self.db.get_document_by_id(doc_id)
         
         if doc:
@@ -980,31 +1408,33 @@ class MainWindow(QMainWindow):
                 )
                 return
             
-            # استخراج مسارات الصور
             # جمع بيانات الصور مع معلومات المرفقات
-            # هيكل جدول images: (0:id, 1:document_id, 2:image_path, 3:original_filename, 
-            #                    4:page_number, 5:image_number, 6:sides, 7:created_date, 8:notes)
+            # الأبعاد المخزنة عند الاستيراد تغني العارض عن فتح الملفات لمعرفتها
+            metadata_by_id = self.db.get_images_metadata(doc_id)
             images_data = []
             for img in images:
-                img_path = img[2]  # العمود 2 هو image_path
-                if os.path.exists(img_path):
-                    notes_value = img[8] if len(img) > 8 else None  # العمود 8 هو notes
-                    print(f"[DEBUG] img[8] (notes) = {notes_value}")
+                if self.image_manager.image_exists(img.image_path):
+                    metadata = metadata_by_id.get(img.id, {})
                     images_data.append({
-                        'path': img_path,
-                        'page_number': img[4] if len(img) > 4 else 0,
-                        'notes': notes_value
+                        'id': img.id,
+                        'path': img.image_path,
+                        'page_number': img.page_number or 0,
+                        'notes': img.notes,
+                        'width': metadata.get('width'),
+                        'height': metadata.get('height'),
+                        'content_hash': metadata.get('content_hash')
                     })
             
             image_paths = [img['path'] for img in images_data]
             
             print(f"\n[MAIN] فتح عارض الوثائق:")
             print(f"  • معرف الوثيقة: {doc_id}")
-            print(f"  • اسم الوثيقة: {doc[1]}")
+            print(f"  • اسم الوثيقة: {doc.doc_name}")
             print(f"  • عدد الصور المسجلة: {len(images)}")
             print(f"  • عدد الصور الموجودة: {len(image_paths)}")
-            for i, img_d in enumerate(images_data):
-                print(f"  • صورة {i+1}: notes = {img_d.get('notes', 'لا يوجد')[:50] if img_d.get('notes') else 'لا يوجد'}...")
+            if tracing.is_enabled():
+                for i, img_d in enumerate(images_data):
+                    tracing.debug('صورة %s: notes = %s...', i + 1, (img_d.get('notes') or 'لا يوجد')[:50])
             if image_paths:
                 print(f"  • أول صورة: {image_paths[0]}")
                 print(f"  • آخر صورة: {image_paths[-1]}")
@@ -1018,13 +1448,66 @@ class MainWindow(QMainWindow):
             
             # فتح نافذة العرض مع بيانات الصور الكاملة
             try:
+                from app.document_viewer import DocumentViewerWindow
                 viewer = DocumentViewerWindow(doc_id, doc, images_data, self)
+                # حذف النافذة عند إغلاقها بدل الاحتفاظ بها طوال الجلسة
+                viewer.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+                viewer.destroyed.connect(lambda *_: QTimer.singleShot(0, self._forget_viewer_windows))
                 viewer.show()
                 self.viewer_windows = getattr(self, 'viewer_windows', [])
                 self.viewer_windows.append(viewer)
             except Exception as e:
                 QMessageBox.critical(self, 'خطأ', f'خطأ في فتح العارض: {str(e)}')
     
+    def export_year_searchable_pdf(self):
+        """تصدير وثائق السنة المختارة كملفات PDF قابلة للبحث في الخلفية"""
+        if not self.current_year:
+            QMessageBox.warning(self, 'تنبيه', 'يجب اختيار سنة أولاً من قائمة السنوات')
+            return
+        
+        output_dir = QFileDialog.getExistingDirectory(self, f'اختر مجلد حفظ ملفات سنة {self.current_year}')
+        if not output_dir:
+            return
+        
+        from app.searchable_pdf import YearPdfExportWorker
+        
+        progress = QProgressDialog(f'جاري تصدير وثائق سنة {self.current_year}...', 'إلغاء', 0, 0, self)
+        progress.setWindowTitle('تصدير PDF قابل للبحث')
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+        
+        worker = YearPdfExportWorker(self.db, self.current_year, output_dir)
+        
+        def on_progress(done, total):
+            progress.setMaximum(total)
+            progress.setValue(done)
+        
+        def on_finished(success, message):
+            progress.close()
+            result = worker.result or {'documents': 0, 'pages': 0, 'failed': []}
+            if success:
+                text = f"تم تصدير {result['documents']} وثيقة ({result['pages']} صفحة)\n{output_dir}"
+                if result['failed']:
+                    text += f"\nفشل تصدير {len(result['failed'])} وثيقة"
+                QMessageBox.information(self, 'نجح', text)
+                print(f"[EXPORT] سنة {self.current_year}: {result['documents']} ملف PDF في {output_dir}")
+            elif not worker.cancelled:
+                QMessageBox.critical(self, 'خطأ', f'فشل التصدير: {message}')
+            self._year_export_worker = None
+        
+        worker.progress_updated.connect(on_progress)
+        worker.export_finished.connect(on_finished)
+        progress.canceled.connect(worker.cancel)
+        self._year_export_worker = worker
+        worker.start()
+    
+    def _forget_viewer_windows(self):
+        """إزالة نوافذ العرض المغلقة (المحذوفة) من القائمة"""
+        self.viewer_windows = [
+            viewer for viewer in getattr(self, 'viewer_windows', [])
+            if not sip.isdeleted(viewer)
+        ]
+    
     def delete_document(self):
         """حذف وثيقة"""
         current_row = self.documents_table.currentRow()
@@ -1047,29 +1530,59 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            self.db.delete_document(doc_id)
-            QMessageBox.information(self, 'نجح', 'تم حذف الوثيقة')
-            self.load_documents()
+            self._delete_documents([doc_id])
+    
+    def _delete_documents(self, doc_ids):
+        """حذف وثائق في معاملة واحدة إلى سلة المحذوفات مع إمكانية التراجع"""
+        try:
+            result = self.db.delete_documents(doc_ids, self._trash_undo_seconds)
+        except Exception as e:
+            QMessageBox.critical(self, 'خطأ', f'فشل حذف الوثائق:\n{str(e)}')
+            return
+        # تحديث الصفوف المتغيرة فقط
+        self.refresh_documents()
+        if not result['documents']:
+            return
+        
+        hours = self._trash_undo_seconds / 3600
+        message = QMessageBox(self)
+        message.setIcon(QMessageBox.Icon.Information)
+        message.setWindowTitle('نجح')
+        message.setText(f"تم حذف {result['documents']} وثيقة")
+        message.setInformativeText(f'تُحذف ملفات الصور نهائياً بعد {hours:g} ساعة، ويمكن التراجع حتى ذلك الحين.')
+        undo_button = message.addButton('تراجع', QMessageBox.ButtonRole.RejectRole)
+        message.addButton('موافق', QMessageBox.ButtonRole.AcceptRole)
+        message.exec()
+        if message.clickedButton() is undo_button:
+            try:
+                restored = self.db.restore_trash(result['trash_id'])
+            except ValueError as e:
+                QMessageBox.warning(self, 'تنبيه', str(e))
+                return
+            self.refresh_documents()
+            QMessageBox.information(self, 'نجح', f'تمت استعادة {restored} وثيقة')
     
     def open_destruction_form(self):
         """فتح نافذة استمارة إتلاف الوثائق"""
-        # الحصول على الوثائق المحددة
-        selected_docs = []
-        for row in range(self.documents_table.rowCount()):
-            checkbox = self.documents_table.cellWidget(row, 0)
-            if checkbox and checkbox.isChecked():
-                doc_id_item = self.documents_table.item(row, 1)
-                if doc_id_item:
-                    doc_id = doc_id_item.data(Qt.ItemDataRole.UserRole)
-                    if doc_id:
-                        doc = self.db.get_document_by_id(doc_id)
-                        if doc:
-                            selected_docs.append(doc)
+        # الوثائق المحددة باستعلام واحد (على دفعات) بدل استعلام لكل صف
+        selected_docs = self.db.get_documents_by_ids(self._checked_document_ids())
         
         # فتح النافذة
+        from app.dialogs import DestructionFormDialog
         dialog = DestructionFormDialog(self, self.db, selected_docs)
         dialog.exec()
     
+    def open_diagnostics(self):
+        """فتح نافذة تشخيص الأداء (غير مشروطة لمتابعة القياسات أثناء العمل)"""
+        dialog = getattr(self, '_diagnostics_dialog', None)
+        if dialog is None:
+            from app.dialogs import DiagnosticsDialog
+            dialog = DiagnosticsDialog(self)
+            self._diagnostics_dialog = dialog
+        dialog.show()
+        dialog.raise_()
+        dialog.activateWindow()
+    
     def select_all_documents(self):
         """تحديد جميع الوثائق"""
         # تحديد جميع الصفوف في الجدول
@@ -1096,6 +1609,125 @@ class MainWindow(QMainWindow):
                 checkbox.setChecked(False)
                 checkbox.blockSignals(False)
     
+    def _checked_document_ids(self):
+        """معرفات الوثائق المحددة بمربعات الاختيار في الجدول"""
+        doc_ids = []
+        for row in range(self.documents_table.rowCount()):
+            checkbox = self.documents_table.cellWidget(row, 1)  # Column 1 now has checkbox
+            if checkbox and checkbox.isChecked():
+                doc_id_item = self.documents_table.item(row, 2)  # Column 2 now has doc number
+                doc_id = doc_id_item.data(Qt.ItemDataRole.UserRole) if doc_id_item else None
+                if doc_id:
+                    doc_ids.append(doc_id)
+        return doc_ids
+    
+    def export_selected_documents(self):
+        """تصدير الوثائق المحددة دون فتح نوافذ العرض"""
+        doc_ids = self._checked_document_ids()
+        if not doc_ids:
+            QMessageBox.warning(self, 'تنبيه', 'يجب تحديد وثائق أولاً')
+            return
+        
+        box = QMessageBox(self)
+        box.setWindowTitle('تصدير الوثائق المحددة')
+        box.setText(f'اختر طريقة تصدير {len(doc_ids)} وثيقة:')
+        zip_btn = box.addButton('🗜️ ملف ZIP واحد', QMessageBox.ButtonRole.AcceptRole)
+        pdf_btn = box.addButton('📕 ملف PDF لكل وثيقة', QMessageBox.ButtonRole.AcceptRole)
+        box.addButton('إلغاء', QMessageBox.ButtonRole.RejectRole)
+        box.exec()
+        
+        if box.clickedButton() == zip_btn:
+            mode = 'zip'
+            target, _ = QFileDialog.getSaveFileName(
+                self, 'حفظ كملف ZIP', f'وثائق_{datetime.now():%Y%m%d}.zip', 'ملفات ZIP (*.zip)'
+            )
+        elif box.clickedButton() == pdf_btn:
+            mode = 'pdf'
+            target = QFileDialog.getExistingDirectory(self, 'اختر مجلد حفظ ملفات PDF')
+        else:
+            return
+        if not target:
+            return
+        
+        from app.bulk_export import BulkExportWorker
+        
+        progress = QProgressDialog('جاري تصدير الوثائق...', 'إلغاء', 0, 0, self)
+        progress.setWindowTitle('تصدير الوثائق')
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+        
+        worker = BulkExportWorker(self.db, doc_ids, target, mode)
+        
+        def on_progress(done, total):
+            progress.setMaximum(total)
+            progress.setValue(done)
+        
+        def on_finished(success, message):
+            progress.close()
+            if success:
+                result = worker.result
+                text = f"تم تصدير {result['documents']} وثيقة ({result['pages']} صورة)\n{target}"
+                if result['failed']:
+                    text += f"\nتعذر تصدير {len(result['failed'])} عنصر"
+                QMessageBox.information(self, 'نجح', text)
+                print(f"[EXPORT] تصدير جماعي ({mode}): {result['documents']} وثيقة إلى {target}")
+            elif not worker.cancelled:
+                QMessageBox.critical(self, 'خطأ', f'فشل التصدير: {message}')
+            self._bulk_export_worker = None
+        
+        worker.progress_updated.connect(on_progress)
+        worker.export_finished.connect(on_finished)
+        progress.canceled.connect(worker.cancel)
+        self._bulk_export_worker = worker
+        worker.start()
+    
+    def print_selected_documents(self):
+        """طباعة صور الوثائق المحددة في مهمة طباعة واحدة دون فتح نوافذ العرض"""
+        doc_ids = self._checked_document_ids()
+        if not doc_ids:
+            QMessageBox.warning(self, 'تنبيه', 'يجب تحديد وثائق أولاً')
+            return
+        
+        from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
+        from app.bulk_export import collect_documents
+        from app.print_spooler import PrintSpoolerWorker
+        
+        documents = collect_documents(self.db, doc_ids)
+        image_paths = [page['path'] for document in documents for page in document['pages']]
+        if not image_paths:
+            QMessageBox.warning(self, 'تنبيه', 'لا توجد صور للطباعة في الوثائق المحددة')
+            return
+        
+        printer = QPrinter(QPrinter.PrinterMode.HighResolution)
+        printer.setDocName(f'{len(documents)} وثيقة')
+        if QPrintDialog(printer, self).exec() != QDialog.DialogCode.Accepted:
+            return
+        
+        progress = QProgressDialog(
+            f'جاري طباعة {len(documents)} وثيقة ({len(image_paths)} صورة)...',
+            'إلغاء', 0, len(image_paths), self
+        )
+        progress.setWindowTitle('طباعة الوثائق')
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+        
+        worker = PrintSpoolerWorker(printer, image_paths)
+        worker.progress_updated.connect(lambda done, total: progress.setValue(done))
+        progress.canceled.connect(worker.cancel)
+        
+        def on_finished(success, message):
+            progress.close()
+            if success:
+                QMessageBox.information(self, 'نجح', f'تم طباعة {worker.page_count} صورة من {len(documents)} وثيقة')
+                print(f"[PRINT] طباعة جماعية: {worker.page_count} صورة من {len(documents)} وثيقة")
+            elif not worker.cancelled:
+                QMessageBox.critical(self, 'خطأ في الطباعة', f'حدث خطأ: {message}')
+            self._print_worker = None
+        
+        worker.print_finished.connect(on_finished)
+        self._print_worker = worker
+        worker.start()
+    
     def delete_selected_documents(self):
         """حذف جميع الوثائق المحددة"""
         # Get checked rows
@@ -1127,34 +1759,8 @@ class MainWindow(QMainWindow):
                     if doc_id:
                         doc_ids.append(doc_id)
             
-            # Create progress dialog
-            progress = QProgressDialog('جاري حذف الوثائق...', 'إلغاء', 0, len(doc_ids), self)
-            progress.setWindowTitle('حذف الوثائق')
-            progress.setWindowModality(Qt.WindowModality.WindowModal)
-            progress.setMinimumDuration(0)
-            progress.show()
-            
-            # Delete from database with progress
-            deleted_count = 0
-            for i, doc_id in enumerate(doc_ids):
-                if progress.wasCanceled():
-                    break
-                progress.setValue(i)
-                progress.setLabelText(f'جاري حذف الوثيقة {i + 1} من {len(doc_ids)}...')
-                QApplication.processEvents()  # Keep UI responsive
-                
-                try:
-                    self.db.delete_document(doc_id)
-                    deleted_count += 1
-                except Exception as e:
-                    print(f'خطأ في حذف الوثيقة {doc_id}: {e}')
-            
-            progress.setValue(len(doc_ids))
-            progress.close()
-            
-            # Reload table
-            self.load_documents()
-            QMessageBox.information(self, 'نجح', f'تم حذف {deleted_count} وثيقة بنجاح')
+            # معاملة واحدة لكل الوثائق (الملفات يحذفها FileCollector بعد مهلة التراجع)
+            self._delete_documents(doc_ids)
     
     def search_documents(self):
         """البحث عن الوثائق والمرفقات"""
@@ -1174,13 +1780,18 @@ class MainWindow(QMainWindow):
         
         search_field = field_map.get(self.search_field.currentText(), 'doc_name')
         
+        search_span = tracing.start_span('search.total', field=search_field)
+        self._load_generation += 1
         self.documents_table.setRowCount(0)
+        self._row_doc_ids = None
         
         # استخدام البحث الجديد الذي يشمل المرفقات
         results_dict = self.db.search_documents_and_attachments(search_term, search_field)
+        image_counts = self.db.get_image_counts({result['doc'].id for result in results_dict.values()})
         
         # Disable updates for better performance
         self.documents_table.setUpdatesEnabled(False)
+        populate_span = tracing.start_span('ui.populate_table', source='search', rows=len(results_dict))
         
         for idx, (key, result_data) in enumerate(results_dict.items()):
             doc = result_data['doc']
@@ -1229,12 +1840,12 @@ class MainWindow(QMainWindow):
                 # إضافة علامة للمرفق
                 display_number = f"📎 {doc_number}" if doc_number else ''
             else:
-                doc_name = doc[1] or ''
+                doc_name = doc.doc_name or ''
                 doc_number = doc_name.split()[0] if doc_name else ''
                 display_number = doc_number
             
             item = QTableWidgetItem(display_number)
-            item.setData(Qt.ItemDataRole.UserRole, doc[0])  # احفظ معرف الوثيقة
+            item.setData(Qt.ItemDataRole.UserRole, doc.id)  # احفظ معرف الوثيقة
             item.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
             self.documents_table.setItem(row, 2, item)
             
@@ -1243,9 +1854,9 @@ class MainWindow(QMainWindow):
                 # استخراج التاريخ من ملاحظات المرفق
                 import re
                 date_match = re.search(r'تاريخ:\s*([^\|]+)', attachment_info)
-                date_val = date_match.group(1).strip() if date_match else (doc[2] or '')
+                date_val = date_match.group(1).strip() if date_match else (doc.doc_date or '')
             else:
-                date_val = doc[2] or ''
+                date_val = doc.doc_date or ''
             date_item = QTableWidgetItem(date_val)
             date_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
             self.documents_table.setItem(row, 3, date_item)
@@ -1253,9 +1864,9 @@ class MainWindow(QMainWindow):
             # المضمون (عمود 4)
             if source == 'attachment' and attachment_info:
                 title_match = re.search(r'مضمون:\s*([^\|]+)', attachment_info)
-                title_val = title_match.group(1).strip() if title_match else (doc[3] or '')
+                title_val = title_match.group(1).strip() if title_match else (doc.doc_title or '')
             else:
-                title_val = doc[3] or ''
+                title_val = doc.doc_title or ''
             content_item = QTableWidgetItem(title_val)
             content_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
             self.documents_table.setItem(row, 4, content_item)
@@ -1263,9 +1874,9 @@ class MainWindow(QMainWindow):
             # الجهة (عمود 5)
             if source == 'attachment' and attachment_info:
                 dept_match = re.search(r'جهة:\s*([^\|]+)', attachment_info)
-                dept_val = dept_match.group(1).strip() if dept_match else (doc[4] or '')
+                dept_val = dept_match.group(1).strip() if dept_match else (doc.issuing_dept or '')
             else:
-                dept_val = doc[4] or ''
+                dept_val = doc.issuing_dept or ''
             issuer_item = QTableWidgetItem(dept_val)
             issuer_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
             self.documents_table.setItem(row, 5, issuer_item)
@@ -1273,21 +1884,20 @@ class MainWindow(QMainWindow):
             # التصنيف (عمود 6)
             if source == 'attachment' and attachment_info:
                 class_match = re.search(r'تصنيف:\s*([^\|]+)', attachment_info)
-                class_val = class_match.group(1).strip() if class_match else (doc[5] or '')
+                class_val = class_match.group(1).strip() if class_match else (doc.doc_classification or '')
             else:
-                class_val = doc[5] or ''
+                class_val = doc.doc_classification or ''
             category_item = QTableWidgetItem(class_val)
             category_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
             self.documents_table.setItem(row, 6, category_item)
             
             # المادة القانونية (عمود 7)
-            legal_item = QTableWidgetItem(doc[6] or '')
+            legal_item = QTableWidgetItem(doc.legal_paragraph or '')
             legal_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
             self.documents_table.setItem(row, 7, legal_item)
             
             # عدد الصور (عمود 8)
-            images = self.db.get_document_images(doc[0])
-            images_item = QTableWidgetItem(str(len(images)))
+            images_item = QTableWidgetItem(str(image_counts.get(doc.id, 0)))
             images_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter)
             self.documents_table.setItem(row, 8, images_item)
             
@@ -1297,6 +1907,10 @@ class MainWindow(QMainWindow):
         
         # Re-enable updates
         self.documents_table.setUpdatesEnabled(True)
+        tracing.count('ui.rows_populated', len(results_dict))
+        populate_span.finish()
+        search_span.set(results=len(results_dict))
+        search_span.finish()
     
     def on_checkbox_changed(self, row, state):
         """Handle checkbox state changes"""
@@ -1334,6 +1948,8 @@ class MainWindow(QMainWindow):
 
 
 def main():
+    startup.set_origin(_PROCESS_START)
+    tracing.configure(get_settings())
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+أوامر صيانة الأرشيف من سطر الأوامر
+
+الاستخدام:
+    python maintenance.py rebuild-thumbnails [--storage documents] [--workers N]
+    python maintenance.py export-searchable-pdf --year 2024 --output out/ [--workers N]
+    python maintenance.py startup-profile [--top 25] [--output startup.json]
+    python maintenance.py export-list --output documents.csv [--year 2024] [--arraysize 500]
+    python maintenance.py backup-db [--backup-dir backups] [--keep 10] [--year 2019]
+    python maintenance.py restore-db (BACKUP | --latest) [--backup-dir backups] [--verify-only]
+    python maintenance.py backup-archive --target E:/archive-backup [--storage documents] [--keep 30]
+    python maintenance.py verify-archive --target E:/archive-backup [--generation NAME] [--quick]
+    python maintenance.py restore-archive --target E:/archive-backup --output documents.restored [--generation NAME]
+    python maintenance.py check-integrity [--max-age-days 30] [--no-decode] [--output report.json]
+    python maintenance.py trash [--restore ID]
+    python maintenance.py empty-trash [--storage documents]
+    python maintenance.py close-year 2019 | reopen-year 2019 | list-years
+    python maintenance.py seal-year 2019 | unseal-year 2019 [--storage documents]
+"""
+
+import os
+import sys
+import json
+import argparse
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(current_dir, 'src'))
+
+
+def cmd_rebuild_thumbnails(args):
+    """إعادة بناء الصور المصغرة لجميع صور الأرشيف"""
+    from app.thumbnails import ThumbnailStore, rebuild_thumbnails
+
+    thumbnails_dir = os.path.join(args.storage, 'thumbnails')
+    if args.purge_legacy:
+        removed = ThumbnailStore(thumbnails_dir).purge_legacy()
+        print(f"[THUMBNAILS] تم حذف {removed} صورة مصغرة بالصيغة القديمة")
+
+    def progress(done, image_path, error):
+        if error:
+            print(f"[THUMBNAILS ERROR] {image_path}: {error}")
+        elif done % 500 == 0:
+            print(f"[THUMBNAILS] تمت معالجة {done} صورة...")
+
+    result = rebuild_thumbnails(
+        args.storage,
+        thumbnails_dir=thumbnails_dir,
+        size_names=args.sizes,
+        workers=args.workers,
+        force=args.force,
+        progress=progress
+    )
+    print(f"[THUMBNAILS] اكتمل: {result['processed']} صورة، فشل {len(result['failed'])}")
+    if result['evicted']:
+        print(f"[THUMBNAILS] حُذفت {result['evicted']} صورة مصغرة الأقدم استخداماً لتجاوز حد الحجم (storage.thumbnails_max_mb)")
+    return 1 if result['failed'] else 0
+
+
+def cmd_export_searchable_pdf(args):
+    """تصدير وثائق سنة كملفات PDF قابلة للبحث"""
+    from database.db_manager import DatabaseManager
+    from app.searchable_pdf import SearchablePdfOcr, export_year_searchable
+
+    db = DatabaseManager(args.db)
+    ocr = SearchablePdfOcr(db, workers=args.workers)
+    if not ocr.is_available():
+        print("[EXPORT] تحذير: Tesseract غير متاح، ستُصدَّر الصور دون طبقة نص")
+
+    def progress(done, total):
+        if done % 50 == 0 or done == total:
+            print(f"[EXPORT] {done}/{total} صفحة...")
+
+    try:
+        result = export_year_searchable(db, args.year, args.output, ocr, progress=progress)
+    finally:
+        ocr.close()
+    for doc_name, error in result['failed']:
+        print(f"[EXPORT ERROR] {doc_name}: {error}")
+    print(f"[EXPORT] اكتمل: {result['documents']} ملف، {result['pages']} صفحة، فشل {len(result['failed'])}")
+    return 1 if result['failed'] else 0
+
+
+def cmd_export_list(args):
+    """تصدير قائمة الوثائق (بيانات فقط) إلى CSV أو JSON بقراءة متدفقة"""
+    from database.db_manager import DatabaseManager
+    from app.helpers import ExportHelper
+
+    db = DatabaseManager(args.db)
+    documents = db.stream_documents(year=args.year, arraysize=args.arraysize)
+    if args.output.lower().endswith('.json'):
+        success, message = ExportHelper.export_to_json(documents, args.output)
+    else:
+        success, message = ExportHelper.export_to_csv(documents, args.output)
+    print(f"[EXPORT] {message}")
+    return 0 if success else 1
+
+
+def cmd_backup_db(args):
+    """نسخة احتياطية مضغوطة من القاعدة دون إيقاف الكتابة فيها"""
+    from database import backup
+
+    def progress(done, total):
+        if total and (done == total or done % (backup.BACKUP_STEP_PAGES * 16) == 0):
+            print(f"[BACKUP] {done}/{total} صفحة...")
+
+    db_path, backup_dir = args.db, args.backup_dir
+    if args.year:
+        # ملف السنة المغلقة لا يتغير: تكفي نسخة واحدة بعد إغلاقها في مجلد خاص بها
+        from database import shards
+        db_path = os.path.join(shards.shard_dir(args.db), shards.shard_filename(args.year))
+        if not os.path.exists(db_path):
+            print(f"[BACKUP] السنة {args.year} ليست مغلقة ({db_path})")
+            return 1
+        backup_dir = os.path.join(args.backup_dir, 'years', str(args.year))
+    result = backup.create_backup(db_path, backup_dir, keep=args.keep, progress=progress)
+    print(f"[BACKUP] {result['path']}")
+    print(f"[BACKUP] sha256: {result['sha256']}")
+    print(f"[BACKUP] {result['db_size'] / 1024 / 1024:.1f} MB -> {result['size'] / 1024 / 1024:.1f} MB "
+          f"في {result['elapsed']:.1f} ث")
+    for path in result['removed']:
+        print(f"[BACKUP] حُذفت النسخة القديمة {path}")
+    return 0
+
+
+def cmd_restore_db(args):
+    """استعادة القاعدة من نسخة احتياطية بعد التحقق منها"""
+    from database import backup
+
+    backup_path = args.backup
+    if args.latest:
+        backups = backup.list_backups(args.backup_dir)
+        if not backups:
+            print(f"[RESTORE] لا توجد نسخ احتياطية في {args.backup_dir}")
+            return 1
+        backup_path = backups[0]
+    if not backup_path:
+        print("[RESTORE] حدد ملف النسخة أو --latest")
+        return 1
+
+    try:
+        if args.verify_only:
+            digest = backup.verify_backup(backup_path)
+            print(f"[RESTORE] النسخة سليمة: {backup_path} ({digest})")
+            return 0
+        result = backup.restore_backup(backup_path, args.db)
+    except ValueError as e:
+        print(f"[RESTORE ERROR] {str(e)}")
+        return 1
+    print(f"[RESTORE] تمت استعادة {args.db} من {backup_path} في {result['elapsed']:.1f} ث")
+    return 0
+
+
+def _file_progress(tag):
+    def progress(done, total):
+        if done % 1000 == 0 or done == total:
+            print(f"[{tag}] {done}/{total} ملف...")
+    return progress
+
+
+def _print_bad_files(tag, bad):
+    for rel_path, problem in bad[:50]:
+        print(f"[{tag} ERROR] {rel_path}: {problem}")
+    if len(bad) > 50:
+        print(f"[{tag} ERROR] ... و{len(bad) - 50} ملف آخر")
+
+
+def cmd_backup_archive(args):
+    """جيل جديد من النسخة الاحتياطية التزايدية لمجلد الوثائق"""
+    from app.archive_backup import DEFAULT_EXCLUDE, backup_archive
+
+    exclude = () if args.include_thumbnails else DEFAULT_EXCLUDE
+    result = backup_archive(args.storage, args.target, keep=args.keep, exclude=exclude,
+                            workers=args.workers, progress=_file_progress('ARCHIVE'))
+    _print_bad_files('ARCHIVE', result['failed'])
+    print(f"[ARCHIVE] الجيل {result['generation']}: {result['files']} ملف، "
+          f"نُسخ {result['copied']} ({result['bytes_copied'] / 1024 / 1024:.1f} MB)، "
+          f"رُبط {result['linked'] + result['relinked']}، فشل {len(result['failed'])}")
+    for generation in result['removed']:
+        print(f"[ARCHIVE] حُذف الجيل القديم {generation}")
+    return 1 if result['failed'] else 0
+
+
+def cmd_verify_archive(args):
+    """مطابقة ملفات جيل مع بيانه"""
+    from app.archive_backup import verify_generation
+
+    try:
+        result = verify_generation(args.target, args.generation, deep=not args.quick,
+                                   workers=args.workers, progress=_file_progress('VERIFY'))
+    except (OSError, ValueError) as e:
+        print(f"[VERIFY ERROR] {str(e)}")
+        return 1
+    _print_bad_files('VERIFY', result['bad'])
+    print(f"[VERIFY] الجيل {result['generation']}: {result['files']} ملف، لا يطابق {len(result['bad'])}")
+    return 1 if result['bad'] else 0
+
+
+def cmd_restore_archive(args):
+    """استعادة جيل إلى مجلد فارغ مع التحقق من كل ملف"""
+    from app.archive_backup import restore_generation
+
+    try:
+        result = restore_generation(args.target, args.generation, args.output,
+                                    workers=args.workers, progress=_file_progress('RESTORE'))
+    except (OSError, ValueError) as e:
+        print(f"[RESTORE ERROR] {str(e)}")
+        return 1
+    _print_bad_files('RESTORE', result['bad'])
+    print(f"[RESTORE] الجيل {result['generation']} -> {args.output}: {result['files']} ملف "
+          f"({result['bytes'] / 1024 / 1024:.1f} MB)، لا يطابق {len(result['bad'])}")
+    return 1 if result['bad'] else 0
+
+
+def cmd_check_integrity(args):
+    """مطابقة جدول الصور مع مجلد التخزين وكشف الملفات التالفة"""
+    from database.db_manager import DatabaseManager
+    from app.integrity import check_archive, has_problems
+
+    def progress(done, total):
+        if done % 5000 < 500 or done == total:
+            print(f"[INTEGRITY] {done}/{total} صورة...")
+
+    db = DatabaseManager(args.db)
+    report = check_archive(
+        db, args.storage,
+        max_age_days=args.max_age_days,
+        decode=not args.no_decode,
+        thumbnail_sizes=args.thumbnail_sizes,
+        orphans=not args.no_orphans,
+        workers=args.workers,
+        progress=progress
+    )
+
+    for image_id, path in report['missing'][:50]:
+        print(f"[INTEGRITY] ملف مفقود (صورة {image_id}): {path}")
+    for image_id, document_id, path in report['dangling'][:50]:
+        print(f"[INTEGRITY] صورة {image_id} لوثيقة محذوفة {document_id}: {path}")
+    for image_id, path, detail in report['hash_mismatch'][:50]:
+        print(f"[INTEGRITY] تغيرت البصمة (صورة {image_id}): {path} {detail}")
+    for image_id, path, error in report['corrupt'][:50]:
+        print(f"[INTEGRITY] صورة تالفة {image_id}: {path}: {error}")
+    for path in report['orphans'][:50]:
+        print(f"[INTEGRITY] ملف يتيم: {path}")
+
+    print(f"[INTEGRITY] {report['images']} صورة: فُحص بالكامل {report['verified']}، "
+          f"تُخطي {report['skipped']} (فُحص حديثاً) في {report['elapsed']:.1f} ث")
+    print(f"[INTEGRITY] مفقود {len(report['missing'])}، بلا وثيقة {len(report['dangling'])}، "
+          f"تغيرت بصمته {len(report['hash_mismatch'])}، تالف {len(report['corrupt'])}، "
+          f"يتيم {len(report['orphans'])}، بلا صورة مصغرة {len(report['thumbnail_gaps'])}")
+    if report['hashes_recorded']:
+        print(f"[INTEGRITY] حُفظت بصمات مرجعية لـ {report['hashes_recorded']} صورة")
+    if report['thumbnail_gaps']:
+        print("[INTEGRITY] الصور المصغرة الناقصة: python maintenance.py rebuild-thumbnails")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[INTEGRITY] تم حفظ التقرير في {args.output}")
+    return 1 if has_problems(report) else 0
+
+
+def cmd_trash(args):
+    """عرض دفعات سلة المحذوفات أو التراجع عن إحداها"""
+    from database.db_manager import DatabaseManager
+
+    db = DatabaseManager(args.db)
+    if args.restore is not None:
+        try:
+            restored = db.restore_trash(args.restore)
+        except ValueError as e:
+            print(f"[TRASH ERROR] {str(e)}")
+            return 1
+        print(f"[TRASH] تمت استعادة {restored} وثيقة من الدفعة {args.restore}")
+        return 0
+
+    batches = db.get_trash()
+    for trash_id, deleted_date, purge_after, documents, purging in batches:
+        state = 'قيد حذف الملفات' if purging else f'تُحذف ملفاتها بعد {purge_after}'
+        print(f"[TRASH] {trash_id}: {documents} وثيقة حُذفت في {deleted_date} ({state})")
+    if not batches:
+        print("[TRASH] سلة المحذوفات فارغة")
+    return 0
+
+
+def cmd_empty_trash(args):
+    """حذف ملفات الوثائق المحذوفة التي انتهت مهلة التراجع عنها"""
+    from database.db_manager import DatabaseManager
+    from app.file_gc import collect_garbage
+    from app.thumbnails import ThumbnailStore
+
+    db = DatabaseManager(args.db)
+    thumbnails = ThumbnailStore(os.path.join(args.storage, 'thumbnails'))
+    result = collect_garbage(db, thumbnails, workers=args.workers, progress=_file_progress('FILE GC'))
+    for path, error in result['errors'][:50]:
+        print(f"[FILE GC] تعذر حذف {path}: {error}")
+    print(f"[FILE GC] {result['batches']} دفعة: حُذفت {result['files']} صورة "
+          f"({result['bytes'] / 1024 / 1024:.1f} MB) و {result['thumbnails']} صورة مصغرة "
+          f"في {result['elapsed']:.1f} ث")
+    return 1 if result['errors'] else 0
+
+
+def cmd_close_year(args):
+    """نقل سنة إلى ملف قاعدة مستقل للقراءة فقط"""
+    from database.db_manager import DatabaseManager
+
+    try:
+        result = DatabaseManager(args.db).close_year(args.year)
+    except ValueError as e:
+        print(f"[SHARDS ERROR] {str(e)}")
+        return 1
+    print(f"[SHARDS] نسخة احتياطية للسنة: python maintenance.py backup-db --year {result['year']}")
+    return 0
+
+
+def cmd_reopen_year(args):
+    """إعادة سنة مغلقة إلى القاعدة الرئيسية للتعديل"""
+    from database.db_manager import DatabaseManager
+
+    try:
+        DatabaseManager(args.db).reopen_year(args.year)
+    except ValueError as e:
+        print(f"[SHARDS ERROR] {str(e)}")
+        return 1
+    return 0
+
+
+def cmd_list_years(args):
+    """عرض السنوات المغلقة وملفاتها"""
+    from database.db_manager import DatabaseManager
+    from app import image_pack
+
+    closed = DatabaseManager(args.db).get_closed_years()
+    sealed = set(image_pack.sealed_years(args.storage))
+    for year, path, documents, images, closed_date in closed:
+        size = os.path.getsize(path) / 1024 / 1024 if os.path.exists(path) else 0
+        print(f"[SHARDS] {year}: {documents} وثيقة، {images} صورة، {size:.1f} MB "
+              f"(أُغلقت في {closed_date}) {path}")
+        if year in sealed:
+            pack = image_pack.pack_path(args.storage, year)
+            print(f"[PACK] {year}: مختومة، {os.path.getsize(pack) / 1024 / 1024:.1f} MB {pack}")
+    for year in sorted(sealed - {row[0] for row in closed}):
+        print(f"[PACK] {year}: مختومة لكنها غير مغلقة (أُعيد فتحها؟) {image_pack.pack_path(args.storage, year)}")
+    if not closed:
+        print("[SHARDS] لا توجد سنوات مغلقة")
+    return 0
+
+
+def cmd_seal_year(args):
+    """ختم سنة مغلقة: نقل ملفاتها وصورها المصغرة إلى حزمة واحدة"""
+    from database.db_manager import DatabaseManager
+    from app.image_pack import seal_year
+    from app.thumbnails import ThumbnailStore
+
+    db = DatabaseManager(args.db)
+    thumbnails = ThumbnailStore(os.path.join(args.storage, 'thumbnails'))
+    try:
+        result = seal_year(args.storage, args.year, thumbnails, db, progress=_file_progress('PACK'))
+    except ValueError as e:
+        print(f"[PACK ERROR] {str(e)}")
+        return 1
+    for path, error in result['errors'][:50]:
+        print(f"[PACK] تعذر حذف {path}: {error}")
+    print(f"[PACK] السنة {result['year']}: أُضيف {result['files']} ملف "
+          f"({result['bytes'] / 1024 / 1024:.1f} MB) و {result['thumbnails']} صورة مصغرة، "
+          f"وحُذف {result['removed']} ملف أصلي في {result['elapsed']:.1f} ث -> {result['path']}")
+    return 1 if result['errors'] else 0
+
+
+def cmd_unseal_year(args):
+    """فك ختم سنة: إعادة ملفاتها إلى مجلدها وحذف الحزمة"""
+    from app import image_pack
+    from app.thumbnails import ThumbnailStore
+
+    thumbnails = ThumbnailStore(os.path.join(args.storage, 'thumbnails'))
+    try:
+        result = image_pack.unseal_year(args.storage, args.year, thumbnails, progress=_file_progress('PACK'))
+    except (ValueError, OSError) as e:
+        print(f"[PACK ERROR] {str(e)}")
+        return 1
+    print(f"[PACK] السنة {result['year']}: أُعيد {result['files']} ملف "
+          f"({result['bytes'] / 1024 / 1024:.1f} MB) و {result['thumbnails']} صورة مصغرة "
+          f"في {result['elapsed']:.1f} ث")
+    if 'pack_error' in result:
+        print(f"[PACK ERROR] استُخرجت كل الملفات لكن تعذر حذف الحزمة: {result['pack_error']}")
+        print(f"[PACK] الحزمة باقية ولا تضر؛ أغلق البرنامج ثم احذف {image_pack.pack_path(args.storage, args.year)}")
+        return 1
+    return 0
+
+
+def cmd_startup_profile(args):
+    """قياس زمن الإقلاع: مراحل أول رسم وجاهزية البيانات وأبطأ الاستيرادات"""
+    from app.startup import import_time_profile
+
+    report = import_time_profile(os.path.join(current_dir, 'main.py'), top=args.top)
+    if report['returncode'] != 0:
+        print(f"[STARTUP] خرج التطبيق برمز {report['returncode']}")
+
+    for name, elapsed in report['marks'].items():
+        print(f"[STARTUP] {name}: {elapsed:.0f} ms")
+    print(f"[STARTUP] مجموع زمن الاستيراد: {report['total_import_ms']:.0f} ms")
+
+    print(f"\n{'تراكمي (ms)':>12} {'ذاتي (ms)':>10}  الوحدة")
+    for entry in report['top_level']:
+        print(f"{entry['cumulative_ms']:>12.1f} {entry['self_ms']:>10.1f}  {entry['module']}")
+    print(f"\nأبطأ الوحدات (زمن ذاتي):")
+    for entry in report['slowest_self']:
+        print(f"{entry['cumulative_ms']:>12.1f} {entry['self_ms']:>10.1f}  {entry['module']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[STARTUP] تم حفظ التقرير في {args.output}")
+    return 0 if report['marks'] else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='أوامر صيانة أرشيف الوثائق')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    thumbs = subparsers.add_parser('rebuild-thumbnails', help='إعادة بناء الصور المصغرة بالتوازي')
+    thumbs.add_argument('--storage', default='documents', help='مجلد تخزين الوثائق')
+    thumbs.add_argument('--workers', type=int, default=None, help='عدد العمليات المتوازية')
+    thumbs.add_argument('--sizes', nargs='+', choices=['icon', 'tile', 'preview'], default=None,
+                        help='المقاسات المطلوبة (الافتراضي: الكل)')
+    thumbs.add_argument('--force', action='store_true', help='إعادة إنشاء الصور المصغرة الموجودة')
+    thumbs.add_argument('--purge-legacy', action='store_true',
+                        help='حذف الصور المصغرة القديمة المتصادمة ({stem}_thumb.jpg)')
+    thumbs.set_defaults(func=cmd_rebuild_thumbnails)
+
+    export = subparsers.add_parser('export-searchable-pdf', help='تصدير وثائق سنة كملفات PDF قابلة للبحث')
+    export.add_argument('--year', required=True, help='السنة المطلوبة')
+    export.add_argument('--output', required=True, help='مجلد ملفات PDF الناتجة')
+    export.add_argument('--db', default='documents.db', help='مسار قاعدة البيانات')
+    export.add_argument('--workers', type=int, default=None, help='عدد عمليات OCR المتوازية')
+    export.set_defaults(func=cmd_export_searchable_pdf)
+
+    export_list = subparsers.add_parser('export-list', help='تصدير قائمة الوثائق إلى CSV أو JSON (حسب امتداد الملف)')
+    export_list.add_argument('--output', required=True, help='ملف .csv أو .json')
+    export_list.add_argument('--year', default=None, help='وثائق سنة محددة فقط')
+    export_list.add_argument('--db', default='documents.db', help='مسار قاعدة البيانات')
+    export_list.add_argument('--arraysize', type=int, default=None, help='عدد الصفوف في كل دفعة قراءة')
+    export_list.set_defaults(func=cmd_export_list)
+
+    backup_db = subparsers.add_parser('backup-db', help='نسخة احتياطية مضغوطة من القاعدة (واجهة النسخ في SQLite)')
+    backup_db.add_argument('--db', default='documents.db', help='مسار قاعدة البيانات')
+    backup_db.add_argument('--backup-dir', default='backups', help='مجلد النسخ الاحتياطية')
+    backup_db.add_argument('--keep', type=int, default=10, help='عدد النسخ المحتفظ بها (0: بلا حذف)')
+    backup_db.add_argument('--year', default=None, help='نسخ ملف سنة مغلقة بدل القاعدة الرئيسية')
+    backup_db.set_defaults(func=cmd_backup_db)
+
+    restore_db = subparsers.add_parser('restore-db', help='استعادة القاعدة من نسخة احتياطية بعد التحقق منها')
+    restore_db.add_argument('backup', nargs='?', default=None, help='ملف النسخة (.db.gz)')
+    restore_db.add_argument('--latest', action='store_true', help='أحدث نسخة في مجلد النسخ')
+    restore_db.add_argument('--db', default='documents.db', help='مسار قاعدة البيانات')
+    restore_db.add_argument('--backup-dir', default='backups', help='مجلد النسخ الاحتياطية')
+    restore_db.add_argument('--verify-only', action='store_true', help='التحقق من البصمة دون استعادة')
+    restore_db.set_defaults(func=cmd_restore_db)
+
+    backup_archive = subparsers.add_parser('backup-archive', help='نسخة احتياطية تزايدية لمجلد الوثائق (أجيال بروابط صلبة)')
+    backup_archive.add_argument('--target', required=True, help='مجلد النسخ الاحتياطية للأرشيف')
+    backup_archive.add_argument('--storage', default='documents', help='مجلد تخزين الوثائق')
+    backup_archive.add_argument('--keep', type=int, default=30, help='عدد الأجيال المحتفظ بها (0: بلا حذف)')
+    backup_archive.add_argument('--workers', type=int, default=None, help='عدد خيوط النسخ والبصمة')
+    backup_archive.add_argument('--include-thumbnails', action='store_true', help='نسخ الصور المصغرة أيضاً')
+    backup_archive.set_defaults(func=cmd_backup_archive)
+
+    verify_archive = subparsers.add_parser('verify-archive', help='مطابقة جيل من نسخة الأرشيف مع بيانه')
+    verify_archive.add_argument('--target', required=True, help='مجلد النسخ الاحتياطية للأرشيف')
+    verify_archive.add_argument('--generation', default=None, help='اسم الجيل (الافتراضي: الأحدث)')
+    verify_archive.add_argument('--quick', action='store_true', help='مقارنة الأحجام فقط دون البصمات')
+    verify_archive.add_argument('--workers', type=int, default=None, help='عدد خيوط التحقق')
+    verify_archive.set_defaults(func=cmd_verify_archive)
+
+    restore_archive = subparsers.add_parser('restore-archive', help='استعادة جيل من نسخة الأرشيف إلى مجلد فارغ')
+    restore_archive.add_argument('--target', required=True, help='مجلد النسخ الاحتياطية للأرشيف')
+    restore_archive.add_argument('--output', required=True, help='مجلد الاستعادة (فارغ أو غير موجود)')
+    restore_archive.add_argument('--generation', default=None, help='اسم الجيل (الافتراضي: الأحدث)')
+    restore_archive.add_argument('--workers', type=int, default=None, help='عدد خيوط النسخ')
+    restore_archive.set_defaults(func=cmd_restore_archive)
+
+    integrity = subparsers.add_parser('check-integrity', help='فحص سلامة الأرشيف: ملفات مفقودة ويتيمة وتالفة')
+    integrity.add_argument('--db', default='documents.db', help='مسار قاعدة البيانات')
+    integrity.add_argument('--storage', default='documents', help='مجلد تخزين الوثائق')
+    integrity.add_argument('--max-age-days', type=int, default=None,
+                           help='تخطي قراءة الصور السليمة المفحوصة خلال هذه المدة (فحص تزايدي)')
+    integrity.add_argument('--no-decode', action='store_true', help='البصمة فقط دون فك ترميز الصور')
+    integrity.add_argument('--thumbnail-sizes', nargs='*', choices=['icon', 'tile', 'preview'], default=['tile'],
+                           help='مقاسات الصور المصغرة المطلوب وجودها (بلا قيم: بلا فحص)')
+    integrity.add_argument('--no-orphans', action='store_true', help='دون البحث عن الملفات اليتيمة')
+    integrity.add_argument('--workers', type=int, default=None, help='عدد خيوط الفحص')
+    integrity.add_argument('--output', default=None, help='حفظ التقرير الكامل بصيغة JSON')
+    integrity.set_defaults(func=cmd_check_integrity)
+
+    trash = subparsers.add_parser('trash', help='عرض سلة المحذوفات أو التراجع عن حذف دفعة')
+    trash.add_argument('--db', default='documents.db', help='مسار قاعدة البيانات')
+    trash.add_argument('--restore', type=int, default=None, help='معرف الدفعة المطلوب استعادتها')
+    trash.set_defaults(func=cmd_trash)
+
+    empty_trash = subparsers.add_parser('empty-trash', help='حذف ملفات الوثائق المحذوفة بعد انتهاء مهلة التراجع')
+    empty_trash.add_argument('--db', default='documents.db', help='مسار قاعدة البيانات')
+    empty_trash.add_argument('--storage', default='documents', help='مجلد تخزين الوثائق')
+    empty_trash.add_argument('--workers', type=int, default=None, help='عدد خيوط الحذف')
+    empty_trash.set_defaults(func=cmd_empty_trash)
+
+    close_year = subparsers.add_parser('close-year', help='نقل سنة إلى ملف قاعدة مستقل للقراءة فقط')
+    close_year.add_argument('year', help='السنة')
+    close_year.add_argument('--db', default='documents.db', help='مسار قاعدة البيانات')
+    close_year.set_defaults(func=cmd_close_year)
+
+    reopen_year = subparsers.add_parser('reopen-year', help='إعادة سنة مغلقة إلى القاعدة الرئيسية للتعديل')
+    reopen_year.add_argument('year', help='السنة')
+    reopen_year.add_argument('--db', default='documents.db', help='مسار قاعدة البيانات')
+    reopen_year.set_defaults(func=cmd_reopen_year)
+
+    list_years = subparsers.add_parser('list-years', help='عرض السنوات المغلقة وملفاتها')
+    list_years.add_argument('--db', default='documents.db', help='مسار قاعدة البيانات')
+    list_years.add_argument('--storage', default='documents', help='مجلد تخزين الوثائق')
+    list_years.set_defaults(func=cmd_list_years)
+
+    seal_year = subparsers.add_parser('seal-year', help='ختم سنة مغلقة في حزمة صور واحدة للقراءة فقط')
+    seal_year.add_argument('year', help='السنة')
+    seal_year.add_argument('--db', default='documents.db', help='مسار قاعدة البيانات')
+    seal_year.add_argument('--storage', default='documents', help='مجلد تخزين الوثائق')
+    seal_year.set_defaults(func=cmd_seal_year)
+
+    unseal_year = subparsers.add_parser('unseal-year', help='إعادة ملفات سنة مختومة إلى مجلدها للتصحيح')
+    unseal_year.add_argument('year', help='السنة')
+    unseal_year.add_argument('--storage', default='documents', help='مجلد تخزين الوثائق')
+    unseal_year.set_defaults(func=cmd_unseal_year)
+
+    profile = subparsers.add_parser('startup-profile', help='تقرير زمن الإقلاع والاستيراد (-X importtime)')
+    profile.add_argument('--top', type=int, default=25, help='عدد أبطأ الوحدات في التقرير')
+    profile.add_argument('--output', default=None, help='حفظ التقرير الكامل بصيغة JSON')
+    profile.set_defaults(func=cmd_startup_profile)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
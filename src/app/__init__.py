@@ -1,32 +1,41 @@
 """
 حزمة التطبيق الرئيسية
 يحتوي على جميع وحدات الواجهة الرسومية وإدارة البيانات
+
+الأسماء المُصدَّرة تُستورد عند أول استخدام (PEP 562) حتى لا يدفع استيراد
+وحدة خفيفة مثل app.tracing كلفة Pillow ومدير السكانر عند الإقلاع.
 """
 
-from .filename_parser import FilenameParser, ImageSequenceHandler
-from .image_manager import ImageManager
-from .scanner_manager import ScannerManager, ScannerDialog
-from .ui_styles import MAIN_STYLESHEET, COLORS, SIZES
-from .settings import Settings, get_settings
-from .helpers import (
-    DateHelper, FileHelper, ValidationHelper,
-    ExportHelper, DatabaseBackupHelper
-)
+import importlib
+
+# الاسم -> الوحدة التي يُستورد منها
+_EXPORTS = {
+    'FilenameParser': '.filename_parser',
+    'ImageSequenceHandler': '.filename_parser',
+    'ImageManager': '.image_manager',
+    'ScannerManager': '.scanner_manager',
+    'ScannerDialog': '.scanner_manager',
+    'MAIN_STYLESHEET': '.ui_styles',
+    'COLORS': '.ui_styles',
+    'SIZES': '.ui_styles',
+    'Settings': '.settings',
+    'get_settings': '.settings',
+    'DateHelper': '.helpers',
+    'FileHelper': '.helpers',
+    'ValidationHelper': '.helpers',
+    'ExportHelper': '.helpers',
+    'DatabaseBackupHelper': '.helpers',
+}
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
 # تعريف ما يتم تصديره عند استخدام 'from app import *'S
-__all__ = [
-    'FilenameParser',
-    'ImageSequenceHandler',
-    'ImageManager',
-    'ScannerManager',
-    'ScannerDialog',
-    'MAIN_STYLESHEET',
-    'COLORS',
-    'SIZES',
-    'Settings',
-    'get_settings',
-    'DateHelper',
-    'FileHelper',
-    'ValidationHelper',
-    'ExportHelper',
-    'DatabaseBackupHelper'
-]
+__all__ = list(_EXPORTS)
@@ -0,0 +1,416 @@
+"""
+نسخ احتياطي تزايدي لمجلد تخزين الوثائق (documents/)
+
+كل تشغيل ينشئ في المجلد الهدف جيلاً جديداً يحوي شجرة الوثائق كاملة، لكن
+الملفات التي لم تتغير منذ الجيل السابق روابط صلبة إليه فلا تُنسخ ولا تشغل
+مساحة. بيان (manifest) كل جيل يحفظ لكل ملف: الحجم، زمن التعديل، بصمة SHA-256.
+
+- ملف يطابق حجمه وزمن تعديله البيان السابق لا يُقرأ أصلاً ويُربط بنسخته
+- غيره يُنسخ مع حساب بصمته في القراءة نفسها، على عدة خيوط بالتوازي
+- إذا طابقت بصمته ملفاً في الهدف (نقل، إعادة تسمية، أو صورة مكررة) يُستبدل برابط إليه
+
+بنية الهدف:
+    target/
+        20261019_170000/                    شجرة الجيل
+        20261019_170000.manifest.json.gz    بيانه
+        ...
+
+حذف جيل قديم (rmtree) لا يمس الأجيال الأخرى لأن الملفات المشتركة روابط صلبة.
+الاستعادة تنسخ جيلاً إلى مجلد فارغ وتتحقق من بصمة كل ملف مقابل البيان.
+
+الاستخدام:
+    result = backup_archive('documents', 'E:/archive-backup', keep=30)
+    verify_generation('E:/archive-backup', result['generation'])
+    restore_generation('E:/archive-backup', result['generation'], 'documents.restored')
+"""
+
+import os
+import gzip
+import json
+import shutil
+import hashlib
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .helpers import FileHelper
+
+
+MANIFEST_SUFFIX = '.manifest.json.gz'
+MANIFEST_VERSION = 1
+PARTIAL_SUFFIX = '.partial'
+DEFAULT_KEEP = 30
+# الصور المصغرة يُعاد بناؤها من الأصول (maintenance.py rebuild-thumbnails)
+DEFAULT_EXCLUDE = ('thumbnails',)
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+# ----------------------------------------------------------------------
+# البيانات والأجيال
+# ----------------------------------------------------------------------
+
+def _manifest_path(target, generation):
+    return os.path.join(target, f'{generation}{MANIFEST_SUFFIX}')
+
+
+def list_generations(target):
+    """
+    الأجيال المكتملة في المجلد الهدف من الأقدم إلى الأحدث
+
+    الجيل مكتمل إذا وُجد مجلده وبيانه معاً.
+    """
+    if not os.path.isdir(target):
+        return []
+    generations = []
+    for name in os.listdir(target):
+        if name.endswith(MANIFEST_SUFFIX):
+            generation = name[:-len(MANIFEST_SUFFIX)]
+            if os.path.isdir(os.path.join(target, generation)):
+                generations.append(generation)
+    return sorted(generations)
+
+
+def load_manifest(target, generation):
+    """
+    بيان جيل
+
+    Returns:
+        dict: {'version', 'generation', 'created', 'source',
+               'files': {المسار النسبي: [الحجم، زمن التعديل ns، sha256]}}
+    """
+    with gzip.open(_manifest_path(target, generation), 'rt', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"إصدار بيان غير مدعوم: {manifest.get('version')}")
+    return manifest
+
+
+def _write_manifest(target, generation, manifest):
+    path = _manifest_path(target, generation)
+    tmp_path = f'{path}.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def rotate_generations(target, keep=DEFAULT_KEEP):
+    """
+    حذف الأجيال الأقدم من آخر keep جيل
+
+    Returns:
+        list: أسماء الأجيال المحذوفة
+    """
+    generations = list_generations(target)
+    removed = generations[:-max(keep, 1)]
+    for generation in removed:
+        # البيان أولاً: جيل بلا بيان لا يُعد مكتملاً إن توقف الحذف في منتصفه
+        os.remove(_manifest_path(target, generation))
+        shutil.rmtree(os.path.join(target, generation), ignore_errors=True)
+    return removed
+
+
+# ----------------------------------------------------------------------
+# النسخ
+# ----------------------------------------------------------------------
+
+def scan_tree(source, exclude=DEFAULT_EXCLUDE):
+    """
+    ملفات الشجرة مع حجمها وزمن تعديلها دون قراءة محتواها
+
+    Args:
+        exclude: أسماء مجلدات في المستوى الأول تُستبعد
+
+    Returns:
+        dict: المسار النسبي (بفاصل /) -> (الحجم، زمن التعديل ns)
+    """
+    files = {}
+    exclude = set(exclude or ())
+    stack = [('', source)]
+    while stack:
+        prefix, directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                rel_path = f'{prefix}{entry.name}'
+                if entry.is_dir(follow_symlinks=False):
+                    if not (prefix == '' and entry.name in exclude):
+                        stack.append((f'{rel_path}/', entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    files[rel_path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def _copy_with_hash(src, dst):
+    """نسخ ملف مع حساب بصمة ما كُتب فعلاً في القراءة نفسها"""
+    digest = hashlib.sha256()
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        for chunk in iter(lambda: fsrc.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            fdst.write(chunk)
+    shutil.copystat(src, dst)
+    return digest.hexdigest()
+
+
+def _link_or_copy(src, dst):
+    """
+    رابط صلب، أو نسخ إذا لم يدعمه نظام الملفات الهدف
+
+    Returns:
+        bool: True إذا أُنشئ رابط
+    """
+    try:
+        os.link(src, dst)
+        return True
+    except OSError:
+        shutil.copy2(src, dst)
+        return False
+
+
+class _DirMaker:
+    """إنشاء المجلدات الأم مرة واحدة لكل مجلد من عدة خيوط"""
+
+    def __init__(self):
+        self._made = set()
+        self._lock = threading.Lock()
+
+    def ensure(self, path):
+        parent = os.path.dirname(path)
+        with self._lock:
+            if parent in self._made:
+                return
+        os.makedirs(parent, exist_ok=True)
+        with self._lock:
+            self._made.add(parent)
+
+
+def backup_archive(source, target, keep=DEFAULT_KEEP, exclude=DEFAULT_EXCLUDE, workers=None,
+                   progress=None, is_cancelled=None):
+    """
+    إنشاء جيل جديد من النسخة الاحتياطية لمجلد الوثائق
+
+    Args:
+        source: مجلد تخزين الوثائق (ImageManager.storage_dir)
+        target: مجلد النسخ الاحتياطية للأرشيف
+        keep: عدد الأجيال المحتفظ بها (0 أو None: بلا حذف)
+        workers: عدد خيوط النسخ والبصمة
+        progress: دالة (المعالَج، الإجمالي) بعدد الملفات
+        is_cancelled: دالة تُرجع True لإيقاف النسخ
+
+    Returns:
+        dict: {'generation', 'files', 'linked', 'copied', 'relinked', 'bytes_copied',
+               'failed': [(المسار، الخطأ)], 'removed'} أو None عند الإلغاء
+    """
+    source = os.path.abspath(source)
+    os.makedirs(target, exist_ok=True)
+    # أجيال لم تكتمل من تشغيل سابق توقف
+    for name in os.listdir(target):
+        if name.endswith(PARTIAL_SUFFIX):
+            shutil.rmtree(os.path.join(target, name), ignore_errors=True)
+
+    generations = list_generations(target)
+    previous = generations[-1] if generations else None
+    previous_files = load_manifest(target, previous)['files'] if previous else {}
+    previous_dir = os.path.join(target, previous) if previous else None
+    # بصمة -> مسار ملف بهذا المحتوى في الهدف (الجيل السابق ثم ما نُسخ في هذا الجيل)
+    by_hash = {
+        entry[2]: os.path.join(previous_dir, rel_path) for rel_path, entry in previous_files.items()
+    }
+    by_hash_lock = threading.Lock()
+
+    generation = datetime.now().strftime('%Y%m%d_%H%M%S')
+    if generation in generations:
+        raise ValueError(f'يوجد جيل بالاسم نفسه: {generation}')
+    work_dir = os.path.join(target, f'{generation}{PARTIAL_SUFFIX}')
+    os.makedirs(work_dir)
+
+    files = scan_tree(source, exclude)
+    result = {
+        'generation': generation, 'files': len(files), 'linked': 0, 'copied': 0,
+        'relinked': 0, 'bytes_copied': 0, 'failed': [], 'removed': []
+    }
+    entries = {}
+    dirs = _DirMaker()
+
+    def process(rel_path, size, mtime_ns):
+        if is_cancelled and is_cancelled():
+            raise InterruptedError
+        dst = os.path.join(work_dir, rel_path)
+        dirs.ensure(dst)
+        old = previous_files.get(rel_path)
+        if old is not None and old[0] == size and old[1] == mtime_ns:
+            # لم يتغير: رابط إلى نسخة الجيل السابق دون قراءة المصدر
+            try:
+                _link_or_copy(os.path.join(previous_dir, rel_path), dst)
+                return 'linked', old[2]
+            except OSError:
+                pass  # نسخة الجيل السابق مفقودة: يُنسخ من المصدر
+        digest = _copy_with_hash(os.path.join(source, rel_path), dst)
+        with by_hash_lock:
+            same = by_hash.setdefault(digest, dst)
+        if same != dst:
+            # المحتوى نفسه موجود في الهدف (ملف نُقل أو لُمس فقط، أو نسخة مكررة)
+            tmp_path = f'{dst}.link'
+            try:
+                os.link(same, tmp_path)
+            except OSError:
+                return 'copied', digest
+            os.replace(tmp_path, dst)
+            return 'relinked', digest
+        return 'copied', digest
+
+    done = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers or FileHelper.io_workers(),
+                                thread_name_prefix='archive-backup') as executor:
+            futures = {
+                executor.submit(process, rel_path, size, mtime_ns): rel_path
+                for rel_path, (size, mtime_ns) in files.items()
+            }
+            for future in as_completed(futures):
+                rel_path = futures[future]
+                try:
+                    action, digest = future.result()
+                except InterruptedError:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
+                except OSError as e:
+                    # ملف حُذف أو قُفل أثناء النسخ: لا يدخل البيان ويُعاد في التشغيل التالي
+                    result['failed'].append((rel_path, str(e)))
+                else:
+                    size, mtime_ns = files[rel_path]
+                    entries[rel_path] = [size, mtime_ns, digest]
+                    result[action] += 1
+                    if action == 'copied':
+                        result['bytes_copied'] += size
+                done += 1
+                if progress:
+                    progress(done, len(files))
+    except InterruptedError:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return None
+    except Exception:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'generation': generation,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'source': source,
+        'files': entries,
+    }
+    os.rename(work_dir, os.path.join(target, generation))
+    _write_manifest(target, generation, manifest)
+    if keep:
+        result['removed'] = rotate_generations(target, keep)
+    return result
+
+
+# ----------------------------------------------------------------------
+# التحقق والاستعادة
+# ----------------------------------------------------------------------
+
+def _check_file(path, entry, deep):
+    """None إذا طابق الملف البيان، أو وصف الاختلاف"""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return 'مفقود'
+    if size != entry[0]:
+        return f'الحجم {size} بدل {entry[0]}'
+    if deep and FileHelper.sha256_file(path) != entry[2]:
+        return 'البصمة لا تطابق'
+    return None
+
+
+def verify_generation(target, generation=None, deep=True, workers=None, progress=None):
+    """
+    مطابقة ملفات جيل مع بيانه
+
+    Args:
+        generation: اسم الجيل (الافتراضي: الأحدث)
+        deep: حساب بصمة كل ملف (False: الحجم فقط)
+
+    Returns:
+        dict: {'generation', 'files', 'bad': [(المسار، السبب)]}
+    """
+    generation = generation or _latest(target)
+    manifest = load_manifest(target, generation)
+    root = os.path.join(target, generation)
+    bad = _check_all(root, manifest['files'], deep, workers, progress)
+    return {'generation': generation, 'files': len(manifest['files']), 'bad': bad}
+
+
+def _check_all(root, files, deep, workers, progress):
+    bad = []
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers or FileHelper.io_workers(),
+                            thread_name_prefix='archive-verify') as executor:
+        futures = {
+            executor.submit(_check_file, os.path.join(root, rel_path), entry, deep): rel_path
+            for rel_path, entry in files.items()
+        }
+        for future in as_completed(futures):
+            problem = future.result()
+            if problem:
+                bad.append((futures[future], problem))
+            done += 1
+            if progress:
+                progress(done, len(files))
+    return sorted(bad)
+
+
+def _latest(target):
+    generations = list_generations(target)
+    if not generations:
+        raise ValueError(f'لا توجد أجيال نسخ في {target}')
+    return generations[-1]
+
+
+def restore_generation(target, generation, destination, workers=None, progress=None):
+    """
+    استعادة جيل إلى مجلد فارغ مع التحقق من بصمة كل ملف مقابل البيان
+
+    Returns:
+        dict: {'generation', 'files', 'bytes', 'bad': [(المسار، السبب)]}
+    """
+    generation = generation or _latest(target)
+    manifest = load_manifest(target, generation)
+    root = os.path.join(target, generation)
+    if os.path.isdir(destination) and os.listdir(destination):
+        raise ValueError(f'مجلد الاستعادة ليس فارغاً: {destination}')
+    os.makedirs(destination, exist_ok=True)
+    dirs = _DirMaker()
+
+    def restore_one(rel_path, entry):
+        dst = os.path.join(destination, rel_path)
+        dirs.ensure(dst)
+        try:
+            digest = _copy_with_hash(os.path.join(root, rel_path), dst)
+        except OSError as e:
+            return str(e)
+        return None if digest == entry[2] else 'البصمة لا تطابق'
+
+    files = manifest['files']
+    bad = []
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers or FileHelper.io_workers(),
+                            thread_name_prefix='archive-restore') as executor:
+        futures = {
+            executor.submit(restore_one, rel_path, entry): rel_path
+            for rel_path, entry in files.items()
+        }
+        for future in as_completed(futures):
+            problem = future.result()
+            if problem:
+                bad.append((futures[future], problem))
+            done += 1
+            if progress:
+                progress(done, len(files))
+    return {
+        'generation': generation,
+        'files': len(files),
+        'bytes': sum(entry[0] for entry in files.values()),
+        'bad': sorted(bad),
+    }
@@ -0,0 +1,123 @@
+"""
+جدولة النسخ الاحتياطي لقاعدة البيانات
+
+يفحص المجدول عند الإقلاع ثم كل ساعة إن كانت آخر نسخة في مجلد النسخ أقدم من
+database.backup_interval يوماً، ويشغّل النسخ في خيط خلفي بواجهة النسخ في SQLite
+(database.backup) فلا تتوقف الواجهة ولا الكتابة في القاعدة أثناءه.
+"""
+
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from database import backup
+
+from . import tracing
+
+
+class BackupWorker(QThread):
+    """خيط عامل ينشئ نسخة احتياطية واحدة ويحذف النسخ الزائدة"""
+
+    progress_updated = pyqtSignal(int, int)
+    backup_finished = pyqtSignal(bool, str)
+
+    def __init__(self, db_path, backup_dir, keep=backup.DEFAULT_KEEP):
+        super().__init__()
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.result = None
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        """تنفيذ النسخ"""
+        try:
+            with tracing.span('backup.create') as span:
+                self.result = backup.create_backup(
+                    self.db_path, self.backup_dir, keep=self.keep,
+                    progress=self.progress_updated.emit,
+                    is_cancelled=lambda: self.cancelled
+                )
+                if self.result is not None:
+                    span.set(pages=self.result['pages'], size=self.result['size'])
+            if self.result is None:
+                self.backup_finished.emit(False, 'تم إلغاء النسخ الاحتياطي')
+            else:
+                self.backup_finished.emit(True, self.result['path'])
+        except Exception as e:
+            self.backup_finished.emit(False, str(e))
+
+
+class BackupScheduler(QObject):
+    """
+    تشغيل BackupWorker كلما حان موعد النسخة التالية
+
+    Args:
+        interval_days: الفترة بين النسخ بالأيام (0: الجدولة معطلة)
+        keep: عدد النسخ المحتفظ بها
+    """
+
+    # فترة فحص الموعد أثناء عمل البرنامج (ms)
+    CHECK_INTERVAL = 60 * 60 * 1000
+
+    backup_finished = pyqtSignal(bool, str)
+
+    def __init__(self, db_path, backup_dir, interval_days, keep=backup.DEFAULT_KEEP, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.interval_days = interval_days
+        self.keep = keep
+        self._worker = None
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.check)
+
+    def start(self):
+        """فحص فوري ثم دوري"""
+        if not self.interval_days or self.interval_days <= 0:
+            return
+        self._timer.start(self.CHECK_INTERVAL)
+        self.check()
+
+    def check(self):
+        """بدء نسخة إذا حان موعدها ولا توجد نسخة جارية"""
+        if self.is_running():
+            return
+        try:
+            if not backup.backup_due(self.backup_dir, self.interval_days):
+                return
+        except OSError as e:
+            print(f"[BACKUP] تعذر قراءة مجلد النسخ الاحتياطية: {str(e)}")
+            return
+        self.run_now()
+
+    def run_now(self):
+        """نسخة احتياطية فورية بغض النظر عن الموعد"""
+        if self.is_running():
+            return False
+        self._worker = BackupWorker(self.db_path, self.backup_dir, self.keep)
+        self._worker.backup_finished.connect(self._on_finished)
+        self._worker.start()
+        return True
+
+    def is_running(self):
+        return self._worker is not None and self._worker.isRunning()
+
+    def _on_finished(self, success, message):
+        result = self._worker.result
+        if success:
+            print(f"[BACKUP] تم إنشاء النسخة الاحتياطية: {message} "
+                  f"({result['size'] / 1024 / 1024:.1f} MB، {result['elapsed']:.1f} ث)")
+            if result['removed']:
+                print(f"[BACKUP] حُذفت {len(result['removed'])} نسخة قديمة")
+        else:
+            print(f"[BACKUP] فشل النسخ الاحتياطي: {message}")
+        self.backup_finished.emit(success, message)
+
+    def stop(self, timeout=5000):
+        """إيقاف الفحص الدوري وإلغاء النسخة الجارية وانتظارها"""
+        self._timer.stop()
+        if self.is_running():
+            self._worker.cancel()
+            self._worker.wait(timeout)
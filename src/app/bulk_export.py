@@ -0,0 +1,224 @@
+"""
+التصدير الجماعي لعدة وثائق دون فتح نوافذ العرض
+
+وضعان:
+- ZIP واحد: مجلد لكل وثيقة، وتُخزَّن صور JPEG دون ضغط (ZIP_STORED) لأنها
+  مضغوطة أصلاً، وتُقرأ الملفات على دفعات فلا تُحمَّل الصور في الذاكرة.
+- ملف PDF لكل وثيقة: تُكتب الملفات بالتوازي على مجموعة خيوط.
+
+في الوضعين يُكتب ملف manifest.csv يربط كل صفحة بوثيقتها ومصدرها وحجمها
+وبصمتها.
+"""
+
+import os
+import csv
+import io
+import zipfile
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from .pdf_writer import write_images_pdf
+from . import image_pack
+from .helpers import FileHelper
+
+
+MANIFEST_FILENAME = 'manifest.csv'
+MANIFEST_COLUMNS = [
+    'document_id', 'doc_name', 'doc_date', 'doc_title', 'page_number',
+    'source_path', 'exported_as', 'size_bytes', 'content_hash'
+]
+_STORED_SUFFIXES = {'.jpg', '.jpeg', '.png'}
+
+
+def collect_documents(db, doc_ids):
+    """
+    بيانات الوثائق المطلوبة مع صفحاتها الموجودة على القرص
+
+    Returns:
+        list: [{'id', 'doc', 'folder', 'pages': [{'path', 'page_number', 'content_hash'}]}]
+    """
+    documents = []
+    for doc_id in doc_ids:
+        doc = db.get_document_by_id(doc_id)
+        if not doc:
+            continue
+        metadata = db.get_images_metadata(doc_id)
+        pages = []
+        for img in db.get_document_images(doc_id):
+            if image_pack.exists(img.image_path):
+                pages.append({
+                    'path': img.image_path,
+                    'page_number': img.page_number,
+                    'content_hash': (metadata.get(img.id) or {}).get('content_hash')
+                })
+        documents.append({
+            'id': doc_id,
+            'doc': doc,
+            'folder': f'{FileHelper.safe_filename(str(doc.doc_name))}_{doc_id}',
+            'pages': pages
+        })
+    return documents
+
+
+def _manifest_row(document, page, exported_as):
+    doc = document['doc']
+    return {
+        'document_id': document['id'],
+        'doc_name': doc.doc_name,
+        'doc_date': doc.doc_date,
+        'doc_title': doc.doc_title,
+        'page_number': page['page_number'],
+        'source_path': page['path'],
+        'exported_as': exported_as,
+        'size_bytes': image_pack.file_size(page['path']),
+        'content_hash': page['content_hash'] or '',
+    }
+
+
+def _manifest_bytes(rows):
+    """ملف CSV بترميز UTF-8 مع BOM ليفتحه Excel بالعربية مباشرة"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=MANIFEST_COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8-sig')
+
+
+def export_zip(documents, zip_path, progress=None, is_cancelled=None):
+    """
+    تصدير الوثائق في ملف ZIP واحد
+
+    Returns:
+        dict: {'documents', 'pages', 'failed': [(المسار، الخطأ)]} أو None عند الإلغاء
+    """
+    total = sum(len(d['pages']) for d in documents)
+    zip_path = Path(zip_path)
+    tmp_path = zip_path.with_name(f'{zip_path.name}.{os.getpid()}.tmp')
+    rows = []
+    result = {'documents': 0, 'pages': 0, 'failed': []}
+    done = 0
+
+    try:
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as zipf:
+            for document in documents:
+                for index, page in enumerate(document['pages'], start=1):
+                    if is_cancelled and is_cancelled():
+                        raise InterruptedError
+                    suffix = Path(page['path']).suffix.lower()
+                    arcname = f"{document['folder']}/صورة_{index:04d}{suffix}"
+                    compress = zipfile.ZIP_STORED if suffix in _STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+                    try:
+                        image_pack.write_to_zip(zipf, page['path'], arcname, compress)
+                        rows.append(_manifest_row(document, page, arcname))
+                        result['pages'] += 1
+                    except OSError as e:
+                        result['failed'].append((page['path'], str(e)))
+                    done += 1
+                    if progress:
+                        progress(done, total)
+                result['documents'] += 1
+            zipf.writestr(MANIFEST_FILENAME, _manifest_bytes(rows))
+        os.replace(tmp_path, zip_path)
+    except InterruptedError:
+        os.remove(tmp_path)
+        return None
+    except Exception:
+        if tmp_path.exists():
+            os.remove(tmp_path)
+        raise
+    return result
+
+
+def export_pdfs(documents, output_dir, workers=None, progress=None, is_cancelled=None):
+    """
+    تصدير كل وثيقة كملف PDF مستقل بالتوازي
+
+    Returns:
+        dict: {'documents', 'pages', 'failed': [(الوثيقة، الخطأ)]} أو None عند الإلغاء
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    total = sum(len(d['pages']) for d in documents)
+    rows = []
+    result = {'documents': 0, 'pages': 0, 'failed': []}
+    done = 0
+
+    def export_one(document):
+        if is_cancelled and is_cancelled():
+            return document, None, None
+        file_name = f"{document['folder']}.pdf"
+        try:
+            pages = write_images_pdf(
+                [page['path'] for page in document['pages']], output_dir / file_name,
+                title=document['doc'].doc_name, is_cancelled=is_cancelled
+            )
+        except Exception as e:
+            return document, None, str(e)
+        return document, file_name if pages is not None else None, None
+
+    workers = workers or min(4, os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-export') as executor:
+        futures = [executor.submit(export_one, d) for d in documents if d['pages']]
+        for future in as_completed(futures):
+            document, file_name, error = future.result()
+            if error:
+                result['failed'].append((document['doc'].doc_name, error))
+            done += len(document['pages'])
+            if file_name:
+                result['documents'] += 1
+                result['pages'] += len(document['pages'])
+                rows.extend(
+                    _manifest_row(document, page, f'{file_name}#{index}')
+                    for index, page in enumerate(document['pages'], start=1)
+                )
+            if progress:
+                progress(done, total)
+
+    if is_cancelled and is_cancelled():
+        return None
+    rows.sort(key=lambda row: (row['document_id'], row['page_number'] or 0))
+    (output_dir / MANIFEST_FILENAME).write_bytes(_manifest_bytes(rows))
+    return result
+
+
+class BulkExportWorker(QThread):
+    """خيط عامل لتصدير عدة وثائق (ZIP واحد أو PDF لكل وثيقة) في الخلفية"""
+
+    progress_updated = pyqtSignal(int, int)
+    export_finished = pyqtSignal(bool, str)
+
+    def __init__(self, db, doc_ids, target, mode='zip'):
+        """
+        Args:
+            target: مسار ملف ZIP أو مجلد ملفات PDF
+            mode: 'zip' أو 'pdf'
+        """
+        super().__init__()
+        self.db = db
+        self.doc_ids = list(doc_ids)
+        self.target = target
+        self.mode = mode
+        self.result = None
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        """تنفيذ التصدير"""
+        try:
+            documents = collect_documents(self.db, self.doc_ids)
+            export = export_zip if self.mode == 'zip' else export_pdfs
+            self.result = export(
+                documents, self.target,
+                progress=self.progress_updated.emit,
+                is_cancelled=lambda: self.cancelled
+            )
+            if self.result is None:
+                self.export_finished.emit(False, 'تم إلغاء التصدير')
+            else:
+                self.export_finished.emit(True, str(self.target))
+        except Exception as e:
+            self.export_finished.emit(False, str(e))
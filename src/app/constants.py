@@ -281,6 +281,14 @@ class AppSettings:
     SUPPORTED_IMAGE_FORMATS = ['.jpg', '.jpeg', '.png', '.tiff', '.bmp', '.gif', '.webp']
     THUMBNAIL_SIZE = (150, 200)
     PREVIEW_SIZE = (380, 480)
+    ICON_SIZE = (48, 64)
+
+    # مقاسات الصور المصغرة المخزنة (اسم المقاس -> العرض، الارتفاع)
+    THUMBNAIL_SIZES = {
+        'icon': ICON_SIZE,          # أيقونة القوائم
+        'tile': THUMBNAIL_SIZE,     # بطاقة الشبكة
+        'preview': PREVIEW_SIZE,    # المعاينة
+    }
     
     # إعدادات OCR
     OCR_LANGUAGES = ['ar', 'en']
@@ -1,16 +1,29 @@
 """
 نوافذ الحوار - Dialogs Module
 حزمة تحتوي على جميع نوافذ الحوار المستخدمة في التطبيق
+
+كل نافذة تُستورد عند أول استخدام (PEP 562) لتسريع إقلاع التطبيق.
 """
 
-from .add_document_dialog import AddDocumentDialog
-from .attachment_details_dialog import AttachmentDetailsDialog
-from .import_images_dialog import ImportImagesDialog
-from .destruction_form_dialog import DestructionFormDialog
+import importlib
+
+_EXPORTS = {
+    'AddDocumentDialog': '.add_document_dialog',
+    'AttachmentDetailsDialog': '.attachment_details_dialog',
+    'ImportImagesDialog': '.import_images_dialog',
+    'DestructionFormDialog': '.destruction_form_dialog',
+    'DiagnosticsDialog': '.diagnostics_dialog',
+    'AdvancedFilterDialog': '.filter_dialog',
+}
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = [
-    'AddDocumentDialog',
-    'AttachmentDetailsDialog', 
-    'ImportImagesDialog',
-    'DestructionFormDialog'
-]
+__all__ = list(_EXPORTS)
@@ -21,26 +21,11 @@ from PyQt6.QtCore import Qt, QThread, pyqtSignal
 
 from ..constants import COLORS, ICONS, APP_SETTINGS, FONT_SIZES, DIMENSIONS
 from ..ui_styles import SCANNER_STATUS_STYLES, BUTTON_STYLES
+from .. import startup
 from .utils import choose_year_folder
 from .attachment_details_dialog import AttachmentDetailsDialog
 
 
-# التحقق من توفر مكتبة السكانر (Windows فقط)
-SCANNER_AVAILABLE = False
-SCANNER_COUNT = 0
-try:
-    import win32com.client
-    SCANNER_AVAILABLE = True
-    try:
-        _wia_manager = win32com.client.Dispatch("WIA.DeviceManager")
-        SCANNER_COUNT = _wia_manager.DeviceInfos.Count
-    except:
-        SCANNER_COUNT = 0
-except ImportError:
-    SCANNER_AVAILABLE = False
-    SCANNER_COUNT = 0
-
-
 class AddDocumentDialog(QDialog):
     """
     نافذة حوار لإضافة وثيقة جديدة
@@ -71,6 +56,7 @@ class AddDocumentDialog(QDialog):
         self.scanned_images = []
         self.attachment_details_dict = {}
         self.selected_year_folder = None
+        self._probe_worker = None
         
         self._init_ui()
         self.apply_dialog_styles()
@@ -169,6 +155,7 @@ class AddDocumentDialog(QDialog):
         # حالة السكانر
         self.scanner_status_label = QLabel()
         self._update_scanner_status()
+        self._start_scanner_probe()
         layout.addRow(self.scanner_status_label)
     
     def _create_year_folder_field(self, layout):
@@ -219,37 +206,58 @@ class AddDocumentDialog(QDialog):
         button_box.rejected.connect(self.reject)
         layout.addRow(button_box)
     
-    def _update_scanner_status(self):
-        """تحديث حالة السكانر في الواجهة"""
-        global SCANNER_AVAILABLE, SCANNER_COUNT
+    def _start_scanner_probe(self):
+        """إعادة فحص السكانر في الخلفية دون تأخير ظهور النافذة"""
+        self._probe_worker = startup.StartupProbeWorker(scanners=True, ocr=False)
+        self._probe_worker.probe_finished.connect(lambda _result: self._update_scanner_status())
+        self._probe_worker.start()
+    
+    def _update_scanner_status(self, refresh=False):
+        """
+        تحديث حالة السكانر في الواجهة
         
-        if SCANNER_AVAILABLE:
-            try:
-                _wia_manager = win32com.client.Dispatch("WIA.DeviceManager")
-                SCANNER_COUNT = _wia_manager.DeviceInfos.Count
-            except:
-                SCANNER_COUNT = 0
+        Args:
+            refresh: إعادة الفحص الآن (قبل المسح مباشرة)؛ وإلا تُعرض آخر نتيجة معروفة
+        
+        Returns:
+            tuple: (المكتبة متاحة، عدد الأجهزة)
+        """
+        if not refresh and startup.status()['scanner_available'] is None:
+            self.scanner_status_label.setText(f'{ICONS.SEARCH} حالة السكانر: جاري الفحص...')
+            self.scanner_status_label.setStyleSheet(SCANNER_STATUS_STYLES['disconnected'])
+            return False, 0
         
-        if not SCANNER_AVAILABLE:
+        scanner_available, scanner_count = startup.scanner_status(refresh=refresh)
+        
+        if not scanner_available:
             self.scanner_status_label.setText(
                 f'{ICONS.WARNING} حالة السكانر: مكتبة pywin32 غير مثبتة - استخدم اختيار الصور من الحاسب'
             )
             self.scanner_status_label.setStyleSheet(SCANNER_STATUS_STYLES['unavailable'])
-        elif SCANNER_COUNT == 0:
+        elif scanner_count == 0:
             self.scanner_status_label.setText(
                 f'{ICONS.WARNING} حالة السكانر: لا يوجد سكانر متصل - قم بتوصيل السكانر أو اختر صورة من الحاسب'
             )
             self.scanner_status_label.setStyleSheet(SCANNER_STATUS_STYLES['disconnected'])
         else:
             self.scanner_status_label.setText(
-                f'{ICONS.SUCCESS} حالة السكانر: متصل ({SCANNER_COUNT} جهاز)'
+                f'{ICONS.SUCCESS} حالة السكانر: متصل ({scanner_count} جهاز)'
             )
             self.scanner_status_label.setStyleSheet(SCANNER_STATUS_STYLES['connected'])
+        return scanner_available, scanner_count
+    
+    def done(self, result):
+        # لا يُترك فحص السكانر الخلفي يحدّث نافذة مغلقة؛ يُكمل منفصلاً عنها
+        if self._probe_worker is not None and self._probe_worker.isRunning():
+            self._probe_worker.probe_finished.disconnect()
+            startup.detach_probe(self._probe_worker)
+            self._probe_worker = None
+        super().done(result)
     
     def select_year_folder(self):
         """استخدم الدالة المساعدة الموحدة لاختيار مجلد السنة"""
         try:
-            return choose_year_folder(self)
+            return choose_year_folder(self, self.db)
         except Exception:
             return None
     
@@ -290,9 +298,9 @@ class AddDocumentDialog(QDialog):
     
     def scan_manual(self):
         """مسح من السكانر مع إدخال يدوي (سريع)"""
-        global SCANNER_AVAILABLE, SCANNER_COUNT
+        scanner_available, scanner_count = self._update_scanner_status(refresh=True)
         
-        if not SCANNER_AVAILABLE:
+        if not scanner_available:
             reply = QMessageBox.question(
                 self, 'السكانر غير متاح',
                 f'{ICONS.WARNING} مكتبة السكانر (pywin32) غير مثبتة\n\n'
@@ -305,8 +313,7 @@ class AddDocumentDialog(QDialog):
                 self._select_image_file()
             return
         
-        self._update_scanner_status()
-        if SCANNER_COUNT == 0:
+        if scanner_count == 0:
             reply = QMessageBox.question(
                 self, 'السكانر غير متصل',
                 f'{ICONS.WARNING} لا يوجد سكانر متصل بالحاسب\n\n'
@@ -331,6 +338,7 @@ class AddDocumentDialog(QDialog):
                 'سيتم فتح نافذة السكانر\n\nضع الوثيقة واضغط Scan'
             )
             
+            import win32com.client
             wia = win32com.client.Dispatch("WIA.CommonDialog")
             image = wia.ShowAcquireImage()
             
@@ -436,9 +444,9 @@ class AddDocumentDialog(QDialog):
     
     def scan_multiple(self):
         """مسح تلقائي لجميع الأوراق دفعة واحدة"""
-        global SCANNER_AVAILABLE, SCANNER_COUNT
+        scanner_available, scanner_count = self._update_scanner_status(refresh=True)
         
-        if not SCANNER_AVAILABLE:
+        if not scanner_available:
             reply = QMessageBox.question(
                 self, 'السكانر غير متاح',
                 f'{ICONS.WARNING} مكتبة السكانر (pywin32) غير مثبتة\n\n'
@@ -449,8 +457,7 @@ class AddDocumentDialog(QDialog):
                 self._select_multiple_image_files()
             return
         
-        self._update_scanner_status()
-        if SCANNER_COUNT == 0:
+        if scanner_count == 0:
             reply = QMessageBox.question(
                 self, 'السكانر غير متصل',
                 f'{ICONS.WARNING} لا يوجد سكانر متصل بالحاسب\n\n'
@@ -503,6 +510,7 @@ class AddDocumentDialog(QDialog):
     
     def _scan_automatic_feeder(self):
         """مسح تلقائي باستخدام وحدة التغذية التلقائية (ADF)"""
+        import win32com.client
         wia = win32com.client.Dispatch("WIA.DeviceManager")
         
         if wia.DeviceInfos.Count == 0:
@@ -574,6 +582,7 @@ class AddDocumentDialog(QDialog):
             'اضغط Cancel عند الانتهاء من آخر ورقة'
         )
         
+        import win32com.client
         wia = win32com.client.Dispatch("WIA.CommonDialog")
         scan_count = len(self.scanned_images)
         temp_dir = tempfile.gettempdir()
@@ -707,9 +716,9 @@ class AddDocumentDialog(QDialog):
     
     def scan_and_extract(self):
         """مسح من السكانر واستخراج المعلومات تلقائياً (بطيء)"""
-        global SCANNER_AVAILABLE, SCANNER_COUNT
+        scanner_available, scanner_count = self._update_scanner_status(refresh=True)
         
-        if not SCANNER_AVAILABLE:
+        if not scanner_available:
             reply = QMessageBox.question(
                 self, 'السكانر غير متاح',
                 f'{ICONS.WARNING} مكتبة السكانر (pywin32) غير مثبتة\n\n'
@@ -720,8 +729,7 @@ class AddDocumentDialog(QDialog):
                 self.extract_from_image()
             return
         
-        self._update_scanner_status()
-        if SCANNER_COUNT == 0:
+        if scanner_count == 0:
             reply = QMessageBox.question(
                 self, 'السكانر غير متصل',
                 f'{ICONS.WARNING} لا يوجد سكانر متصل بالحاسب\n\n'
@@ -751,6 +759,7 @@ class AddDocumentDialog(QDialog):
                 'سيتم فتح نافذة السكانر\n\nضع الوثيقة في السكانر واضغط Scan'
             )
             
+            import win32com.client
             wia = win32com.client.Dispatch("WIA.CommonDialog")
             image = wia.ShowAcquireImage()
             
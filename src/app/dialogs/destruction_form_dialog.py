@@ -10,15 +10,226 @@ import os
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
     QPushButton, QTableWidget, QTableWidgetItem, QGroupBox,
-    QFormLayout, QFileDialog, QMessageBox
+    QFormLayout, QFileDialog, QMessageBox, QProgressDialog
 )
 from PyQt6.QtCore import Qt, QRectF, QMarginsF
-from PyQt6.QtGui import QPainter, QFont, QColor, QPen, QImage, QPageSize, QPageLayout
+from PyQt6.QtGui import QPainter, QFont, QColor, QPen, QImageReader, QPageSize, QPageLayout
 
 from ..constants import COLORS, FONT_SIZES, DIMENSIONS, ICONS
 from ..ui_styles import TITLE_STYLES, BUTTON_STYLES, PAGES_INFO_STYLE
 
 
+def draw_destruction_form(printer, pages, form_info, progress=None, is_cancelled=None):
+    """
+    رسم صفحات الاستمارة على الطابعة باستخدام QPainter
+    
+    دالة مستقلة عن النافذة لتعمل من خيط الطباعة الخلفي أو من نافذة المعاينة
+    
+    Args:
+        pages: صفوف الجدول مقسمة على الصفحات
+        form_info: معلومات الجهة (agency, directorate, section, division)
+    
+    Returns:
+        int: عدد الصفحات المرسومة، أو None عند الإلغاء
+    """
+    from PyQt6.QtPrintSupport import QPrinter
+    
+    painter = QPainter()
+    if not painter.begin(printer):
+        raise RuntimeError('فشل بدء الطباعة')
+    
+    # استخدام وحدة Millimeter للحصول على أبعاد حقيقية
+    page_rect = printer.pageRect(QPrinter.Unit.Millimeter)
+    width_mm = page_rect.width()
+    height_mm = page_rect.height()
+    
+    # تحويل من مليمتر إلى بكسل
+    dpi = printer.resolution()
+    px_per_mm = dpi / 25.4
+    
+    width = width_mm * px_per_mm
+    height = height_mm * px_per_mm
+    
+    # هوامش بالمليمتر ثم تحويلها
+    margin_mm = 10
+    margin = margin_mm * px_per_mm
+    content_width = width - (2 * margin)
+    
+    # ارتفاع الصف (حوالي 7mm للصف)
+    row_height = 7 * px_per_mm
+    
+    # الشعار يُقرأ مرة واحدة بمقاس طباعته بدل قراءته في كل صفحة
+    logo = None
+    logo_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "MOI.png")
+    if os.path.exists(logo_path):
+        reader = QImageReader(logo_path)
+        logo_px = int(25 * px_per_mm)
+        if reader.size().isValid():
+            reader.setScaledSize(reader.size().scaled(logo_px, logo_px, Qt.AspectRatioMode.KeepAspectRatio))
+        logo = reader.read()
+        if logo.isNull():
+            logo = None
+    
+    total = len(pages)
+    for page_idx, page_data in enumerate(pages):
+        if is_cancelled and is_cancelled():
+            printer.abort()
+            painter.end()
+            return None
+        if page_idx > 0:
+            printer.newPage()
+        
+        y_pos = margin
+        
+        # ===== الشعار (أعلى وسط) =====
+        if logo is not None:
+            logo_size = 25 * px_per_mm
+            logo_x = margin + (content_width - logo_size) / 2
+            logo_y = y_pos
+            painter.drawImage(QRectF(logo_x, logo_y, logo_size, logo_size), logo)
+        
+        # ===== معلومات الوزارة (أعلى يمين) =====
+        ministry_font = QFont("Arial")
+        ministry_font.setPointSize(10)
+        ministry_font.setBold(True)
+        painter.setFont(ministry_font)
+        painter.setPen(Qt.GlobalColor.black)
+        
+        ministry_lines = [
+            "وزارة الداخلية",
+            "وكالة الوزارة لشؤون الإدارية والمالية",
+            "مديرية إدارة الموارد البشرية",
+            "مديرية السجلات والوثائق"
+        ]
+        
+        line_h = 5 * px_per_mm
+        temp_y = y_pos
+        for line in ministry_lines:
+            ministry_rect = QRectF(margin + content_width * 0.55, temp_y, content_width * 0.45, line_h)
+            painter.drawText(ministry_rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, line)
+            temp_y += line_h
+        
+        # ===== معلومات الإصدار (أعلى يسار) =====
+        version_font = QFont("Arial")
+        version_font.setPointSize(8)
+        painter.setFont(version_font)
+        
+        version_data = [
+            ("رقم الإصدار", "0.1"),
+            ("سنة الإصدار", "2023"),
+            ("رقم الترميز", "م.ب-س"),
+            ("نموذج", "(37)")
+        ]
+        
+        inner_y = y_pos
+        for label, value in version_data:
+            val_rect = QRectF(margin, inner_y, 15 * px_per_mm, line_h)
+            painter.drawText(val_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, value)
+            slash_rect = QRectF(margin + 15 * px_per_mm, inner_y, 3 * px_per_mm, line_h)
+            painter.drawText(slash_rect, Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter, "/")
+            lbl_rect = QRectF(margin + 18 * px_per_mm, inner_y, 25 * px_per_mm, line_h)
+            painter.drawText(lbl_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, label)
+            inner_y += line_h
+        
+        y_pos = temp_y + 5 * px_per_mm
+        
+        # ===== العنوان الرئيسي (وسط) =====
+        title_font = QFont("Arial")
+        title_font.setPointSize(16)
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        painter.setPen(Qt.GlobalColor.black)
+        
+        title_height = 10 * px_per_mm
+        title_rect = QRectF(margin, y_pos, content_width, title_height)
+        painter.drawText(title_rect, Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter, "استمارة إتلاف الوثائق")
+        y_pos += title_height + (4 * px_per_mm)
+        
+        # ===== معلومات النموذج =====
+        info_font = QFont("Arial")
+        info_font.setPointSize(10)
+        painter.setFont(info_font)
+        
+        info_data = [
+            ("الوكالة", form_info['agency']),
+            ("التشكيل أو المديرية", form_info['directorate']),
+            ("القسم", form_info['section']),
+            ("الشعبة", form_info['division'])
+        ]
+        
+        line_height = 5 * px_per_mm
+        label_w = 32 * px_per_mm
+        
+        for label, value in info_data:
+            lbl_rect = QRectF(margin + content_width - label_w, y_pos, label_w, line_height)
+            painter.drawText(lbl_rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, label)
+            colon_rect = QRectF(margin + content_width - label_w - (4 * px_per_mm), y_pos, 4 * px_per_mm, line_height)
+            painter.drawText(colon_rect, Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter, ":")
+            val_rect = QRectF(margin, y_pos, content_width - label_w - (6 * px_per_mm), line_height)
+            painter.drawText(val_rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, value)
+            y_pos += line_height
+        
+        y_pos += 3 * px_per_mm
+        
+        # ===== الجدول =====
+        col_widths = [0.04, 0.08, 0.10, 0.12, 0.34, 0.08, 0.24]
+        headers = ['ت', 'رقم الوثيقة', 'تاريخها', 'جهة الإصدار', 'مضمونها', 'تصنيف', 'الفقرة القانونية']
+        
+        # رسم رأس الجدول
+        header_font = QFont("Arial")
+        header_font.setPointSize(8)
+        header_font.setBold(True)
+        painter.setFont(header_font)
+        
+        painter.setBrush(QColor(217, 225, 242))
+        painter.setPen(QPen(Qt.GlobalColor.black, 1))
+        painter.drawRect(QRectF(margin, y_pos, content_width, row_height))
+        
+        x_pos = margin + content_width
+        for header, col_w in zip(headers, col_widths):
+            cell_width = content_width * col_w
+            x_pos -= cell_width
+            cell_rect = QRectF(x_pos, y_pos, cell_width, row_height)
+            painter.drawRect(cell_rect)
+            painter.drawText(cell_rect, Qt.AlignmentFlag.AlignCenter, header)
+        
+        y_pos += row_height
+        
+        # رسم صفوف البيانات
+        data_font = QFont("Arial")
+        data_font.setPointSize(7)
+        painter.setFont(data_font)
+        painter.setBrush(Qt.GlobalColor.white)
+        
+        for row_idx, row in enumerate(page_data, 1):
+            x_pos = margin + content_width
+            row_data = [str(row_idx)] + list(row[1:])
+            
+            for cell, col_w in zip(row_data, col_widths):
+                cell_width = content_width * col_w
+                x_pos -= cell_width
+                cell_rect = QRectF(x_pos, y_pos, cell_width, row_height)
+                painter.drawRect(cell_rect)
+                display_text = str(cell)[:45] if len(str(cell)) > 45 else str(cell)
+                painter.drawText(cell_rect.adjusted(2, 0, -2, 0), Qt.AlignmentFlag.AlignCenter, display_text)
+            
+            y_pos += row_height
+        
+        # ===== رقم الصفحة =====
+        page_font = QFont("Arial")
+        page_font.setPointSize(8)
+        painter.setFont(page_font)
+        page_num_text = f"صفحة {page_idx + 1} من {total}"
+        page_rect_bottom = QRectF(margin, height - margin - (5 * px_per_mm), content_width, 5 * px_per_mm)
+        painter.drawText(page_rect_bottom, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, page_num_text)
+        
+        if progress:
+            progress(page_idx + 1, total)
+    
+    painter.end()
+    return total
+
+
 class DestructionFormDialog(QDialog):
     """
     نافذة استمارة إتلاف الوثائق
@@ -44,6 +255,7 @@ class DestructionFormDialog(QDialog):
         super().__init__(parent)
         self.db = db
         self.selected_docs = selected_docs or []
+        self._print_worker = None
         
         self.setWindowTitle('استمارة إتلاف الوثائق')
         self.setMinimumSize(900, 700)
@@ -204,6 +416,12 @@ class DestructionFormDialog(QDialog):
         print_btn.clicked.connect(self._print_form)
         buttons_layout.addWidget(print_btn)
         
+        # زر الطباعة المباشرة (دون معاينة)
+        print_direct_btn = QPushButton(f'{ICONS.PRINT} طباعة مباشرة')
+        print_direct_btn.setStyleSheet(BUTTON_STYLES['purple'])
+        print_direct_btn.clicked.connect(self._print_direct)
+        buttons_layout.addWidget(print_direct_btn)
+        
         # زر تصدير Excel
         export_excel_btn = QPushButton(f'{ICONS.EXCEL} تصدير Excel')
         export_excel_btn.setStyleSheet(BUTTON_STYLES['success'])
@@ -268,24 +486,24 @@ class DestructionFormDialog(QDialog):
             self.docs_table.setItem(row, 0, QTableWidgetItem(str(idx + 1)))
             
             # رقم الوثيقة
-            doc_name = doc[1] or ''
+            doc_name = doc.doc_name or ''
             doc_number = doc_name.split()[0] if doc_name else ''
             self.docs_table.setItem(row, 1, QTableWidgetItem(doc_number))
             
             # تاريخها
-            self.docs_table.setItem(row, 2, QTableWidgetItem(doc[2] or ''))
+            self.docs_table.setItem(row, 2, QTableWidgetItem(doc.doc_date or ''))
             
             # جهة الإصدار
-            self.docs_table.setItem(row, 3, QTableWidgetItem(doc[4] or ''))
+            self.docs_table.setItem(row, 3, QTableWidgetItem(doc.issuing_dept or ''))
             
             # مضمونها
-            self.docs_table.setItem(row, 4, QTableWidgetItem(doc[3] or ''))
+            self.docs_table.setItem(row, 4, QTableWidgetItem(doc.doc_title or ''))
             
             # تصنيف الوثيقة
-            self.docs_table.setItem(row, 5, QTableWidgetItem(doc[5] or ''))
+            self.docs_table.setItem(row, 5, QTableWidgetItem(doc.doc_classification or ''))
             
             # الفقرة القانونية
-            self.docs_table.setItem(row, 6, QTableWidgetItem(doc[6] or ''))
+            self.docs_table.setItem(row, 6, QTableWidgetItem(doc.legal_paragraph or ''))
         
         self._update_pages_info()
     
@@ -324,33 +542,40 @@ class DestructionFormDialog(QDialog):
     # وظائف الطباعة
     # =========================================================================
     
+    def _prepare_print_job(self):
+        """جمع بيانات الاستمارة وتقسيمها وإعداد طابعة A4"""
+        from PyQt6.QtPrintSupport import QPrinter
+        
+        # جمع البيانات وتقسيمها
+        table_data = self._get_table_data()
+        self._print_pages = self._split_data_into_pages(table_data)
+        self._total_pages = len(self._print_pages)
+        
+        # حفظ معلومات النموذج
+        self._form_info = {
+            'agency': self.agency_input.text(),
+            'directorate': self.directorate_input.text(),
+            'section': self.section_input.text(),
+            'division': self.division_input.text()
+        }
+        
+        # إعداد الطابعة
+        printer = QPrinter(QPrinter.PrinterMode.HighResolution)
+        page_size = QPageSize(QPageSize.PageSizeId.A4)
+        page_layout = QPageLayout(
+            page_size, 
+            QPageLayout.Orientation.Portrait, 
+            QMarginsF(15, 15, 15, 15)
+        )
+        printer.setPageLayout(page_layout)
+        return printer
+    
     def _print_form(self):
         """طباعة الاستمارة مع معاينة باستخدام QPainter"""
         try:
-            from PyQt6.QtPrintSupport import QPrinter, QPrintPreviewDialog
-            
-            # جمع البيانات وتقسيمها
-            table_data = self._get_table_data()
-            self._print_pages = self._split_data_into_pages(table_data)
-            self._total_pages = len(self._print_pages)
+            from PyQt6.QtPrintSupport import QPrintPreviewDialog
             
-            # حفظ معلومات النموذج
-            self._form_info = {
-                'agency': self.agency_input.text(),
-                'directorate': self.directorate_input.text(),
-                'section': self.section_input.text(),
-                'division': self.division_input.text()
-            }
-            
-            # إعداد الطابعة
-            printer = QPrinter(QPrinter.PrinterMode.HighResolution)
-            page_size = QPageSize(QPageSize.PageSizeId.A4)
-            page_layout = QPageLayout(
-                page_size, 
-                QPageLayout.Orientation.Portrait, 
-                QMarginsF(15, 15, 15, 15)
-            )
-            printer.setPageLayout(page_layout)
+            printer = self._prepare_print_job()
             
             # إنشاء نافذة المعاينة
             preview = QPrintPreviewDialog(printer, self)
@@ -363,185 +588,50 @@ class DestructionFormDialog(QDialog):
         except Exception as e:
             QMessageBox.critical(self, 'خطأ', f'حدث خطأ أثناء الطباعة:\n{str(e)}')
     
-    def _draw_pages_with_painter(self, printer):
-        """رسم الصفحات باستخدام QPainter للتحكم الكامل"""
-        from PyQt6.QtPrintSupport import QPrinter
-        
-        painter = QPainter()
-        painter.begin(printer)
-        
-        # استخدام وحدة Millimeter للحصول على أبعاد حقيقية
-        page_rect = printer.pageRect(QPrinter.Unit.Millimeter)
-        width_mm = page_rect.width()
-        height_mm = page_rect.height()
-        
-        # تحويل من مليمتر إلى بكسل
-        dpi = printer.resolution()
-        px_per_mm = dpi / 25.4
+    def _print_direct(self):
+        """طباعة الاستمارة مباشرة دون معاينة - الرسم في خيط خلفي"""
+        from PyQt6.QtPrintSupport import QPrintDialog
+        from ..print_spooler import PrintSpoolerWorker
         
-        width = width_mm * px_per_mm
-        height = height_mm * px_per_mm
-        
-        # هوامش بالمليمتر ثم تحويلها
-        margin_mm = 10
-        margin = margin_mm * px_per_mm
-        content_width = width - (2 * margin)
+        printer = self._prepare_print_job()
+        if QPrintDialog(printer, self).exec() != QDialog.DialogCode.Accepted:
+            return
         
-        # ارتفاع الصف (حوالي 7mm للصف)
-        row_height = 7 * px_per_mm
+        pages, form_info = self._print_pages, self._form_info
+        progress = QProgressDialog('جاري إرسال الاستمارة إلى الطابعة...', 'إلغاء', 0, len(pages), self)
+        progress.setWindowTitle('طباعة')
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(300)
         
-        for page_idx, page_data in enumerate(self._print_pages):
-            if page_idx > 0:
-                printer.newPage()
-            
-            y_pos = margin
-            
-            # ===== الشعار (أعلى وسط) =====
-            logo_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "MOI.png")
-            if os.path.exists(logo_path):
-                logo = QImage(logo_path)
-                if not logo.isNull():
-                    logo_size = 25 * px_per_mm
-                    logo_x = margin + (content_width - logo_size) / 2
-                    logo_y = y_pos
-                    painter.drawImage(QRectF(logo_x, logo_y, logo_size, logo_size), logo)
-            
-            # ===== معلومات الوزارة (أعلى يمين) =====
-            ministry_font = QFont("Arial")
-            ministry_font.setPointSize(10)
-            ministry_font.setBold(True)
-            painter.setFont(ministry_font)
-            painter.setPen(Qt.GlobalColor.black)
-            
-            ministry_lines = [
-                "وزارة الداخلية",
-                "وكالة الوزارة لشؤون الإدارية والمالية",
-                "مديرية إدارة الموارد البشرية",
-                "مديرية السجلات والوثائق"
-            ]
-            
-            line_h = 5 * px_per_mm
-            temp_y = y_pos
-            for line in ministry_lines:
-                ministry_rect = QRectF(margin + content_width * 0.55, temp_y, content_width * 0.45, line_h)
-                painter.drawText(ministry_rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, line)
-                temp_y += line_h
-            
-            # ===== معلومات الإصدار (أعلى يسار) =====
-            version_font = QFont("Arial")
-            version_font.setPointSize(8)
-            painter.setFont(version_font)
-            
-            version_data = [
-                ("رقم الإصدار", "0.1"),
-                ("سنة الإصدار", "2023"),
-                ("رقم الترميز", "م.ب-س"),
-                ("نموذج", "(37)")
-            ]
-            
-            inner_y = y_pos
-            for label, value in version_data:
-                val_rect = QRectF(margin, inner_y, 15 * px_per_mm, line_h)
-                painter.drawText(val_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, value)
-                slash_rect = QRectF(margin + 15 * px_per_mm, inner_y, 3 * px_per_mm, line_h)
-                painter.drawText(slash_rect, Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter, "/")
-                lbl_rect = QRectF(margin + 18 * px_per_mm, inner_y, 25 * px_per_mm, line_h)
-                painter.drawText(lbl_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, label)
-                inner_y += line_h
-            
-            y_pos = temp_y + 5 * px_per_mm
-            
-            # ===== العنوان الرئيسي (وسط) =====
-            title_font = QFont("Arial")
-            title_font.setPointSize(16)
-            title_font.setBold(True)
-            painter.setFont(title_font)
-            painter.setPen(Qt.GlobalColor.black)
-            
-            title_height = 10 * px_per_mm
-            title_rect = QRectF(margin, y_pos, content_width, title_height)
-            painter.drawText(title_rect, Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter, "استمارة إتلاف الوثائق")
-            y_pos += title_height + (4 * px_per_mm)
-            
-            # ===== معلومات النموذج =====
-            info_font = QFont("Arial")
-            info_font.setPointSize(10)
-            painter.setFont(info_font)
-            
-            info_data = [
-                ("الوكالة", self._form_info['agency']),
-                ("التشكيل أو المديرية", self._form_info['directorate']),
-                ("القسم", self._form_info['section']),
-                ("الشعبة", self._form_info['division'])
-            ]
-            
-            line_height = 5 * px_per_mm
-            label_w = 32 * px_per_mm
-            
-            for label, value in info_data:
-                lbl_rect = QRectF(margin + content_width - label_w, y_pos, label_w, line_height)
-                painter.drawText(lbl_rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, label)
-                colon_rect = QRectF(margin + content_width - label_w - (4 * px_per_mm), y_pos, 4 * px_per_mm, line_height)
-                painter.drawText(colon_rect, Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignVCenter, ":")
-                val_rect = QRectF(margin, y_pos, content_width - label_w - (6 * px_per_mm), line_height)
-                painter.drawText(val_rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, value)
-                y_pos += line_height
-            
-            y_pos += 3 * px_per_mm
-            
-            # ===== الجدول =====
-            col_widths = [0.04, 0.08, 0.10, 0.12, 0.34, 0.08, 0.24]
-            headers = ['ت', 'رقم الوثيقة', 'تاريخها', 'جهة الإصدار', 'مضمونها', 'تصنيف', 'الفقرة القانونية']
-            
-            # رسم رأس الجدول
-            header_font = QFont("Arial")
-            header_font.setPointSize(8)
-            header_font.setBold(True)
-            painter.setFont(header_font)
-            
-            painter.setBrush(QColor(217, 225, 242))
-            painter.setPen(QPen(Qt.GlobalColor.black, 1))
-            painter.drawRect(QRectF(margin, y_pos, content_width, row_height))
-            
-            x_pos = margin + content_width
-            for header, col_w in zip(headers, col_widths):
-                cell_width = content_width * col_w
-                x_pos -= cell_width
-                cell_rect = QRectF(x_pos, y_pos, cell_width, row_height)
-                painter.drawRect(cell_rect)
-                painter.drawText(cell_rect, Qt.AlignmentFlag.AlignCenter, header)
-            
-            y_pos += row_height
-            
-            # رسم صفوف البيانات
-            data_font = QFont("Arial")
-            data_font.setPointSize(7)
-            painter.setFont(data_font)
-            painter.setBrush(Qt.GlobalColor.white)
-            
-            for row_idx, row in enumerate(page_data, 1):
-                x_pos = margin + content_width
-                row_data = [str(row_idx)] + list(row[1:])
-                
-                for cell, col_w in zip(row_data, col_widths):
-                    cell_width = content_width * col_w
-                    x_pos -= cell_width
-                    cell_rect = QRectF(x_pos, y_pos, cell_width, row_height)
-                    painter.drawRect(cell_rect)
-                    display_text = str(cell)[:45] if len(str(cell)) > 45 else str(cell)
-                    painter.drawText(cell_rect.adjusted(2, 0, -2, 0), Qt.AlignmentFlag.AlignCenter, display_text)
-                
-                y_pos += row_height
-            
-            # ===== رقم الصفحة =====
-            page_font = QFont("Arial")
-            page_font.setPointSize(8)
-            painter.setFont(page_font)
-            page_num_text = f"صفحة {page_idx + 1} من {self._total_pages}"
-            page_rect_bottom = QRectF(margin, height - margin - (5 * px_per_mm), content_width, 5 * px_per_mm)
-            painter.drawText(page_rect_bottom, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, page_num_text)
-        
-        painter.end()
+        worker = PrintSpoolerWorker(
+            printer,
+            paint=lambda printer, report, cancelled: draw_destruction_form(
+                printer, pages, form_info, progress=report, is_cancelled=cancelled
+            )
+        )
+        worker.progress_updated.connect(lambda done, total: progress.setValue(done))
+        progress.canceled.connect(worker.cancel)
+        
+        def on_finished(success, message):
+            progress.close()
+            if not success and not worker.cancelled:
+                QMessageBox.critical(self, 'خطأ', f'حدث خطأ أثناء الطباعة:\n{message}')
+            self._print_worker = None
+        
+        worker.print_finished.connect(on_finished)
+        self._print_worker = worker
+        worker.start()
+    
+    def done(self, result):
+        """إيقاف مهمة الطباعة الجارية قبل إغلاق النافذة"""
+        if self._print_worker is not None:
+            self._print_worker.cancel()
+            self._print_worker.wait()
+        super().done(result)
+    
+    def _draw_pages_with_painter(self, printer):
+        """رسم الصفحات باستخدام QPainter للتحكم الكامل (معاينة الطباعة)"""
+        draw_destruction_form(printer, self._print_pages, self._form_info)
     
     # =========================================================================
     # وظائف التصدير
@@ -0,0 +1,194 @@
+"""
+نافذة تشخيص الأداء
+Performance Diagnostics Dialog
+
+تعرض زمن العمليات المُتتبَّعة (p50/p95) والعدادات وتصدّر التتبع بصيغة Chrome
+"""
+
+from datetime import datetime
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QCheckBox,
+    QTableWidget, QTableWidgetItem, QHeaderView, QGroupBox, QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import Qt, QTimer
+
+from .. import tracing
+from ..constants import COLORS, FONT_SIZES
+from ..ui_styles import BUTTON_STYLES
+
+
+class DiagnosticsDialog(QDialog):
+    """
+    نافذة تشخيص الأداء
+
+    - تفعيل/تعطيل التتبع أثناء التشغيل
+    - جدول زمن كل عملية: العدد، p50، p95، الأقصى، المجموع
+    - العدادات (إصابات الذاكرة المؤقتة، الصفوف، الصور...)
+    - تصدير آخر النطاقات بصيغة Chrome trace-event
+    """
+
+    REFRESH_INTERVAL_MS = 1000
+    OPERATION_COLUMNS = ['العملية', 'العدد', 'p50 (ms)', 'p95 (ms)', 'الأقصى (ms)', 'المجموع (ms)']
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('تشخيص الأداء')
+        self.setMinimumSize(760, 560)
+
+        self._init_ui()
+        self.apply_dialog_styles()
+        self.refresh()
+
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+
+    def apply_dialog_styles(self):
+        """Apply light-theme styles to this dialog"""
+        self.setStyleSheet(f"""
+            QDialog {{
+                background-color: {COLORS.BACKGROUND};
+                color: {COLORS.TEXT_PRIMARY};
+                font-size: {FONT_SIZES.BODY}px;
+                font-family: 'Segoe UI', Arial, sans-serif;
+            }}
+            QTableWidget {{
+                background-color: {COLORS.BACKGROUND_WHITE};
+                color: {COLORS.TEXT_PRIMARY};
+                border: 1px solid {COLORS.BORDER};
+            }}
+        """)
+
+    def _init_ui(self):
+        """إنشاء واجهة المستخدم"""
+        layout = QVBoxLayout()
+
+        # حالة التتبع
+        top_layout = QHBoxLayout()
+        self.enabled_check = QCheckBox('تفعيل التتبع')
+        self.enabled_check.setChecked(tracing.is_enabled())
+        self.enabled_check.toggled.connect(self._toggle_tracing)
+        top_layout.addWidget(self.enabled_check)
+        top_layout.addStretch()
+        self.status_label = QLabel()
+        top_layout.addWidget(self.status_label)
+        layout.addLayout(top_layout)
+
+        # جدول العمليات
+        operations_group = QGroupBox('زمن العمليات')
+        operations_layout = QVBoxLayout()
+        self.operations_table = QTableWidget(0, len(self.OPERATION_COLUMNS))
+        self.operations_table.setHorizontalHeaderLabels(self.OPERATION_COLUMNS)
+        self.operations_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.operations_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.operations_table.setSortingEnabled(True)
+        operations_layout.addWidget(self.operations_table)
+        operations_group.setLayout(operations_layout)
+        layout.addWidget(operations_group, 3)
+
+        # جدول العدادات
+        counters_group = QGroupBox('العدادات')
+        counters_layout = QVBoxLayout()
+        self.counters_table = QTableWidget(0, 2)
+        self.counters_table.setHorizontalHeaderLabels(['العداد', 'القيمة'])
+        self.counters_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.counters_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        counters_layout.addWidget(self.counters_table)
+        counters_group.setLayout(counters_layout)
+        layout.addWidget(counters_group, 1)
+
+        # الأزرار
+        buttons_layout = QHBoxLayout()
+        export_btn = QPushButton('💾 تصدير Chrome trace')
+        export_btn.setStyleSheet(BUTTON_STYLES['primary'])
+        export_btn.clicked.connect(self._export_trace)
+        buttons_layout.addWidget(export_btn)
+
+        reset_btn = QPushButton('🧹 مسح')
+        reset_btn.setStyleSheet(BUTTON_STYLES['danger'])
+        reset_btn.clicked.connect(self._reset)
+        buttons_layout.addWidget(reset_btn)
+
+        buttons_layout.addStretch()
+
+        close_btn = QPushButton('إغلاق')
+        close_btn.clicked.connect(self.accept)
+        buttons_layout.addWidget(close_btn)
+        layout.addLayout(buttons_layout)
+
+        self.setLayout(layout)
+
+    # =========================================================================
+    # التحديث
+    # =========================================================================
+
+    def refresh(self):
+        """تحديث الجداول من إحصاءات التتبع الحالية"""
+        stats = tracing.operation_stats()
+
+        self.operations_table.setSortingEnabled(False)
+        self.operations_table.setRowCount(len(stats))
+        for row, (name, values) in enumerate(sorted(stats.items(), key=lambda item: -item[1]['total_ms'])):
+            cells = [
+                name, values['count'], values['p50_ms'], values['p95_ms'],
+                values['max_ms'], values['total_ms']
+            ]
+            for column, value in enumerate(cells):
+                item = QTableWidgetItem()
+                if isinstance(value, float):
+                    # قيمة رقمية للترتيب الصحيح مع عرض بمنزلتين
+                    item.setData(Qt.ItemDataRole.DisplayRole, round(value, 2))
+                else:
+                    item.setData(Qt.ItemDataRole.DisplayRole, value)
+                if column:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                self.operations_table.setItem(row, column, item)
+        self.operations_table.setSortingEnabled(True)
+
+        counters = tracing.counters()
+        self.counters_table.setRowCount(len(counters))
+        for row, (name, value) in enumerate(sorted(counters.items())):
+            self.counters_table.setItem(row, 0, QTableWidgetItem(name))
+            value_item = QTableWidgetItem(str(value))
+            value_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+            self.counters_table.setItem(row, 1, value_item)
+
+        spans = len(tracing.recent_spans())
+        state = 'مفعّل' if tracing.is_enabled() else 'معطّل'
+        self.status_label.setText(f'التتبع {state} - {spans} نطاق في الذاكرة')
+
+    def _toggle_tracing(self, checked):
+        tracing.enable(checked)
+        self.refresh()
+
+    def _reset(self):
+        tracing.reset()
+        self.refresh()
+
+    def _export_trace(self):
+        """حفظ التتبع بصيغة Chrome trace-event"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, 'تصدير التتبع',
+            f'trace_{datetime.now():%Y%m%d_%H%M%S}.json',
+            'ملفات JSON (*.json)'
+        )
+        if not file_path:
+            return
+        try:
+            tracing.export_chrome_trace(file_path)
+            QMessageBox.information(
+                self, 'نجح',
+                f'تم حفظ التتبع\n{file_path}\n\nيمكن فتحه في chrome://tracing أو ui.perfetto.dev'
+            )
+        except Exception as e:
+            QMessageBox.critical(self, 'خطأ', f'فشل حفظ التتبع: {str(e)}')
+
+    def showEvent(self, event):
+        """التحديث الدوري فقط أثناء ظهور النافذة"""
+        super().showEvent(event)
+        self.refresh()
+        self._timer.start(self.REFRESH_INTERVAL_MS)
+
+    def done(self, result):
+        self._timer.stop()
+        super().done(result)
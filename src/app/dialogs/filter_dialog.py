@@ -0,0 +1,273 @@
+"""
+نافذة الفلترة المتقدمة
+Advanced Filter Dialog
+
+تجمع عدة شروط (الرقم، مدى التاريخ، مدى السنوات، الجهة، التصنيف، المادة
+القانونية، المضمون) في استعلام واحد، مع عمود جانبي يعرض عدد الوثائق لكل قيمة
+ويتحدث أثناء الكتابة والاختيار
+"""
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QPushButton,
+    QGroupBox, QFormLayout, QListWidget, QListWidgetItem
+)
+from PyQt6.QtCore import Qt, QTimer
+
+from database import DocumentQuery
+
+from ..constants import COLORS, FONT_SIZES
+from ..ui_styles import BUTTON_STYLES
+
+
+class AdvancedFilterDialog(QDialog):
+    """
+    نافذة الفلترة المتقدمة
+
+    - حقول الرقم والتاريخ والسنوات والمضمون وطريقة الترتيب
+    - قوائم الجهات والتصنيفات والمواد القانونية مع عدد الوثائق لكل قيمة
+    - الإجمالي المطابق يظهر قبل التطبيق
+    """
+
+    # تأخير تحديث الأعداد بعد آخر تعديل (ms)
+    FACET_REFRESH_DELAY = 250
+    SORT_OPTIONS = [
+        ('الأحدث إضافة', 'created', True),
+        ('تاريخ الوثيقة (الأحدث)', 'date', True),
+        ('تاريخ الوثيقة (الأقدم)', 'date', False),
+        ('المضمون', 'title', False),
+        ('الجهة', 'dept', False),
+    ]
+    FACET_LISTS = [
+        ('issuing_dept', 'جهة الإصدار', 'departments'),
+        ('doc_classification', 'التصنيف', 'classifications'),
+        ('legal_paragraph', 'المادة القانونية', 'legal_paragraphs'),
+    ]
+
+    def __init__(self, parent=None, db=None, query=None):
+        """
+        Args:
+            db: DatabaseManager
+            query: DocumentQuery الحالي (لتعبئة الحقول) أو None
+        """
+        super().__init__(parent)
+        self.db = db
+        self._pending_checked = None  # قيم مختارة من استعلام سابق قبل ملء القوائم
+        self.setWindowTitle('فلترة متقدمة')
+        self.setMinimumSize(900, 560)
+
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.timeout.connect(self.refresh_facets)
+
+        self._init_ui()
+        self.apply_dialog_styles()
+        if query is not None:
+            self._load_query(query)
+        self.refresh_facets()
+
+    def apply_dialog_styles(self):
+        """Apply light-theme styles to this dialog"""
+        self.setStyleSheet(f"""
+            QDialog {{
+                background-color: {COLORS.BACKGROUND};
+                color: {COLORS.TEXT_PRIMARY};
+                font-size: {FONT_SIZES.BODY}px;
+                font-family: 'Segoe UI', Arial, sans-serif;
+            }}
+            QLineEdit, QComboBox, QListWidget {{
+                background-color: {COLORS.BACKGROUND_WHITE};
+                color: {COLORS.TEXT_PRIMARY};
+                border: 1px solid {COLORS.BORDER};
+            }}
+        """)
+
+    def _init_ui(self):
+        """إنشاء واجهة المستخدم"""
+        layout = QVBoxLayout()
+        content_layout = QHBoxLayout()
+
+        # الشروط
+        conditions_group = QGroupBox('الشروط')
+        form = QFormLayout()
+
+        self.number_input = QLineEdit()
+        self.number_input.setPlaceholderText('رقم الوثيقة')
+        form.addRow('الرقم:', self.number_input)
+
+        date_layout = QHBoxLayout()
+        self.date_from_input = QLineEdit()
+        self.date_from_input.setPlaceholderText('من: 1-1-2023')
+        self.date_to_input = QLineEdit()
+        self.date_to_input.setPlaceholderText('إلى: 31-12-2024')
+        date_layout.addWidget(self.date_from_input)
+        date_layout.addWidget(self.date_to_input)
+        form.addRow('التاريخ:', date_layout)
+
+        years = sorted(self.db.get_years()) if self.db else []
+        year_layout = QHBoxLayout()
+        self.year_from_combo = QComboBox()
+        self.year_to_combo = QComboBox()
+        for combo in (self.year_from_combo, self.year_to_combo):
+            combo.addItem('—', None)
+            for year in years:
+                combo.addItem(year, year)
+            year_layout.addWidget(combo)
+        form.addRow('سنة المجلد:', year_layout)
+
+        self.title_input = QLineEdit()
+        self.title_input.setPlaceholderText('نص ضمن المضمون')
+        form.addRow('المضمون:', self.title_input)
+
+        self.sort_combo = QComboBox()
+        for label, _, _ in self.SORT_OPTIONS:
+            self.sort_combo.addItem(label)
+        form.addRow('الترتيب:', self.sort_combo)
+
+        self.error_label = QLabel()
+        self.error_label.setStyleSheet(f'color: {COLORS.ERROR};')
+        form.addRow(self.error_label)
+
+        conditions_group.setLayout(form)
+        content_layout.addWidget(conditions_group, 2)
+
+        # العمود الجانبي: قيم الحقول التصنيفية مع أعدادها
+        facets_layout = QVBoxLayout()
+        self.facet_lists = {}
+        for field, title, _ in self.FACET_LISTS:
+            group = QGroupBox(title)
+            group_layout = QVBoxLayout()
+            facet_list = QListWidget()
+            facet_list.itemChanged.connect(self._schedule_refresh)
+            group_layout.addWidget(facet_list)
+            group.setLayout(group_layout)
+            facets_layout.addWidget(group)
+            self.facet_lists[field] = facet_list
+        content_layout.addLayout(facets_layout, 3)
+        layout.addLayout(content_layout)
+
+        for line_edit in (self.number_input, self.date_from_input, self.date_to_input, self.title_input):
+            line_edit.textChanged.connect(self._schedule_refresh)
+        for combo in (self.year_from_combo, self.year_to_combo):
+            combo.currentIndexChanged.connect(self._schedule_refresh)
+
+        # الأزرار
+        buttons_layout = QHBoxLayout()
+        self.total_label = QLabel()
+        self.total_label.setStyleSheet('font-weight: bold;')
+        buttons_layout.addWidget(self.total_label)
+        buttons_layout.addStretch()
+
+        clear_btn = QPushButton('🧹 مسح الشروط')
+        clear_btn.clicked.connect(self.clear)
+        buttons_layout.addWidget(clear_btn)
+
+        self.apply_btn = QPushButton('✓ تطبيق')
+        self.apply_btn.setStyleSheet(BUTTON_STYLES['primary'])
+        self.apply_btn.clicked.connect(self.accept)
+        buttons_layout.addWidget(self.apply_btn)
+
+        cancel_btn = QPushButton('إلغاء')
+        cancel_btn.clicked.connect(self.reject)
+        buttons_layout.addWidget(cancel_btn)
+        layout.addLayout(buttons_layout)
+
+        self.setLayout(layout)
+
+    # =========================================================================
+    # الشروط
+    # =========================================================================
+
+    def _load_query(self, query):
+        """تعبئة الحقول من استعلام سابق"""
+        self.number_input.setText(query.number or '')
+        self.date_from_input.setText(query.date_from or '')
+        self.date_to_input.setText(query.date_to or '')
+        self.title_input.setText(query.title or '')
+        for combo, year in ((self.year_from_combo, query.year_from), (self.year_to_combo, query.year_to)):
+            index = combo.findData(year)
+            combo.setCurrentIndex(max(index, 0))
+        for index, (_, sort, descending) in enumerate(self.SORT_OPTIONS):
+            if (sort, descending) == (query.sort, query.descending):
+                self.sort_combo.setCurrentIndex(index)
+        # القيم المختارة تُعلَّم عند أول تحديث للأعداد
+        self._pending_checked = {
+            field: set(getattr(query, attribute)) for field, _, attribute in self.FACET_LISTS
+        }
+
+    def _checked_values(self, field):
+        if self._pending_checked is not None:
+            return set(self._pending_checked[field])
+        facet_list = self.facet_lists[field]
+        return {
+            facet_list.item(i).data(Qt.ItemDataRole.UserRole)
+            for i in range(facet_list.count())
+            if facet_list.item(i).checkState() == Qt.CheckState.Checked
+        }
+
+    def query(self):
+        """DocumentQuery من الحقول الحالية"""
+        _, sort, descending = self.SORT_OPTIONS[self.sort_combo.currentIndex()]
+        values = {attribute: sorted(self._checked_values(field)) for field, _, attribute in self.FACET_LISTS}
+        return DocumentQuery(
+            number=self.number_input.text(),
+            date_from=self.date_from_input.text().strip(),
+            date_to=self.date_to_input.text().strip(),
+            year_from=self.year_from_combo.currentData(),
+            year_to=self.year_to_combo.currentData(),
+            title=self.title_input.text(),
+            sort=sort,
+            descending=descending,
+            **values
+        )
+
+    def clear(self):
+        """مسح جميع الشروط"""
+        for line_edit in (self.number_input, self.date_from_input, self.date_to_input, self.title_input):
+            line_edit.clear()
+        self.year_from_combo.setCurrentIndex(0)
+        self.year_to_combo.setCurrentIndex(0)
+        self.sort_combo.setCurrentIndex(0)
+        self._pending_checked = {field: set() for field, _, _ in self.FACET_LISTS}
+        self.refresh_facets()
+
+    # =========================================================================
+    # الأعداد
+    # =========================================================================
+
+    def _schedule_refresh(self, *args):
+        self._refresh_timer.start(self.FACET_REFRESH_DELAY)
+
+    def refresh_facets(self):
+        """إعادة حساب الإجمالي وعدد كل قيمة في القوائم الجانبية"""
+        self._refresh_timer.stop()
+        checked = {field: self._checked_values(field) for field, _, _ in self.FACET_LISTS}
+        self._pending_checked = None
+        try:
+            page = self.db.query_documents(self.query(), limit=1, facets=True)
+        except ValueError as e:
+            self.error_label.setText(str(e))
+            self.apply_btn.setEnabled(False)
+            return
+        self.error_label.clear()
+        self.apply_btn.setEnabled(True)
+        self.total_label.setText(f"{page['total']} وثيقة مطابقة")
+
+        for field, facet_list in self.facet_lists.items():
+            # القيم الفارغة (NULL) لا يمكن اختيارها بشرط IN
+            counts = {value: count for value, count in page['facets'].get(field, []) if value is not None}
+            # القيم المختارة تبقى ظاهرة حتى لو لم يعد لها نتائج
+            for value in checked[field]:
+                counts.setdefault(value, 0)
+            facet_list.blockSignals(True)
+            facet_list.clear()
+            for value, count in sorted(counts.items(), key=lambda item: (-item[1], item[0] or '')):
+                item = QListWidgetItem(f"{value or '(فارغ)'}  ({count})")
+                item.setData(Qt.ItemDataRole.UserRole, value)
+                item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                item.setCheckState(Qt.CheckState.Checked if value in checked[field] else Qt.CheckState.Unchecked)
+                facet_list.addItem(item)
+            facet_list.blockSignals(False)
+
+    def done(self, result):
+        self._refresh_timer.stop()
+        super().done(result)
@@ -31,16 +31,18 @@ class ImportImagesDialog(QDialog):
     - تحليل أسماء الملفات
     """
     
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, db=None):
         """
         تهيئة النافذة
         
         Args:
             parent: النافذة الأب
+            db: مدير قاعدة البيانات (لقائمة السنوات)
         """
         super().__init__(parent)
         self.setWindowTitle('استيراد الصور')
         self.setGeometry(100, 100, 700, 500)
+        self.db = db
         self.selected_files = []
         self._init_ui()
         self.apply_dialog_styles()
@@ -163,7 +165,7 @@ class ImportImagesDialog(QDialog):
         
         if files:
             # اختيار مجلد السنة
-            year_folder = choose_year_folder(self)
+            year_folder = choose_year_folder(self, self.db)
             if not year_folder:
                 QMessageBox.warning(self, 'تنبيه', 'يجب اختيار أو إنشاء مجلد سنة')
                 return
@@ -194,7 +196,7 @@ class ImportImagesDialog(QDialog):
         
         if folder:
             # اختيار مجلد السنة
-            year_folder = choose_year_folder(self)
+            year_folder = choose_year_folder(self, self.db)
             if not year_folder:
                 QMessageBox.warning(self, 'تنبيه', 'يجب اختيار أو إنشاء مجلد سنة')
                 return
@@ -8,12 +8,13 @@ from pathlib import Path
 from PyQt6.QtWidgets import QInputDialog, QMessageBox
 
 
-def choose_year_folder(parent):
+def choose_year_folder(parent, db=None):
     """
     دالة مساعدة لعرض مجلدات السنوات الموجودة أو إنشاء مجلد سنة جديدة.
     
     Args:
         parent: النافذة الأب
+        db: مدير قاعدة البيانات (السنوات من فهرس السنة)؛ بدونه يُقرأ مجلد الوثائق
     
     Returns:
         str | None: المسار كسلسلة أو None إذا ألغاها المستخدم
@@ -21,11 +22,16 @@ def choose_year_folder(parent):
     documents_path = Path('documents')
     documents_path.mkdir(exist_ok=True)
     
-    # الحصول على قائمة السنوات الموجودة
-    years = sorted(
-        [f.name for f in documents_path.iterdir() if f.is_dir() and f.name.isdigit()],
-        reverse=True
-    )
+    # الحصول على قائمة السنوات الموجودة (السنوات المغلقة للقراءة فقط فلا تُعرض)
+    closed_years = set()
+    if db is not None:
+        closed_years = {closed[0] for closed in db.get_closed_years()}
+        years = [year for year in db.get_years() if year not in closed_years]
+    else:
+        years = sorted(
+            [f.name for f in documents_path.iterdir() if f.is_dir() and f.name.isdigit()],
+            reverse=True
+        )
     
     # عرض قائمة الاختيار
     year, ok = QInputDialog.getItem(
@@ -43,6 +49,9 @@ def choose_year_folder(parent):
     if year == 'سنة جديدة...':
         # إنشاء سنة جديدة
         new_year, ok2 = QInputDialog.getText(parent, 'سنة جديدة', 'أدخل السنة:')
+        if ok2 and new_year in closed_years:
+            QMessageBox.warning(parent, 'سنة مغلقة', f'السنة {new_year} مغلقة ولا يمكن الإضافة إليها')
+            return None
         if ok2 and new_year.isdigit():
             year_folder = documents_path / new_year
             year_folder.mkdir(exist_ok=True)
@@ -9,20 +9,30 @@ from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QScrollArea, QPushButton, QSpinBox, QComboBox, QMessageBox,
     QFileDialog, QDialog, QDialogButtonBox, QListWidget, QListWidgetItem,
-    QSplitter, QSizePolicy
+    QSplitter, QSizePolicy, QStackedWidget, QProgressDialog
 )
-from PyQt6.QtGui import QPixmap, QFont
-from PyQt6.QtCore import Qt, QSize, pyqtSlot, QTimer
+from PyQt6.QtGui import QPixmap, QFont, QIcon
+from PyQt6.QtCore import Qt, QSize, pyqtSlot, pyqtSignal
 from PyQt6.QtPrintSupport import QPrinter, QPrintDialog
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.ui_styles import COLORS
+from app.constants import APP_SETTINGS
+from app.image_loader import PageLoader, PRIORITY_VISIBLE, open_image_reader
+from app.image_cache import get_image_cache
+from app import image_pack
+from app.tiled_view import TiledImageView, MIN_ZOOM, MAX_ZOOM
+from app.pdf_writer import PdfExportWorker
+from app.print_spooler import PrintSpoolerWorker
 
 
 class DocumentViewerWindow(QMainWindow):
     """نافذة عرض الوثائق"""
     
+    # إشارة جاهزية صورة مصغرة (مسار الصورة، مسار الصورة المصغرة)
+    thumbnail_ready = pyqtSignal(str, str)
+    
     def __init__(self, document_id, document_data, images_data, parent=None):
         super().__init__(parent)
         self.document_id = document_id
@@ -38,23 +48,41 @@ class DocumentViewerWindow(QMainWindow):
             self.images_data = [{'path': p, 'notes': None} for p in self.image_paths]
         
         self.current_page = 0
-        self.image_manager = None
+        self.image_manager = getattr(parent, 'image_manager', None)
+        self.db = getattr(parent, 'db', None)
         
-        # نظام Cache للأداء السريع
-        self.image_cache = {}  # cache للصور المحملة
-        self.scaled_cache = {}  # cache للصور المُحجمة
-        self.target_width = 700  # العرض المستهدف للصور
+        # نظام Cache للأداء السريع - مشترك بين كل نوافذ العرض بميزانية بايت
+        self.image_cache = get_image_cache()
+        self.image_keys = [img.get('id') or img['path'] for img in self.images_data]
+        self.source_sizes = {}  # الأبعاد الأصلية الكاملة لكل صفحة
         self._programmatic_update = False  # علامة للتحديث البرمجي
         
+        # الأبعاد المخزنة عند الاستيراد تغني عن قراءة ترويسة الملف
+        for i, img in enumerate(self.images_data):
+            if img.get('width') and img.get('height'):
+                self.source_sizes[i] = QSize(img['width'], img['height'])
+        
         # متغيرات التكبير والتصغير
         self.zoom_factor = 1.0
-        self.original_pixmap = None
+        self.original_pixmap = None  # الصورة المعروضة (قد تكون بدقة مخفضة)
+        self._fit_pending = False  # ضبط التكبير الأولي عند وصول الصورة
+        
+        # وضع التكبير العميق (هرم بلاطات) يُنشأ عند أول تفعيل
+        self.deep_zoom = False
+        self.tiled_view = None
+        
+        # عمال التصدير الجارية (يُحتفظ بها حتى انتهائها)
+        self._export_workers = []
+        
+        # محمل الصور في الخلفية (فك ترميز بالمقاس المطلوب فقط)
+        self.loader = PageLoader(self.image_paths, self)
+        self.loader.image_ready.connect(self._on_image_loaded)
         
         # معلومات تشخيصية محدودة
         if len(self.image_paths) > 0:
             pass  # تم تحميل الصور بنجاح
         
-        self.setWindowTitle(f"عرض الوثيقة - {document_data[1]}")
+        self.setWindowTitle(f"عرض الوثيقة - {document_data.doc_name}")
         self.setGeometry(50, 50, 1400, 900)  # حجم محسن للتصميم الجديد بثلاثة أجزاء
         self.init_ui()
         
@@ -73,79 +101,22 @@ class DocumentViewerWindow(QMainWindow):
             self.display_image(0)
     
     def preload_images(self):
-        """تحميل الصور مسبقاً في الخلفية لتحسين الأداء"""
-        for i, image_path in enumerate(self.image_paths[:3]):  # تحميل أول 3 صور فقط لتوفير الذاكرة
-            if os.path.exists(image_path) and i not in self.image_cache:
-                try:
-                    pixmap = QPixmap(image_path)
-                    if not pixmap.isNull():
-                        self.image_cache[i] = pixmap
-                        # تحجيم الصورة وحفظها في الـ cache أيضاً
-                        scaled_pixmap = pixmap.scaledToWidth(
-                            self.target_width, 
-                            Qt.TransformationMode.SmoothTransformation
-                        )
-                        self.scaled_cache[i] = scaled_pixmap
-                except Exception:
-                    pass  # تجاهل الأخطاء في التحميل المسبق
+        """جلب الصفحات الأولى مسبقاً في الخلفية لتحسين الأداء"""
+        if self.image_paths:
+            self.loader.prefetch(0, 1, self._fit_target_size(), loaded=self._loaded_pages())
     
-    def get_cached_image(self, index):
-        """الحصول على صورة محجمة من الـ cache أو تحميلها"""
-        # تحقق من وجود الصورة المحجمة في الـ cache
-        if index in self.scaled_cache:
-            return self.scaled_cache[index]
-        
-        # تحقق من وجود الصورة الأصلية في الـ cache
-        if index in self.image_cache:
-            pixmap = self.image_cache[index]
-        else:
-            # تحميل الصورة من القرص
-            image_path = self.image_paths[index]
-            if not os.path.exists(image_path):
-                return None
-            
-            pixmap = QPixmap(image_path)
-            if pixmap.isNull():
-                return None
-            
-            # حفظ في الـ cache
-            self.image_cache[index] = pixmap
-        
-        # تحجيم الصورة
-        scaled_pixmap = pixmap.scaledToWidth(
-            self.target_width, 
-            Qt.TransformationMode.SmoothTransformation
-        )
-        
-        # حفظ النسخة المحجمة في الـ cache
-        self.scaled_cache[index] = scaled_pixmap
-        
-        # إدارة حجم الـ cache
-        self._manage_cache_size()
-        
-        return scaled_pixmap
+    def _fit_target_size(self):
+        """مقاس فك الترميز المناسب لملء منطقة العرض"""
+        available_size = self.scroll_area.viewport().size()
+        if available_size.width() <= 200 or available_size.height() <= 200:
+            # النافذة لم تُرسم بعد - استخدم مساحة الشاشة المتاحة
+            screen = self.screen()
+            available_size = screen.availableSize() if screen else QSize(1400, 900)
+        return QSize(max(available_size.width(), 200), max(available_size.height(), 200))
     
-    def _manage_cache_size(self):
-        """إدارة حجم الـ cache لمنع استهلاك الذاكرة المفرط"""
-        max_cache_size = 10  # أقصى عدد صور في الـ cache
-        
-        if len(self.scaled_cache) > max_cache_size:
-            # احتفظ بالصور الأقرب للصورة الحالية
-            current_index = self.current_page
-            keys_to_keep = []
-            
-            # احتفظ بالصورة الحالية والمجاورة لها
-            for i in range(max(0, current_index - 2), min(len(self.image_paths), current_index + 3)):
-                if i in self.scaled_cache:
-                    keys_to_keep.append(i)
-            
-            # احذف باقي الصور من الـ cache
-            keys_to_remove = [k for k in self.scaled_cache.keys() if k not in keys_to_keep]
-            for key in keys_to_remove[:5]:  # احذف 5 صور كحد أقصى في المرة الواحدة
-                if key in self.scaled_cache:
-                    del self.scaled_cache[key]
-                if key in self.image_cache:
-                    del self.image_cache[key]
+    def _loaded_pages(self):
+        """فهارس الصفحات الموجودة في الذاكرة المؤقتة"""
+        return {i for i, key in enumerate(self.image_keys) if self.image_cache.contains(key)}
     
     def init_ui(self):
         """إنشاء واجهة المشاهد بتصميم حديث وأنيق"""
@@ -304,6 +275,8 @@ class DocumentViewerWindow(QMainWindow):
             item.setToolTip(f"اضغط لعرض الصورة\nالمسار: {image_path}")
             self.image_list.addItem(item)
         
+        self._load_list_icons()
+        
         left_layout.addWidget(self.image_list)
         
         # أزرار الطباعة والتصدير
@@ -389,7 +362,11 @@ class DocumentViewerWindow(QMainWindow):
             "QScrollBar::handle:horizontal:hover { background-color: #2980b9; }"
         )
         
-        center_layout.addWidget(self.scroll_area)
+        # العرض العادي والتكبير العميق يتبادلان المنطقة نفسها
+        self.view_stack = QStackedWidget()
+        self.view_stack.addWidget(self.scroll_area)
+        
+        center_layout.addWidget(self.view_stack)
         center_panel.setLayout(center_layout)
         
         # الجانب الأيمن - أدوات التحكم في التكبير عمودياً
@@ -485,6 +462,20 @@ class DocumentViewerWindow(QMainWindow):
         actual_size_btn.setMinimumHeight(40)
         right_layout.addWidget(actual_size_btn)
         
+        # زر وضع التكبير العميق
+        self.deep_zoom_btn = QPushButton('🧩\nعميق')
+        self.deep_zoom_btn.setCheckable(True)
+        self.deep_zoom_btn.toggled.connect(self.toggle_deep_zoom)
+        self.deep_zoom_btn.setStyleSheet(
+            "QPushButton { padding: 8px; font-size: 12px; font-weight: bold; "
+            "background-color: #16a085; color: white; border: none; border-radius: 6px; }"
+            "QPushButton:hover { background-color: #138d75; }"
+            "QPushButton:checked { background-color: #0e6655; }"
+        )
+        self.deep_zoom_btn.setToolTip('التكبير العميق: تحميل الأجزاء الظاهرة فقط من الصفحة\n(Ctrl + عجلة الفأرة للتكبير، والسحب للتحريك)')
+        self.deep_zoom_btn.setMinimumHeight(40)
+        right_layout.addWidget(self.deep_zoom_btn)
+        
         right_layout.addStretch()  # دفع الأزرار للأعلى
         right_panel.setLayout(right_layout)
         
@@ -495,20 +486,47 @@ class DocumentViewerWindow(QMainWindow):
         
         central_widget.setLayout(main_layout)
         
-        # عرض الصورة الأولى مع تأخير قصير لضمان حساب المساحة بشكل صحيح
-        if self.image_paths:
-            # استخدام QTimer لضمان رسم النافذة أولاً
-            from PyQt6.QtCore import QTimer
-            QTimer.singleShot(100, lambda: self.display_image(0))
+    
+    def _load_list_icons(self):
+        """عرض أيقونات مصغرة في قائمة الصور (تُنشأ في الخلفية عند الحاجة)"""
+        if not self.image_manager:
+            return
+        
+        self.image_list.setIconSize(QSize(*APP_SETTINGS.ICON_SIZE))
+        self.thumbnail_ready.connect(self._on_thumbnail_ready)
+        
+        for i, image_path in enumerate(self.image_paths):
+            icon_path = self.image_manager.request_thumbnail(
+                image_path, 'icon', self._emit_thumbnail_ready,
+                digest=self.images_data[i].get('content_hash')
+            )
+            self.image_list.item(i).setIcon(QIcon(icon_path))
+    
+    def _emit_thumbnail_ready(self, image_path, size_name, thumb_path):
+        """يُستدعى من خيط الخلفية - ينقل النتيجة لخيط الواجهة عبر الإشارة"""
+        if not thumb_path:
+            return
+        try:
+            self.thumbnail_ready.emit(image_path, thumb_path)
+        except RuntimeError:
+            pass  # أُغلقت النافذة قبل جاهزية الصورة المصغرة
+    
+    def _on_thumbnail_ready(self, image_path, thumb_path):
+        """استبدال الصورة البديلة بالأيقونة الجاهزة"""
+        for i, path in enumerate(self.image_paths):
+            if path == image_path and i < self.image_list.count():
+                self.image_list.item(i).setIcon(QIcon(thumb_path))
     
     def display_image(self, index):
         """عرض الصورة في الموضع المحدد مع دعم التكبير والتصغير"""
         if 0 <= index < len(self.image_paths):
+            direction = 1 if index >= self.current_page else -1
             self.current_page = index
             image_path = self.image_paths[index]
             
             # تحميل الصورة الأصلية
-            if not os.path.exists(image_path):
+            if not image_pack.exists(image_path):
+                self.original_pixmap = None
                 self.image_label.setText(f"❌ الصورة غير موجودة:\n{os.path.basename(image_path)}")
                 self.image_label.setStyleSheet(
                     f"background-color: {COLORS.BACKGROUND_WHITE}; "
@@ -517,51 +535,133 @@ class DocumentViewerWindow(QMainWindow):
                 )
                 return
             
-            # تحميل الصورة الأصلية
-            self.original_pixmap = QPixmap(image_path)
+            # تحديث عناصر التحكم
+            self._update_controls(index)
+            
+            # تحديث معلومات الصورة
+            self._update_current_image_info(index)
+            
+            if self.deep_zoom:
+                self._show_tiled(index)
+                return
             
-            if self.original_pixmap.isNull():
-                self.image_label.setText(f"❌ فشل تحميل الصورة:\n{os.path.basename(image_path)}")
+            # إعادة تعيين التكبير لملء المساحة عند وصول الصورة
+            self._fit_pending = True
+            target_size = self._fit_target_size()
+            
+            cached = self.image_cache.get(self.image_keys[index])
+            if cached is not None:
+                self._show_image(index, cached)
+            else:
+                # فك الترميز في الخلفية بالمقاس اللازم للعرض فقط
+                self.original_pixmap = None
+                self.image_label.setPixmap(QPixmap())
+                self.image_label.setText("⏳ جاري تحميل الصورة...")
+                self.loader.request(index, target_size, PRIORITY_VISIBLE)
+            
+            # جلب الصور المجاورة مسبقاً في اتجاه التنقل
+            self.loader.prefetch(index, direction, target_size, loaded=self._loaded_pages())
+    
+    def _on_image_loaded(self, index, image, source_size):
+        """استلام صورة مفكوكة من المحمل في خيط الواجهة"""
+        if image.isNull():
+            if index == self.current_page and self.original_pixmap is None:
+                self.image_label.setText(f"❌ فشل تحميل الصورة:\n{os.path.basename(self.image_paths[index])}")
                 self.image_label.setStyleSheet(
                     f"background-color: {COLORS.BACKGROUND_WHITE}; "
                     "border: 2px dashed #e74c3c; border-radius: 8px; "
                     "color: #e74c3c; font-size: 16px; font-weight: bold;"
                 )
-                return
-            
-            # إعادة تعيين التكبير وعرض الصورة بحجم مناسب for the new longitudinal design
+            return
+        
+        if source_size.isValid():
+            self.source_sizes[index] = source_size
+        
+        # الذاكرة المؤقتة تحتفظ بأدق نسخة محملة لكل صفحة
+        self.image_cache.put(self.image_keys[index], image, owner=id(self))
+        
+        if index == self.current_page:
+            self._show_image(index, image)
+    
+    def _show_image(self, index, image):
+        """عرض صورة محملة مع ضبط التكبير الأولي عند الحاجة"""
+        if self.original_pixmap is not None and image.width() <= self.original_pixmap.width() and not self._fit_pending:
+            return
+        self.original_pixmap = QPixmap.fromImage(image)
+        
+        if self._fit_pending:
+            self._fit_pending = False
             self.zoom_factor = 1.0
             
             # حساب الحجم المناسب للعرض الأولي مع الاستفادة من المساحة الطولية الكبيرة
+            source_size = self._source_size()
             available_size = self.scroll_area.viewport().size()
             if available_size.width() > 200 and available_size.height() > 200:
                 # حساب نسبة محسنة للتكبير للاستفادة من التصميم الطولي
-                scale_x = (available_size.width() - 30) / self.original_pixmap.width()
-                scale_y = (available_size.height() - 80) / self.original_pixmap.height()
+                scale_x = (available_size.width() - 30) / source_size.width()
+                scale_y = (available_size.height() - 80) / source_size.height()
                 initial_scale = min(scale_x, scale_y, 1.5)  # السماح بالتكبير حتى 150% للاستفادة من المساحة
                 
                 if initial_scale > 0.2:  # تجنب التصغير المفرط
                     self.zoom_factor = initial_scale
-            
-            self.apply_zoom()
-            
-            # تحديث عناصر التحكم
-            self._update_controls(index)
-            
-            # تحديث معلومات الصورة
-            self._update_current_image_info(index)
-            
-            # تحديث مؤشر التكبير
-            self.update_zoom_label()
-            
-            # إصلاح تصميم الصورة
-            self.image_label.setStyleSheet(
-                "background-color: white; "
-                "border: 1px solid #bdc3c7; border-radius: 4px;"
-            )
-            
-            # تحميل الصور المجاورة في الخلفية
-            self._preload_adjacent_images(index)
+            else:
+                # النافذة لم تُرسم بعد - اعرض الصورة بالدقة التي فُكت بها
+                self.zoom_factor = image.width() / source_size.width()
+        
+        self.apply_zoom()
+        
+        # إصلاح تصميم الصورة
+        self.image_label.setStyleSheet(
+            "background-color: white; "
+            "border: 1px solid #bdc3c7; border-radius: 4px;"
+        )
+    
+    def _source_size(self):
+        """الأبعاد الأصلية الكاملة للصفحة الحالية"""
+        size = self.source_sizes.get(self.current_page)
+        if size is None or not size.isValid():
+            size = self.original_pixmap.size()
+        return size
+    
+    def toggle_deep_zoom(self, enabled):
+        """التبديل بين العرض العادي والتكبير العميق بالبلاطات"""
+        self.deep_zoom = enabled
+        if enabled:
+            if self.tiled_view is None:
+                store = self.image_manager.thumbnails if self.image_manager else None
+                self.tiled_view = TiledImageView(store)
+                self.tiled_view.zoom_changed.connect(self._on_tiled_zoom_changed)
+                self.view_stack.addWidget(self.tiled_view)
+            self.view_stack.setCurrentWidget(self.tiled_view)
+            # إيقاف الجلب المسبق للعرض العادي
+            self.loader.prefetch(self.current_page, 1, self._fit_target_size(), ahead=0, behind=0,
+                                 loaded=self._loaded_pages())
+        else:
+            self.view_stack.setCurrentWidget(self.scroll_area)
+        if self.image_paths:
+            self.display_image(self.current_page)
+    
+    def _show_tiled(self, index):
+        """عرض الصفحة في وضع التكبير العميق"""
+        image_path = self.image_paths[index]
+        source_size = self.source_sizes.get(index)
+        if source_size is None or not source_size.isValid():
+            source_size = open_image_reader(image_path).size()
+            self.source_sizes[index] = source_size
+        try:
+            if self.image_manager:
+                digest = self.image_manager.thumbnails.digest_for(image_path)
+            else:
+                digest = self.tiled_view.store.digest_for(image_path)
+        except OSError as e:
+            QMessageBox.warning(self, 'خطأ', f'تعذر قراءة الصورة:\n{e}')
+            return
+        self.tiled_view.set_image(image_path, source_size, digest)
+    
+    def _on_tiled_zoom_changed(self, zoom):
+        """مزامنة مؤشر التكبير مع عارض البلاطات"""
+        self.zoom_factor = zoom
+        self.update_zoom_label()
     
     def _update_controls(self, index):
         """تحديث عناصر التحكم بالصفحة"""
@@ -586,19 +686,25 @@ class DocumentViewerWindow(QMainWindow):
     
     def zoom_in(self):
         """تكبير الصورة مع حد أقصى محسن للتصميم الطولي"""
-        if self.original_pixmap:
-            self.zoom_factor = min(self.zoom_factor * 1.25, 8.0)  # حد أقصى 800% للاستفادة من المساحة الكبيرة
+        if self.deep_zoom:
+            self.tiled_view.zoom_by(1.25)
+        elif self.original_pixmap:
+            self.zoom_factor = min(self.zoom_factor * 1.25, MAX_ZOOM)  # حد أقصى 800% للاستفادة من المساحة الكبيرة
             self.apply_zoom()
     
     def zoom_out(self):
         """تصغير الصورة مع حد أدنى محسن"""
-        if self.original_pixmap:
-            self.zoom_factor = max(self.zoom_factor / 1.25, 0.05)  # حد أدنى 5%
+        if self.deep_zoom:
+            self.tiled_view.zoom_by(1 / 1.25)
+        elif self.original_pixmap:
+            self.zoom_factor = max(self.zoom_factor / 1.25, MIN_ZOOM)  # حد أدنى 5%
             self.apply_zoom()
     
     def fit_to_window(self):
         """ملء النافذة بالصورة مع حساب أفضل للمساحة المتاحة - محسن للتصميم الطولي"""
-        if self.original_pixmap:
+        if self.deep_zoom:
+            self.tiled_view.fit_to_window()
+        elif self.original_pixmap:
             # حساب المساحة المتاحة الفعلية في المنطقة الوسطى
             available_size = self.scroll_area.viewport().size()
             
@@ -616,23 +722,34 @@ class DocumentViewerWindow(QMainWindow):
                 available_size.setHeight(600)
             
             # حساب نسبة التكبير للاستفادة من المساحة الطولية
-            scale_x = available_size.width() / self.original_pixmap.width()
-            scale_y = available_size.height() / self.original_pixmap.height()
+            source_size = self._source_size()
+            scale_x = available_size.width() / source_size.width()
+            scale_y = available_size.height() / source_size.height()
             self.zoom_factor = min(scale_x, scale_y, 3.0)  # حد أقصى 300% للاستفادة من المساحة الكبيرة
             
             self.apply_zoom()
     
     def actual_size(self):
         """الحجم الأصلي 100%"""
-        if self.original_pixmap:
+        if self.deep_zoom:
+            self.tiled_view.set_zoom(1.0)
+        elif self.original_pixmap:
             self.zoom_factor = 1.0
             self.apply_zoom()
     
     def apply_zoom(self):
         """تطبيق التكبير على الصورة"""
         if self.original_pixmap:
-            # حساب الحجم الجديد
-            new_size = self.original_pixmap.size() * self.zoom_factor
+            # حساب الحجم الجديد نسبة للأبعاد الأصلية الكاملة
+            source_size = self._source_size()
+            new_size = source_size * self.zoom_factor
+            
+            # طلب فك ترميز أدق إذا تجاوز التكبير دقة النسخة المحملة
+            if (new_size.width() > self.original_pixmap.width() * 1.05
+                    and self.original_pixmap.width() < source_size.width()):
+                self.loader.request(
+                    self.current_page, new_size.boundedTo(source_size), PRIORITY_VISIBLE
+                )
             
             # تطبيق التكبير مع الحفاظ على الجودة
             scaled_pixmap = self.original_pixmap.scaled(
@@ -654,33 +771,18 @@ class DocumentViewerWindow(QMainWindow):
             percentage = int(self.zoom_factor * 100)
             self.zoom_label.setText(f'{percentage}%')
     
-    def _preload_adjacent_images(self, current_index):
-        """تحميل الصور المجاورة في الخلفية لتحسين التنقل"""
-        # تحميل الصورة التالية
-        if current_index + 1 < len(self.image_paths) and (current_index + 1) not in self.scaled_cache:
-            try:
-                self.get_cached_image(current_index + 1)
-            except Exception:
-                pass
-        
-        # تحميل الصورة السابقة
-        if current_index - 1 >= 0 and (current_index - 1) not in self.scaled_cache:
-            try:
-                self.get_cached_image(current_index - 1)
-            except Exception:
-                pass
-    
     def _update_current_image_info(self, index):
         """تحديث معلومات الصورة/المرفق الحالي مع عرض معلومات الوثيقة"""
         total_pages = len(self.image_paths)
         
         # إنشاء معلومات الوثيقة الأساسية بتصميم محسن ومضغوط
         doc_info_html = ""
-        if self.document_data and len(self.document_data) >= 5:
-            doc_name = self.document_data[1] if len(self.document_data) > 1 else "غير محدد"
-            doc_date = self.document_data[2] if len(self.document_data) > 2 else "غير محدد"  
-            doc_title = self.document_data[3] if len(self.document_data) > 3 else "غير محدد"
-            issuing_dept = self.document_data[4] if len(self.document_data) > 4 else "غير محدد"
+        if self.document_data:
+            doc = self.document_data
+            doc_name = doc.doc_name or "غير محدد"
+            doc_date = doc.doc_date or "غير محدد"
+            doc_title = doc.doc_title or "غير محدد"
+            issuing_dept = doc.issuing_dept or "غير محدد"
             
             doc_info_html = f"""
             <div style='background: linear-gradient(135deg, #3498db, #2980b9); padding: 6px; border-radius: 6px; margin-bottom: 6px;'>
@@ -766,53 +868,34 @@ class DocumentViewerWindow(QMainWindow):
             self.print_document(printer)
     
     def print_document(self, printer):
-        """طباعة الوثيقة على الطابعة"""
-        from PyQt6.QtGui import QPainter
-        
-        try:
-            painter = QPainter()
-            if not painter.begin(printer):
-                QMessageBox.critical(self, 'خطأ', 'فشل بدء الطباعة')
-                return
-            
-            # حجم الصفحة بالبكسل
-            page_rect = printer.pageRect(QPrinter.Unit.DevicePixel)
-            print_count = 0
-            
-            for i, image_path in enumerate(self.image_paths):
-                # تحميل الصورة
-                pixmap = QPixmap(image_path)
-                if pixmap.isNull():
-                    continue
-                
-                # رسم الصورة على الصفحة
-                painter.drawPixmap(
-                    page_rect.toRect(),
-                    pixmap.scaled(
-                        page_rect.width(),
-                        page_rect.height(),
-                        Qt.AspectRatioMode.KeepAspectRatio,
-                        Qt.TransformationMode.SmoothTransformation
-                    )
+        """طباعة الوثيقة على الطابعة في خيط خلفي بدقة الطابعة الفعلية"""
+        progress = QProgressDialog('جاري تحضير الصفحات وإرسالها إلى الطابعة...', 'إلغاء',
+                                   0, len(self.image_paths), self)
+        progress.setWindowTitle('طباعة')
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(300)
+        
+        worker = PrintSpoolerWorker(printer, self.image_paths)
+        worker.progress_updated.connect(lambda done, total: progress.setValue(done))
+        progress.canceled.connect(worker.cancel)
+        
+        def on_finished(success, message):
+            progress.close()
+            if success:
+                QMessageBox.information(
+                    self, 'نجح',
+                    f'تم طباعة {worker.page_count} صورة بنجاح'
                 )
-                
-                print_count += 1
-                
-                # الصفحة التالية (إن كانت هناك صور أخرى)
-                if i < len(self.image_paths) - 1:
-                    printer.newPage()
-            
-            painter.end()
-            
-            QMessageBox.information(
-                self, 'نجح',
-                f'تم طباعة {print_count} صورة بنجاح'
-            )
-            print(f"[PRINT] تم طباعة {print_count} صورة من {len(self.image_paths)}")
-            
-        except Exception as e:
-            QMessageBox.critical(self, 'خطأ في الطباعة', f'حدث خطأ: {str(e)}')
-            print(f"[ERROR] خطأ في الطباعة: {e}")
+                print(f"[PRINT] تم طباعة {worker.page_count} صورة من {len(self.image_paths)}")
+            elif not worker.cancelled:
+                QMessageBox.critical(self, 'خطأ في الطباعة', f'حدث خطأ: {message}')
+                print(f"[ERROR] خطأ في الطباعة: {message}")
+            self._export_workers.remove(worker)
+        
+        worker.print_finished.connect(on_finished)
+        # يُلغى ويُنتظر مع عمال التصدير عند إغلاق النافذة
+        self._export_workers.append(worker)
+        worker.start()
     
     def export_images(self):
         """استرجاع واستخراج الصور - صورة واحدة أو ملف كامل"""
@@ -850,6 +933,10 @@ class DocumentViewerWindow(QMainWindow):
         pdf_btn.clicked.connect(lambda: self.export_as_pdf(dialog))
         button_layout.addWidget(pdf_btn)
         
+        searchable_pdf_btn = QPushButton('🔎 استخراج كملف PDF قابل للبحث (OCR)')
+        searchable_pdf_btn.clicked.connect(lambda: self.export_as_pdf(dialog, searchable=True))
+        button_layout.addWidget(searchable_pdf_btn)
+        
         # زر الإغلاق
         cancel_btn = QPushButton('إلغاء')
         cancel_btn.clicked.connect(dialog.close)
@@ -873,9 +960,8 @@ class DocumentViewerWindow(QMainWindow):
         
         if file_path:
             try:
-                import shutil
                 source_path = self.image_paths[self.current_page]
-                shutil.copy2(source_path, file_path)
+                image_pack.copy_to(source_path, file_path)
                 
                 QMessageBox.information(
                     self, 'نجح',
@@ -897,14 +983,13 @@ class DocumentViewerWindow(QMainWindow):
         if output_dir:
             try:
                 from pathlib import Path
-                import shutil
                 
                 output_path = Path(output_dir)
                 count = 0
                 
                 for i, image_path in enumerate(self.image_paths):
                     dest = output_path / f'صورة_{i+1:04d}.jpg'
-                    shutil.copy2(image_path, dest)
+                    image_pack.copy_to(image_path, dest)
                     count += 1
                 
                 QMessageBox.information(
@@ -922,7 +1007,7 @@ class DocumentViewerWindow(QMainWindow):
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             'حفظ كملف ZIP',
-            f'{self.document_data[1]}.zip',
+            f'{self.document_data.doc_name}.zip',
             'ملفات ZIP (*.zip)'
         )
         
@@ -933,8 +1018,8 @@ class DocumentViewerWindow(QMainWindow):
                 
                 with zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
                     for i, image_path in enumerate(self.image_paths):
-                        zipf.write(
-                            image_path,
+                        image_pack.write_to_zip(
+                            zipf, image_path,
                             arcname=f'صورة_{i+1:04d}.jpg'
                         )
                 
@@ -946,50 +1031,62 @@ class DocumentViewerWindow(QMainWindow):
             except Exception as e:
                 QMessageBox.critical(self, 'خطأ', f'فشل إنشاء ZIP: {str(e)}')
     
-    def export_as_pdf(self, parent_dialog):
-        """استخراج كملف PDF"""
+    def export_as_pdf(self, parent_dialog, searchable=False):
+        """استخراج كملف PDF (مع طبقة نص OCR غير مرئية إذا كان searchable)"""
         parent_dialog.close()
         
         file_path, _ = QFileDialog.getSaveFileName(
             self,
             'حفظ كملف PDF',
-            f'{self.document_data[1]}.pdf',
+            f'{self.document_data.doc_name}.pdf',
             'ملفات PDF (*.pdf)'
         )
         
-        if file_path:
-            try:
-                from PIL import Image
-                
-                images = []
-                
-                # تحميل جميع الصور
-                for image_path in self.image_paths:
-                    img = Image.open(image_path).convert('RGB')
-                    images.append(img)
-                
-                # حفظ كـ PDF
-                if images:
-                    images[0].save(
-                        file_path,
-                        save_all=True,
-                        append_images=images[1:],
-                        duration=100,
-                        loop=0
-                    )
-                
-                QMessageBox.information(
-                    self, 'نجح',
-                    f'تم إنشاء ملف PDF بنجاح\n{file_path}\nعدد الصفحات: {len(images)}'
-                )
-                print(f"[EXPORT] تم إنشاء PDF: {file_path} بـ {len(images)} صفحة")
-            except ImportError:
+        if not file_path:
+            return
+        
+        ocr = None
+        if searchable:
+            from app.searchable_pdf import SearchablePdfOcr
+            ocr = SearchablePdfOcr(self.db)
+            if not ocr.is_available():
                 QMessageBox.warning(
                     self, 'تنبيه',
-                    'مكتبة Pillow غير مثبتة\nثبّتها باستخدام: pip install pillow'
+                    'محرك OCR (Tesseract) غير متاح\nسيتم إنشاء ملف PDF بالصور فقط'
                 )
-            except Exception as e:
-                QMessageBox.critical(self, 'خطأ', f'فشل إنشاء PDF: {str(e)}')
+                ocr = None
+        
+        # التصدير في خيط خلفي صفحة بصفحة (بايتات JPEG تُضمَّن دون إعادة ترميز)
+        progress = QProgressDialog(
+            'جاري التعرف على النصوص وإنشاء ملف PDF...' if ocr else 'جاري إنشاء ملف PDF...',
+            'إلغاء', 0, len(self.image_paths), self
+        )
+        progress.setWindowTitle('تصدير PDF')
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(300)
+        
+        worker = PdfExportWorker(
+            self.image_paths, file_path, title=self.document_data.doc_name, ocr=ocr,
+            content_hashes=[img.get('content_hash') for img in self.images_data]
+        )
+        worker.progress_updated.connect(lambda done, total: progress.setValue(done))
+        progress.canceled.connect(worker.cancel)
+        
+        def on_finished(success, message):
+            progress.close()
+            if success:
+                QMessageBox.information(
+                    self, 'نجح',
+                    f'تم إنشاء ملف PDF بنجاح\n{file_path}\nعدد الصفحات: {worker.page_count}'
+                )
+                print(f"[EXPORT] تم إنشاء PDF: {file_path} بـ {worker.page_count} صفحة")
+            elif not worker.cancelled:
+                QMessageBox.critical(self, 'خطأ', f'فشل إنشاء PDF: {message}')
+            self._export_workers.remove(worker)
+        
+        worker.export_finished.connect(on_finished)
+        self._export_workers.append(worker)
+        worker.start()
 
     def on_image_clicked(self, item):
         """عند النقر على صورة من القائمة - للتنقل السريع"""
@@ -1016,6 +1113,10 @@ class DocumentViewerWindow(QMainWindow):
         """استجابة لتغيير حجم النافذة لإعادة تحجيم الصورة بما يناسب المساحة الجديدة"""
         super().resizeEvent(event)
         
+        # عارض البلاطات يحافظ على التكبير بنفسه
+        if getattr(self, 'deep_zoom', False):
+            return
+        
         # إعادة تطبيق الزوم إذا كانت هناك صورة معروضة حالياً
         if hasattr(self, 'original_pixmap') and self.original_pixmap:
             # التحقق من وضع العرض الحالي ومحاولة المحافظة عليه
@@ -1029,11 +1130,21 @@ class DocumentViewerWindow(QMainWindow):
                     self.apply_zoom()
     
     def cleanup_cache(self):
-        """تنظيف الـ cache لتوفير الذاكرة"""
-        self.image_cache.clear()
-        self.scaled_cache.clear()
+        """تحرير صور هذه النافذة من الذاكرة المؤقتة المشتركة"""
+        released = self.image_cache.release(id(self))
+        self.original_pixmap = None
+        stats = self.image_cache.stats()
+        print(f"[IMAGE CACHE] تم تحرير {released // 1024} KB؛ "
+              f"المستخدم {stats['bytes'] // (1024 * 1024)}/{stats['max_bytes'] // (1024 * 1024)} MB، "
+              f"نسبة الإصابة {stats['hit_rate']:.0%}")
     
     def closeEvent(self, event):
         """عند إغلاق النافذة"""
+        self.loader.shutdown()
+        for worker in self._export_workers:
+            worker.cancel()
+            worker.wait()
+        if self.tiled_view is not None:
+            self.tiled_view.release()
         self.cleanup_cache()
         super().closeEvent(event)
\ No newline at end of file
@@ -0,0 +1,176 @@
+"""
+جامع ملفات الوثائق المحذوفة
+
+حذف الوثائق (DatabaseManager.delete_documents) معاملة واحدة تنقل صفوفها إلى
+سلة المحذوفات دون أن تلمس القرص، فيمكن التراجع عنه فوراً. بعد انتهاء مهلة
+التراجع يحجز الجامع الدفعة (فلا يمكن استعادتها بعد ذلك) ويحذف ملفات صورها
+على عدة خيوط، ثم صورها المصغرة وبلاطاتها دفعة واحدة، ثم يحذف الدفعة من السلة.
+
+الملفات التي ما زالت صورة حية أو دفعة أخرى في السلة تشير إليها لا تُحذف، ولا
+الصور المصغرة لبصمة تستعملها صورة أخرى. الدفعة التي تعذر حذف بعض ملفاتها
+(ملف مفتوح مثلاً) تبقى محجوزة ويُعاد المحاولة في التشغيل التالي.
+
+الاستخدام:
+    result = db.delete_documents([12, 13])
+    db.restore_trash(result['trash_id'])           # تراجع خلال المهلة
+    collect_garbage(db, image_manager.thumbnails)  # بعد المهلة (FileCollector دورياً)
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from . import tracing
+from .helpers import FileHelper
+
+
+def _remove_file(path):
+    """حذف ملف صورة -> (المسار، الحجم المحرر، الخطأ)"""
+    try:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return path, size, None
+    except FileNotFoundError:
+        return path, 0, None
+    except OSError as e:
+        return path, 0, str(e)
+
+
+def collect_garbage(db, thumbnails=None, workers=None, progress=None, is_cancelled=None):
+    """
+    حذف ملفات دفعات السلة المنتهية مهلتها
+
+    Args:
+        db: DatabaseManager
+        thumbnails: ThumbnailStore لحذف الصور المصغرة (None: الصور الأصلية فقط)
+        progress: دالة (المحذوف، الإجمالي) بعدد ملفات الصور
+        is_cancelled: دالة تُرجع True للتوقف بعد الدفعة الجارية
+
+    Returns:
+        dict: {'batches', 'files', 'bytes', 'thumbnails', 'errors': [(المسار، الخطأ)], 'elapsed'}
+              أو None عند الإلغاء (الدفعات المحجوزة تُكمل في التشغيل التالي)
+    """
+    started = time.perf_counter()
+    batches = [(trash_id,) + tuple(db.get_trash_files(trash_id)) for trash_id in db.claim_expired_trash()]
+    total = sum(len(paths) for _, paths, _ in batches)
+    report = {'batches': 0, 'files': 0, 'bytes': 0, 'thumbnails': 0, 'errors': []}
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=workers or FileHelper.io_workers(), thread_name_prefix='file-gc') as executor:
+        for trash_id, paths, digests in batches:
+            if is_cancelled and is_cancelled():
+                return None
+            errors = []
+            parents = set()
+            for path, size, error in executor.map(_remove_file, paths):
+                if error:
+                    errors.append((path, error))
+                else:
+                    report['files'] += 1
+                    report['bytes'] += size
+                    parents.add(os.path.dirname(path))
+                done += 1
+                if progress:
+                    progress(done, total)
+            # مجلدات الوثائق (doc_N) التي فرغت
+            for parent in parents:
+                try:
+                    os.rmdir(parent)
+                except OSError:
+                    pass
+            if thumbnails is not None and digests:
+                report['thumbnails'] += thumbnails.remove_many(digests)
+            if errors:
+                report['errors'].extend(errors)
+                continue
+            db.purge_trash(trash_id)
+            report['batches'] += 1
+
+    report['elapsed'] = time.perf_counter() - started
+    return report
+
+
+class FileGCWorker(QThread):
+    """خيط عامل يشغّل collect_garbage مرة واحدة"""
+
+    progress_updated = pyqtSignal(int, int)
+    gc_finished = pyqtSignal(bool, str)
+
+    def __init__(self, db, thumbnails=None):
+        super().__init__()
+        self.db = db
+        self.thumbnails = thumbnails
+        self.result = None
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        """تنفيذ الحذف"""
+        try:
+            with tracing.span('file_gc.collect') as span:
+                self.result = collect_garbage(
+                    self.db, self.thumbnails,
+                    progress=self.progress_updated.emit,
+                    is_cancelled=lambda: self.cancelled
+                )
+                if self.result is not None:
+                    span.set(batches=self.result['batches'], files=self.result['files'])
+            if self.result is None:
+                self.gc_finished.emit(False, 'تم إيقاف حذف الملفات')
+            else:
+                self.gc_finished.emit(True, '')
+        except Exception as e:
+            self.gc_finished.emit(False, str(e))
+
+
+class FileCollector(QObject):
+    """تشغيل FileGCWorker عند الإقلاع ثم دورياً ما دام البرنامج يعمل"""
+
+    # فترة البحث عن دفعات انتهت مهلتها (ms)
+    CHECK_INTERVAL = 10 * 60 * 1000
+
+    def __init__(self, db, thumbnails=None, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.thumbnails = thumbnails
+        self._worker = None
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.run_now)
+
+    def start(self):
+        self._timer.start(self.CHECK_INTERVAL)
+        self.run_now()
+
+    def run_now(self):
+        """تشغيل الجامع إن لم يكن يعمل"""
+        if self.is_running():
+            return False
+        self._worker = FileGCWorker(self.db, self.thumbnails)
+        self._worker.gc_finished.connect(self._on_finished)
+        self._worker.start()
+        return True
+
+    def is_running(self):
+        return self._worker is not None and self._worker.isRunning()
+
+    def _on_finished(self, success, message):
+        result = self._worker.result
+        if not success:
+            print(f"[FILE GC] {message}")
+            return
+        if result['batches'] or result['errors']:
+            print(f"[FILE GC] حُذفت {result['files']} صورة ({result['bytes'] / 1024 / 1024:.1f} MB) "
+                  f"و {result['thumbnails']} صورة مصغرة من {result['batches']} دفعة محذوفات")
+        for path, error in result['errors']:
+            print(f"[FILE GC] تعذر حذف {path}: {error}")
+
+    def stop(self, timeout=5000):
+        """إيقاف التشغيل الدوري وانتظار الدفعة الجارية"""
+        self._timer.stop()
+        if self.is_running():
+            self._worker.cancel()
+            self._worker.wait(timeout)
@@ -0,0 +1,134 @@
+"""
+لقطة الشاشة الأولى - عرض أحدث الوثائق فور الإقلاع على الأرشيفات الكبيرة
+
+عند الإغلاق تُحفظ أحدث N وثيقة (مع عدد صورها) وقائمة السنوات في ملف ثنائي
+صغير بجانب قاعدة البيانات، مع عدّاد تغييرات القاعدة في لحظة الحفظ. عند الإقلاع
+التالي يُرسم الجدول من اللقطة مباشرة إذا لم تتغير القاعدة، ثم تُقرأ بداية
+القائمة الحية في خيط خلفي وتُطابَق مع المعروض (إضافة الباقي صفحةً صفحة فقط إن
+تطابقت البداية).
+
+بنية الملف:
+    ترويسة ثابتة: MAGIC | الإصدار | عدّاد التغييرات | حجم القاعدة | حجم WAL | CRC32 | طول البيانات
+    بيانات: JSON مضغوط بـ zlib {'years': [...], 'rows': [[...الوثيقة, عدد الصور], ...]}
+    حقول الوثيقة في كل صف بترتيب DOCUMENT_FIELDS
+"""
+
+import os
+import json
+import zlib
+import struct
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from database.records import DOCUMENT_FIELDS
+
+from . import tracing
+
+
+SNAPSHOT_FILENAME = 'first_screen.snap'
+DEFAULT_SNAPSHOT_ROWS = 200
+
+_MAGIC = b'DOCSNAP\x00'
+# الإصدار 2: أعمدة الوثيقة بترتيب DOCUMENT_FIELDS بدل ترتيب SELECT *
+_VERSION = 2
+_HEADER = struct.Struct('<8sIQQQII')
+
+
+def snapshot_path(db_path):
+    """مسار ملف اللقطة بجانب قاعدة البيانات"""
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), SNAPSHOT_FILENAME)
+
+
+def snapshot_rows(documents, image_counts):
+    """صفوف اللقطة: حقول الوثيقة متبوعة بعدد صورها"""
+    return [list(doc) + [image_counts.get(doc.id, 0)] for doc in documents]
+
+
+@tracing.traced('startup.save_snapshot')
+def save_snapshot(path, db, rows, years):
+    """
+    حفظ اللقطة (كتابة ذرية عبر ملف مؤقت)
+
+    Args:
+        db: DatabaseManager (لقراءة عدّاد التغييرات)
+        rows: صفوف snapshot_rows()
+        years: قائمة نصوص السنوات كما تظهر في قائمة الاختيار
+    """
+    counter = db.change_counter()
+    if counter is None:
+        return False
+    payload = zlib.compress(
+        json.dumps({'years': list(years), 'rows': rows}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    )
+    header = _HEADER.pack(_MAGIC, _VERSION, counter[0], counter[1], counter[2], zlib.crc32(payload), len(payload))
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(temp_path, path)
+    return True
+
+
+@tracing.traced('startup.load_snapshot')
+def load_snapshot(path, db):
+    """
+    قراءة اللقطة إذا كانت سليمة ومطابقة لحالة القاعدة الحالية
+
+    Returns:
+        dict: {'years', 'rows'} أو None (غير موجودة، تالفة، أو القاعدة تغيرت بعدها)
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            magic, version, change_counter, db_size, wal_size, crc, length = _HEADER.unpack(header)
+            if magic != _MAGIC or version != _VERSION:
+                return None
+            if db.change_counter() != (change_counter, db_size, wal_size):
+                tracing.count('startup.snapshot_stale')
+                return None
+            payload = f.read(length)
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            print(f"[STARTUP] لقطة الشاشة الأولى تالفة: {path}")
+            return None
+        data = json.loads(zlib.decompress(payload).decode('utf-8'))
+        if any(len(row) != len(DOCUMENT_FIELDS) + 1 for row in data['rows']):
+            print(f"[STARTUP] أعمدة لقطة الشاشة الأولى لا تطابق الإصدار الحالي: {path}")
+            return None
+    except (OSError, ValueError, KeyError, TypeError, zlib.error) as e:
+        print(f"[STARTUP] تعذر قراءة لقطة الشاشة الأولى: {str(e)}")
+        return None
+    tracing.count('startup.snapshot_hit')
+    return data
+
+
+class LiveDocumentsWorker(QThread):
+    """
+    خيط عامل يقرأ أحدث الوثائق بعدد صفوف اللقطة وعدد صورها من القاعدة
+
+    تكفي بداية القائمة للمطابقة؛ الوثائق الأقدم تُقرأ صفحةً صفحة بعد ذلك.
+    """
+
+    load_finished = pyqtSignal(bool, str)
+
+    def __init__(self, db, head_size):
+        super().__init__()
+        self.db = db
+        self.head_size = head_size
+        self.documents = []
+        self.image_counts = {}
+        self.change_seq = 0
+
+    def run(self):
+        try:
+            with tracing.span('startup.load_live_documents', rows=self.head_size):
+                # رقم سجل التغييرات قبل القائمة حتى لا يفوت تغيير يقع بينهما
+                self.change_seq = self.db.get_change_sequence()
+                self.documents = self.db.get_recent_documents(self.head_size)
+                self.image_counts = self.db.get_image_counts([doc.id for doc in self.documents])
+            self.load_finished.emit(True, '')
+        except Exception as e:
+            self.load_finished.emit(False, str(e))
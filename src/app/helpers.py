@@ -2,10 +2,15 @@
 وحدة المساعدات والوظائف الإضافية
 """
 
+import os
+import hashlib
 from datetime import datetime
 from pathlib import Path
 
 
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
 class DateHelper:
     """مساعد معالجة التواريخ"""
     
@@ -50,6 +55,20 @@ class FileHelper:
         
         return f"{size_bytes:.2f} TB"
     
+    @staticmethod
+    def sha256_file(file_path):
+        """بصمة SHA-256 لمحتوى الملف بقراءة متدفقة"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def io_workers():
+        """عدد الخيوط الافتراضي لعمليات الملفات المتوازية (القراءة والنسخ والحذف)"""
+        return min(8, (os.cpu_count() or 2) * 2)
+    
     @staticmethod
     def is_valid_image(file_path):
         """التحقق من أن الملف صورة صحيحة"""
@@ -116,10 +135,16 @@ class ExportHelper:
     
     @staticmethod
     def export_to_csv(documents, filepath):
-        """تصدير الوثائق إلى ملف CSV"""
+        """
+        تصدير الوثائق إلى ملف CSV
+        
+        documents: أي مُكرِّر صفوف (مثل DatabaseManager.stream_documents())؛
+        يُكتب كل صف فور قراءته فلا تُحمَّل القائمة كاملة في الذاكرة
+        """
         import csv
         
         try:
+            count = 0
             with open(filepath, 'w', encoding='utf-8-sig', newline='') as f:
                 writer = csv.writer(f)
                 
@@ -132,74 +157,74 @@ class ExportHelper:
                 # البيانات
                 for doc in documents:
                     writer.writerow([
-                        doc[0], doc[1], doc[2], doc[3],
-                        doc[4], doc[5], doc[6]
+                        doc.id, doc.doc_name, doc.doc_date, doc.doc_title,
+                        doc.issuing_dept, doc.doc_classification, doc.legal_paragraph
                     ])
+                    count += 1
             
-            return True, f"تم التصدير بنجاح إلى {filepath}"
+            return True, f"تم تصدير {count} وثيقة بنجاح إلى {filepath}"
         
         except Exception as e:
             return False, f"خطأ في التصدير: {str(e)}"
     
     @staticmethod
     def export_to_json(documents, filepath):
-        """تصدير الوثائق إلى ملف JSON"""
+        """
+        تصدير الوثائق إلى ملف JSON
+        
+        documents: أي مُكرِّر صفوف؛ عناصر المصفوفة تُكتب واحداً واحداً بدل
+        بناء القائمة كاملة ثم json.dump
+        """
         import json
         
         try:
-            data = []
-            
-            for doc in documents:
-                data.append({
-                    'id': doc[0],
-                    'name': doc[1],
-                    'date': doc[2],
-                    'title': doc[3],
-                    'issuing_department': doc[4],
-                    'classification': doc[5],
-                    'legal_paragraph': doc[6],
-                    'created_date': doc[7]
-                })
-            
+            count = 0
             with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.write('[')
+                for doc in documents:
+                    item = {
+                        'id': doc.id,
+                        'name': doc.doc_name,
+                        'date': doc.doc_date,
+                        'title': doc.doc_title,
+                        'issuing_department': doc.issuing_dept,
+                        'classification': doc.doc_classification,
+                        'legal_paragraph': doc.legal_paragraph,
+                        'created_date': doc.created_date
+                    }
+                    f.write(',\n  ' if count else '\n  ')
+                    f.write(json.dumps(item, ensure_ascii=False))
+                    count += 1
+                f.write('\n]\n' if count else ']\n')
             
-            return True, f"تم التصدير بنجاح إلى {filepath}"
+            return True, f"تم تصدير {count} وثيقة بنجاح إلى {filepath}"
         
         except Exception as e:
             return False, f"خطأ في التصدير: {str(e)}"
 
 
 class DatabaseBackupHelper:
-    """مساعد النسخ الاحتياطي لقاعدة البيانات"""
+    """مساعد النسخ الاحتياطي لقاعدة البيانات (عبر database.backup)"""
     
     @staticmethod
-    def create_backup(db_path, backup_dir='backups'):
-        """إنشاء نسخة احتياطية من قاعدة البيانات"""
-        import shutil
+    def create_backup(db_path, backup_dir='backups', keep=None):
+        """إنشاء نسخة احتياطية مضغوطة من قاعدة البيانات دون إيقاف الكتابة فيها"""
+        from database import backup
         
         try:
-            backup_path = Path(backup_dir)
-            backup_path.mkdir(exist_ok=True)
-            
-            db_file = Path(db_path)
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_file = backup_path / f'backup_{timestamp}.db'
-            
-            shutil.copy2(db_file, backup_file)
-            
-            return True, f"تم إنشاء النسخة الاحتياطية: {backup_file}"
+            result = backup.create_backup(db_path, backup_dir, keep=keep or backup.DEFAULT_KEEP)
+            return True, f"تم إنشاء النسخة الاحتياطية: {result['path']}"
         
         except Exception as e:
             return False, f"خطأ في إنشاء النسخة الاحتياطية: {str(e)}"
     
     @staticmethod
     def restore_backup(backup_file, db_path):
-        """استعادة قاعدة البيانات من نسخة احتياطية"""
-        import shutil
+        """استعادة قاعدة البيانات من نسخة احتياطية بعد التحقق من بصمتها وسلامتها"""
+        from database import backup
         
         try:
-            shutil.copy2(backup_file, db_path)
+            backup.restore_backup(backup_file, db_path)
             return True, "تم استعادة قاعدة البيانات بنجاح"
         
         except Exception as e:
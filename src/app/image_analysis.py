@@ -0,0 +1,153 @@
+"""
+تحليل الصور عند الاستيراد - استخراج البيانات الوصفية بفتح واحد لكل صورة
+
+يُقرأ الملف مرة واحدة إلى الذاكرة، ومنه تُحسب بصمة المحتوى وتُقرأ ترويسة
+الصورة (الأبعاد، النمط، الصيغة، الدقة، اتجاه EXIF)، ثم يُفك ترميزها بمقياس
+مخفض لحساب البصمة الإدراكية وتوليد الصور المصغرة. يُوزَّع العمل على مجموعة
+عمليات لأنه مقيد بالمعالج (فك الترميز) لا بالقرص.
+"""
+
+import io
+import os
+import hashlib
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+from .thumbnails import THUMBNAIL_SIZES, thumbnail_path, save_thumbnails
+
+
+# حجم فك الترميز الأدنى اللازم للبصمة الإدراكية
+_PHASH_SIZE = (9, 8)
+_EXIF_ORIENTATION = 0x0112
+
+
+def perceptual_hash(img):
+    """
+    بصمة إدراكية (dHash) بطول 64 بت كنص سداسي عشري
+
+    تتشابه بصمات الصور المتقاربة بصرياً (مسح مكرر للصفحة نفسها)، ويمكن
+    مقارنتها بعدد البتات المختلفة.
+    """
+    small = img.convert('L').resize(_PHASH_SIZE, Image.Resampling.BILINEAR)
+    pixels = list(small.getdata())
+    width = _PHASH_SIZE[0]
+    bits = 0
+    for row in range(_PHASH_SIZE[1]):
+        for col in range(width - 1):
+            left = pixels[row * width + col]
+            right = pixels[row * width + col + 1]
+            bits = (bits << 1) | (1 if left > right else 0)
+    return f'{bits:016x}'
+
+
+def analyze_image(image_path, thumbnails_dir=None, thumbnail_sizes=None):
+    """
+    استخراج البيانات الوصفية لصورة واحدة بفتح واحد للملف
+
+    Args:
+        image_path: مسار الصورة
+        thumbnails_dir: مجلد الصور المصغرة (None = بدون صور مصغرة)
+        thumbnail_sizes: أسماء مقاسات الصور المصغرة المطلوب توليدها
+
+    Returns:
+        dict: width, height, color_mode, image_format, dpi_x, dpi_y,
+              orientation, file_size, content_hash, phash, thumbnails
+    """
+    with open(image_path, 'rb') as f:
+        data = f.read()
+
+    content_hash = hashlib.sha1(data).hexdigest()
+
+    with Image.open(io.BytesIO(data)) as img:
+        # الترويسة - قبل draft لأن draft يغير الأبعاد المُبلغ عنها
+        width, height = img.size
+        color_mode = img.mode
+        image_format = img.format
+        dpi = img.info.get('dpi') or (72, 72)
+        try:
+            orientation = img.getexif().get(_EXIF_ORIENTATION, 1)
+        except Exception:
+            orientation = 1
+
+        # المقاسات التي لم تُنشأ بعد فقط
+        targets = []
+        thumbnails = []
+        if thumbnails_dir:
+            for size_name in thumbnail_sizes or ():
+                path = thumbnail_path(thumbnails_dir, content_hash, size_name)
+                thumbnails.append((size_name, str(path)))
+                if not path.exists():
+                    targets.append((THUMBNAIL_SIZES[size_name], path))
+
+        # فك ترميز واحد بمقياس مخفض يكفي لأكبر صورة مصغرة وللبصمة الإدراكية
+        draft_size = max((t[0] for t in targets), key=lambda s: s[0] * s[1], default=(64, 64))
+        img.draft('RGB', draft_size)
+        img.load()
+
+        phash = perceptual_hash(img)
+        if targets:
+            save_thumbnails(img, targets)
+
+    return {
+        'width': width,
+        'height': height,
+        'color_mode': color_mode,
+        'image_format': image_format,
+        'dpi_x': int(round(float(dpi[0]))),
+        'dpi_y': int(round(float(dpi[1]))),
+        'orientation': orientation,
+        'file_size': len(data),
+        'content_hash': content_hash,
+        'phash': phash,
+        'thumbnails': thumbnails,
+    }
+
+
+def _analyze_job(args):
+    """عامل التحليل - يعمل داخل عملية منفصلة"""
+    key, image_path, thumbnails_dir, thumbnail_sizes = args
+    try:
+        return key, analyze_image(image_path, thumbnails_dir, thumbnail_sizes), None
+    except Exception as e:
+        return key, None, str(e)
+
+
+class ImageAnalysisPool:
+    """
+    مجموعة عمليات لتحليل الصور بالتوازي أثناء الاستيراد
+
+    تُرسل الصور بـ submit() فور حفظها فيتداخل التحليل مع نسخ بقية الملفات،
+    ثم تُجمع النتائج بـ results() بترتيب اكتمالها.
+    """
+
+    def __init__(self, thumbnails_dir=None, thumbnail_sizes=('icon',), workers=None):
+        self.thumbnails_dir = str(thumbnails_dir) if thumbnails_dir else None
+        self.thumbnail_sizes = tuple(thumbnail_sizes or ())
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self._executor = None
+        self._futures = []
+
+    def submit(self, key, image_path):
+        """جدولة تحليل صورة؛ key يُعاد مع النتيجة (مثلاً معرف الصورة)"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        job = (key, str(Path(image_path)), self.thumbnails_dir, self.thumbnail_sizes)
+        self._futures.append(self._executor.submit(_analyze_job, job))
+
+    def pending_count(self):
+        """عدد الصور المرسلة للتحليل"""
+        return len(self._futures)
+
+    def results(self):
+        """مُولِّد (key، البيانات الوصفية أو None، الخطأ أو None) بترتيب الاكتمال"""
+        futures, self._futures = self._futures, []
+        for future in as_completed(futures):
+            yield future.result()
+
+    def close(self):
+        """إيقاف مجموعة العمليات"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,173 @@
+"""
+ذاكرة مؤقتة مشتركة للصور المفكوكة بين جميع نوافذ العرض
+
+الميزانية بالبايت لا بعدد الصور، لأن صفحة ممسوحة بدقة 300 نقطة تشغل
+عشرات الميغابايت بينما الصورة المصغرة بضعة كيلوبايتات. الإخراج بترتيب
+الأقدم استخداماً (LRU)، والمفتاح (معرف الصورة، المقياس) حيث المقياس هو عرض
+النسخة المفكوكة. كل نافذة تُسجل كمالك لما تضيفه، وعند إغلاقها تُحرر الصور
+التي لم تعد أي نافذة أخرى تستخدمها.
+"""
+
+import threading
+from collections import OrderedDict
+
+from .settings import get_settings
+from . import tracing
+
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ImageCache:
+    """ذاكرة مؤقتة للصور (QImage) بميزانية بايت وإخراج LRU"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # (image_id, scale) -> QImage
+        self._sizes = {}               # (image_id, scale) -> bytes
+        self._owners = {}              # (image_id, scale) -> set(owner)
+        self._scales = {}              # image_id -> set(scale)
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _image_bytes(image):
+        """الحجم الفعلي للصورة في الذاكرة"""
+        return image.sizeInBytes()
+
+    def get(self, image_id, min_scale=0):
+        """
+        أدق نسخة محفوظة من الصورة بعرض لا يقل عن min_scale
+
+        Returns:
+            QImage أو None
+        """
+        with self._lock:
+            scales = [s for s in self._scales.get(image_id, ()) if s >= min_scale]
+            if not scales:
+                self.misses += 1
+                tracing.count('image_cache.miss')
+                return None
+            key = (image_id, max(scales))
+            self._entries.move_to_end(key)
+            self.hits += 1
+            tracing.count('image_cache.hit')
+            return self._entries[key]
+
+    def peek(self, image_id):
+        """أدق نسخة محفوظة دون احتسابها في إحصائيات الإصابة (للبدائل المؤقتة)"""
+        with self._lock:
+            scales = self._scales.get(image_id)
+            if not scales:
+                return None
+            return self._entries[(image_id, max(scales))]
+
+    def contains(self, image_id):
+        """هل توجد أي نسخة من الصورة (دون احتساب إصابة أو إخفاق)"""
+        with self._lock:
+            return bool(self._scales.get(image_id))
+
+    def put(self, image_id, image, owner=None):
+        """
+        إضافة نسخة مفكوكة من الصورة
+
+        تحل النسخة الأدق محل النسخ الأصغر من الصورة نفسها لأن التصغير منها
+        ممكن دائماً، وتُهمل النسخة الأصغر إذا وُجدت نسخة أدق.
+        """
+        if image is None or image.isNull():
+            return
+        scale = image.width()
+        nbytes = self._image_bytes(image)
+        with self._lock:
+            owners = set()
+            for old_scale in list(self._scales.get(image_id, ())):
+                old_key = (image_id, old_scale)
+                if old_scale >= scale:
+                    # توجد نسخة أدق - اكتفِ بتسجيل المالك
+                    if owner is not None:
+                        self._owners[old_key].add(owner)
+                    self._entries.move_to_end(old_key)
+                    return
+                owners |= self._owners.get(old_key, set())
+                self._remove(old_key)
+
+            if nbytes > self.max_bytes:
+                return  # أكبر من الميزانية كاملة
+
+            key = (image_id, scale)
+            self._entries[key] = image
+            self._sizes[key] = nbytes
+            self._owners[key] = owners | ({owner} if owner is not None else set())
+            self._scales.setdefault(image_id, set()).add(scale)
+            self.total_bytes += nbytes
+            self._evict()
+
+    def release(self, owner):
+        """تحرير الصور التي لم يعد يستخدمها أي مالك بعد إغلاق owner"""
+        with self._lock:
+            released = 0
+            for key in list(self._entries):
+                owners = self._owners[key]
+                if owner in owners:
+                    owners.discard(owner)
+                    if not owners:
+                        released += self._sizes[key]
+                        self._remove(key)
+            return released
+
+    def clear(self):
+        """إفراغ الذاكرة المؤقتة بالكامل"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._owners.clear()
+            self._scales.clear()
+            self.total_bytes = 0
+
+    def _remove(self, key):
+        """حذف مدخل واحد (يُستدعى والقفل مأخوذ)"""
+        self._entries.pop(key, None)
+        self.total_bytes -= self._sizes.pop(key, 0)
+        self._owners.pop(key, None)
+        scales = self._scales.get(key[0])
+        if scales is not None:
+            scales.discard(key[1])
+            if not scales:
+                del self._scales[key[0]]
+
+    def _evict(self):
+        """إخراج الأقدم استخداماً حتى العودة تحت الميزانية"""
+        while self.total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+            tracing.count('image_cache.eviction')
+
+    def stats(self):
+        """إحصائيات الاستخدام"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+# الذاكرة المؤقتة العامة
+_global_image_cache = None
+
+def get_image_cache():
+    """الحصول على الذاكرة المؤقتة العامة للصور"""
+    global _global_image_cache
+    if _global_image_cache is None:
+        max_mb = get_settings().get('viewer.image_cache_mb', DEFAULT_MAX_BYTES // (1024 * 1024))
+        _global_image_cache = ImageCache(int(max_mb) * 1024 * 1024)
+    return _global_image_cache
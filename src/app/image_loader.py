@@ -0,0 +1,169 @@
+"""
+محمل صفحات الوثيقة في الخلفية - فك ترميز بالمقاس المطلوب فقط
+
+يستخدم QImageReader.setScaledSize ليفك ترميز JPEG مباشرة بالدقة اللازمة
+للعرض بدل فك الصورة كاملة ثم تصغيرها، ويعمل في مجموعة خيوط خلفية ثم يسلم
+QImage لخيط الواجهة عبر إشارة. يجلب الصفحات التالية مسبقاً في اتجاه التنقل
+ويلغي الطلبات التي لم تعد مطلوبة قبل بدء تنفيذها.
+"""
+
+import os
+
+from PyQt6.QtCore import (
+    QObject, QRunnable, QThreadPool, QSize, Qt, QBuffer, QByteArray, QIODevice, pyqtSignal
+)
+from PyQt6.QtGui import QImage, QImageReader
+
+from . import image_pack
+from . import tracing
+
+
+# أولويات المهام في مجموعة الخيوط (الأعلى يُنفذ أولاً)
+PRIORITY_VISIBLE = 10
+PRIORITY_PREFETCH = 0
+
+
+def open_image_reader(image_path):
+    """
+    QImageReader للصورة من القرص، أو من ذاكرة حزمة سنتها إن كانت مختومة
+
+    الصورة المختومة تُقرأ عبر QBuffer فوق بايتاتها دون استخراجها إلى ملف.
+    """
+    if not os.path.exists(image_path):
+        pack, key = image_pack.locate(image_path)
+        if pack is not None:
+            buffer = QBuffer()
+            buffer.setData(QByteArray(pack.read(key)))
+            buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+            reader = QImageReader(buffer)
+            reader.buffer = buffer  # QImageReader لا يملك الجهاز: يبقى حياً ما بقي القارئ
+            return reader
+    return QImageReader(image_path)
+
+
+@tracing.traced('image.decode')
+def read_scaled_image(image_path, target_size=None):
+    """
+    قراءة صورة مع فك ترميزها بمقاس لا يتجاوز target_size
+
+    Returns:
+        tuple: (QImage، المقاس الأصلي الكامل QSize)
+    """
+    reader = open_image_reader(image_path)
+    source_size = reader.size()  # من الترويسة فقط دون فك الترميز
+    if target_size is not None and target_size.isValid() and source_size.isValid():
+        scaled = source_size.scaled(target_size, Qt.AspectRatioMode.KeepAspectRatio)
+        if scaled.width() < source_size.width():
+            reader.setScaledSize(scaled)
+    image = reader.read()
+    if not source_size.isValid():
+        source_size = image.size()
+    return image, source_size
+
+
+class _LoaderSignals(QObject):
+    """إشارات مهام التحميل (QRunnable لا يرث QObject)"""
+    loaded = pyqtSignal(int, QImage, QSize, object)
+
+
+class _LoadTask(QRunnable):
+    """مهمة فك ترميز صفحة واحدة"""
+
+    def __init__(self, signals, index, image_path, target_size, key):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.signals = signals
+        self.index = index
+        self.image_path = image_path
+        self.target_size = target_size
+        self.key = key
+
+    def run(self):
+        try:
+            image, source_size = read_scaled_image(self.image_path, self.target_size)
+        except Exception:
+            image, source_size = QImage(), QSize()
+        try:
+            self.signals.loaded.emit(self.index, image, source_size, self.key)
+        except RuntimeError:
+            pass  # أُغلق المحمل أثناء فك الترميز
+
+
+class PageLoader(QObject):
+    """
+    محمل صفحات وثيقة واحدة في الخلفية
+
+    الإشارة image_ready(index, QImage, source_size) تصل دائماً في خيط الواجهة.
+    """
+
+    image_ready = pyqtSignal(int, QImage, QSize)
+
+    def __init__(self, image_paths, parent=None, max_threads=2):
+        super().__init__(parent)
+        self.image_paths = list(image_paths)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._signals = _LoaderSignals()
+        self._signals.loaded.connect(self._on_loaded)
+        # المهام المجدولة أو الجارية: المفتاح (الفهرس، العرض، الارتفاع) -> المهمة
+        self._tasks = {}
+
+    def request(self, index, target_size, priority=PRIORITY_VISIBLE):
+        """جدولة فك ترميز صفحة بالمقاس المطلوب (يستبدل الطلبات الأقدم لنفس الصفحة)"""
+        if not 0 <= index < len(self.image_paths):
+            return
+        key = (index, target_size.width(), target_size.height())
+        if key in self._tasks:
+            return
+
+        # طلب جديد لنفس الصفحة يلغي ما لم يبدأ من طلباتها السابقة
+        for other_key in [k for k in self._tasks if k[0] == index]:
+            self._cancel(other_key)
+
+        task = _LoadTask(self._signals, index, self.image_paths[index], QSize(target_size), key)
+        self._tasks[key] = task
+        self.pool.start(task, priority)
+
+    def prefetch(self, current_index, direction, target_size, ahead=2, behind=1, loaded=()):
+        """
+        جلب الصفحات المجاورة مسبقاً في اتجاه التنقل وإلغاء ما خرج من النافذة
+
+        Args:
+            current_index: الصفحة المعروضة
+            direction: 1 للأمام، -1 للخلف
+            target_size: مقاس فك الترميز
+            ahead: عدد الصفحات في اتجاه التنقل
+            behind: عدد الصفحات في الاتجاه المعاكس
+            loaded: فهارس الصفحات المحملة مسبقاً (لا حاجة لجلبها)
+        """
+        direction = 1 if direction >= 0 else -1
+        wanted = [current_index + direction * step for step in range(1, ahead + 1)]
+        wanted += [current_index - direction * step for step in range(1, behind + 1)]
+        wanted = [i for i in wanted if 0 <= i < len(self.image_paths)]
+
+        # إلغاء الجلب المسبق للصفحات التي لم تعد قريبة
+        keep = set(wanted) | {current_index}
+        for key in [k for k in self._tasks if k[0] not in keep]:
+            self._cancel(key)
+
+        for index in wanted:
+            if index not in loaded:
+                self.request(index, target_size, PRIORITY_PREFETCH)
+
+    def _cancel(self, key):
+        """إلغاء مهمة لم يبدأ تنفيذها بعد (المهام الجارية تكتمل وتُهمل نتيجتها)"""
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            self.pool.tryTake(task)
+
+    def _on_loaded(self, index, image, source_size, key):
+        """استلام النتيجة في خيط الواجهة"""
+        if self._tasks.pop(key, None) is None:
+            return  # أُلغي الطلب أثناء التنفيذ
+        self.image_ready.emit(index, image, source_size)
+
+    def shutdown(self):
+        """إلغاء كل المهام المنتظرة وانتظار الجارية"""
+        self._tasks.clear()
+        self.pool.clear()
+        self.pool.waitForDone(2000)
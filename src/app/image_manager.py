@@ -2,20 +2,26 @@
 معالج الصور - دعم معالجة وتخزين الصور
 """
 
+import io
 import os
 from pathlib import Path
 from PIL import Image
 import shutil
 
+from .thumbnails import ThumbnailStore, DEFAULT_THUMBNAIL_SIZE
+from . import image_pack
+
 
 class ImageManager:
     """مدير الصور والملفات"""
     
-    def __init__(self, storage_dir='documents'):
+    def __init__(self, storage_dir='documents', thumbnails_max_bytes=None):
         self.storage_dir = Path(storage_dir).resolve()
         self.storage_dir.mkdir(exist_ok=True)
         self.thumbnails_dir = self.storage_dir / 'thumbnails'
         self.thumbnails_dir.mkdir(exist_ok=True)
+        # None: الحد المضبوط في الإعدادات (storage.thumbnails_max_mb)
+        self.thumbnails = ThumbnailStore(self.thumbnails_dir, max_bytes=thumbnails_max_bytes)
     
     def save_image(self, source_path, document_id, image_number=None, year=None):
         """
@@ -66,48 +72,67 @@ class ImageManager:
         
         dest_path = doc_dir / filename
         
-        # نسخ الملف
+        # نسخ الملف (الصور المصغرة تُنشأ لاحقاً عند أول طلب لها)
         shutil.copy2(source_path, dest_path)
         
-        # إنشاء صورة مصغرة
-        self.create_thumbnail(dest_path)
-        
         return str(dest_path.resolve())
     
-    def create_thumbnail(self, image_path, size=(150, 200)):
+    def create_thumbnail(self, image_path, size_names=None):
         """
-        إنشاء صورة مصغرة
+        إنشاء الصور المصغرة للصورة بجميع المقاسات أو المقاسات المحددة
         
         Args:
             image_path: مسار الصورة
-            size: حجم الصورة المصغرة (عرض، ارتفاع)
+            size_names: أسماء المقاسات ('icon', 'tile', 'preview')
+        
+        Returns:
+            dict: اسم المقاس -> مسار الصورة المصغرة
         """
         try:
-            image_path = Path(image_path)
-            
-            # فتح الصورة
-            img = Image.open(image_path)
-            
-            # تحويل إلى RGB إذا كانت RGBA
-            if img.mode == 'RGBA':
-                img = img.convert('RGB')
-            
-            # تغيير الحجم
-            img.thumbnail(size, Image.Resampling.LANCZOS)
-            
-            # حفظ الصورة المصغرة
-            thumb_path = self.thumbnails_dir / f'{image_path.stem}_thumb.jpg'
-            img.save(thumb_path, 'JPEG', quality=85)
-            
+            return self.thumbnails.create(image_path, size_names=size_names)
         except Exception as e:
             print(f'خطأ في إنشاء الصورة المصغرة: {e}')
+            return {}
+    
+    def get_thumbnail(self, image_path, size_name=DEFAULT_THUMBNAIL_SIZE, digest=None):
+        """الحصول على مسار الصورة المصغرة (مفهرسة ببصمة محتوى الصورة)"""
+        return self.thumbnails.get(image_path, size_name, digest)
+    
+    def request_thumbnail(self, image_path, size_name=DEFAULT_THUMBNAIL_SIZE, callback=None, digest=None):
+        """
+        طلب صورة مصغرة دون انتظار: يُعاد مسارها إن كانت جاهزة، وإلا مسار
+        صورة بديلة مع جدولة إنشائها في الخلفية واستدعاء callback عند الجاهزية
+        (digest: بصمة المحتوى المخزنة في القاعدة إن وُجدت)
+        """
+        return self.thumbnails.request(image_path, size_name, callback, digest)
     
-    def get_thumbnail(self, image_name):
-        """الحصول على مسار الصورة المصغرة"""
-        thumb_path = self.thumbnails_dir / f'{Path(image_name).stem}_thumb.jpg'
-        if thumb_path.exists():
-            return str(thumb_path)
-        return None
+    def image_exists(self, image_path):
+        """هل الصورة متاحة (ملفاً على القرص أو داخل حزمة سنة مختومة)"""
+        return image_pack.exists(image_path)
+    
+    def read_image(self, image_path):
+        """محتوى الصورة بالبايت من القرص أو من حزمة سنتها (عبر mmap)"""
+        return image_pack.read_bytes(image_path)
+    
+    def open_image(self, image_path):
+        """فتح الصورة بـ PIL دون استخراجها من حزمة سنتها إن كانت مختومة"""
+        if os.path.exists(image_path):
+            return Image.open(image_path)
+        return Image.open(io.BytesIO(self.read_image(image_path)))
+    
+    def sealed_years(self):
+        """السنوات المختومة في مجلد التخزين"""
+        return image_pack.sealed_years(self.storage_dir)
+    
+    def seal_year(self, year, db=None, progress=None, is_cancelled=None):
+        """ختم سنة مغلقة في حزمة واحدة مع صورها المصغرة (راجع image_pack.seal_year)"""
+        return image_pack.seal_year(self.storage_dir, year, self.thumbnails, db,
+                                    progress=progress, is_cancelled=is_cancelled)
+    
+    def unseal_year(self, year, progress=None, is_cancelled=None):
+        """إعادة ملفات سنة مختومة إلى مجلدها لإجراء تصحيحات"""
+        return image_pack.unseal_year(self.storage_dir, year, self.thumbnails,
+                                      progress=progress, is_cancelled=is_cancelled)
     
     def get_document_images(self, document_id):
         """الحصول على قائمة صور الوثيقة"""
@@ -128,12 +153,11 @@ class ImageManager:
         image_path = Path(image_path)
         
         if image_path.exists():
+            digest = self.thumbnails.digest_for(image_path)
             image_path.unlink()
             
-            # حذف الصورة المصغرة
-            thumb_path = self.thumbnails_dir / f'{image_path.stem}_thumb.jpg'
-            if thumb_path.exists():
-                thumb_path.unlink()
+            # حذف الصور المصغرة
+            self.thumbnails.remove(digest)
     
     def delete_document_images(self, document_id):
         """حذف جميع صور الوثيقة"""
@@ -141,18 +165,36 @@ class ImageManager:
         
         if doc_dir.exists():
             for file in doc_dir.glob('*'):
+                try:
+                    self.thumbnails.remove(self.thumbnails.digest_for(file))
+                except OSError:
+                    pass
                 file.unlink()
             doc_dir.rmdir()
     
-    def get_image_info(self, image_path):
-        """الحصول على معلومات الصورة"""
-        try:
-            img = Image.open(image_path)
+    def get_image_info(self, image_path, metadata=None):
+        """
+        الحصول على معلومات الصورة
+        
+        Args:
+            image_path: مسار الصورة
+            metadata: البيانات الوصفية المخزنة في قاعدة البيانات (إن وُجدت
+                      تُستخدم مباشرة دون فتح الملف)
+        """
+        if metadata and metadata.get('width'):
             return {
-                'size': img.size,
-                'mode': img.mode,
-                'format': img.format,
-                'dpi': img.info.get('dpi', (72, 72))
+                'size': (metadata['width'], metadata['height']),
+                'mode': metadata.get('color_mode'),
+                'format': metadata.get('image_format'),
+                'dpi': (metadata.get('dpi_x') or 72, metadata.get('dpi_y') or 72)
             }
+        try:
+            with self.open_image(image_path) as img:
+                return {
+                    'size': img.size,
+                    'mode': img.mode,
+                    'format': img.format,
+                    'dpi': img.info.get('dpi', (72, 72))
+                }
         except:
             return None
@@ -0,0 +1,497 @@
+"""
+حزم صور السنوات المختومة - ملف واحد مفهرس بدل مئات آلاف الملفات الصغيرة
+
+ختم السنة يجمع كل ملفات documents/{السنة}/ في ملف واحد documents/{السنة}.pack
+مع الصور المصغرة الموجودة لبصماتها، ثم يحذف الملفات الأصلية بعد التحقق من
+بصمة كل ملف داخل الحزمة. بنية الملف:
+
+    [ترويسة 8 بايت][بيانات الملفات متتالية ...][فهرس JSON][تذييل 24 بايت]
+
+الفهرس: {'files': {المسار النسبي: [الإزاحة، الحجم، البصمة]}،
+         'thumbnails': {'<البصمة>_<المقاس>': [الإزاحة، الحجم]}}
+والتذييل (توقيع، إزاحة الفهرس، حجمه) في آخر الملف يشير إلى أحدث فهرس. الإضافة
+إلى حزمة قائمة تكتب البيانات الجديدة ثم فهرساً وتذييلاً جديدين بعد القديمين،
+فلا يُعدَّل أي بايت مكتوب سابقاً.
+
+القراءة عبر mmap: الحزمة تُفتح مرة واحدة وتبقى مفتوحة (خريطة الحزم المفتوحة
+تُجدَّد إذا تغير الملف)، وقراءة صورة نسخ شريحة من الذاكرة دون فتح ملف أو
+استدعاء نظام. المسار المخزن في القاعدة لا يتغير: read_bytes و open_stream
+و exists تقرأ الملف من القرص إن وُجد (تصحيح بعد الختم مثلاً) وإلا من حزمة
+سنته، فيعمل العارض والطباعة والتصدير دون معرفة بالختم.
+
+الختم للسنوات المغلقة فقط (DatabaseManager.close_year) لأن وثائقها لا تتغير:
+    python maintenance.py seal-year 2019
+    python maintenance.py unseal-year 2019     # لإجراء تصحيحات
+"""
+
+import io
+import os
+import json
+import mmap
+import time
+import shutil
+import struct
+import hashlib
+import threading
+from pathlib import Path
+
+
+PACK_SUFFIX = '.pack'
+_HEADER = b'DAPACK01'
+_FOOTER_MAGIC = b'DAPKIDX1'
+_FOOTER = struct.Struct('<8sQQ')
+# محاولات حذف الحزمة بعد فك الختم (قد تكون مفتوحة في عملية أخرى لحظياً)
+_REMOVE_ATTEMPTS = 3
+
+
+def pack_path(storage_dir, year):
+    """مسار حزمة السنة بجانب مجلدها: documents/2019.pack"""
+    return os.path.join(storage_dir, f'{year}{PACK_SUFFIX}')
+
+
+def sealed_years(storage_dir):
+    """السنوات التي لها حزمة في مجلد التخزين (تصاعدياً)"""
+    try:
+        names = os.listdir(storage_dir)
+    except OSError:
+        return []
+    return sorted(
+        name[:-len(PACK_SUFFIX)] for name in names
+        if name.endswith(PACK_SUFFIX) and name[:-len(PACK_SUFFIX)].isdigit()
+    )
+
+
+class ImagePack:
+    """حزمة مفتوحة للقراءة عبر mmap (آمنة للقراءة من عدة خيوط)"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._file = open(self.path, 'rb')
+        try:
+            stat = os.fstat(self._file.fileno())
+            self.stamp = (stat.st_size, stat.st_mtime_ns)
+            if stat.st_size < len(_HEADER) + _FOOTER.size:
+                raise ValueError(f'ملف الحزمة مبتور: {self.path}')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        try:
+            self.index = self._read_index()
+        except Exception:
+            self.close()
+            raise
+        self.files = self.index['files']
+        self.thumbnails = self.index['thumbnails']
+
+    def _read_index(self):
+        if self._map[:len(_HEADER)] != _HEADER:
+            raise ValueError(f'ليس ملف حزمة صور: {self.path}')
+        magic, offset, size = _FOOTER.unpack(self._map[-_FOOTER.size:])
+        if magic != _FOOTER_MAGIC or offset + size > len(self._map) - _FOOTER.size:
+            raise ValueError(f'تذييل الحزمة تالف (كتابة لم تكتمل؟): {self.path}')
+        return json.loads(self._map[offset:offset + size])
+
+    def read(self, key):
+        """بايتات ملف بمساره النسبي داخل مجلد السنة"""
+        offset, size = self.files[key][:2]
+        return self._map[offset:offset + size]
+
+    def read_thumbnail(self, digest, size_name):
+        """بايتات صورة مصغرة محفوظة في الحزمة، أو None"""
+        entry = self.thumbnails.get(f'{digest}_{size_name}')
+        if entry is None:
+            return None
+        offset, size = entry
+        return self._map[offset:offset + size]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class PackWriter:
+    """
+    كتابة حزمة جديدة أو الإضافة إلى حزمة قائمة
+
+    لا يصبح المكتوب مرئياً للقراء إلا بعد commit (الفهرس والتذييل الجديدان)،
+    و abort يعيد الملف إلى حاله قبل الفتح.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._created = not os.path.exists(self.path)
+        if self._created:
+            self.index = {'version': 1, 'files': {}, 'thumbnails': {}}
+            self._file = open(self.path, 'w+b')
+            self._file.write(_HEADER)
+            self._start = 0
+        else:
+            pack = ImagePack(self.path)
+            self.index = pack.index
+            pack.close()
+            self._file = open(self.path, 'r+b')
+            self._start = self._file.seek(0, os.SEEK_END)
+
+    def has_file(self, key, digest):
+        entry = self.index['files'].get(key)
+        return entry is not None and entry[2] == digest
+
+    def has_thumbnail(self, digest, size_name):
+        return f'{digest}_{size_name}' in self.index['thumbnails']
+
+    def _append(self, data):
+        offset = self._file.tell()
+        self._file.write(data)
+        return offset
+
+    def add_file(self, key, data, digest):
+        self.index['files'][key] = [self._append(data), len(data), digest]
+
+    def add_thumbnail(self, digest, size_name, data):
+        self.index['thumbnails'][f'{digest}_{size_name}'] = [self._append(data), len(data)]
+
+    def commit(self):
+        """كتابة الفهرس والتذييل ثم fsync"""
+        self.index['updated'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        data = json.dumps(self.index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        offset = self._append(data)
+        self._file.write(_FOOTER.pack(_FOOTER_MAGIC, offset, len(data)))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        release(self.path)
+
+    def abort(self):
+        """التراجع عن كل ما كُتب منذ الفتح"""
+        if self._created:
+            self._file.close()
+            os.remove(self.path)
+        else:
+            self._file.truncate(self._start)
+            self._file.close()
+
+
+# ----------------------------------------------------------------------
+# الحزم المفتوحة للقراءة
+# ----------------------------------------------------------------------
+
+_packs = {}
+_packs_lock = threading.Lock()
+
+
+def get_pack(path):
+    """الحزمة المفتوحة لملف (تُفتح مرة وتُعاد فتحها إذا تغير الملف)، أو None"""
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        release(path)
+        return None
+    with _packs_lock:
+        pack = _packs.get(path)
+        if pack is not None and pack.stamp == (stat.st_size, stat.st_mtime_ns):
+            return pack
+        try:
+            _packs[path] = ImagePack(path)
+        except (OSError, ValueError) as e:
+            print(f"[PACK ERROR] تعذر فتح {path}: {e}")
+            _packs.pop(path, None)
+            return None
+        # الحزمة القديمة قد تكون قيد القراءة في خيط آخر: تُغلق عند تحريرها
+        return _packs[path]
+
+
+def release(path):
+    """إغلاق حزمة مفتوحة (قبل حذف ملفها أو استبداله)"""
+    with _packs_lock:
+        pack = _packs.pop(os.path.abspath(path), None)
+    if pack is not None:
+        pack.close()
+
+
+def locate(image_path):
+    """
+    الحزمة التي تحتوي صورة بمسارها الأصلي documents/{السنة}/...
+
+    Returns:
+        tuple: (ImagePack، المسار النسبي) أو (None، None)
+    """
+    path = Path(os.path.abspath(image_path))
+    for parent in path.parents:
+        if not parent.name.isdigit():
+            continue
+        pack = get_pack(parent.parent / f'{parent.name}{PACK_SUFFIX}')
+        if pack is None:
+            continue
+        key = path.relative_to(parent).as_posix()
+        if key in pack.files:
+            return pack, key
+        return None, None
+    return None, None
+
+
+def exists(image_path):
+    """هل الصورة متاحة (على القرص أو في حزمة سنتها)"""
+    return os.path.exists(image_path) or locate(image_path)[0] is not None
+
+
+def read_bytes(image_path):
+    """محتوى الصورة من القرص أو من حزمة سنتها (FileNotFoundError إن لم توجد)"""
+    try:
+        with open(image_path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        pack, key = locate(image_path)
+        if pack is None:
+            raise
+        return pack.read(key)
+
+
+def open_stream(image_path):
+    """ملف ثنائي للقراءة (لـ PIL وما شابه): الملف نفسه أو BytesIO من الحزمة"""
+    try:
+        return open(image_path, 'rb')
+    except FileNotFoundError:
+        pack, key = locate(image_path)
+        if pack is None:
+            raise
+        return io.BytesIO(pack.read(key))
+
+
+def copy_to(image_path, dest):
+    """نسخ الصورة إلى ملف خارج الأرشيف (من القرص أو من حزمة سنتها)"""
+    if os.path.exists(image_path):
+        return shutil.copy2(image_path, dest)
+    pack, key = locate(image_path)
+    if pack is None:
+        raise FileNotFoundError(image_path)
+    with open(dest, 'wb') as f:
+        f.write(pack.read(key))
+    return dest
+
+
+def write_to_zip(zipf, image_path, arcname, compress_type=None):
+    """إضافة الصورة إلى ZipFile مفتوح (من القرص أو من حزمة سنتها)"""
+    if os.path.exists(image_path):
+        zipf.write(image_path, arcname=arcname, compress_type=compress_type)
+        return
+    pack, key = locate(image_path)
+    if pack is None:
+        raise FileNotFoundError(image_path)
+    zipf.writestr(arcname, pack.read(key), compress_type=compress_type)
+
+
+def file_size(image_path):
+    """حجم الصورة بالبايت (FileNotFoundError إن لم توجد)"""
+    try:
+        return os.stat(image_path).st_size
+    except FileNotFoundError:
+        pack, key = locate(image_path)
+        if pack is None:
+            raise
+        return pack.files[key][1]
+
+
+def stored_digest(image_path):
+    """بصمة SHA-1 المحفوظة في الحزمة لصورة مختومة، أو None"""
+    pack, key = locate(image_path)
+    return pack.files[key][2] if pack is not None else None
+
+
+def read_thumbnail(image_path, digest, size_name):
+    """صورة مصغرة محفوظة في حزمة سنة الصورة، أو None"""
+    pack, key = locate(image_path)
+    return pack.read_thumbnail(digest, size_name) if pack is not None else None
+
+
+# ----------------------------------------------------------------------
+# الختم وفك الختم
+# ----------------------------------------------------------------------
+
+def _iter_year_files(year_dir):
+    """(المسار النسبي، المسار الكامل) لكل ملفات مجلد السنة"""
+    for dirpath, dirnames, filenames in os.walk(year_dir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            yield Path(os.path.relpath(path, year_dir)).as_posix(), path
+
+
+def _remove_empty_dirs(root):
+    """حذف المجلدات الفارغة من الأعمق إلى الجذر (الجذر نفسه إن فرغ)"""
+    for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+        try:
+            os.rmdir(dirpath)
+        except OSError:
+            pass
+
+
+def seal_year(storage_dir, year, thumbnails=None, db=None, progress=None, is_cancelled=None):
+    """
+    ختم سنة: نقل ملفاتها وصورها المصغرة إلى حزمتها ثم حذف الأصول
+
+    الختم مرة ثانية يضيف إلى الحزمة ما ظهر على القرص بعد الختم الأول فقط.
+
+    Args:
+        storage_dir: مجلد تخزين الوثائق
+        year: السنة
+        thumbnails: ThumbnailStore لتضمين الصور المصغرة الموجودة (None: بدونها)
+        db: DatabaseManager للتحقق من أن السنة مغلقة (None: بلا تحقق)
+        progress: دالة (المعالَج، الإجمالي) بعدد الملفات
+        is_cancelled: دالة تُرجع True للتوقف (الحزمة تعود كما كانت)
+
+    Raises:
+        ValueError: السنة غير مغلقة، أو لا ملفات لها، أو فشل التحقق من الحزمة
+
+    Returns:
+        dict: {'year', 'path', 'files', 'thumbnails', 'bytes', 'removed',
+               'errors': [(المسار، الخطأ)], 'elapsed'} أو None عند الإلغاء
+    """
+    started = time.perf_counter()
+    year = str(year)
+    if db is not None and year not in {closed[0] for closed in db.get_closed_years()}:
+        raise ValueError(f'السنة {year} غير مغلقة؛ يجب إغلاقها قبل الختم (close-year)')
+
+    year_dir = os.path.join(storage_dir, year)
+    files = list(_iter_year_files(year_dir)) if os.path.isdir(year_dir) else []
+    path = pack_path(storage_dir, year)
+    if not files:
+        if os.path.exists(path):
+            return {'year': year, 'path': path, 'files': 0, 'thumbnails': 0, 'bytes': 0,
+                    'removed': 0, 'errors': [], 'elapsed': time.perf_counter() - started}
+        raise ValueError(f'لا توجد ملفات للسنة {year} في {year_dir}')
+
+    report = {'year': year, 'path': path, 'files': 0, 'thumbnails': 0, 'bytes': 0,
+              'removed': 0, 'errors': []}
+    written = []
+    writer = PackWriter(path)
+    try:
+        for done, (key, file_path) in enumerate(files, start=1):
+            if is_cancelled and is_cancelled():
+                writer.abort()
+                return None
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha1(data).hexdigest()
+            if not writer.has_file(key, digest):
+                writer.add_file(key, data, digest)
+                report['files'] += 1
+                report['bytes'] += len(data)
+            written.append((key, digest, file_path))
+
+            if thumbnails is not None:
+                for size_name in thumbnails.sizes:
+                    if writer.has_thumbnail(digest, size_name):
+                        continue
+                    try:
+                        with open(thumbnails.path_for(digest, size_name), 'rb') as f:
+                            writer.add_thumbnail(digest, size_name, f.read())
+                        report['thumbnails'] += 1
+                    except FileNotFoundError:
+                        pass
+            if progress:
+                progress(done, len(files))
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit()
+
+    # لا يُحذف أي أصل قبل التحقق من بصمته داخل الحزمة كما كُتبت على القرص
+    pack = ImagePack(path)
+    try:
+        for key, digest, file_path in written:
+            if hashlib.sha1(pack.read(key)).hexdigest() != digest:
+                raise ValueError(f'فشل التحقق من {key} داخل الحزمة؛ لم يُحذف أي ملف')
+    finally:
+        pack.close()
+
+    for key, digest, file_path in written:
+        try:
+            os.remove(file_path)
+            report['removed'] += 1
+        except OSError as e:
+            report['errors'].append((file_path, str(e)))
+    _remove_empty_dirs(year_dir)
+
+    report['elapsed'] = time.perf_counter() - started
+    return report
+
+
+def unseal_year(storage_dir, year, thumbnails=None, progress=None, is_cancelled=None):
+    """
+    فك ختم سنة: إعادة ملفاتها من الحزمة إلى مجلدها ثم حذف الحزمة
+
+    الملفات الموجودة على القرص (تصحيحات بعد الختم) لا تُستبدل.
+
+    Args:
+        thumbnails: ThumbnailStore لإعادة الصور المصغرة الناقصة إلى المخزن
+        progress: دالة (المعالَج، الإجمالي) بعدد الملفات
+        is_cancelled: دالة تُرجع True للتوقف (الحزمة تبقى والقراءة تعمل كما كانت)
+
+    Raises:
+        ValueError: السنة غير مختومة
+
+    Returns:
+        dict: {'year', 'files', 'thumbnails', 'bytes', 'elapsed'} أو None عند الإلغاء،
+              ومعه 'pack_error' إذا تعذر حذف الحزمة بعد الاستخراج (ملف مفتوح)
+    """
+    started = time.perf_counter()
+    year = str(year)
+    path = pack_path(storage_dir, year)
+    if not os.path.exists(path):
+        raise ValueError(f'السنة {year} غير مختومة')
+
+    year_dir = os.path.join(storage_dir, year)
+    report = {'year': year, 'files': 0, 'thumbnails': 0, 'bytes': 0}
+    pack = ImagePack(path)
+    try:
+        total = len(pack.files)
+        for done, key in enumerate(sorted(pack.files), start=1):
+            if is_cancelled and is_cancelled():
+                return None
+            target = os.path.join(year_dir, *key.split('/'))
+            if not os.path.exists(target):
+                data = pack.read(key)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                # الكتابة في ملف مؤقت ثم الاستبدال لتفادي صور مبتورة
+                tmp_path = f'{target}.{os.getpid()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, target)
+                report['files'] += 1
+                report['bytes'] += len(data)
+            if progress:
+                progress(done, total)
+
+        if thumbnails is not None:
+            restored = []
+            for name, (offset, size) in pack.thumbnails.items():
+                digest, size_name = name.split('_', 1)
+                if size_name not in thumbnails.sizes:
+                    continue
+                target = thumbnails.path_for(digest, size_name)
+                if target.exists():
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(pack.read_thumbnail(digest, size_name))
+                restored.append((digest, size_name, target))
+            thumbnails.register(restored)
+            report['thumbnails'] = len(restored)
+    finally:
+        pack.close()
+
+    # على Windows لا يُحذف ملف ما زالت عملية أخرى (البرنامج المفتوح) تربطه بـ mmap.
+    # الملفات استُخرجت كلها والقرص مقدَّم على الحزمة، فبقاؤها لا يضر
+    release(path)
+    for attempt in range(_REMOVE_ATTEMPTS):
+        try:
+            os.remove(path)
+            break
+        except OSError as e:
+            if attempt == _REMOVE_ATTEMPTS - 1:
+                report['pack_error'] = str(e)
+            else:
+                time.sleep(0.5)
+    report['elapsed'] = time.perf_counter() - started
+    return report
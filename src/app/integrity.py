@@ -0,0 +1,201 @@
+"""
+فحص سلامة الأرشيف - مطابقة جدول الصور مع مجلد التخزين وكشف تلف الملفات
+
+يكشف الفحص:
+- الصفوف التي لا يوجد ملفها (missing)
+- صفوف صور وثيقتها محذوفة (dangling)
+- ملفات صور في مجلد التخزين لا يشير إليها أي صف (orphans)
+- ملفات تغيرت بصمتها عن البصمة المخزنة عند الاستيراد (hash_mismatch - تلف صامت)
+- صور لا يمكن فك ترميزها (corrupt)
+- صور بلا صورة مصغرة في المخزن (thumbnail_gaps)
+
+وجود الملفات وأحجامها يُفحص لكل الصور في كل تشغيل (stat فقط)، أما القراءة الكاملة
+وحساب البصمة وفك الترميز فتتخطى الصور السليمة التي فُحصت خلال max_age_days يوماً،
+فيمكن تشغيله ليلياً ويغطي الأرشيف كله على دورات. نتيجة كل صورة تُحفظ في جدول
+integrity_checks على دفعات، فلا يضيع ما فُحص إذا توقف التشغيل. الصور التي لا
+بصمة لها تُحفظ بصمتها في أول فحص لتكون مرجعاً لما بعده. صور السنوات المختومة
+تُقرأ من حزمة سنتها (image_pack) بنفس المسار المخزن.
+"""
+
+import io
+import os
+import time
+import hashlib
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from .thumbnails import DEFAULT_THUMBNAIL_SIZE, IMAGE_EXTENSIONS, thumbnail_path
+from . import image_pack
+from .helpers import FileHelper
+
+
+# عدد الصور في كل دفعة (نتائجها تُحفظ في معاملة واحدة)
+BATCH_SIZE = 500
+# فك الترميز بمقياس مخفض يكفي لكشف البيانات المبتورة أو التالفة
+_DECODE_DRAFT_SIZE = (256, 256)
+
+
+def _normalize(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def check_image(image_path, expected_hash=None, decode=True):
+    """
+    قراءة صورة كاملة وحساب بصمتها (SHA-1 كما في analyze_image) وفك ترميزها
+
+    Returns:
+        tuple: (الحالة، التفاصيل، البصمة، الحجم) - الحالة 'ok' أو 'missing'
+               أو 'hash_mismatch' أو 'corrupt'
+    """
+    try:
+        data = image_pack.read_bytes(image_path)
+    except FileNotFoundError:
+        return 'missing', None, None, None
+    except OSError as e:
+        return 'corrupt', str(e), None, None
+
+    digest = hashlib.sha1(data).hexdigest()
+    if expected_hash and digest != expected_hash:
+        return 'hash_mismatch', f'{expected_hash} -> {digest}', digest, len(data)
+    if decode:
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                img.draft('RGB', _DECODE_DRAFT_SIZE)
+                img.load()
+        except Exception as e:
+            return 'corrupt', str(e) or type(e).__name__, digest, len(data)
+    return 'ok', None, digest, len(data)
+
+
+def iter_storage_images(storage_dir, thumbnails_dir):
+    """ملفات الصور في مجلد التخزين دون مجلد الصور المصغرة (مسارات مطبّعة)"""
+    thumbnails_dir = _normalize(thumbnails_dir)
+    for dirpath, dirnames, filenames in os.walk(storage_dir):
+        if _normalize(dirpath) == thumbnails_dir:
+            dirnames[:] = []
+            continue
+        for filename in filenames:
+            if os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS:
+                yield _normalize(os.path.join(dirpath, filename))
+
+
+def check_archive(db, storage_dir='documents', thumbnails_dir=None, max_age_days=None,
+                  decode=True, thumbnail_sizes=(DEFAULT_THUMBNAIL_SIZE,), orphans=True,
+                  workers=None, progress=None, is_cancelled=None):
+    """
+    فحص سلامة الأرشيف كاملاً
+
+    Args:
+        db: DatabaseManager
+        storage_dir: مجلد تخزين الوثائق
+        thumbnails_dir: مجلد الصور المصغرة (الافتراضي: storage_dir/thumbnails)
+        max_age_days: تخطي القراءة الكاملة للصور السليمة المفحوصة خلال هذه المدة
+                      (None: قراءة كل الصور)
+        decode: فك ترميز كل صورة تُقرأ (أبطأ من البصمة وحدها)
+        thumbnail_sizes: مقاسات الصور المصغرة المطلوب وجودها (فارغ: بلا فحص)
+        orphans: البحث عن ملفات لا يشير إليها أي صف
+        progress: دالة (المفحوص، الإجمالي) بعدد الصور
+        is_cancelled: دالة تُرجع True لإيقاف الفحص (ما فُحص يبقى محفوظاً)
+
+    Returns:
+        dict: {'images', 'verified', 'skipped', 'hashes_recorded', 'cancelled', 'elapsed',
+               'missing': [(id, المسار)], 'dangling': [(id, معرف الوثيقة، المسار)],
+               'hash_mismatch': [(id, المسار، التفاصيل)], 'corrupt': [(id, المسار، الخطأ)],
+               'thumbnail_gaps': [(id, المسار، المقاس)], 'orphans': [المسار]}
+    """
+    started = time.perf_counter()
+    thumbnails_dir = thumbnails_dir or os.path.join(storage_dir, 'thumbnails')
+    thumbnail_sizes = tuple(thumbnail_sizes or ())
+    cutoff = None
+    if max_age_days:
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).strftime('%Y-%m-%d %H:%M:%S')
+
+    report = {
+        'images': 0, 'verified': 0, 'skipped': 0, 'hashes_recorded': 0, 'cancelled': False,
+        'missing': [], 'dangling': [], 'hash_mismatch': [], 'corrupt': [],
+        'thumbnail_gaps': [], 'orphans': [],
+    }
+    referenced = set()
+    total = sum(db.get_image_counts().values())
+
+    def inspect(record):
+        # الصور السليمة المفحوصة حديثاً: وجود الملف وحجمه فقط، وتغيّر الحجم يستدعي القراءة
+        deep = cutoff is None or record.status != 'ok' or (record.checked_date or '') < cutoff
+        status, detail, digest, size = 'ok', None, record.content_hash, None
+        if not deep:
+            try:
+                file_size = image_pack.file_size(record.image_path)
+                deep = record.file_size is not None and file_size != record.file_size
+            except OSError:
+                status = 'missing'
+        if deep:
+            status, detail, digest, size = check_image(record.image_path, record.content_hash, decode)
+        gaps = []
+        if status != 'missing' and digest:
+            gaps = [
+                size_name for size_name in thumbnail_sizes
+                if not thumbnail_path(thumbnails_dir, digest, size_name).exists()
+                and image_pack.read_thumbnail(record.image_path, digest, size_name) is None
+            ]
+        return record, deep, status, detail, digest, size, gaps
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers or FileHelper.io_workers(),
+                            thread_name_prefix='integrity') as executor:
+        for batch in db.iter_integrity_targets(BATCH_SIZE):
+            if is_cancelled and is_cancelled():
+                report['cancelled'] = True
+                break
+            results = []
+            new_hashes = []
+            for record, deep, status, detail, digest, size, gaps in executor.map(inspect, batch):
+                report['images'] += 1
+                if orphans:
+                    referenced.add(_normalize(record.image_path))
+                if not record.has_document:
+                    report['dangling'].append((record.id, record.document_id, record.image_path))
+                if status == 'missing':
+                    report['missing'].append((record.id, record.image_path))
+                elif status == 'hash_mismatch':
+                    report['hash_mismatch'].append((record.id, record.image_path, detail))
+                elif status == 'corrupt':
+                    report['corrupt'].append((record.id, record.image_path, detail))
+                for size_name in gaps:
+                    report['thumbnail_gaps'].append((record.id, record.image_path, size_name))
+
+                if deep:
+                    report['verified'] += 1
+                    # بصمة مرجعية فقط لملف سليم؛ التالف لا يصلح مرجعاً
+                    if digest and not record.content_hash and status == 'ok':
+                        new_hashes.append((record.id, digest, size))
+                else:
+                    report['skipped'] += 1
+                # الفحص السطحي لا يجدد تاريخ الفحص الكامل إلا إذا اختفى الملف
+                if deep or status == 'missing':
+                    results.append((record.id, status, detail))
+            db.save_integrity_results(results, new_hashes)
+            report['hashes_recorded'] += len(new_hashes)
+            done += len(batch)
+            if progress:
+                progress(done, total)
+
+    # نتائج صور حُذفت (مرة واحدة بعد المرور الكامل)
+    if not report['cancelled']:
+        db.prune_integrity_checks()
+
+    # الملفات اليتيمة تُحسب فقط بعد المرور على كل الصفوف
+    if orphans and not report['cancelled'] and os.path.isdir(storage_dir):
+        report['orphans'] = sorted(
+            path for path in iter_storage_images(storage_dir, thumbnails_dir)
+            if path not in referenced
+        )
+
+    report['elapsed'] = time.perf_counter() - started
+    return report
+
+
+def has_problems(report):
+    """هل في التقرير مشكلات تستدعي التدخل (الصور المصغرة الناقصة تُعاد بناؤها تلقائياً)"""
+    return any(report[key] for key in ('missing', 'dangling', 'hash_mismatch', 'corrupt', 'orphans'))
@@ -1,6 +1,9 @@
 import re
 import os
 
+from . import image_pack
+from . import tracing
+
 # محاولة استخدام pytesseract (أخف وأسرع)
 try:
     import pytesseract
@@ -87,14 +90,16 @@ class OCRExtractor:
         except Exception as e:
             return Image.open(image_path)
     
+    @tracing.traced('ocr.extract_text')
     def extract_text(self, image_path):
         """استخراج النصوص من الصورة - محاولة عدة طرق"""
         if not self.reader:
             return None
         # محاولة سريعة أولاً: معالجة خفيفة ونص سريع
         try:
-            img_fast = self._preprocess_image_v2(image_path)
-            fast_text = pytesseract.image_to_string(img_fast, config='--oem 3 --psm 6 -l ara+eng')
+            with tracing.span('ocr.pass', config='fast'):
+                img_fast = self._preprocess_image_v2(image_path)
+                fast_text = pytesseract.image_to_string(img_fast, config='--oem 3 --psm 6 -l ara+eng')
             if fast_text:
                 # إذا وجدنا كلمة الموضوع مباشرة فانسداد مبكر
                 if 'الموضوع' in fast_text or 'موضوع' in fast_text:
@@ -116,8 +121,9 @@ class OCRExtractor:
 
         for config, preprocess_func in configs:
             try:
-                img = preprocess_func(image_path)
-                text = pytesseract.image_to_string(img, config=config)
+                with tracing.span('ocr.pass', config=config):
+                    img = preprocess_func(image_path)
+                    text = pytesseract.image_to_string(img, config=config)
                 arabic_count = len(re.findall(r'[\u0600-\u06FF]', text))
                 has_subject = 'الموضوع' in text or 'موضوع' in text
 
@@ -131,6 +137,34 @@ class OCRExtractor:
 
         return best_text if best_text else None
     
+    @tracing.traced('ocr.extract_words')
+    def extract_words(self, image_path, language='ara+eng'):
+        """
+        استخراج الكلمات مع مواضعها بإحداثيات بكسلات الصورة الأصلية
+
+        Returns:
+            dict: {'size': [العرض، الارتفاع]، 'words': [[النص، يسار، أعلى، عرض، ارتفاع]، ...]}
+                  أو None إذا لم يكن OCR متاحاً
+        """
+        if not self.reader:
+            return None
+        with image_pack.open_stream(image_path) as source, Image.open(source) as img:
+            size = list(img.size)
+            # تدرج الرمادي دون تغيير المقاس حتى تطابق المواضع الصورة الأصلية
+            gray = img.convert('L')
+        data = pytesseract.image_to_data(
+            gray, config=f'--oem 3 --psm 3 -l {language}',
+            output_type=pytesseract.Output.DICT
+        )
+        words = []
+        for i, text in enumerate(data['text']):
+            text = (text or '').strip()
+            # الصفوف ذات الثقة -1 عناوين كتل وأسطر وليست كلمات
+            if not text or float(data['conf'][i]) < 0:
+                continue
+            words.append([text, data['left'][i], data['top'][i], data['width'][i], data['height'][i]])
+        return {'size': size, 'words': words}
+
     def extract_document_info(self, image_path):
         """استخراج معلومات الوثيقة من الصورة"""
         text = self.extract_text(image_path)
@@ -0,0 +1,396 @@
+"""
+كاتب PDF متدفق - صفحة بعد صفحة وبذاكرة ثابتة
+
+تُكتب كل صفحة إلى الملف فور تجهيزها ولا يبقى في الذاكرة إلا مواضع الكائنات
+(للجدول المرجعي xref). صور JPEG تُضمَّن كما هي (DCTDecode) بنسخ بايتاتها
+على دفعات دون فك ترميزها أو إعادة ضغطها، فلا تفقد جودة ولا تستهلك وقت
+معالج. الصيغ الأخرى (PNG، TIFF، BMP) تُفك صفحة واحدة وتُضغط دون فقد
+(FlateDecode).
+
+يمكن إضافة طبقة نص غير مرئية (نمط الرسم 3) فوق كل صورة من مواضع كلمات
+OCR، فيصبح الملف قابلاً للبحث والنسخ دون تغيير مظهره. يُستخدم خط Type0
+بترميز Identity-H حيث رقم المحرف = رمز Unicode، مع جدول ToUnicode لاستخراج
+النص، ولا يُضمَّن ملف الخط لأن النص لا يُرسم.
+"""
+
+import os
+import zlib
+import unicodedata
+import shutil
+from pathlib import Path
+
+from PIL import Image
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from . import image_pack
+
+
+DEFAULT_DPI = 300
+_COPY_CHUNK_SIZE = 1024 * 1024
+_JPEG_FORMATS = {'JPEG', 'MPO'}
+_COLOR_SPACES = {'L': '/DeviceGray', 'RGB': '/DeviceRGB', 'CMYK': '/DeviceCMYK'}
+# عرض كل محرف في خط طبقة النص (بوحدات 1/1000 من حجم الخط)
+_TEXT_GLYPH_WIDTH = 500
+
+
+def pdf_string(text):
+    """نص PDF بترميز UTF-16BE (يدعم العربية) بصيغة سداسية عشرية"""
+    return '<FEFF' + text.encode('utf-16-be').hex().upper() + '>'
+
+
+def _to_unicode_cmap():
+    """جدول ToUnicode يربط كل رقم محرف (2 بايت) برمز Unicode المساوي له"""
+    ranges = [f'<{high:02X}00> <{high:02X}FF> <{high:02X}00>' for high in range(256)]
+    blocks = []
+    # الحد الأقصى 100 مدخل لكل كتلة bfrange
+    for start in range(0, len(ranges), 100):
+        chunk = ranges[start:start + 100]
+        blocks.append(f'{len(chunk)} beginbfrange\n' + '\n'.join(chunk) + '\nendbfrange')
+    return (
+        '/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n'
+        '/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n'
+        '/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n'
+        '1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n'
+        + '\n'.join(blocks) +
+        '\nendcmap\nCMapName currentdict /CMap defineresource pop\nend\nend\n'
+    ).encode('latin-1')
+
+
+def text_layer(words, scale_x, scale_y, page_height, font_name='/F1'):
+    """
+    أوامر رسم طبقة النص غير المرئية
+
+    Args:
+        words: [[النص، يسار، أعلى، عرض، ارتفاع]، ...] بإحداثيات بكسلات الصورة
+        scale_x, scale_y: النقاط لكل بكسل
+        page_height: ارتفاع الصفحة بالنقاط (أصل إحداثيات PDF في الأسفل)
+    """
+    ops = ['BT', '3 Tr']
+    for text, left, top, width, height in words:
+        codes = [ord(ch) for ch in text if ord(ch) <= 0xFFFF]
+        if not codes or width <= 0 or height <= 0:
+            continue
+        if any(unicodedata.bidirectional(ch) in ('R', 'AL') for ch in text):
+            # محتوى PDF بالترتيب المرئي: الكلمة العربية تُكتب معكوسة من اليسار
+            # ويعيد القارئ ترتيبها منطقياً عند البحث والنسخ
+            codes.reverse()
+        size = height * scale_y
+        # تمديد أفقي حتى يغطي النص عرض الكلمة في الصورة (للتظليل عند البحث)
+        natural_width = len(codes) * _TEXT_GLYPH_WIDTH / 1000.0 * size
+        horizontal_scale = 100.0 * width * scale_x / natural_width
+        x = left * scale_x
+        y = page_height - (top + height) * scale_y
+        encoded = ''.join(f'{code:04X}' for code in codes)
+        ops.append(
+            f'{font_name} {size:.2f} Tf {horizontal_scale:.2f} Tz '
+            f'1 0 0 1 {x:.2f} {y:.2f} Tm <{encoded}> Tj'
+        )
+    ops.append('ET')
+    return ('\n'.join(ops) + '\n').encode('latin-1')
+
+
+class PdfWriter:
+    """
+    كتابة ملف PDF تدريجياً
+
+    الاستخدام:
+        with PdfWriter(path, title='...') as pdf:
+            for image_path in paths:
+                pdf.add_image_page(image_path)
+    """
+
+    def __init__(self, file_path, title=None, default_dpi=DEFAULT_DPI):
+        self.file_path = Path(file_path)
+        self.title = title
+        self.default_dpi = default_dpi
+        # الكتابة في ملف مؤقت ثم الاستبدال عند الإغلاق لتفادي ملفات مبتورة
+        self._tmp_path = self.file_path.with_name(f'{self.file_path.name}.{os.getpid()}.tmp')
+        self._file = open(self._tmp_path, 'wb')
+        self._offsets = [0]  # موضع كل كائن (الكائن 0 محجوز)
+        self._page_ids = []
+        self._text_font_id = None
+        self.page_count = 0
+
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        # الكائنان 1 (الفهرس) و2 (شجرة الصفحات) يُكتبان في النهاية
+        self._catalog_id = self._reserve()
+        self._pages_id = self._reserve()
+
+    # ------------------------------------------------------------------
+    # الكتابة منخفضة المستوى
+    # ------------------------------------------------------------------
+
+    def _write(self, data):
+        if isinstance(data, str):
+            data = data.encode('latin-1')
+        self._file.write(data)
+
+    def _reserve(self):
+        """حجز رقم كائن يُكتب لاحقاً"""
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _begin_object(self, obj_id=None):
+        if obj_id is None:
+            obj_id = self._reserve()
+        self._offsets[obj_id] = self._file.tell()
+        self._write(f'{obj_id} 0 obj\n')
+        return obj_id
+
+    def write_object(self, body, obj_id=None):
+        """كتابة كائن قاموس أو قيمة بسيطة؛ يُعيد رقمه"""
+        obj_id = self._begin_object(obj_id)
+        self._write(body)
+        self._write('\nendobj\n')
+        return obj_id
+
+    def write_stream(self, dictionary, data=None, source=None, length=None, obj_id=None):
+        """
+        كتابة كائن تدفق من بايتات في الذاكرة أو من ملف مفتوح على دفعات
+
+        Args:
+            dictionary: محتوى القاموس دون << >> ودون /Length
+            data: بايتات التدفق
+            source: ملف مفتوح يُنسخ منه length بايت (بدل data)
+        """
+        if data is not None:
+            length = len(data)
+        obj_id = self._begin_object(obj_id)
+        self._write(f'<< {dictionary} /Length {length} >>\nstream\n')
+        if data is not None:
+            self._write(data)
+        else:
+            shutil.copyfileobj(source, self._file, _COPY_CHUNK_SIZE)
+        self._write('\nendstream\nendobj\n')
+        return obj_id
+
+    # ------------------------------------------------------------------
+    # الصفحات
+    # ------------------------------------------------------------------
+
+    def _write_image(self, image_path):
+        """
+        تضمين صورة كـ XObject
+
+        Returns:
+            tuple: (رقم الكائن، العرض، الارتفاع، الدقة (x، y))
+        """
+        with image_pack.open_stream(image_path) as source, Image.open(source) as img:
+            width, height = img.size
+            dpi = img.info.get('dpi') or (self.default_dpi, self.default_dpi)
+            dpi = tuple(float(d) if d and float(d) > 1 else self.default_dpi for d in dpi[:2])
+            mode = img.mode
+
+            if img.format in _JPEG_FORMATS and mode in _COLOR_SPACES:
+                # تمرير بايتات JPEG كما هي
+                dictionary = (
+                    f'/Type /XObject /Subtype /Image /Width {width} /Height {height} '
+                    f'/ColorSpace {_COLOR_SPACES[mode]} /BitsPerComponent 8 /Filter /DCTDecode'
+                )
+                if mode == 'CMYK' and 'adobe' in img.info:
+                    # ملفات Adobe CMYK تُخزن القيم معكوسة
+                    dictionary += ' /Decode [1 0 1 0 1 0 1 0]'
+                length = source.seek(0, os.SEEK_END)
+                source.seek(0)
+                obj_id = self.write_stream(dictionary, source=source, length=length)
+                return obj_id, width, height, dpi
+
+            # الصيغ الأخرى: فك صفحة واحدة وضغط دون فقد
+            if mode not in ('L', 'RGB'):
+                img = img.convert('RGB')
+            dictionary = (
+                f'/Type /XObject /Subtype /Image /Width {width} /Height {height} '
+                f'/ColorSpace {_COLOR_SPACES[img.mode]} /BitsPerComponent 8 /Filter /FlateDecode'
+            )
+            data = zlib.compress(img.tobytes(), 6)
+        return self.write_stream(dictionary, data=data), width, height, dpi
+
+    def _text_font(self):
+        """كتابة خط طبقة النص مرة واحدة للملف كاملاً؛ يُعيد رقم كائنه"""
+        if self._text_font_id is None:
+            to_unicode_id = self.write_stream('', data=_to_unicode_cmap())
+            descriptor_id = self.write_object(
+                '<< /Type /FontDescriptor /FontName /GlyphLessFont /Flags 5 '
+                '/FontBBox [0 0 500 1000] /ItalicAngle 0 /Ascent 1000 /Descent 0 '
+                '/CapHeight 1000 /StemV 80 >>'
+            )
+            cid_font_id = self.write_object(
+                '<< /Type /Font /Subtype /CIDFontType2 /BaseFont /GlyphLessFont '
+                '/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> '
+                f'/FontDescriptor {descriptor_id} 0 R /DW {_TEXT_GLYPH_WIDTH} /CIDToGIDMap /Identity >>'
+            )
+            self._text_font_id = self.write_object(
+                '<< /Type /Font /Subtype /Type0 /BaseFont /GlyphLessFont /Encoding /Identity-H '
+                f'/DescendantFonts [{cid_font_id} 0 R] /ToUnicode {to_unicode_id} 0 R >>'
+            )
+        return self._text_font_id
+
+    def add_image_page(self, image_path, ocr_result=None):
+        """
+        إضافة صفحة تملؤها صورة، بمقاس يساوي مقاسها الفعلي حسب دقة المسح
+
+        Args:
+            image_path: مسار الصورة
+            ocr_result: {'size': [...], 'words': [...]} لإضافة طبقة نص غير مرئية
+
+        Returns:
+            tuple: (عرض الصفحة، ارتفاعها) بالنقاط
+        """
+        image_id, width, height, dpi = self._write_image(image_path)
+        page_width = width * 72.0 / dpi[0]
+        page_height = height * 72.0 / dpi[1]
+
+        content = f'q {page_width:.2f} 0 0 {page_height:.2f} 0 0 cm /Im0 Do Q\n'.encode('latin-1')
+        resources = f'/XObject << /Im0 {image_id} 0 R >>'
+        if ocr_result and ocr_result.get('words'):
+            ocr_width, ocr_height = ocr_result.get('size') or (width, height)
+            content += text_layer(
+                ocr_result['words'], page_width / ocr_width, page_height / ocr_height, page_height
+            )
+            resources += f' /Font << /F1 {self._text_font()} 0 R >>'
+        content_id = self.write_stream('/Filter /FlateDecode', data=zlib.compress(content))
+
+        page_id = self.write_object(
+            f'<< /Type /Page /Parent {self._pages_id} 0 R '
+            f'/MediaBox [0 0 {page_width:.2f} {page_height:.2f}] '
+            f'/Resources << {resources} >> '
+            f'/Contents {content_id} 0 R >>'
+        )
+        self._page_ids.append(page_id)
+        self.page_count += 1
+        return page_width, page_height
+
+    # ------------------------------------------------------------------
+    # الإنهاء
+    # ------------------------------------------------------------------
+
+    def close(self):
+        """كتابة شجرة الصفحات والجدول المرجعي ثم حفظ الملف"""
+        if self._file is None:
+            return
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self._page_ids)
+        self.write_object(
+            f'<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>',
+            obj_id=self._pages_id
+        )
+        self.write_object(f'<< /Type /Catalog /Pages {self._pages_id} 0 R >>', obj_id=self._catalog_id)
+
+        info = '/Producer (Document Archive)'
+        if self.title:
+            info += f' /Title {pdf_string(self.title)}'
+        info_id = self.write_object(f'<< {info} >>')
+
+        xref_offset = self._file.tell()
+        self._write(f'xref\n0 {len(self._offsets)}\n')
+        self._write('0000000000 65535 f \n')
+        for offset in self._offsets[1:]:
+            self._write(f'{offset:010d} 00000 n \n')
+        self._write(
+            f'trailer\n<< /Size {len(self._offsets)} /Root {self._catalog_id} 0 R '
+            f'/Info {info_id} 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n'
+        )
+        self._file.close()
+        self._file = None
+        os.replace(self._tmp_path, self.file_path)
+
+    def abort(self):
+        """إلغاء الكتابة وحذف الملف المؤقت"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def write_images_pdf(image_paths, file_path, title=None, progress=None, is_cancelled=None,
+                     page_words=None):
+    """
+    إنشاء PDF من قائمة صور بصفحة لكل صورة
+
+    Args:
+        page_words: مُكرِّر نتائج OCR بترتيب الصفحات (لطبقة النص) أو None
+        progress: دالة تُستدعى (المنجز، الإجمالي) بعد كل صفحة
+        is_cancelled: دالة تُعيد True لإيقاف التصدير (يُحذف الملف الجزئي)
+
+    Returns:
+        int: عدد الصفحات، أو None عند الإلغاء
+    """
+    total = len(image_paths)
+    page_words = iter(page_words) if page_words is not None else None
+    pdf = PdfWriter(file_path, title=title)
+    try:
+        for done, image_path in enumerate(image_paths, start=1):
+            if is_cancelled and is_cancelled():
+                pdf.abort()
+                return None
+            ocr_result = next(page_words, None) if page_words is not None else None
+            pdf.add_image_page(image_path, ocr_result)
+            if progress:
+                progress(done, total)
+        pdf.close()
+    except Exception:
+        pdf.abort()
+        raise
+    return pdf.page_count
+
+
+class PdfExportWorker(QThread):
+    """خيط عامل لتصدير الصور كملف PDF في الخلفية"""
+
+    progress_updated = pyqtSignal(int, int)
+    export_finished = pyqtSignal(bool, str)
+
+    def __init__(self, image_paths, file_path, title=None, ocr=None, content_hashes=None):
+        """
+        Args:
+            ocr: مزود كلمات OCR (SearchablePdfOcr) لإضافة طبقة نص قابلة للبحث
+            content_hashes: بصمات محتوى الصور (لإعادة استخدام نتائج OCR المحفوظة)
+        """
+        super().__init__()
+        self.image_paths = list(image_paths)
+        self.file_path = file_path
+        self.title = title
+        self.ocr = ocr
+        self.content_hashes = list(content_hashes or [None] * len(self.image_paths))
+        self.page_count = 0
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        """تنفيذ التصدير"""
+        page_words = None
+        try:
+            if self.ocr is not None:
+                page_words = self.ocr.iter_words(list(zip(self.image_paths, self.content_hashes)))
+            pages = write_images_pdf(
+                self.image_paths, self.file_path, title=self.title,
+                progress=self.progress_updated.emit,
+                is_cancelled=lambda: self.cancelled,
+                page_words=page_words
+            )
+            if pages is None:
+                self.export_finished.emit(False, 'تم إلغاء التصدير')
+            else:
+                self.page_count = pages
+                self.export_finished.emit(True, str(self.file_path))
+        except Exception as e:
+            self.export_finished.emit(False, str(e))
+        finally:
+            if page_words is not None:
+                page_words.close()
+            if self.ocr is not None:
+                self.ocr.close()
@@ -0,0 +1,146 @@
+"""
+مُجدوِل الطباعة - تحضير الصفحات ورسمها على الطابعة في خيط خلفي
+
+تُفك كل صورة مباشرة بمقاس منطقة الطباعة بنقاط الطابعة الفعلية
+(QImageReader.setScaledSize) بدل تحميل الصورة كاملة ثم تصغيرها، وتُحضَّر
+الصفحة التالية أثناء إرسال الحالية. الرسم بـ QPainter على QPrinter مسموح
+خارج خيط الواجهة، فتبقى النوافذ مستجيبة ويمكن إلغاء المهمة في أي لحظة.
+يمكن جمع صفحات عدة وثائق في مهمة طباعة واحدة.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QThread, pyqtSignal, QSize, QRectF, Qt
+from PyQt6.QtGui import QImageIOHandler, QPainter
+from PyQt6.QtPrintSupport import QPrinter
+
+from .image_loader import open_image_reader
+from . import tracing
+
+
+# عدد الصفحات التي تُحضَّر مسبقاً أثناء رسم الصفحة الحالية
+PREFETCH_PAGES = 2
+
+
+def page_pixel_size(printer):
+    """مقاس منطقة الطباعة بنقاط الطابعة (QSize)"""
+    rect = printer.pageRect(QPrinter.Unit.DevicePixel)
+    return QSize(int(rect.width()), int(rect.height()))
+
+
+@tracing.traced('image.decode_print')
+def render_page(image_path, page_size):
+    """
+    فك صورة بأكبر مقاس يناسب الصفحة دون تجاوز دقة الصورة الأصلية
+
+    Returns:
+        QImage أو None إذا تعذرت القراءة
+    """
+    reader = open_image_reader(image_path)
+    reader.setAutoTransform(True)
+    source = reader.size()
+    if source.isValid():
+        # المقاس المصغَّر يُطبَّق قبل التدوير حسب بيانات EXIF
+        rotated = bool(reader.transformation() & QImageIOHandler.Transformation.TransformationRotate90)
+        fit = page_size.transposed() if rotated else page_size
+        if source.width() > fit.width() or source.height() > fit.height():
+            reader.setScaledSize(source.scaled(fit, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        print(f"[PRINT ERROR] تعذر قراءة {image_path}: {reader.errorString()}")
+        return None
+    return image
+
+
+def print_images(printer, image_paths, progress=None, is_cancelled=None):
+    """
+    طباعة الصور على الطابعة صفحة لكل صورة في مهمة واحدة
+
+    Args:
+        progress: دالة تُستدعى (الصفحات المنجزة، الإجمالي)
+        is_cancelled: دالة تُرجع True لإيقاف المهمة
+
+    Returns:
+        int: عدد الصفحات المطبوعة، أو None عند الإلغاء
+    """
+    total = len(image_paths)
+    page_size = page_pixel_size(printer)
+    page_rect = QRectF(0, 0, page_size.width(), page_size.height())
+
+    painter = QPainter()
+    if not painter.begin(printer):
+        raise RuntimeError('فشل بدء الطباعة')
+
+    printed = 0
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='print-render')
+    pending = [executor.submit(render_page, path, page_size) for path in image_paths[:PREFETCH_PAGES]]
+    try:
+        for index in range(total):
+            if is_cancelled and is_cancelled():
+                printer.abort()
+                return None
+            image = pending.pop(0).result()
+            next_index = index + PREFETCH_PAGES
+            if next_index < total:
+                pending.append(executor.submit(render_page, image_paths[next_index], page_size))
+
+            if image is not None:
+                if printed > 0:
+                    printer.newPage()
+                target = image.size().scaled(page_size, Qt.AspectRatioMode.KeepAspectRatio)
+                x = (page_size.width() - target.width()) / 2
+                y = (page_size.height() - target.height()) / 2
+                painter.drawImage(QRectF(x, y, target.width(), target.height()).intersected(page_rect), image)
+                printed += 1
+            if progress:
+                progress(index + 1, total)
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        if painter.isActive():
+            painter.end()
+    return printed
+
+
+class PrintSpoolerWorker(QThread):
+    """خيط عامل لطباعة صور (أو رسم مخصص) على طابعة دون تجميد الواجهة"""
+
+    progress_updated = pyqtSignal(int, int)
+    print_finished = pyqtSignal(bool, str)
+
+    def __init__(self, printer, image_paths=None, paint=None):
+        """
+        Args:
+            printer: QPrinter مهيأ (يجب أن يبقى حياً حتى انتهاء الخيط)
+            image_paths: صور تُطبع صفحة لكل صورة
+            paint: بديل للصور - دالة (printer, progress, is_cancelled) تُرجع عدد الصفحات أو None
+        """
+        super().__init__()
+        self.printer = printer
+        self.image_paths = list(image_paths or [])
+        self.paint = paint
+        self.page_count = 0
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        """تنفيذ الطباعة"""
+        try:
+            if self.paint is not None:
+                count = self.paint(self.printer, self.progress_updated.emit, lambda: self.cancelled)
+            else:
+                count = print_images(
+                    self.printer, self.image_paths,
+                    progress=self.progress_updated.emit,
+                    is_cancelled=lambda: self.cancelled
+                )
+            if count is None:
+                self.print_finished.emit(False, 'تم إلغاء الطباعة')
+            else:
+                self.page_count = count
+                self.print_finished.emit(True, f'تم إرسال {count} صفحة إلى الطابعة')
+        except Exception as e:
+            self.print_finished.emit(False, str(e))
@@ -0,0 +1,220 @@
+"""
+تصدير PDF قابل للبحث - طبقة نص OCR غير مرئية فوق صور الصفحات
+
+تُقرأ مواضع الكلمات من ذاكرة OCR في قاعدة البيانات (مفهرسة ببصمة محتوى
+الصورة) وإلا تُستخرج بـ Tesseract وتُحفظ لإعادة استخدامها. يعمل OCR على
+مجموعة خيوط بنافذة منزلقة: كل خيط يشغّل عملية Tesseract مستقلة فتتوزع
+الصفحات على أنوية المعالج، بينما تُكتب الصفحات بالترتيب فور جاهزيتها.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from .pdf_writer import write_images_pdf
+from .thumbnails import file_digest
+from . import image_pack
+from .helpers import FileHelper
+
+
+DEFAULT_LANGUAGE = 'ara+eng'
+
+
+class SearchablePdfOcr:
+    """مزود كلمات OCR للصفحات مع ذاكرة نتائج وتنفيذ متوازٍ"""
+
+    def __init__(self, db=None, workers=None, language=DEFAULT_LANGUAGE):
+        from .ocr_extractor import OCRExtractor
+
+        self.db = db
+        self.language = language
+        self.workers = workers or max(1, os.cpu_count() or 1)
+        if self.workers > 1:
+            # Tesseract متعدد الخيوط داخلياً؛ خيط لكل عملية يمنع التزاحم على الأنوية
+            os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+        self.extractor = OCRExtractor()
+        self._executor = None
+
+    def is_available(self):
+        return bool(self.extractor.reader)
+
+    def page_words(self, image_path, content_hash=None):
+        """نتيجة OCR لصفحة واحدة (من الذاكرة إن وُجدت)"""
+        if self.db is not None:
+            content_hash = content_hash or image_pack.stored_digest(image_path) or file_digest(image_path)
+            cached = self.db.get_ocr_words(content_hash)
+            if cached is not None:
+                return cached
+
+        result = self.extractor.extract_words(image_path, self.language)
+        if result is not None and self.db is not None:
+            self.db.save_ocr_words(content_hash, result, self.language)
+        return result
+
+    def _safe_page_words(self, image_path, content_hash):
+        try:
+            return self.page_words(image_path, content_hash)
+        except Exception as e:
+            print(f"[OCR ERROR] {image_path}: {e}")
+            return None
+
+    def iter_words(self, pages):
+        """
+        نتائج OCR لقائمة صفحات بترتيبها مع معالجة متوازية
+
+        Args:
+            pages: قائمة من (مسار الصورة، بصمة المحتوى أو None)
+
+        Yields:
+            dict أو None لكل صفحة بالترتيب
+        """
+        if not self.is_available():
+            for _ in pages:
+                yield None
+            return
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ocr')
+
+        # نافذة منزلقة: لا يتجاوز عدد الصفحات المنتظرة ضعفي عدد الخيوط
+        window = self.workers * 2
+        pending = deque()
+        pages = iter(pages)
+        try:
+            while True:
+                while len(pending) < window:
+                    page = next(pages, None)
+                    if page is None:
+                        break
+                    pending.append(self._executor.submit(self._safe_page_words, *page))
+                if not pending:
+                    return
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+def year_documents(db, year):
+    """
+    وثائق سنة محددة مع صفحاتها
+
+    Returns:
+        list: [(معرف الوثيقة، اسمها، [(مسار الصورة، بصمة المحتوى)، ...])، ...]
+    """
+    documents = []
+    for doc_id in sorted(db.get_document_ids_by_image_year(year)):
+        doc = db.get_document_by_id(doc_id)
+        if not doc:
+            continue
+        metadata = db.get_images_metadata(doc_id)
+        pages = [
+            (img.image_path, (metadata.get(img.id) or {}).get('content_hash'))
+            for img in db.get_document_images(doc_id)
+            if image_pack.exists(img.image_path)
+        ]
+        if pages:
+            documents.append((doc_id, doc.doc_name, pages))
+    return documents
+
+
+def export_year_searchable(db, year, output_dir, ocr, progress=None, is_cancelled=None):
+    """
+    تصدير كل وثائق السنة كملفات PDF قابلة للبحث (ملف لكل وثيقة)
+
+    صفحات كل الوثائق تمر في مُكرِّر OCR واحد، فيبدأ التعرف على صفحات الوثيقة
+    التالية أثناء كتابة الحالية.
+
+    Args:
+        progress: دالة تُستدعى (الصفحات المنجزة، الإجمالي)
+
+    Returns:
+        dict: {'documents': عدد الملفات، 'pages': عدد الصفحات، 'failed': [(الوثيقة، الخطأ)]}
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    documents = year_documents(db, year)
+    total = sum(len(pages) for _, _, pages in documents)
+
+    all_pages = [page for _, _, pages in documents for page in pages]
+    page_words = ocr.iter_words(all_pages)
+    done = 0
+    result = {'documents': 0, 'pages': 0, 'failed': []}
+    try:
+        for doc_id, doc_name, pages in documents:
+            if is_cancelled and is_cancelled():
+                break
+            file_path = output_dir / f'{FileHelper.safe_filename(str(doc_name))}_{doc_id}.pdf'
+            offset = done
+
+            def doc_progress(page_done, _total, offset=offset):
+                if progress:
+                    progress(offset + page_done, total)
+
+            # صفحات هذه الوثيقة فقط من المُكرِّر المشترك
+            doc_words = (next(page_words, None) for _ in pages)
+            try:
+                count = write_images_pdf(
+                    [path for path, _ in pages], file_path, title=doc_name,
+                    progress=doc_progress, is_cancelled=is_cancelled, page_words=doc_words
+                )
+            except Exception as e:
+                result['failed'].append((doc_name, str(e)))
+                count = None
+            if is_cancelled and is_cancelled():
+                break
+            # استهلاك ما تبقى من نتائج الوثيقة عند الفشل للحفاظ على الترتيب
+            for _ in doc_words:
+                pass
+            done = offset + len(pages)
+            if count is not None:
+                result['documents'] += 1
+                result['pages'] += count
+    finally:
+        page_words.close()
+    return result
+
+
+class YearPdfExportWorker(QThread):
+    """خيط عامل لتصدير وثائق سنة كاملة كملفات PDF قابلة للبحث"""
+
+    progress_updated = pyqtSignal(int, int)
+    export_finished = pyqtSignal(bool, str)
+
+    def __init__(self, db, year, output_dir, workers=None):
+        super().__init__()
+        self.db = db
+        self.year = year
+        self.output_dir = output_dir
+        self.workers = workers
+        self.result = None
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        """تنفيذ التصدير"""
+        ocr = SearchablePdfOcr(self.db, workers=self.workers)
+        try:
+            self.result = export_year_searchable(
+                self.db, self.year, self.output_dir, ocr,
+                progress=self.progress_updated.emit,
+                is_cancelled=lambda: self.cancelled
+            )
+            if self.cancelled:
+                self.export_finished.emit(False, 'تم إلغاء التصدير')
+            else:
+                self.export_finished.emit(True, str(self.output_dir))
+        except Exception as e:
+            self.export_finished.emit(False, str(e))
+        finally:
+            ocr.close()
@@ -19,7 +19,8 @@ class Settings:
         },
         'database': {
             'path': 'documents.db',
-            'backup_interval': 7  # أيام
+            'backup_interval': 7,  # أيام (0: بلا نسخ تلقائي)
+            'backup_keep': 10  # عدد النسخ الاحتياطية المحتفظ بها
         },
         'scanner': {
             'default_dpi': 300,
@@ -29,7 +30,20 @@ class Settings:
         'storage': {
             'documents_folder': 'documents',
             'backup_folder': 'backups',
-            'thumbnails_folder': 'documents/thumbnails'
+            'thumbnails_folder': 'documents/thumbnails',
+            'thumbnails_max_mb': 512,  # الحد الأقصى لحجم الصور المصغرة على القرص
+            'trash_undo_hours': 24  # مهلة التراجع عن حذف الوثائق قبل حذف ملفاتها
+        },
+        'viewer': {
+            'image_cache_mb': 256  # ميزانية ذاكرة الصور المفكوكة المشتركة بين نوافذ العرض
+        },
+        'startup': {
+            'snapshot': True,  # عرض آخر الوثائق من لقطة محفوظة فور الإقلاع
+            'snapshot_rows': 200  # عدد الصفوف المحفوظة في اللقطة
+        },
+        'diagnostics': {
+            'tracing': False,  # تتبع زمن العمليات (يمكن تفعيله من نافذة تشخيص الأداء)
+            'ring_size': 10000  # عدد آخر النطاقات المحفوظة في الذاكرة
         },
         'file_naming': {
             'auto_parse': True,
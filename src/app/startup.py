@@ -0,0 +1,279 @@
+"""
+بدء التشغيل السريع - فحص الأجهزة في الخلفية وقياس زمن أول رسم
+
+فحص السكانر (win32com + WIA.DeviceManager) وفحص Tesseract (تشغيل عملية
+خارجية) كانا يجريان عند استيراد main.py ونوافذ الحوار قبل ظهور أي نافذة.
+هنا يُجرى الفحص مرة واحدة في خيط خلفي بعد أول رسم وتُحفظ نتيجته، وتقرأ
+الواجهة آخر نتيجة معروفة دون انتظار. ويُسجَّل زمن مراحل الإقلاع (أول رسم،
+جاهزية البيانات) ويمكن إنتاج تقرير زمن الاستيراد بأسلوب -X importtime:
+
+    python maintenance.py startup-profile [--top 25] [--output startup.json]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import threading
+import subprocess
+import importlib.util
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from . import tracing
+
+
+# متغير بيئة يجعل التطبيق يطبع مراحل الإقلاع ثم يُغلق بعد جاهزية البيانات
+PROFILE_ENV = 'DOCAPP_STARTUP_PROFILE'
+PROFILE_MARKER = '[STARTUP PROFILE]'
+
+_lock = threading.Lock()
+_status = {
+    'scanner_available': None,  # None = لم يُفحص بعد
+    'scanner_count': 0,
+    'ocr_module': None,
+    'ocr_engine': None,
+}
+_origin = time.perf_counter()
+_marks = {}
+# فحوص أُغلقت نوافذها قبل انتهائها: يبقى مرجعها هنا حتى ينتهي الخيط
+_detached_probes = set()
+
+
+# ----------------------------------------------------------------------
+# فحص الأجهزة
+# ----------------------------------------------------------------------
+
+def probe_scanners():
+    """
+    فحص مكتبة pywin32 وعدد أجهزة السكانر المتصلة عبر WIA
+
+    Returns:
+        tuple: (المكتبة متاحة، عدد الأجهزة)
+    """
+    try:
+        import win32com.client
+    except ImportError:
+        return False, 0
+
+    # COM يحتاج تهيئة في كل خيط غير خيط الواجهة
+    com_initialized = False
+    try:
+        import pythoncom
+        pythoncom.CoInitialize()
+        com_initialized = True
+    except Exception:
+        pass
+    try:
+        manager = win32com.client.Dispatch("WIA.DeviceManager")
+        return True, manager.DeviceInfos.Count
+    except Exception:
+        return True, 0
+    finally:
+        if com_initialized:
+            pythoncom.CoUninitialize()
+
+
+def probe_ocr():
+    """
+    فحص توفر pytesseract ومحرك Tesseract
+
+    Returns:
+        tuple: (المكتبة مثبتة، المحرك يعمل)
+    """
+    if importlib.util.find_spec('pytesseract') is None:
+        return False, False
+    try:
+        from .ocr_extractor import OCRExtractor
+        return True, bool(OCRExtractor().reader)
+    except Exception as e:
+        print(f"[STARTUP] تعذر فحص OCR: {str(e)}")
+        return True, False
+
+
+def refresh_status(scanners=True, ocr=True):
+    """تشغيل الفحوص المطلوبة الآن وحفظ نتيجتها (يُستدعى عادة من خيط خلفي)"""
+    with tracing.span('startup.probe', scanners=scanners, ocr=ocr):
+        if scanners:
+            available, count_ = probe_scanners()
+            with _lock:
+                _status['scanner_available'] = available
+                _status['scanner_count'] = count_
+        if ocr:
+            module, engine = probe_ocr()
+            with _lock:
+                _status['ocr_module'] = module
+                _status['ocr_engine'] = engine
+    return status()
+
+
+def status():
+    """نسخة من آخر نتائج الفحص"""
+    with _lock:
+        return dict(_status)
+
+
+def scanner_status(refresh=False):
+    """
+    حالة السكانر من آخر فحص؛ يُفحص الآن إذا طُلب ذلك أو لم يسبق الفحص
+
+    Returns:
+        tuple: (المكتبة متاحة، عدد الأجهزة)
+    """
+    if refresh or _status['scanner_available'] is None:
+        refresh_status(scanners=True, ocr=False)
+    with _lock:
+        return _status['scanner_available'], _status['scanner_count']
+
+
+def ocr_status():
+    """
+    حالة OCR من آخر فحص؛ يُفحص الآن إذا لم يسبق الفحص
+
+    Returns:
+        tuple: (المكتبة مثبتة، المحرك يعمل)
+    """
+    if _status['ocr_module'] is None:
+        refresh_status(scanners=False, ocr=True)
+    with _lock:
+        return _status['ocr_module'], _status['ocr_engine']
+
+
+class StartupProbeWorker(QThread):
+    """خيط عامل لفحص السكانر و OCR دون تأخير ظهور النوافذ"""
+
+    probe_finished = pyqtSignal(dict)
+
+    def __init__(self, scanners=True, ocr=True):
+        super().__init__()
+        self.scanners = scanners
+        self.ocr = ocr
+
+    def run(self):
+        try:
+            result = refresh_status(scanners=self.scanners, ocr=self.ocr)
+        except Exception as e:
+            print(f"[STARTUP] فشل فحص الأجهزة: {str(e)}")
+            result = status()
+        self.probe_finished.emit(result)
+
+
+def detach_probe(worker):
+    """
+    إبقاء خيط فحص جارٍ حياً بعد إغلاق النافذة التي بدأته
+
+    فحص WIA قد يبقى معلقاً مدة غير معروفة، وهدم QThread أثناء عمله يُنهي
+    التطبيق؛ فيُحتفظ بالخيط حتى ينتهي من تلقاء نفسه ثم يُحرر.
+    """
+    def release():
+        worker.wait()
+        _detached_probes.discard(worker)
+
+    _detached_probes.add(worker)
+    worker.finished.connect(release)
+    if worker.isFinished():
+        release()
+
+
+def wait_detached_probes():
+    """انتظار الفحوص المنفصلة قبل إغلاق التطبيق"""
+    for worker in list(_detached_probes):
+        worker.wait()
+    _detached_probes.clear()
+
+
+# ----------------------------------------------------------------------
+# مراحل الإقلاع
+# ----------------------------------------------------------------------
+
+def set_origin(perf_counter_value):
+    """تحديد لحظة بدء العملية (time.perf_counter في أول سطر من main.py)"""
+    global _origin
+    _origin = perf_counter_value
+
+
+def mark(name):
+    """تسجيل مرحلة إقلاع بالميلي ثانية منذ بدء العملية"""
+    elapsed = (time.perf_counter() - _origin) * 1000
+    _marks[name] = elapsed
+    tracing.count(f'startup.{name}_ms', int(elapsed))
+    return elapsed
+
+
+def marks():
+    return dict(_marks)
+
+
+def profile_requested():
+    return os.environ.get(PROFILE_ENV, '') not in ('', '0')
+
+
+def emit_profile():
+    """طباعة مراحل الإقلاع بسطر JSON يقرؤه import_time_profile()"""
+    print(f"{PROFILE_MARKER} {json.dumps(marks())}", flush=True)
+
+
+# ----------------------------------------------------------------------
+# تقرير زمن الاستيراد
+# ----------------------------------------------------------------------
+
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def parse_importtime(text):
+    """
+    تحليل مخرجات python -X importtime
+
+    Returns:
+        list: قواميس {'module', 'self_ms', 'cumulative_ms', 'depth'} بترتيب الظهور
+    """
+    entries = []
+    for line in text.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        entries.append({
+            'module': module,
+            'self_ms': int(self_us) / 1000,
+            'cumulative_ms': int(cumulative_us) / 1000,
+            'depth': (len(indent) - 1) // 2,
+        })
+    return entries
+
+
+def import_time_profile(script, top=25, timeout=120):
+    """
+    تشغيل التطبيق مع -X importtime حتى جاهزية البيانات ثم إغلاقه
+    (في المجلد الحالي، أي على الأرشيف الموجود فيه)
+
+    Args:
+        script: مسار main.py
+        top: عدد أبطأ الوحدات في التقرير
+
+    Returns:
+        dict: {'marks', 'total_import_ms', 'top_level', 'slowest_self', 'returncode'}
+    """
+    env = dict(os.environ)
+    env[PROFILE_ENV] = '1'
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', script],
+        env=env, capture_output=True, text=True, encoding='utf-8', errors='replace',
+        timeout=timeout
+    )
+
+    startup_marks = {}
+    for line in result.stdout.splitlines():
+        if line.startswith(PROFILE_MARKER):
+            startup_marks = json.loads(line[len(PROFILE_MARKER):])
+
+    entries = parse_importtime(result.stderr)
+    top_level = [entry for entry in entries if entry['depth'] == 0]
+    return {
+        'marks': startup_marks,
+        'total_import_ms': sum(entry['cumulative_ms'] for entry in top_level),
+        'top_level': sorted(top_level, key=lambda e: -e['cumulative_ms'])[:top],
+        'slowest_self': sorted(entries, key=lambda e: -e['self_ms'])[:top],
+        'returncode': result.returncode,
+    }
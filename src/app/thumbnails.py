@@ -0,0 +1,610 @@
+"""
+مخزن الصور المصغرة - صور مصغرة متعددة المقاسات مفهرسة ببصمة محتوى الصورة
+
+تُخزَّن كل صورة مصغرة في مسار مجزأ حسب بصمة SHA-1 لمحتوى الصورة الأصلية:
+    thumbnails/ab/cd/abcd...ef_tile.jpg
+لذلك لا تتصادم الصور المصغرة لوثائق مختلفة حتى لو تشابهت أسماء ملفاتها
+(image_0001.jpg ...)، وتُشارك الصور المكررة صورة مصغرة واحدة.
+
+تُولَّد الصور المصغرة عند الطلب الأول في مجموعة خيوط خلفية، ويُقدَّم بديل
+مؤقت (placeholder) إلى حين جاهزيتها. يُحتفظ بفهرس على القرص (index.db)
+لحجم كل صورة مصغرة وآخر استخدام لها، وتُحذف الأقدم استخداماً (LRU) عند
+تجاوز الحد الأقصى للحجم.
+
+صور السنوات المختومة (image_pack) تُقرأ بصمتها وصورها المصغرة من حزمة سنتها،
+فتُنسخ الصورة المصغرة إلى المخزن عند أول طلب دون فك ترميز الأصل.
+"""
+
+import os
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from PIL import Image
+
+from .constants import APP_SETTINGS
+from .settings import get_settings
+from . import image_pack
+from . import tracing
+
+
+THUMBNAIL_SIZES = APP_SETTINGS.THUMBNAIL_SIZES
+DEFAULT_THUMBNAIL_SIZE = 'tile'
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.tiff', '.tif', '.bmp'}
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+INDEX_FILENAME = 'index.db'
+# تأخير كتابة أوقات الاستخدام المتراكمة إلى الفهرس (ثوانٍ)
+TOUCH_FLUSH_DELAY = 5.0
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path):
+    """حساب بصمة SHA-1 لمحتوى الملف بقراءة متدفقة"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def configured_max_bytes():
+    """حد حجم المخزن من الإعدادات (storage.thumbnails_max_mb)"""
+    return get_settings().get('storage.thumbnails_max_mb', DEFAULT_MAX_BYTES // (1024 * 1024)) * 1024 * 1024
+
+
+def thumbnail_path(root_dir, digest, size_name):
+    """المسار المجزأ لصورة مصغرة: root/ab/cd/<البصمة>_<المقاس>.jpg"""
+    return Path(root_dir) / digest[:2] / digest[2:4] / f'{digest}_{size_name}.jpg'
+
+
+def tiles_dir(root_dir, digest):
+    """مجلد هرم البلاطات للعرض بالتكبير العميق: root/ab/cd/<البصمة>_tiles"""
+    return Path(root_dir) / digest[:2] / digest[2:4] / f'{digest}_tiles'
+
+
+def tile_path(root_dir, digest, level, col, row):
+    """مسار بلاطة واحدة: <مجلد البلاطات>/L<المستوى>/<العمود>_<الصف>.jpg"""
+    return tiles_dir(root_dir, digest) / f'L{level}' / f'{col}_{row}.jpg'
+
+
+@tracing.traced('image.render_thumbnails')
+def render_thumbnails(source_path, targets):
+    """
+    توليد عدة صور مصغرة من فك ترميز واحد للصورة الأصلية
+
+    Args:
+        source_path: مسار الصورة الأصلية
+        targets: قائمة من (المقاس (عرض، ارتفاع)، مسار الحفظ)
+
+    Returns:
+        int: عدد الصور المصغرة المحفوظة
+    """
+    if not targets:
+        return 0
+
+    # الترتيب من الأكبر للأصغر: كل مقاس يُشتق من سابقه بدل إعادة فك الترميز
+    targets = sorted(targets, key=lambda t: t[0][0] * t[0][1], reverse=True)
+    largest = targets[0][0]
+
+    with image_pack.open_stream(source_path) as source, Image.open(source) as img:
+        # وضع draft يجعل فك ترميز JPEG يتم بمقياس مخفض (1/2، 1/4، 1/8) مباشرة
+        img.draft('RGB', largest)
+        return save_thumbnails(img, targets)
+
+
+def save_thumbnails(img, targets):
+    """
+    حفظ صور مصغرة من صورة مفتوحة مسبقاً (دون إعادة فتح الملف)
+
+    Args:
+        img: صورة PIL (يُفضل فتحها بوضع draft بمقاس أكبر هدف)
+        targets: قائمة من (المقاس (عرض، ارتفاع)، مسار الحفظ)
+
+    Returns:
+        int: عدد الصور المصغرة المحفوظة
+    """
+    targets = sorted(targets, key=lambda t: t[0][0] * t[0][1], reverse=True)
+    current = img.convert('RGB') if img.mode not in ('RGB', 'L') else img.copy()
+
+    saved = 0
+    for size, dest_path in targets:
+        current.thumbnail(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+        dest_path = Path(dest_path)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        # الكتابة في ملف مؤقت ثم الاستبدال لتفادي صور مصغرة مبتورة
+        tmp_path = dest_path.with_name(f'{dest_path.name}.{os.getpid()}.tmp')
+        current.save(tmp_path, 'JPEG', quality=85, optimize=True)
+        os.replace(tmp_path, dest_path)
+        saved += 1
+
+    return saved
+
+
+class ThumbnailStore:
+    """مخزن الصور المصغرة المجزأ على القرص والمفهرس ببصمة المحتوى"""
+
+    def __init__(self, root_dir, sizes=None, max_bytes=None, workers=2):
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.sizes = dict(sizes or THUMBNAIL_SIZES)
+        # None: الحد المضبوط في الإعدادات
+        self.max_bytes = configured_max_bytes() if max_bytes is None else max_bytes
+        self.workers = workers
+        self.index_path = self.root_dir / INDEX_FILENAME
+        # ذاكرة البصمات: (المسار، الحجم، وقت التعديل) -> البصمة
+        self._digests = {}
+        self._lock = threading.Lock()
+        # الطلبات الجارية: (مسار الصورة، المقاس) -> قائمة دوال الاستدعاء
+        self._pending = {}
+        self._executor = None
+        # أوقات الاستخدام بانتظار الكتابة: المسار -> الوقت
+        self._touched = {}
+        self._touch_timer = None
+        # الحجم الكلي للفهرس محدثاً مع كل تسجيل وحذف (None: يُقرأ عند الحاجة)
+        self._total_bytes = None
+        self._init_index()
+
+    # ------------------------------------------------------------------
+    # الفهرس على القرص
+    # ------------------------------------------------------------------
+
+    def _connect(self):
+        return sqlite3.connect(self.index_path, timeout=30)
+
+    def _init_index(self):
+        """إنشاء جدول الفهرس إذا لم يكن موجوداً"""
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS thumbnails (
+                path TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                size_name TEXT NOT NULL,
+                bytes INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_thumbnails_access ON thumbnails(last_access)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_thumbnails_digest ON thumbnails(digest)')
+        conn.commit()
+        conn.close()
+
+    def register(self, entries, enforce=True):
+        """
+        تسجيل صور مصغرة في الفهرس ثم تطبيق حد الحجم
+
+        الحجم الكلي يُحدث في الذاكرة، فلا يُجمع الفهرس كله إلا عند تجاوز الحد.
+
+        Args:
+            entries: قائمة من (البصمة، اسم المقاس، المسار)
+            enforce: تطبيق حد الحجم بعد التسجيل (False لعمليات الدفعات التي
+                     تطبقه مرة واحدة في نهايتها)
+        """
+        now = time.time()
+        rows = []
+        for digest, size_name, path in entries:
+            try:
+                rows.append((str(path), digest, size_name, Path(path).stat().st_size, now))
+            except OSError:
+                continue
+        if not rows:
+            return
+        conn = self._connect()
+        # الصفوف المستبدلة (إعادة إنشاء المقاس نفسه) تُطرح من الحجم الكلي
+        replaced = 0
+        for row in rows:
+            previous = conn.execute('SELECT bytes FROM thumbnails WHERE path = ?', (row[0],)).fetchone()
+            if previous:
+                replaced += previous[0]
+        conn.executemany(
+            'INSERT OR REPLACE INTO thumbnails (path, digest, size_name, bytes, last_access) VALUES (?, ?, ?, ?, ?)',
+            rows
+        )
+        conn.commit()
+        conn.close()
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += sum(row[3] for row in rows) - replaced
+        if enforce and self._over_budget():
+            self.enforce_budget()
+
+    def _touch(self, path):
+        """
+        تسجيل استخدام الصورة المصغرة دون لمس القرص
+
+        الأوقات تتراكم في الذاكرة وتُكتب دفعة واحدة بعد TOUCH_FLUSH_DELAY ثانية
+        في خيط مؤقت، فلا يُفتح الفهرس ولا يُنفَّذ commit في خيط الواجهة مع كل عرض.
+        """
+        with self._lock:
+            self._touched[str(path)] = time.time()
+            if self._touch_timer is None:
+                self._touch_timer = threading.Timer(TOUCH_FLUSH_DELAY, self.flush_touches)
+                self._touch_timer.daemon = True
+                self._touch_timer.start()
+
+    def flush_touches(self):
+        """
+        كتابة أوقات الاستخدام المتراكمة إلى الفهرس في معاملة واحدة
+
+        Returns:
+            int: عدد الصور المصغرة المحدثة
+        """
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            timer, self._touch_timer = self._touch_timer, None
+        if timer is not None:
+            timer.cancel()
+        if not touched:
+            return 0
+        conn = self._connect()
+        conn.executemany(
+            'UPDATE thumbnails SET last_access = ? WHERE path = ?',
+            [(last_access, path) for path, last_access in touched.items()]
+        )
+        conn.commit()
+        conn.close()
+        return len(touched)
+
+    def total_bytes(self):
+        """الحجم الكلي للصور المصغرة المسجلة في الفهرس"""
+        conn = self._connect()
+        total = conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM thumbnails').fetchone()[0]
+        conn.close()
+        return total
+
+    def _over_budget(self):
+        """هل تجاوز الحجم الكلي المعروف الحد (يُقرأ من الفهرس مرة عند أول حاجة)"""
+        if not self.max_bytes:
+            return False
+        with self._lock:
+            total = self._total_bytes
+        if total is None:
+            total = self.total_bytes()
+            with self._lock:
+                if self._total_bytes is None:
+                    self._total_bytes = total
+        return total > self.max_bytes
+
+    def enforce_budget(self, max_bytes=None):
+        """
+        حذف الصور المصغرة الأقدم استخداماً حتى يصبح الحجم الكلي ضمن الحد
+
+        يُنزل الحجم إلى 90% من الحد لتفادي الحذف المتكرر مع كل إضافة.
+
+        Returns:
+            int: عدد الصور المصغرة المحذوفة
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        if not max_bytes:
+            return 0
+
+        # ترتيب LRU يشمل الاستخدامات التي لم تُكتب بعد
+        self.flush_touches()
+        conn = self._connect()
+        # الحجم من الفهرس نفسه: قد تكون عمليات أخرى (إعادة البناء) أضافت إليه
+        total = conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM thumbnails').fetchone()[0]
+        if total <= max_bytes:
+            conn.close()
+            with self._lock:
+                self._total_bytes = total
+            return 0
+
+        target = int(max_bytes * 0.9)
+        evicted = []
+        cursor = conn.execute('SELECT path, bytes FROM thumbnails ORDER BY last_access')
+        for path, size in cursor:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            total -= size
+            evicted.append((path,))
+
+        conn.executemany('DELETE FROM thumbnails WHERE path = ?', evicted)
+        conn.commit()
+        conn.close()
+        with self._lock:
+            self._total_bytes = total
+        return len(evicted)
+
+    # ------------------------------------------------------------------
+    # البصمات والمسارات
+    # ------------------------------------------------------------------
+
+    def digest_for(self, image_path):
+        """الحصول على بصمة الصورة مع تجنب إعادة قراءة الملفات غير المعدلة"""
+        image_path = Path(image_path)
+        try:
+            stat = image_path.stat()
+        except FileNotFoundError:
+            # صورة في حزمة سنة مختومة: بصمتها محفوظة في فهرس الحزمة
+            digest = image_pack.stored_digest(image_path)
+            if digest is None:
+                raise
+            return digest
+        key = (str(image_path), stat.st_size, stat.st_mtime_ns)
+
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            digest = file_digest(image_path)
+            with self._lock:
+                self._digests[key] = digest
+        return digest
+
+    def path_for(self, digest, size_name=DEFAULT_THUMBNAIL_SIZE):
+        """مسار الصورة المصغرة لبصمة ومقاس محددين"""
+        if size_name not in self.sizes:
+            raise ValueError(f'مقاس صورة مصغرة غير معروف: {size_name}')
+        return thumbnail_path(self.root_dir, digest, size_name)
+
+    def placeholder(self, size_name=DEFAULT_THUMBNAIL_SIZE):
+        """مسار صورة بديلة رمادية تُعرض إلى حين جاهزية الصورة المصغرة"""
+        path = self.root_dir / f'placeholder_{size_name}.jpg'
+        if not path.exists():
+            width, height = self.sizes[size_name]
+            Image.new('RGB', (width, height), (226, 232, 240)).save(path, 'JPEG', quality=70)
+        return str(path)
+
+    # ------------------------------------------------------------------
+    # الإنشاء والقراءة
+    # ------------------------------------------------------------------
+
+    def create(self, image_path, size_names=None, digest=None, force=False, enforce=True):
+        """
+        إنشاء الصور المصغرة المطلوبة للصورة (بشكل متزامن)
+
+        Args:
+            image_path: مسار الصورة الأصلية
+            size_names: أسماء المقاسات (الافتراضي: جميع المقاسات)
+            digest: بصمة محسوبة مسبقاً (اختياري)
+            force: إعادة الإنشاء حتى لو كانت موجودة
+            enforce: تطبيق حد الحجم بعد التسجيل (راجع register)
+
+        Returns:
+            dict: اسم المقاس -> مسار الصورة المصغرة
+        """
+        digest = digest or self.digest_for(image_path)
+        size_names = list(size_names or self.sizes)
+
+        paths = {name: self.path_for(digest, name) for name in size_names}
+        missing = {
+            name: path for name, path in paths.items()
+            if force or not path.exists()
+        }
+        if missing:
+            registered = [(digest, name, path) for name, path in missing.items()]
+            if not force:
+                # الصور المصغرة المحفوظة في حزمة السنة تُنسخ كما هي دون فك ترميز الأصل
+                for name, path in list(missing.items()):
+                    data = image_pack.read_thumbnail(image_path, digest, name)
+                    if data is not None:
+                        path.parent.mkdir(parents=True, exist_ok=True)
+                        tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+                        tmp_path.write_bytes(data)
+                        os.replace(tmp_path, path)
+                        del missing[name]
+            if missing:
+                render_thumbnails(image_path, [(self.sizes[name], path) for name, path in missing.items()])
+            self.register(registered, enforce=enforce)
+        # الموجودة مسبقاً استُخدمت الآن: تحديث ترتيبها في LRU
+        for name, path in paths.items():
+            if name not in missing:
+                self._touch(path)
+        return {name: str(path) for name, path in paths.items()}
+
+    def get(self, image_path, size_name=DEFAULT_THUMBNAIL_SIZE, digest=None):
+        """مسار الصورة المصغرة إن كانت موجودة، وإلا None"""
+        try:
+            digest = digest or self.digest_for(image_path)
+        except OSError:
+            return None
+        path = self.path_for(digest, size_name)
+        if not path.exists():
+            return None
+        self._touch(path)
+        return str(path)
+
+    def request(self, image_path, size_name=DEFAULT_THUMBNAIL_SIZE, callback=None, digest=None):
+        """
+        طلب صورة مصغرة دون حجب الواجهة
+
+        إذا كانت الصورة المصغرة جاهزة يُعاد مسارها مباشرة. وإلا يُجدوَل
+        إنشاؤها في الخلفية ويُعاد مسار الصورة البديلة، ثم تُستدعى
+        callback(image_path, size_name, thumb_path) من خيط الخلفية عند
+        الجاهزية (thumb_path يساوي None عند الفشل).
+
+        digest: بصمة المحتوى المخزنة في القاعدة (content_hash) إن وُجدت،
+        فتُعرف الصورة المصغرة الجاهزة دون قراءة الأصل حتى بعد إعادة التشغيل.
+        """
+        image_path = str(image_path)
+        cached_digest = digest or self._cached_digest(image_path)
+        if cached_digest:
+            path = self.path_for(cached_digest, size_name)
+            if path.exists():
+                self._touch(path)
+                return str(path)
+
+        key = (image_path, size_name)
+        with self._lock:
+            callbacks = self._pending.get(key)
+            if callbacks is not None:
+                if callback:
+                    callbacks.append(callback)
+                return self.placeholder(size_name)
+            self._pending[key] = [callback] if callback else []
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='thumbnails'
+                )
+            executor = self._executor
+
+        executor.submit(self._generate, image_path, size_name, digest)
+        return self.placeholder(size_name)
+
+    def _cached_digest(self, image_path):
+        """البصمة المحفوظة في الذاكرة للملف إن لم يتغير (دون قراءة محتواه)"""
+        try:
+            stat = os.stat(image_path)
+        except FileNotFoundError:
+            return image_pack.stored_digest(image_path)
+        except OSError:
+            return None
+        with self._lock:
+            return self._digests.get((str(Path(image_path)), stat.st_size, stat.st_mtime_ns))
+
+    def _generate(self, image_path, size_name, digest=None):
+        """إنشاء صورة مصغرة في خيط الخلفية وإبلاغ المنتظرين"""
+        thumb_path = None
+        try:
+            thumb_path = self.create(image_path, size_names=[size_name], digest=digest)[size_name]
+        except Exception as e:
+            print(f'خطأ في إنشاء الصورة المصغرة: {e}')
+
+        with self._lock:
+            callbacks = self._pending.pop((image_path, size_name), [])
+        for callback in callbacks:
+            try:
+                callback(image_path, size_name, thumb_path)
+            except Exception:
+                pass
+
+    def remove(self, digest):
+        """حذف جميع مقاسات الصورة المصغرة وبلاطات التكبير العميق لبصمة محددة"""
+        self.remove_many([digest])
+
+    def remove_many(self, digests):
+        """
+        حذف الصور المصغرة والبلاطات لعدة بصمات مع تحديث الفهرس في معاملة واحدة
+
+        Returns:
+            int: عدد الملفات المحذوفة (دون البلاطات)
+        """
+        removed = 0
+        for digest in digests:
+            for name in self.sizes:
+                try:
+                    self.path_for(digest, name).unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            shutil.rmtree(tiles_dir(self.root_dir, digest), ignore_errors=True)
+        conn = self._connect()
+        conn.executemany('DELETE FROM thumbnails WHERE digest = ?', [(digest,) for digest in digests])
+        conn.commit()
+        conn.close()
+        with self._lock:
+            self._total_bytes = None
+        return removed
+
+    def purge_legacy(self):
+        """حذف الصور المصغرة بالصيغة القديمة ({stem}_thumb.jpg) المتصادمة"""
+        removed = 0
+        for path in self.root_dir.glob('*_thumb.jpg'):
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+    def shutdown(self, wait=False):
+        """إيقاف مجموعة خيوط الخلفية وكتابة أوقات الاستخدام المتبقية"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait, cancel_futures=True)
+        self.flush_touches()
+
+
+def _iter_archive_images(storage_dir, thumbnails_dir):
+    """
+    المرور على جميع صور الأرشيف مع استثناء مجلد الصور المصغرة
+
+    صور السنوات المختومة تُعاد بمسارها الأصلي (documents/{السنة}/...) وتُقرأ
+    من حزمتها، إلا ما وُجد منها على القرص فقد مُرّ عليه مع الملفات.
+    """
+    storage_dir = Path(storage_dir)
+    thumbnails_dir = Path(thumbnails_dir).resolve()
+    for dirpath, dirnames, filenames in os.walk(storage_dir):
+        if Path(dirpath).resolve() == thumbnails_dir:
+            dirnames[:] = []
+            continue
+        for filename in filenames:
+            if Path(filename).suffix.lower() in IMAGE_EXTENSIONS:
+                yield os.path.join(dirpath, filename)
+
+    for year in image_pack.sealed_years(storage_dir):
+        pack = image_pack.get_pack(image_pack.pack_path(storage_dir, year))
+        if pack is None:
+            continue
+        for key in sorted(pack.files):
+            path = os.path.join(storage_dir, year, *key.split('/'))
+            if Path(key).suffix.lower() in IMAGE_EXTENSIONS and not os.path.exists(path):
+                yield path
+
+
+_worker_stores = {}
+
+
+def _rebuild_one(args):
+    """عامل إعادة البناء - يعمل داخل عملية منفصلة"""
+    image_path, root_dir, size_names, force, max_bytes = args
+    try:
+        store = _worker_stores.get(root_dir)
+        if store is None:
+            store = _worker_stores[root_dir] = ThumbnailStore(root_dir, max_bytes=max_bytes)
+        # حد الحجم يُطبَّق مرة واحدة بعد انتهاء كل العمليات (rebuild_thumbnails)
+        store.create(image_path, size_names=size_names, force=force, enforce=False)
+        return image_path, None
+    except Exception as e:
+        return image_path, str(e)
+
+
+def rebuild_thumbnails(storage_dir, thumbnails_dir=None, size_names=None,
+                       workers=None, force=False, progress=None, max_bytes=None):
+    """
+    إعادة بناء الصور المصغرة لأرشيف كامل بالتوازي على عدة عمليات
+
+    Args:
+        storage_dir: مجلد تخزين الوثائق
+        thumbnails_dir: مجلد الصور المصغرة (الافتراضي: storage_dir/thumbnails)
+        size_names: المقاسات المطلوبة (الافتراضي: الكل)
+        workers: عدد العمليات (الافتراضي: عدد الأنوية)
+        force: إعادة الإنشاء حتى للصور المصغرة الموجودة
+        progress: دالة تُستدعى (المعالَج، المسار، الخطأ) بعد كل صورة
+        max_bytes: حد حجم المخزن (الافتراضي: storage.thumbnails_max_mb)، يُطبَّق
+                   مرة واحدة في النهاية لا بعد كل صورة
+
+    Returns:
+        dict: {'processed': عدد، 'failed': [(المسار، الخطأ)]، 'evicted': عدد المحذوف لحد الحجم}
+    """
+    storage_dir = Path(storage_dir)
+    thumbnails_dir = Path(thumbnails_dir) if thumbnails_dir else storage_dir / 'thumbnails'
+    max_bytes = configured_max_bytes() if max_bytes is None else max_bytes
+
+    jobs = [
+        (path, str(thumbnails_dir), size_names, force, max_bytes)
+        for path in _iter_archive_images(storage_dir, thumbnails_dir)
+    ]
+
+    processed = 0
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for image_path, error in executor.map(_rebuild_one, jobs, chunksize=16):
+            processed += 1
+            if error:
+                failed.append((image_path, error))
+            if progress:
+                progress(processed, image_path, error)
+
+    evicted = ThumbnailStore(thumbnails_dir, max_bytes=max_bytes).enforce_budget()
+    return {'processed': processed, 'failed': failed, 'evicted': evicted}
@@ -0,0 +1,390 @@
+"""
+عرض الصفحة بالتكبير العميق - هرم بلاطات يُحمَّل منه المرئي فقط
+
+تُقسَّم الصفحة إلى مستويات: المستوى 0 بالدقة الكاملة وكل مستوى تالٍ بنصف
+أبعاد سابقه، وكل مستوى إلى بلاطات 256×256. يُنشأ المستوى عند أول حاجة إليه
+بفك ترميز واحد بمقاسه (QImageReader.setScaledSize) ثم تُحفظ بلاطاته على
+القرص ضمن مخزن الصور المصغرة، فتخضع لحد حجمه وتُحذف مع الصورة. بعد ذلك
+تُقرأ البلاطات الظاهرة فقط، لذا تتناسب تكلفة التكبير والتحريك مع حجم
+منطقة العرض لا مع نسبة التكبير.
+"""
+
+import os
+import math
+import threading
+
+from PyQt6.QtWidgets import QGraphicsView, QGraphicsScene, QGraphicsItem
+from PyQt6.QtCore import (
+    QObject, QRunnable, QThreadPool, QRect, QRectF, QSize, Qt, QTimer, pyqtSignal
+)
+from PyQt6.QtGui import QColor, QImage, QPainter, QTransform
+
+from .thumbnails import ThumbnailStore, tile_path
+from .image_cache import get_image_cache
+from .image_loader import PRIORITY_VISIBLE, PRIORITY_PREFETCH, open_image_reader
+from .settings import get_settings
+from . import tracing
+
+
+TILE_SIZE = 256
+MIN_ZOOM = 0.05
+MAX_ZOOM = 8.0
+
+_PLACEHOLDER_COLOR = QColor(236, 240, 241)
+
+
+def level_count(width, height, tile_size=TILE_SIZE):
+    """عدد مستويات الهرم حتى تتسع الصفحة كاملة في بلاطة واحدة"""
+    levels = 1
+    while max(width, height) > tile_size:
+        width, height = (width + 1) // 2, (height + 1) // 2
+        levels += 1
+    return levels
+
+
+def level_size(source_size, level):
+    """أبعاد الصفحة في مستوى محدد"""
+    factor = 1 << level
+    return QSize(
+        max(1, math.ceil(source_size.width() / factor)),
+        max(1, math.ceil(source_size.height() / factor))
+    )
+
+
+@tracing.traced('image.build_tile_level')
+def build_level(image_path, root_dir, digest, level, source_size, tile_size=TILE_SIZE):
+    """
+    إنشاء بلاطات مستوى كامل من فك ترميز واحد بمقاس المستوى
+
+    Returns:
+        list: مسارات البلاطات المحفوظة
+    """
+    reader = open_image_reader(image_path)
+    if level > 0:
+        reader.setScaledSize(level_size(source_size, level))
+    image = reader.read()
+    if image.isNull():
+        raise ValueError(reader.errorString())
+
+    saved = []
+    for row in range(math.ceil(image.height() / tile_size)):
+        for col in range(math.ceil(image.width() / tile_size)):
+            rect = QRect(col * tile_size, row * tile_size, tile_size, tile_size).intersected(image.rect())
+            path = tile_path(root_dir, digest, level, col, row)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # الكتابة في ملف مؤقت ثم الاستبدال لتفادي بلاطات مبتورة
+            tmp_path = path.with_name(f'{path.name}.{threading.get_ident()}.tmp')
+            image.copy(rect).save(str(tmp_path), 'JPG', 85)
+            os.replace(tmp_path, path)
+            saved.append(path)
+    return saved
+
+
+class _TileSignals(QObject):
+    """إشارات مهام البلاطات"""
+    loaded = pyqtSignal(object, QImage)
+
+
+class _TileTask(QRunnable):
+    """قراءة بلاطة واحدة (مع إنشاء مستواها إن لم يكن موجوداً)"""
+
+    def __init__(self, loader, key, image_path, source_size):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.loader = loader
+        self.key = key
+        # الصفحة المصدر وقت الطلب: قد يتغير loader.image_path أثناء التنفيذ
+        self.image_path = image_path
+        self.source_size = QSize(source_size)
+
+    def run(self):
+        digest, level, col, row = self.key
+        loader = self.loader
+        image = QImage()
+        try:
+            path = tile_path(loader.store.root_dir, digest, level, col, row)
+            if not path.exists():
+                loader.ensure_level(self.key, self.image_path, self.source_size)
+            image = QImage(str(path))
+        except Exception as e:
+            print(f"[TILES ERROR] {self.image_path}: {e}")
+        try:
+            loader.signals.loaded.emit(self.key, image)
+        except RuntimeError:
+            pass  # أُغلق المحمل أثناء القراءة
+
+
+class TileLoader(QObject):
+    """تحميل بلاطات صفحة واحدة في الخلفية مع إلغاء غير الظاهر منها"""
+
+    tile_ready = pyqtSignal(object, QImage)
+
+    def __init__(self, store, parent=None, max_threads=2):
+        super().__init__(parent)
+        self.store = store
+        self.image_path = None
+        self.source_size = QSize()
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.signals = _TileSignals()
+        self.signals.loaded.connect(self._on_loaded)
+        self._tasks = {}
+        # قفل لكل مستوى حتى لا يُنشأ المستوى نفسه مرتين بالتوازي
+        self._level_locks = {}
+        self._locks_guard = threading.Lock()
+
+    def set_image(self, image_path, source_size):
+        """تغيير الصفحة المصدر وإلغاء طلبات الصفحة السابقة"""
+        self.retain(())
+        self.image_path = image_path
+        self.source_size = QSize(source_size)
+
+    def ensure_level(self, key, image_path, source_size):
+        """
+        إنشاء بلاطات مستوى البلاطة المطلوبة إن لم تكن موجودة (من خيط الخلفية)
+
+        image_path و source_size للصفحة التي طُلبت لها البلاطة (لا الصفحة
+        الحالية)، فلا تُبنى بلاطات صفحة جديدة تحت بصمة الصفحة السابقة.
+        يُعاد إنشاء المستوى كاملاً أيضاً إذا حذف حد حجم المخزن بعض بلاطاته.
+        """
+        digest, level = key[:2]
+        with self._locks_guard:
+            lock = self._level_locks.setdefault((digest, level), threading.Lock())
+        with lock:
+            if tile_path(self.store.root_dir, *key).exists():
+                return  # أنشأته مهمة أخرى أثناء الانتظار
+            paths = build_level(image_path, self.store.root_dir, digest, level, source_size)
+            self.store.register([(digest, f'L{level}', path) for path in paths])
+
+    def request(self, key, priority=PRIORITY_VISIBLE):
+        """جدولة قراءة بلاطة (digest، المستوى، العمود، الصف)"""
+        if key in self._tasks or self.image_path is None:
+            return
+        task = _TileTask(self, key, self.image_path, self.source_size)
+        self._tasks[key] = task
+        self.pool.start(task, priority)
+
+    def retain(self, keys):
+        """إلغاء الطلبات المنتظرة للبلاطات التي لم تعد ظاهرة"""
+        keys = set(keys)
+        for key in [k for k in self._tasks if k not in keys]:
+            task = self._tasks.pop(key)
+            self.pool.tryTake(task)
+
+    def _on_loaded(self, key, image):
+        """استلام البلاطة في خيط الواجهة"""
+        if self._tasks.pop(key, None) is None:
+            return  # أُلغي الطلب أثناء القراءة
+        self.tile_ready.emit(key, image)
+
+    def shutdown(self):
+        """إلغاء المهام المنتظرة وانتظار الجارية"""
+        self._tasks.clear()
+        self.pool.clear()
+        self.pool.waitForDone(3000)
+
+
+class TiledPageItem(QGraphicsItem):
+    """عنصر الصفحة في المشهد - يرسم البلاطات المتاحة للجزء المكشوف فقط"""
+
+    def __init__(self, view):
+        super().__init__()
+        self.view = view
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+
+    def boundingRect(self):
+        size = self.view.source_size
+        return QRectF(0, 0, size.width(), size.height())
+
+    def paint(self, painter, option, widget=None):
+        view = self.view
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        for level, col, row in view.tiles_in_rect(option.exposedRect, view.level):
+            target = view.tile_rect(level, col, row)
+            image = view.cache.get(view.tile_key(level, col, row))
+            if image is not None:
+                painter.drawImage(target, image, QRectF(image.rect()))
+            elif not self._paint_fallback(painter, target, level):
+                painter.fillRect(target, _PLACEHOLDER_COLOR)
+
+    def _paint_fallback(self, painter, target, level):
+        """رسم الجزء نفسه من بلاطة مستوى أقل دقة إلى حين وصول البلاطة"""
+        view = self.view
+        for coarse in range(level + 1, view.levels):
+            span = TILE_SIZE << coarse
+            col, row = int(target.x() // span), int(target.y() // span)
+            image = view.cache.peek(view.tile_key(coarse, col, row))
+            if image is None:
+                continue
+            scale = 1.0 / (1 << coarse)
+            source = QRectF(
+                (target.x() - col * span) * scale, (target.y() - row * span) * scale,
+                target.width() * scale, target.height() * scale
+            )
+            painter.drawImage(target, image, source)
+            return True
+        return False
+
+
+class TiledImageView(QGraphicsView):
+    """
+    عارض صفحة بالتكبير العميق
+
+    إحداثيات المشهد هي بكسلات الصفحة الأصلية، ونسبة التكبير هي مقياس
+    التحويل (بكسل شاشة لكل بكسل أصلي) كما في العارض العادي.
+    """
+
+    zoom_changed = pyqtSignal(float)
+
+    def __init__(self, store=None, parent=None):
+        super().__init__(parent)
+        if store is None:
+            store = ThumbnailStore(get_settings().get('storage.thumbnails_folder', 'documents/thumbnails'))
+        self.store = store
+        self.cache = get_image_cache()
+        self.loader = TileLoader(store, self)
+        self.loader.tile_ready.connect(self._on_tile_ready)
+
+        self.digest = None
+        self.source_size = QSize()
+        self.levels = 1
+        self.level = 0
+        self.item = None
+
+        self.setScene(QGraphicsScene(self))
+        self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
+        self.setResizeAnchor(QGraphicsView.ViewportAnchor.AnchorViewCenter)
+        self.setBackgroundBrush(QColor('#f1f2f6'))
+        # البلاطات ترسم نفسها؛ لا حاجة لإعادة رسم النافذة كاملة عند التحريك
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate)
+
+        # تجميع طلبات البلاطات أثناء التحريك المتواصل
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(15)
+        self._update_timer.timeout.connect(self.update_visible_tiles)
+        self.horizontalScrollBar().valueChanged.connect(self._schedule_update)
+        self.verticalScrollBar().valueChanged.connect(self._schedule_update)
+
+    # ------------------------------------------------------------------
+    # الصفحة والبلاطات
+    # ------------------------------------------------------------------
+
+    def set_image(self, image_path, source_size, digest):
+        """عرض صفحة جديدة"""
+        self.loader.set_image(image_path, source_size)
+        self.digest = digest
+        self.source_size = QSize(source_size)
+        self.levels = level_count(source_size.width(), source_size.height())
+
+        self.scene().clear()
+        self.item = TiledPageItem(self)
+        self.scene().addItem(self.item)
+        self.scene().setSceneRect(self.item.boundingRect())
+        self.fit_to_window()
+
+    def tile_key(self, level, col, row):
+        return (self.digest, level, col, row)
+
+    def tile_rect(self, level, col, row):
+        """مستطيل البلاطة بإحداثيات الصفحة الأصلية"""
+        span = TILE_SIZE << level
+        rect = QRectF(col * span, row * span, span, span)
+        return rect.intersected(QRectF(0, 0, self.source_size.width(), self.source_size.height()))
+
+    def tiles_in_rect(self, rect, level):
+        """البلاطات (المستوى، العمود، الصف) المتقاطعة مع مستطيل بإحداثيات الصفحة"""
+        rect = rect.intersected(QRectF(0, 0, self.source_size.width(), self.source_size.height()))
+        if rect.isEmpty():
+            return []
+        span = TILE_SIZE << level
+        cols = range(int(rect.left() // span), int(math.ceil(rect.right() / span)))
+        rows = range(int(rect.top() // span), int(math.ceil(rect.bottom() / span)))
+        return [(level, col, row) for row in rows for col in cols]
+
+    def _level_for(self, zoom):
+        """أدق مستوى لا تقل دقته عن دقة العرض"""
+        if zoom >= 1.0:
+            return 0
+        return min(int(math.floor(math.log2(1.0 / zoom))), self.levels - 1)
+
+    def _schedule_update(self, *args):
+        self._update_timer.start()
+
+    def update_visible_tiles(self):
+        """طلب البلاطات الظاهرة الناقصة وإلغاء ما خرج من منطقة العرض"""
+        if self.item is None:
+            return
+        visible = self.mapToScene(self.viewport().rect()).boundingRect()
+        wanted = []
+        for level, col, row in self.tiles_in_rect(visible, self.level):
+            key = self.tile_key(level, col, row)
+            wanted.append(key)
+            if not self.cache.contains(key):
+                self.loader.request(key, PRIORITY_VISIBLE)
+
+        # المستوى الأخشن كاملاً بديل سريع أثناء التحريك والتكبير
+        coarse = self.levels - 1
+        if coarse != self.level:
+            key = self.tile_key(coarse, 0, 0)
+            wanted.append(key)
+            if not self.cache.contains(key):
+                self.loader.request(key, PRIORITY_PREFETCH)
+
+        self.loader.retain(wanted)
+
+    def _on_tile_ready(self, key, image):
+        """استلام بلاطة وإعادة رسم موضعها فقط"""
+        if image.isNull():
+            return
+        self.cache.put(key, image, owner=id(self))
+        if key[0] == self.digest and self.item is not None:
+            self.item.update(self.tile_rect(*key[1:]))
+
+    # ------------------------------------------------------------------
+    # التكبير
+    # ------------------------------------------------------------------
+
+    @property
+    def zoom_factor(self):
+        return self.transform().m11()
+
+    def set_zoom(self, zoom):
+        """تطبيق نسبة تكبير (بكسل شاشة لكل بكسل أصلي)"""
+        zoom = max(MIN_ZOOM, min(zoom, MAX_ZOOM))
+        self.setTransform(QTransform.fromScale(zoom, zoom))
+        self._zoom_applied()
+
+    def zoom_by(self, factor):
+        self.set_zoom(self.zoom_factor * factor)
+
+    def fit_to_window(self):
+        """ملء منطقة العرض بالصفحة"""
+        if self.item is None:
+            return
+        self.fitInView(self.item, Qt.AspectRatioMode.KeepAspectRatio)
+        self._zoom_applied()
+
+    def _zoom_applied(self):
+        self.level = self._level_for(self.zoom_factor)
+        self.zoom_changed.emit(self.zoom_factor)
+        self._schedule_update()
+
+    def wheelEvent(self, event):
+        """Ctrl + عجلة الفأرة للتكبير، والعجلة وحدها للتمرير"""
+        if event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.zoom_by(1.25 if event.angleDelta().y() > 0 else 1 / 1.25)
+            event.accept()
+        else:
+            super().wheelEvent(event)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._schedule_update()
+
+    def release(self):
+        """إيقاف التحميل وتحرير بلاطات هذا العارض من الذاكرة المؤقتة"""
+        self._update_timer.stop()
+        self.loader.shutdown()
+        self.cache.release(id(self))
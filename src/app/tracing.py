@@ -0,0 +1,284 @@
+"""
+تتبع المسارات الساخنة - نطاقات زمنية (spans) وعدادات بكلفة شبه معدومة عند التعطيل
+
+الاستخدام:
+    from app import tracing
+
+    with tracing.span('db.search', field=field):
+        ...
+
+    @tracing.traced('ocr.extract_text')
+    def extract_text(...): ...
+
+    tracing.count('image_cache.hit')
+    tracing.debug('معالجة الصورة idx=%s', idx)
+
+عند التعطيل تُرجع span() كائناً فارغاً مشتركاً، ولا تفعل count() و debug()
+شيئاً بعد فحص متغير واحد، ولا تُنسَّق رسائل debug() أصلاً. عند التفعيل تُحفظ
+آخر النطاقات في حلقة دائرية بحجم ثابت، وتُجمع أزمنة كل عملية لحساب p50/p95،
+ويمكن تصدير النطاقات بصيغة Chrome trace-event (chrome://tracing أو Perfetto).
+
+يُفعَّل بالإعداد diagnostics.tracing أو بمتغير البيئة DOCAPP_TRACE=1 أو من
+نافذة تشخيص الأداء.
+"""
+
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque
+
+
+DEFAULT_RING_SIZE = 10000
+# عدد الأزمنة المحفوظة لكل عملية لحساب النسب المئوية
+SAMPLES_PER_OPERATION = 2048
+
+_enabled = os.environ.get('DOCAPP_TRACE', '') not in ('', '0')
+_lock = threading.Lock()
+_ring = deque(maxlen=DEFAULT_RING_SIZE)
+_operations = {}
+_counters = {}
+_epoch_ns = time.perf_counter_ns()
+_pid = os.getpid()
+
+
+class _NullSpan:
+    """نطاق فارغ يُستخدم عند التعطيل (كائن واحد مشترك)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+    def finish(self):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _OperationStats:
+    """إحصاءات عملية واحدة: العدد والمجموع والأقصى وعينة من آخر الأزمنة"""
+
+    __slots__ = ('count', 'total_ns', 'max_ns', 'samples')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.samples = deque(maxlen=SAMPLES_PER_OPERATION)
+
+    def add(self, duration_ns):
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+        self.samples.append(duration_ns)
+
+
+class Span:
+    """نطاق زمني مُسجَّل عند الخروج من كتلة with"""
+
+    __slots__ = ('name', 'attrs', 'start_ns')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.start_ns = 0
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter_ns() - self.start_ns
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        _record(self.name, self.start_ns, duration, self.attrs)
+        return False
+
+    def set(self, **attrs):
+        """إضافة خصائص تُعرف أثناء التنفيذ (مثل عدد النتائج)"""
+        self.attrs.update(attrs)
+
+    def finish(self):
+        """إنهاء نطاق بدأ بـ start_span()"""
+        self.__exit__(None, None, None)
+
+
+def _record(name, start_ns, duration_ns, attrs, phase='X'):
+    _ring.append((phase, name, start_ns, duration_ns, threading.get_ident(), attrs))
+    if phase != 'X':
+        return
+    with _lock:
+        stats = _operations.get(name)
+        if stats is None:
+            stats = _operations[name] = _OperationStats()
+        stats.add(duration_ns)
+
+
+# ----------------------------------------------------------------------
+# الواجهة العامة
+# ----------------------------------------------------------------------
+
+def enable(flag=True, ring_size=None):
+    """تفعيل أو تعطيل التتبع (ring_size يغيّر سعة الحلقة مع الاحتفاظ بآخر النطاقات)"""
+    global _enabled, _ring
+    if ring_size and ring_size != _ring.maxlen:
+        _ring = deque(_ring, maxlen=ring_size)
+    _enabled = bool(flag)
+
+
+def is_enabled():
+    return _enabled
+
+
+def configure(settings):
+    """تطبيق إعدادات diagnostics.* (لا يُعطِّل تفعيلاً سابقاً بمتغير البيئة)"""
+    ring_size = settings.get('diagnostics.ring_size', DEFAULT_RING_SIZE)
+    enable(_enabled or settings.get('diagnostics.tracing', False), ring_size=ring_size)
+
+
+def span(name, **attrs):
+    """نطاق زمني لكتلة with؛ كائن فارغ مشترك عند التعطيل"""
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, attrs)
+
+
+def start_span(name, **attrs):
+    """نطاق يبدأ الآن ويُنهى صراحة بـ finish() (للمقاطع الطويلة خارج كتلة with)"""
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, attrs).__enter__()
+
+
+def traced(name=None):
+    """مُزخرِف يلف الدالة بنطاق زمني (الاسم الافتراضي: module.function)"""
+    def decorate(func):
+        span_name = name or f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(span_name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, value=1):
+    """زيادة عداد (إصابات الذاكرة المؤقتة، الصفوف المضافة...)"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def debug(message, *args):
+    """
+    رسالة تشخيص تُسجَّل كحدث لحظي في الحلقة وتُطبع بوسم [DEBUG]
+
+    تُنسَّق الرسالة (message % args) فقط عند التفعيل، لذلك لا تكلف شيئاً
+    داخل الحلقات في الوضع العادي.
+    """
+    if not _enabled:
+        return
+    text = message % args if args else message
+    _record('debug', time.perf_counter_ns(), 0, {'message': text}, phase='i')
+    print(f"[DEBUG] {text}")
+
+
+def reset():
+    """مسح النطاقات والإحصاءات والعدادات"""
+    with _lock:
+        _ring.clear()
+        _operations.clear()
+        _counters.clear()
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def operation_stats():
+    """
+    إحصاءات كل عملية مُتتبَّعة
+
+    Returns:
+        dict: الاسم -> {'count', 'total_ms', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms'}
+    """
+    with _lock:
+        snapshot = [(name, stats.count, stats.total_ns, stats.max_ns, sorted(stats.samples))
+                    for name, stats in _operations.items()]
+    result = {}
+    for name, count_, total_ns, max_ns, samples in snapshot:
+        result[name] = {
+            'count': count_,
+            'total_ms': total_ns / 1e6,
+            'mean_ms': total_ns / count_ / 1e6 if count_ else 0,
+            'p50_ms': _percentile(samples, 0.50) / 1e6,
+            'p95_ms': _percentile(samples, 0.95) / 1e6,
+            'max_ms': max_ns / 1e6,
+        }
+    return result
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def recent_spans(limit=None):
+    """آخر النطاقات من الحلقة: قائمة (المرحلة، الاسم، البداية ns، المدة ns، الخيط، الخصائص)"""
+    spans = list(_ring)
+    return spans[-limit:] if limit else spans
+
+
+def chrome_trace():
+    """النطاقات الحالية والعدادات بصيغة Chrome trace-event (قاموس قابل للتحويل إلى JSON)"""
+    events = []
+    threads = {}
+    for phase, name, start_ns, duration_ns, thread_id, attrs in list(_ring):
+        tid = threads.setdefault(thread_id, len(threads) + 1)
+        event = {
+            'name': name,
+            'cat': name.split('.', 1)[0],
+            'ph': phase,
+            'ts': (start_ns - _epoch_ns) / 1000,
+            'pid': _pid,
+            'tid': tid,
+            'args': {key: value if isinstance(value, (int, float, str, bool)) or value is None else str(value)
+                     for key, value in attrs.items()},
+        }
+        if phase == 'X':
+            event['dur'] = duration_ns / 1000
+        else:
+            event['s'] = 't'
+        events.append(event)
+
+    now = (time.perf_counter_ns() - _epoch_ns) / 1000
+    for name, value in counters().items():
+        events.append({'name': name, 'ph': 'C', 'ts': now, 'pid': _pid, 'tid': 0, 'args': {'value': value}})
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    for thread_id, tid in threads.items():
+        events.append({'name': 'thread_name', 'ph': 'M', 'pid': _pid, 'tid': tid,
+                       'args': {'name': names.get(thread_id, f'thread-{thread_id}')}})
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def export_chrome_trace(file_path):
+    """حفظ التتبع في ملف JSON يُفتح في chrome://tracing أو ui.perfetto.dev"""
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(chrome_trace(), f, ensure_ascii=False)
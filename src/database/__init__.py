@@ -3,5 +3,10 @@
 """
 
 from .db_manager import DatabaseManager
+from .query_builder import DocumentQuery
+from .records import DocumentRecord, ImageRecord, AttachmentRecord, IntegrityRecord
 
-__all__ = ['DatabaseManager']
+__all__ = [
+    'DatabaseManager', 'DocumentQuery',
+    'DocumentRecord', 'ImageRecord', 'AttachmentRecord', 'IntegrityRecord',
+]
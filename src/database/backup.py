@@ -0,0 +1,229 @@
+"""
+النسخ الاحتياطي لقاعدة البيانات أثناء العمل
+
+تُنسخ القاعدة بواجهة النسخ الاحتياطي في SQLite (Connection.backup) على دفعات
+من الصفحات مع مهلة قصيرة بين الدفعات، فلا يُحجب الكاتبون طوال النسخ ولا تُلتقط
+صورة ممزقة من ملف يُكتب إليه كما في نسخ الملف مباشرة. تُفحص النسخة بـ
+PRAGMA quick_check ثم تُضغط بـ gzip ويُكتب بجانبها ملف .sha256 (بصيغة sha256sum)،
+وتُحذف النسخ الأقدم من آخر keep نسخة.
+
+الاستعادة تتحقق من البصمة ومن سلامة القاعدة المفكوكة قبل أن تلمس القاعدة الحية،
+ثم تنقلها إليها بخطوة واحدة من واجهة النسخ نفسها (معاملة كتابة واحدة).
+
+الاستخدام:
+    result = create_backup('documents.db', 'backups', keep=10)
+    restore_backup(result['path'], 'documents.db')
+"""
+
+import os
+import gzip
+import time
+import shutil
+import sqlite3
+from datetime import datetime
+
+from app.helpers import FileHelper
+
+
+BACKUP_PREFIX = 'backup_'
+BACKUP_SUFFIX = '.db.gz'
+CHECKSUM_SUFFIX = '.sha256'
+DEFAULT_KEEP = 10
+
+# صفحات كل خطوة نسخ (4 MB بصفحات 4096) والمهلة بين الخطوات بالثواني
+BACKUP_STEP_PAGES = 1024
+BACKUP_STEP_SLEEP = 0.005
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def _quick_check(db_path):
+    """PRAGMA quick_check على ملف قاعدة (ValueError إذا لم تكن سليمة)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        result = conn.execute('PRAGMA quick_check').fetchone()[0]
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f'ملف قاعدة بيانات غير صالح: {str(e)}')
+    finally:
+        conn.close()
+    if result != 'ok':
+        raise ValueError(f'فحص سلامة القاعدة فشل: {result}')
+
+
+def _remove(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def checksum_path(backup_path):
+    """مسار ملف البصمة بجانب النسخة"""
+    return f'{backup_path}{CHECKSUM_SUFFIX}'
+
+
+def list_backups(backup_dir):
+    """
+    النسخ الاحتياطية في المجلد من الأحدث إلى الأقدم
+
+    Returns:
+        list: مسارات ملفات backup_*.db.gz
+    """
+    if not os.path.isdir(backup_dir):
+        return []
+    names = [
+        name for name in os.listdir(backup_dir)
+        if name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX)
+    ]
+    # الطابع الزمني في الاسم يرتب النسخ أبجدياً
+    return [os.path.join(backup_dir, name) for name in sorted(names, reverse=True)]
+
+
+def last_backup_time(backup_dir):
+    """وقت آخر نسخة (datetime) أو None إذا لا توجد نسخ"""
+    backups = list_backups(backup_dir)
+    if not backups:
+        return None
+    return datetime.fromtimestamp(os.path.getmtime(backups[0]))
+
+
+def backup_due(backup_dir, interval_days):
+    """هل مضت interval_days منذ آخر نسخة (أو لا توجد نسخة)"""
+    if not interval_days or interval_days <= 0:
+        return False
+    last = last_backup_time(backup_dir)
+    return last is None or (datetime.now() - last).total_seconds() >= interval_days * 86400
+
+
+def rotate_backups(backup_dir, keep=DEFAULT_KEEP):
+    """
+    حذف النسخ الأقدم من آخر keep نسخة (مع ملفات بصمتها)
+
+    Returns:
+        list: مسارات النسخ المحذوفة
+    """
+    removed = []
+    for path in list_backups(backup_dir)[max(keep, 1):]:
+        _remove(path, checksum_path(path))
+        removed.append(path)
+    return removed
+
+
+def create_backup(db_path, backup_dir='backups', keep=DEFAULT_KEEP, step_pages=BACKUP_STEP_PAGES,
+                  step_sleep=BACKUP_STEP_SLEEP, progress=None, is_cancelled=None):
+    """
+    نسخة احتياطية مضغوطة وموقعة ببصمة SHA-256 من قاعدة تعمل
+
+    Args:
+        keep: عدد النسخ المحتفظ بها بعد النسخ (0 أو None: بلا حذف)
+        step_pages: صفحات كل خطوة نسخ؛ القفل على القاعدة يُحرَّر بين الخطوات
+        progress: دالة (المنسوخ، الإجمالي) بعدد الصفحات
+        is_cancelled: دالة تُرجع True لإيقاف النسخ
+
+    Returns:
+        dict: {'path', 'sha256', 'pages', 'size', 'db_size', 'elapsed', 'removed'}
+              أو None عند الإلغاء
+    """
+    started = time.perf_counter()
+    os.makedirs(backup_dir, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    backup_path = os.path.join(backup_dir, f'{BACKUP_PREFIX}{timestamp}{BACKUP_SUFFIX}')
+    raw_tmp = os.path.join(backup_dir, f'.{BACKUP_PREFIX}{timestamp}.{os.getpid()}.db')
+    gz_tmp = f'{backup_path}.{os.getpid()}.tmp'
+    copied = {'pages': 0}
+
+    def on_step(status, remaining, total):
+        # استثناء من هنا يُجهض النسخ داخل Connection.backup
+        if is_cancelled and is_cancelled():
+            raise InterruptedError
+        copied['pages'] = total
+        if progress:
+            progress(total - remaining, total)
+
+    try:
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(raw_tmp)
+        try:
+            source.backup(target, pages=step_pages, progress=on_step, sleep=step_sleep)
+        finally:
+            target.close()
+            source.close()
+
+        _quick_check(raw_tmp)
+        with open(raw_tmp, 'rb') as src, gzip.open(gz_tmp, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, _CHUNK_SIZE)
+        db_size = os.path.getsize(raw_tmp)
+        digest = FileHelper.sha256_file(gz_tmp)
+
+        # البصمة تُكتب أولاً حتى لا تظهر نسخة بلا بصمة
+        with open(checksum_path(backup_path), 'w', encoding='utf-8') as f:
+            f.write(f'{digest}  {os.path.basename(backup_path)}\n')
+        os.replace(gz_tmp, backup_path)
+    except InterruptedError:
+        return None
+    finally:
+        _remove(raw_tmp, gz_tmp)
+
+    removed = rotate_backups(backup_dir, keep) if keep else []
+    return {
+        'path': backup_path,
+        'sha256': digest,
+        'pages': copied['pages'],
+        'size': os.path.getsize(backup_path),
+        'db_size': db_size,
+        'elapsed': time.perf_counter() - started,
+        'removed': removed,
+    }
+
+
+def verify_backup(backup_path):
+    """
+    مطابقة النسخة مع ملف بصمتها
+
+    Raises:
+        ValueError: لا يوجد ملف بصمة أو البصمة لا تطابق
+    """
+    try:
+        with open(checksum_path(backup_path), 'r', encoding='utf-8') as f:
+            expected = f.read().split()[0].lower()
+    except (OSError, IndexError):
+        raise ValueError(f'لا يوجد ملف بصمة صالح للنسخة: {backup_path}')
+    actual = FileHelper.sha256_file(backup_path)
+    if actual != expected:
+        raise ValueError(f'بصمة النسخة لا تطابق (النسخة تالفة): {backup_path}')
+    return actual
+
+
+def restore_backup(backup_path, db_path):
+    """
+    استعادة القاعدة من نسخة بعد التحقق منها
+
+    تُفك النسخة إلى ملف مؤقت بجانب القاعدة ويُفحص، ثم تُنقل صفحاتها إلى
+    القاعدة الحية بخطوة نسخ واحدة، فإما تُستبدل كاملة أو تبقى كما هي.
+
+    Raises:
+        ValueError: النسخة تالفة أو لا تطابق بصمتها
+    """
+    started = time.perf_counter()
+    verify_backup(backup_path)
+    db_dir = os.path.dirname(os.path.abspath(db_path))
+    raw_tmp = os.path.join(db_dir, f'.restore_{os.getpid()}.db')
+    try:
+        try:
+            with gzip.open(backup_path, 'rb') as src, open(raw_tmp, 'wb') as dst:
+                shutil.copyfileobj(src, dst, _CHUNK_SIZE)
+        except (OSError, EOFError) as e:
+            raise ValueError(f'تعذر فك النسخة: {str(e)}')
+        _quick_check(raw_tmp)
+
+        source = sqlite3.connect(raw_tmp)
+        target = sqlite3.connect(db_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+    finally:
+        _remove(raw_tmp)
+    return {'path': backup_path, 'elapsed': time.perf_counter() - started}
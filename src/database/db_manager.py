@@ -1,11 +1,92 @@
 import sqlite3
+import json
 import os
+import re
+import heapq
+import itertools
 from datetime import datetime
 from pathlib import Path
 
+from app import tracing
+from . import shards
+from .query_builder import DocumentQuery, date_key
+from .records import (
+    DOCUMENT_FIELDS, DOCUMENT_COLUMNS, IMAGE_COLUMNS, select_list,
+    document_row, image_row, keyed_document_row, attachment_row, integrity_row
+)
+
+def _doc_number(doc_name):
+    """رقم الوثيقة: ما قبل أول مسافة في الاسم (كتعبير SUBSTR/INSTR في الاستعلامات)"""
+    return (doc_name or '').split(' ', 1)[0]
+
+
+def _sql_int(text):
+    """قيمة CAST(text AS INTEGER) في SQLite: الأرقام في بداية النص أو 0"""
+    match = re.match(r'\s*([+-]?\d+)', text or '')
+    return int(match.group(1)) if match else 0
+
+
+def _recent_key(doc):
+    """ترتيب ORDER BY created_date DESC, id DESC (مع reverse=True)"""
+    return doc.created_date or '', doc.id
+
+
 class DatabaseManager:
+    # أعمدة البيانات الوصفية للصور (تُضاف للقواعد القديمة عند الترحيل)
+    IMAGE_METADATA_COLUMNS = {
+        'width': 'INTEGER',
+        'height': 'INTEGER',
+        'color_mode': 'TEXT',
+        'image_format': 'TEXT',
+        'dpi_x': 'INTEGER',
+        'dpi_y': 'INTEGER',
+        'orientation': 'INTEGER',
+        'file_size': 'INTEGER',
+        'content_hash': 'TEXT',
+        'phash': 'TEXT',
+    }
+    
+    # مشغلات سجل التغييرات: (الاسم، الحدث، معرف الوثيقة، العملية)
+    # تغيّر الصور يُسجَّل تعديلاً لوثيقتها لأن الجدول يعرض عدد الصور
+    CHANGE_TRIGGERS = [
+        ('trg_documents_insert', 'INSERT ON documents', 'NEW.id', 'insert'),
+        ('trg_documents_update', 'UPDATE ON documents', 'NEW.id', 'update'),
+        ('trg_documents_delete', 'DELETE ON documents', 'OLD.id', 'delete'),
+        ('trg_images_insert', 'INSERT ON images', 'NEW.document_id', 'update'),
+        ('trg_images_delete', 'DELETE ON images', 'OLD.document_id', 'update'),
+        ('trg_images_move', 'UPDATE OF document_id ON images', 'NEW.document_id', 'update'),
+    ]
+    # عدد السجلات المحفوظة بعد التقليم
+    CHANGE_JOURNAL_KEEP = 10000
+    # مجلد السنة في مسار الصورة: documents/<السنة>/ بأي من الفاصلين
+    YEAR_IN_PATH = re.compile(r'documents[\\/](\d+)[\\/]', re.IGNORECASE)
+    # عدد الصفوف في كل دفعة عند القراءة المتدفقة أو صفحات المفتاح (cursor.arraysize)
+    ITER_ARRAYSIZE = 500
+    # حد متغيرات SQLite الافتراضي 999
+    MAX_SQL_VARIABLES = 900
+    # مهلة التراجع عن الحذف قبل أن يحذف file_gc ملفات الصور (ثوانٍ)
+    TRASH_UNDO_SECONDS = 24 * 60 * 60
+    # ملفات السنوات المغلقة المرفقة باتصال واحد (SQLITE_MAX_ATTACHED الافتراضي 10)؛
+    # الأكثر منها يُقرأ على عدة اتصالات وتُدمج نتائجها بترتيب الاستعلام
+    MAX_ATTACHED_SHARDS = 10
+    # أعمدة الوثيقة بالبادئة d. للاستعلامات التي تربط الصور بوثائقها
+    _DOCUMENT_COLUMNS_D = select_list(DOCUMENT_FIELDS, 'd')
+    # فهارس مركبة لتركيبات الفلترة الشائعة (مساواة على الحقول التصنيفية ثم مدى التاريخ)
+    DOCUMENT_INDEXES = {
+        'idx_documents_created': 'created_date',
+        'idx_documents_date_key': 'date_key',
+        'idx_documents_dept_class_date': 'issuing_dept, doc_classification, date_key',
+        'idx_documents_class_date': 'doc_classification, date_key',
+        'idx_documents_paragraph_date': 'legal_paragraph, date_key',
+    }
+    
     def __init__(self, db_path='documents.db'):
         self.db_path = db_path
+        # السنوات المغلقة: السنة -> مسار ملفها (shards.py)
+        self._shards = {}
+        # أعمدة الجدولين في القاعدة الرئيسية، وأعمدة كل ملف سنة عند أول إرفاق
+        self._table_columns = {}
+        self._shard_columns = {}
         self.init_database()
     
     def init_database(self):
@@ -40,7 +121,121 @@ class DatabaseManager:
                 sides INTEGER,
                 notes TEXT,
                 created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (document_id) REFERENCES documents(id)
+                FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE
+            )
+        ''')
+        
+        # ترحيل جدول الصور: إضافة الأعمدة الناقصة في القواعد القديمة
+        cursor.execute("PRAGMA table_info(images)")
+        existing_columns = {column[1] for column in cursor.fetchall()}
+        if 'notes' not in existing_columns:
+            cursor.execute('ALTER TABLE images ADD COLUMN notes TEXT')
+        for column, column_type in self.IMAGE_METADATA_COLUMNS.items():
+            if column not in existing_columns:
+                cursor.execute(f'ALTER TABLE images ADD COLUMN {column} {column_type}')
+        
+        # سنة المجلد مفهرسة للوثائق والصور بدل البحث بـ LIKE في المسارات
+        backfill_years = False
+        if 'year' not in existing_columns:
+            cursor.execute('ALTER TABLE images ADD COLUMN year TEXT')
+            backfill_years = True
+        cursor.execute("PRAGMA table_info(documents)")
+        if 'year' not in {column[1] for column in cursor.fetchall()}:
+            cursor.execute('ALTER TABLE documents ADD COLUMN year TEXT')
+            backfill_years = True
+        
+        # القواعد القديمة أنشئت بلا ON DELETE CASCADE (يُعاد بناء الجدول قبل فهارسه ومشغلاته)
+        self._migrate_images_cascade(cursor)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_images_content_hash ON images(content_hash)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_images_year ON images(year, document_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_documents_year ON documents(year)')
+        
+        # مفتاح التاريخ YYYY-MM-DD لفلترة مدى التاريخ وترتيبه في SQL (query_builder)
+        backfill_date_keys = False
+        if 'date_key' not in {column[1] for column in cursor.execute("PRAGMA table_info(documents)")}:
+            cursor.execute('ALTER TABLE documents ADD COLUMN date_key TEXT')
+            backfill_date_keys = True
+        for index, columns in self.DOCUMENT_INDEXES.items():
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {index} ON documents({columns})')
+        
+        # ذاكرة نتائج OCR بمواضع الكلمات، مفهرسة ببصمة محتوى الصورة
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ocr_cache (
+                content_hash TEXT PRIMARY KEY,
+                language TEXT,
+                words TEXT NOT NULL,
+                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # سجل تغييرات الوثائق: يملؤه SQLite بالمشغلات عند كل إضافة/تعديل/حذف،
+        # ويقرأ الجدول الرئيسي ما بعد آخر رقم تسلسلي رآه بدل إعادة التحميل الكامل
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS document_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                document_id INTEGER NOT NULL,
+                op TEXT NOT NULL,
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        for trigger, event, document_id, op in self.CHANGE_TRIGGERS:
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {trigger} AFTER {event}
+                BEGIN
+                    INSERT INTO document_changes (document_id, op) VALUES ({document_id}, '{op}');
+                END
+            ''')
+        
+        # آخر فحص سلامة لكل صورة (integrity.py)؛ الفحص التزايدي يتخطى ما فُحص حديثاً
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS integrity_checks (
+                image_id INTEGER PRIMARY KEY,
+                checked_date TIMESTAMP NOT NULL,
+                status TEXT NOT NULL,
+                detail TEXT
+            )
+        ''')
+        
+        # سلة المحذوفات: delete_documents ينقل صفوف الوثائق وصورها إلى هنا (JSON بأسماء
+        # الأعمدة) ويمكن التراجع عن الحذف حتى purge_after، ثم يحذف file_gc ملفاتها
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trash (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                deleted_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                purge_after TIMESTAMP NOT NULL,
+                documents INTEGER NOT NULL,
+                purging INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trash_documents (
+                document_id INTEGER PRIMARY KEY,
+                trash_id INTEGER NOT NULL REFERENCES trash(id) ON DELETE CASCADE,
+                row TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trash_images (
+                image_id INTEGER PRIMARY KEY,
+                trash_id INTEGER NOT NULL REFERENCES trash(id) ON DELETE CASCADE,
+                image_path TEXT NOT NULL,
+                content_hash TEXT,
+                row TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trash_documents_trash ON trash_documents(trash_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trash_images_trash ON trash_images(trash_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trash_images_hash ON trash_images(content_hash)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trash_purge ON trash(purge_after)')
+        
+        # السنوات المغلقة المنقولة إلى ملفات مستقلة (close_year)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS year_shards (
+                year TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                documents INTEGER NOT NULL,
+                images INTEGER NOT NULL,
+                closed_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
         
@@ -53,24 +248,229 @@ class DatabaseManager:
             )
         ''')
         
+        if backfill_years:
+            self._backfill_years(cursor)
+        if backfill_date_keys:
+            self._backfill_date_keys(cursor)
+        
+        for table in shards.SHARD_TABLES:
+            self._table_columns[table] = [column[1] for column in cursor.execute(f'PRAGMA table_info({table})')]
+        self._load_shards(cursor)
+        
         conn.commit()
         conn.close()
+        
+        self._check_shards()
+    
+    # ------------------------------------------------------------------
+    # توجيه القراءة بين القاعدة الرئيسية وملفات السنوات المغلقة
+    # ------------------------------------------------------------------
     
+    def _load_shards(self, cursor):
+        """قراءة سجل السنوات المغلقة (الأحدث أولاً فيُرفق مع القاعدة الرئيسية)"""
+        directory = shards.shard_dir(self.db_path)
+        cursor.execute('SELECT year, filename FROM year_shards ORDER BY year DESC')
+        self._shards = {year: os.path.join(directory, filename) for year, filename in cursor.fetchall()}
+    
+    def _check_shards(self):
+        """التحقق من وجود ملفات السنوات المسجلة في year_shards قبل أي إرفاق"""
+        missing = [year for year, path in self._shards.items() if not os.path.isfile(path)]
+        if missing:
+            raise ValueError(
+                f'ملفات السنوات المغلقة غير موجودة ({", ".join(sorted(missing))}) في '
+                f'{shards.shard_dir(self.db_path)}؛ انسخ مجلد السنوات مع القاعدة'
+            )
+    
+    def _read_groups(self, year_from=None, year_to=None):
+        """
+        مصادر استعلام قراءة مقيد بمدى سنوات، مقسمة إلى اتصالات
+        
+        Returns:
+            list: (تشمل القاعدة الرئيسية، [(السنة، المسار)...]) لكل اتصال
+        """
+        closed = [
+            (year, path) for year, path in self._shards.items()
+            if (year_from is None or year >= year_from) and (year_to is None or year <= year_to)
+        ]
+        if not closed:
+            return [(True, [])]
+        # سنة مغلقة واحدة: ملفها وحده (القاعدة الرئيسية لا تحوي شيئاً منها)
+        include_main = not (year_from is not None and year_from == year_to and year_from in self._shards)
+        size = self.MAX_ATTACHED_SHARDS
+        return [
+            (include_main and start == 0, closed[start:start + size])
+            for start in range(0, len(closed), size)
+        ]
+    
+    def _open_sources(self, include_main, shard_sources):
+        """
+        اتصال بالقاعدة الرئيسية تُرفق به ملفات السنوات المطلوبة
+        
+        عروض مؤقتة باسمَي documents و images تجمع الجداول (UNION ALL) وتحجب
+        جداول القاعدة الرئيسية في الأسماء غير المؤهلة، فتعمل الاستعلامات كما هي
+        وتبقى الجداول الأخرى (integrity_checks، ocr_cache...) من القاعدة الرئيسية.
+        """
+        if not shard_sources:
+            return sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, uri=True)
+        try:
+            for index, (year, path) in enumerate(shard_sources):
+                conn.execute(f'ATTACH DATABASE ? AS shard_{index}', (shards.shard_uri(path),))
+            for table in shards.SHARD_TABLES:
+                columns = self._table_columns[table]
+                arms = [f"SELECT {', '.join(columns)} FROM main.{table}"] if include_main else []
+                for index, (year, path) in enumerate(shard_sources):
+                    available = self._shard_columns.get((year, table))
+                    if available is None:
+                        available = {column[1] for column in conn.execute(f'PRAGMA shard_{index}.table_info({table})')}
+                        self._shard_columns[(year, table)] = available
+                    # أعمدة أضافتها ترحيلات بعد إغلاق السنة تُقرأ NULL
+                    select = ', '.join(column if column in available else f'NULL AS {column}' for column in columns)
+                    arms.append(f'SELECT {select} FROM shard_{index}.{table}')
+                conn.execute(f"CREATE TEMP VIEW {table} AS {' UNION ALL '.join(arms)}")
+        except Exception:
+            conn.close()
+            raise
+        return conn
+    
+    def _stream(self, include_main, shard_sources, sql, params, row_factory, arraysize):
+        conn = self._open_sources(include_main, shard_sources)
+        try:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory
+            cursor.arraysize = arraysize or self.ITER_ARRAYSIZE
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+    
+    def _select(self, sql, params=(), row_factory=None, year_from=None, year_to=None,
+                key=None, reverse=False, arraysize=None):
+        """
+        تنفيذ استعلام قراءة على كل السنوات (أو مدى منها) كمُكرِّر صفوف
+        
+        بلا سنوات مغلقة هو مؤشر واحد على القاعدة الرئيسية كما كان. إذا احتاج
+        الاستعلام أكثر من اتصال تُدمج النتائج بـ key (بترتيب ORDER BY نفسه) وإلا
+        تُسلسل.
+        """
+        streams = [
+            self._stream(include_main, shard_sources, sql, params, row_factory, arraysize)
+            for include_main, shard_sources in self._read_groups(year_from, year_to)
+        ]
+        if len(streams) == 1:
+            return streams[0]
+        if key is None:
+            return itertools.chain(*streams)
+        return heapq.merge(*streams, key=key, reverse=reverse)
+    
+    def _reject_closed(self, doc_ids):
+        """ValueError إذا كانت إحدى الوثائق في سنة مغلقة (ملفاتها للقراءة فقط)"""
+        if not self._shards:
+            return
+        doc_ids = list(doc_ids)
+        for start in range(0, len(doc_ids), self.MAX_SQL_VARIABLES):
+            chunk = doc_ids[start:start + self.MAX_SQL_VARIABLES]
+            placeholders = ','.join('?' * len(chunk))
+            years = {row[0] for row in self._select(f'SELECT year FROM documents WHERE id IN ({placeholders})', chunk)}
+            closed = sorted(years & set(self._shards))
+            if closed:
+                raise ValueError(f"لا يمكن تعديل وثائق سنة مغلقة: {', '.join(closed)}")
+    
+    @staticmethod
+    def _migrate_images_cascade(cursor):
+        """
+        إعادة بناء جدول الصور بمفتاح أجنبي ON DELETE CASCADE (بنفس أعمدته ومعرفاته)
+        
+        تعريف الجدول يُؤخذ من sqlite_master فيشمل الأعمدة المضافة بـ ALTER TABLE.
+        الفهارس والمشغلات تُحذف مع الجدول القديم ويعيد init_database إنشاءها.
+        """
+        foreign_keys = cursor.execute('PRAGMA foreign_key_list(images)').fetchall()
+        # (id, seq, table, from, to, on_update, on_delete, match)
+        if not foreign_keys or all(fk[6] == 'CASCADE' for fk in foreign_keys):
+            return
+        sql = cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'images'"
+        ).fetchone()[0]
+        create_sql = re.sub(
+            r'REFERENCES\s+documents\s*\(\s*id\s*\)',
+            'REFERENCES documents(id) ON DELETE CASCADE', sql, count=1
+        )
+        create_sql = re.sub(r'^CREATE TABLE\s+"?images"?', 'CREATE TABLE images_migrated', create_sql)
+        sequence = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'images'").fetchone()
+        cursor.execute('DROP TABLE IF EXISTS images_migrated')
+        cursor.execute(create_sql)
+        cursor.execute('INSERT INTO images_migrated SELECT * FROM images')
+        cursor.execute('DROP TABLE images')
+        cursor.execute('ALTER TABLE images_migrated RENAME TO images')
+        # AUTOINCREMENT لا يعيد استعمال معرفات صور حُذفت قبل الترحيل
+        if sequence:
+            cursor.execute(
+                "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'images'", (sequence[0],)
+            )
+        print('[DB] تم ترحيل جدول الصور إلى ON DELETE CASCADE')
+    
+    @classmethod
+    def year_from_image_path(cls, image_path):
+        """سنة مجلد الصورة من مسارها (آخر documents/<السنة>/ فيه) أو None"""
+        matches = cls.YEAR_IN_PATH.findall(image_path or '')
+        return matches[-1] if matches else None
+    
+    def _backfill_years(self, cursor):
+        """ترحيل: تعبئة عمود السنة للصور والوثائق الموجودة من مسارات الصور"""
+        cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM document_changes')
+        last_seq = cursor.fetchone()[0]
+        
+        cursor.execute('SELECT id, image_path FROM images WHERE year IS NULL')
+        updates = []
+        for image_id, image_path in cursor.fetchall():
+            year = self.year_from_image_path(image_path)
+            if year:
+                updates.append((year, image_id))
+        cursor.executemany('UPDATE images SET year = ? WHERE id = ?', updates)
+        cursor.execute('''
+            UPDATE documents SET year = (
+                SELECT MIN(images.year) FROM images WHERE images.document_id = documents.id
+            ) WHERE year IS NULL
+        ''')
+        # الترحيل لا يغيّر ما يعرضه الجدول، فلا داعي لتسجيله في سجل التغييرات
+        cursor.execute('DELETE FROM document_changes WHERE seq > ?', (last_seq,))
+        if updates:
+            print(f"[DB] تم ترحيل عمود السنة لـ {len(updates)} صورة")
+    
+    def _backfill_date_keys(self, cursor):
+        """ترحيل: تعبئة مفتاح التاريخ للوثائق الموجودة من حقل التاريخ"""
+        cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM document_changes')
+        last_seq = cursor.fetchone()[0]
+        
+        cursor.execute('SELECT id, doc_date FROM documents WHERE date_key IS NULL')
+        updates = [(date_key(doc_date), doc_id) for doc_id, doc_date in cursor.fetchall()]
+        updates = [update for update in updates if update[0]]
+        cursor.executemany('UPDATE documents SET date_key = ? WHERE id = ?', updates)
+        cursor.execute('DELETE FROM document_changes WHERE seq > ?', (last_seq,))
+        if updates:
+            print(f"[DB] تم ترحيل مفتاح التاريخ لـ {len(updates)} وثيقة")
+    
+    @tracing.traced('db.add_document')
     def add_document(self, doc_name, doc_date, doc_title, issuing_dept, doc_classification, legal_paragraph):
         """إضافة وثيقة جديدة"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
-            INSERT INTO documents (doc_name, doc_date, doc_title, issuing_dept, doc_classification, legal_paragraph)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (doc_name, doc_date, doc_title, issuing_dept, doc_classification, legal_paragraph))
+            INSERT INTO documents (doc_name, doc_date, doc_title, issuing_dept, doc_classification, legal_paragraph, date_key)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (doc_name, doc_date, doc_title, issuing_dept, doc_classification, legal_paragraph, date_key(doc_date)))
         
         conn.commit()
         doc_id = cursor.lastrowid
         conn.close()
         return doc_id
     
+    @tracing.traced('db.add_image')
     def add_image(self, document_id, image_path, original_filename, page_number, image_number, sides, notes=None):
         """إضافة صورة للوثيقة"""
         conn = sqlite3.connect(self.db_path)
@@ -80,11 +480,15 @@ class DatabaseManager:
         cursor.execute("PRAGMA table_info(images)")
         columns = [column[1] for column in cursor.fetchall()]
         
+        year = self.year_from_image_path(image_path)
+        if year in self._shards:
+            conn.close()
+            raise ValueError(f'السنة {year} مغلقة: لا يمكن إضافة صور إليها')
         if 'notes' in columns:
             cursor.execute('''
-                INSERT INTO images (document_id, image_path, original_filename, page_number, image_number, sides, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (document_id, image_path, original_filename, page_number, image_number, sides, notes))
+                INSERT INTO images (document_id, image_path, original_filename, page_number, image_number, sides, notes, year)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (document_id, image_path, original_filename, page_number, image_number, sides, notes, year))
         else:
             # إضافة العمود إذا لم يكن موجوداً
             try:
@@ -94,25 +498,82 @@ class DatabaseManager:
                 pass
             
             cursor.execute('''
-                INSERT INTO images (document_id, image_path, original_filename, page_number, image_number, sides, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (document_id, image_path, original_filename, page_number, image_number, sides, notes))
+                INSERT INTO images (document_id, image_path, original_filename, page_number, image_number, sides, notes, year)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (document_id, image_path, original_filename, page_number, image_number, sides, notes, year))
+        image_id = cursor.lastrowid
+        
+        # سنة الوثيقة هي سنة أول صورة تُضاف لها
+        if year:
+            cursor.execute('UPDATE documents SET year = ? WHERE id = ? AND year IS NULL', (year, document_id))
         
         conn.commit()
-        image_id = cursor.lastrowid
         conn.close()
         return image_id
     
-    def search_documents(self, search_term, search_field='doc_name'):
-        """البحث عن الوثائق"""
+    @tracing.traced('db.update_images_metadata')
+    def update_images_metadata(self, metadata_rows):
+        """
+        حفظ البيانات الوصفية المستخرجة لعدة صور في معاملة واحدة
+        
+        Args:
+            metadata_rows: قائمة من (image_id, dict) حيث dict يحتوي أعمدة IMAGE_METADATA_COLUMNS
+        """
+        columns = list(self.IMAGE_METADATA_COLUMNS)
+        assignments = ', '.join(f'{column} = ?' for column in columns)
+        params = [
+            tuple(metadata.get(column) for column in columns) + (image_id,)
+            for image_id, metadata in metadata_rows
+        ]
+        if not params:
+            return
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        cursor.executemany(f'UPDATE images SET {assignments} WHERE id = ?', params)
+        conn.commit()
+        conn.close()
+    
+    @tracing.traced('db.get_images_metadata')
+    def get_images_metadata(self, document_id):
+        """البيانات الوصفية لصور الوثيقة: قاموس image_id -> dict (دون فتح الملفات)"""
+        columns = list(self.IMAGE_METADATA_COLUMNS)
+        rows = self._select(f'SELECT id, {", ".join(columns)} FROM images WHERE document_id = ?', (document_id,))
+        results = {row[0]: dict(zip(columns, row[1:])) for row in rows}
+        return results
+    
+    @tracing.traced('db.get_ocr_words')
+    def get_ocr_words(self, content_hash):
+        """
+        نتيجة OCR المحفوظة لمحتوى صورة (بغض النظر عن الوثيقة أو المسار)
         
-        query = f'SELECT * FROM documents WHERE {search_field} LIKE ?'
-        cursor.execute(query, (f'%{search_term}%',))
-        
-        results = cursor.fetchall()
+        Returns:
+            dict: {'size': [العرض، الارتفاع]، 'words': [[النص، يسار، أعلى، عرض، ارتفاع]، ...]} أو None
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT words FROM ocr_cache WHERE content_hash = ?', (content_hash,))
+        row = cursor.fetchone()
         conn.close()
+        return json.loads(row[0]) if row else None
+    
+    @tracing.traced('db.save_ocr_words')
+    def save_ocr_words(self, content_hash, ocr_result, language=None):
+        """حفظ نتيجة OCR بمواضع الكلمات لإعادة استخدامها في التصديرات اللاحقة"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT OR REPLACE INTO ocr_cache (content_hash, language, words) VALUES (?, ?, ?)',
+            (content_hash, language, json.dumps(ocr_result, ensure_ascii=False))
+        )
+        conn.commit()
+        conn.close()
+    
+    @tracing.traced('db.search_documents')
+    def search_documents(self, search_term, search_field='doc_name'):
+        """البحث عن الوثائق"""
+        query = f'SELECT {DOCUMENT_COLUMNS} FROM documents WHERE {search_field} LIKE ?'
+        results = list(self._select(query, (f'%{search_term}%',), document_row))
         
         # حفظ في السجل
         self.save_search_history(search_term)
@@ -121,97 +582,71 @@ class DatabaseManager:
     
     def find_document_exact(self, doc_name):
         """البحث عن وثيقة بالاسم الدقيق (مطابقة تامة)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM documents WHERE doc_name = ?', (doc_name,))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        return results
+        return list(self._select(f'SELECT {DOCUMENT_COLUMNS} FROM documents WHERE doc_name = ?', (doc_name,), document_row))
     
     def find_document_by_number(self, doc_number):
         """البحث عن وثيقة برقم الوثيقة فقط (البحث في بداية اسم الوثيقة)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # البحث عن الوثائق التي تبدأ برقم معين متبوعاً بمسافة
-        cursor.execute('SELECT * FROM documents WHERE doc_name LIKE ?', (f'{doc_number} %',))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        return results
+        return list(self._select(
+            f'SELECT {DOCUMENT_COLUMNS} FROM documents WHERE doc_name LIKE ?', (f'{doc_number} %',), document_row
+        ))
     
+    @tracing.traced('db.find_document_by_number_and_date')
     def find_document_by_number_and_date(self, doc_number, doc_date):
         """البحث عن وثيقة برقم الوثيقة والتاريخ (للتحقق من التكرار عند الاستيراد)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # البحث عن الوثائق التي تحتوي على الرقم والتاريخ في اسم الوثيقة
         # الصيغة المتوقعة: "رقم في تاريخ"
         doc_name_pattern = f'{doc_number} في {doc_date}'
         
-        cursor.execute('''
-            SELECT * FROM documents 
+        return list(self._select(f'''
+            SELECT {DOCUMENT_COLUMNS} FROM documents 
             WHERE doc_name = ? OR doc_name LIKE ?
-        ''', (doc_name_pattern, f'{doc_name_pattern}%'))
-        
-        results = cursor.fetchall()
-        conn.close()
-        
-        return results
+        ''', (doc_name_pattern, f'{doc_name_pattern}%'), document_row))
     
+    @tracing.traced('db.search_documents_and_attachments')
     def search_documents_and_attachments(self, search_term, search_field='doc_name'):
         """البحث عن الوثائق والمرفقات حسب الحقل المختار بدقة"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # تحويل النتائج لقاموس للتحقق من التكرار
         results_dict = {}
         
+        stage = tracing.start_span('search.documents', field=search_field)
         # البحث في الوثائق الرئيسية حسب الحقل المحدد
         if search_field == 'doc_name':
             # البحث الدقيق في رقم الوثيقة - أولاً المطابق تماماً، ثم المبتدئ بنفس الرقم
-            cursor.execute('''
-                SELECT *, 
-                       CASE 
-                           WHEN SUBSTR(doc_name, 1, INSTR(doc_name || ' ', ' ') - 1) = ? THEN 1
-                           WHEN SUBSTR(doc_name, 1, INSTR(doc_name || ' ', ' ') - 1) LIKE ? THEN 2
-                           ELSE 3
-                       END as priority
+            # الأولوية تُحسب في ORDER BY فقط فلا تظهر عموداً إضافياً في الصفوف
+            # (key يعيد الترتيب نفسه عند دمج نتائج ملفات السنوات)
+            query = f'''
+                SELECT {DOCUMENT_COLUMNS}
                 FROM documents 
                 WHERE SUBSTR(doc_name, 1, INSTR(doc_name || ' ', ' ') - 1) = ? 
                    OR SUBSTR(doc_name, 1, INSTR(doc_name || ' ', ' ') - 1) LIKE ?
-                ORDER BY priority, CAST(SUBSTR(doc_name, 1, INSTR(doc_name || ' ', ' ') - 1) AS INTEGER)
-            ''', (search_term, f'{search_term}%', search_term, f'{search_term}%',))
-        elif search_field == 'doc_date':
-            # البحث في التاريخ فقط
-            cursor.execute('SELECT * FROM documents WHERE doc_date LIKE ? ORDER BY doc_date', (f'%{search_term}%',))
-        elif search_field == 'doc_title':
-            # البحث في المضمون فقط
-            cursor.execute('SELECT * FROM documents WHERE doc_title LIKE ? ORDER BY doc_title', (f'%{search_term}%',))
-        elif search_field == 'issuing_dept':
-            # البحث في الجهة فقط
-            cursor.execute('SELECT * FROM documents WHERE issuing_dept LIKE ? ORDER BY issuing_dept', (f'%{search_term}%',))
-        elif search_field == 'doc_classification':
-            # البحث في التصنيف فقط
-            cursor.execute('SELECT * FROM documents WHERE doc_classification LIKE ? ORDER BY doc_classification', (f'%{search_term}%',))
+                ORDER BY CASE 
+                             WHEN SUBSTR(doc_name, 1, INSTR(doc_name || ' ', ' ') - 1) = ? THEN 1
+                             WHEN SUBSTR(doc_name, 1, INSTR(doc_name || ' ', ' ') - 1) LIKE ? THEN 2
+                             ELSE 3
+                         END,
+                         CAST(SUBSTR(doc_name, 1, INSTR(doc_name || ' ', ' ') - 1) AS INTEGER)
+            '''
+            params = (search_term, f'{search_term}%', search_term, f'{search_term}%')
+            key = lambda doc: (_doc_number(doc.doc_name) != search_term, _sql_int(_doc_number(doc.doc_name)))
         else:
-            # حماية من SQL injection - استخدام الحقل الافتراضي
-            cursor.execute('SELECT * FROM documents WHERE doc_name LIKE ? ORDER BY doc_name', (f'%{search_term}%',))
+            # البحث في التاريخ أو المضمون أو الجهة أو التصنيف فقط؛ غير ذلك حماية
+            # من SQL injection - استخدام الحقل الافتراضي
+            field = search_field if search_field in (
+                'doc_date', 'doc_title', 'issuing_dept', 'doc_classification'
+            ) else 'doc_name'
+            query = f'SELECT {DOCUMENT_COLUMNS} FROM documents WHERE {field} LIKE ? ORDER BY {field}'
+            params = (f'%{search_term}%',)
+            key = lambda doc: getattr(doc, field) or ''
         
-        doc_results = cursor.fetchall()
+        doc_results = list(self._select(query, params, document_row, key=key))
+        stage.set(rows=len(doc_results))
+        stage.finish()
         
         # إضافة نتائج البحث الرئيسية
         for doc in doc_results:
-            # استبعاد عمود priority إذا كان موجوداً (في حالة البحث بـ doc_name)
-            if search_field == 'doc_name' and len(doc) > 7:
-                doc = doc[:-1]  # إزالة العمود الأخير (priority)
-            
-            doc_id = doc[0]
-            doc_name = doc[1] or ''
+            doc_id = doc.id
+            doc_name = doc.doc_name or ''
             # استخراج رقم الوثيقة من الاسم
             doc_number = doc_name.split()[0] if doc_name else ''
             results_dict[doc_id] = {
@@ -222,22 +657,21 @@ class DatabaseManager:
             }
         
         # البحث في المرفقات والصور الإضافية
+        stage = tracing.start_span('search.attachments', field=search_field)
         if search_field == 'doc_name':
             # البحث في ملاحظات الصور للعثور على وثائق تحتوي على نفس الرقم في المرفقات
-            cursor.execute('''
-                SELECT DISTINCT i.document_id, i.notes, d.*
+            # المرور على المؤشر مباشرة بدل fetchall: ملاحظات كل المرفقات قد تكون كبيرة
+            attachments = self._select(f'''
+                SELECT DISTINCT i.notes, {self._DOCUMENT_COLUMNS_D}
                 FROM images i
                 JOIN documents d ON i.document_id = d.id
                 WHERE i.notes IS NOT NULL 
                 ORDER BY CAST(SUBSTR(d.doc_name, 1, INSTR(d.doc_name || ' ', ' ') - 1) AS INTEGER)
-            ''')
-            
-            attachment_results = cursor.fetchall()
-            
-            for row in attachment_results:
-                doc_id = row[0]
-                attachment_notes = row[1] or ''
-                doc_data = row[2:]  # بيانات الوثيقة تبدأ من العمود 2
+            ''', row_factory=attachment_row, key=lambda attachment: _sql_int(_doc_number(attachment.document.doc_name)))
+            for attachment in attachments:
+                doc_data = attachment.document
+                doc_id = doc_data.id
+                attachment_notes = attachment.notes or ''
                 
                 # البحث في ملاحظات المرفق عن رقم الوثيقة
                 if attachment_notes:
@@ -274,20 +708,18 @@ class DatabaseManager:
         
         elif search_field == 'doc_title':
             # البحث في مضمون المرفقات
-            cursor.execute('''
-                SELECT DISTINCT i.document_id, i.notes, d.*
+            # المرور على المؤشر مباشرة بدل fetchall: ملاحظات كل المرفقات قد تكون كبيرة
+            attachments = self._select(f'''
+                SELECT DISTINCT i.notes, {self._DOCUMENT_COLUMNS_D}
                 FROM images i
                 JOIN documents d ON i.document_id = d.id
                 WHERE i.notes LIKE ?
                 ORDER BY d.doc_title
-            ''', (f'%مضمون:%{search_term}%',))
-            
-            attachment_results = cursor.fetchall()
-            
-            for row in attachment_results:
-                doc_id = row[0]
-                attachment_notes = row[1] or ''
-                doc_data = row[2:]
+            ''', (f'%مضمون:%{search_term}%',), attachment_row, key=lambda attachment: attachment.document.doc_title or '')
+            for attachment in attachments:
+                doc_data = attachment.document
+                doc_id = doc_data.id
+                attachment_notes = attachment.notes or ''
                 
                 if attachment_notes and search_term.lower() in attachment_notes.lower():
                     # إذا كانت الوثيقة غير موجودة في النتائج، أضفها
@@ -303,13 +735,77 @@ class DatabaseManager:
                             'attachment_info': attachment_notes
                         }
         
-        conn.close()
+        stage.set(results=len(results_dict))
+        stage.finish()
         
         # حفظ في السجل
         self.save_search_history(search_term)
         
         return results_dict
     
+    @tracing.traced('db.query_documents')
+    def query_documents(self, query, limit=200, after=None, facets=False):
+        """
+        صفحة من الوثائق المطابقة لشروط DocumentQuery مع عدّ الوجوه اختيارياً
+        
+        الصفحة والوجوه تُقرأ في معاملة قراءة واحدة فتتطابق أعدادها.
+        
+        Args:
+            query: DocumentQuery
+            limit: عدد الوثائق في الصفحة
+            after: مفتاح 'next' من الصفحة السابقة
+            facets: حساب الإجمالي وعدد كل قيمة في الحقول التصنيفية
+        
+        Returns:
+            dict: {'documents': صفوف الوثائق، 'next': مفتاح الصفحة التالية أو None،
+                   'total': الإجمالي أو None، 'facets': {الحقل: [(القيمة، العدد)...]} أو None}
+        """
+        sql, params = query.page_sql(limit, after)
+        if facets:
+            facets_sql, facets_params = query.facets_sql()
+        # وجه السنة يُعدّ دون شرط السنة، فيحتاج كل ملفات السنوات
+        groups = self._read_groups() if facets else self._read_groups(query.year_from, query.year_to)
+        rows = []
+        total = None
+        counts = {}
+        for include_main, shard_sources in groups:
+            conn = self._open_sources(include_main, shard_sources)
+            cursor = conn.cursor()
+            try:
+                cursor.execute('BEGIN')
+                cursor.row_factory = keyed_document_row
+                cursor.execute(sql, params)
+                rows.extend(cursor.fetchall())
+                cursor.row_factory = None
+                
+                if facets:
+                    cursor.execute(facets_sql, facets_params)
+                    for field, value, count in cursor.fetchall():
+                        if field == '':
+                            total = (total or 0) + count
+                        else:
+                            counts[(field, value)] = counts.get((field, value), 0) + count
+                conn.commit()
+            finally:
+                conn.close()
+        
+        # صفحات عدة اتصالات تُدمج بمفتاح الترتيب نفسه ثم تُقص إلى limit
+        if len(groups) > 1:
+            rows.sort(key=lambda row: (row[1], row[0].id), reverse=query.descending)
+            del rows[limit:]
+        facet_counts = None
+        if facets:
+            facet_counts = {}
+            for (field, value), count in counts.items():
+                facet_counts.setdefault(field, []).append((value, count))
+            for values in facet_counts.values():
+                values.sort(key=lambda item: (-item[1], item[0] or ''))
+        
+        # كل صف (الوثيقة، قيمة الترتيب)؛ القيمة للمفتاح فقط
+        documents = [doc for doc, _ in rows]
+        next_key = (rows[-1][1], rows[-1][0].id) if len(rows) == limit else None
+        return {'documents': documents, 'next': next_key, 'total': total, 'facets': facet_counts}
+    
     def save_search_history(self, search_term):
         """حفظ سجل البحث"""
         conn = sqlite3.connect(self.db_path)
@@ -318,48 +814,264 @@ class DatabaseManager:
         conn.commit()
         conn.close()
     
+    @tracing.traced('db.get_document_by_id')
     def get_document_by_id(self, doc_id):
         """الحصول على وثيقة من خلال ID"""
+        results = list(self._select(f'SELECT {DOCUMENT_COLUMNS} FROM documents WHERE id = ?', (doc_id,), document_row))
+        return results[0] if results else None
+    
+    @tracing.traced('db.get_documents_by_ids')
+    def get_documents_by_ids(self, doc_ids):
+        """الوثائق ذات المعرفات المحددة بترتيب get_all_documents"""
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return []
+        results = []
+        for start in range(0, len(doc_ids), self.MAX_SQL_VARIABLES):
+            chunk = doc_ids[start:start + self.MAX_SQL_VARIABLES]
+            placeholders = ','.join('?' * len(chunk))
+            results.extend(self._select(
+                f'SELECT {DOCUMENT_COLUMNS} FROM documents WHERE id IN ({placeholders})', chunk, document_row
+            ))
+        results.sort(key=lambda doc: (doc.created_date or '', doc.id), reverse=True)
+        return results
+    
+    @tracing.traced('db.get_document_images')
+    def get_document_images(self, document_id):
+        """الحصول على صور الوثيقة"""
+        return list(self._select(
+            f'SELECT {IMAGE_COLUMNS} FROM images WHERE document_id = ? ORDER BY page_number', (document_id,), image_row
+        ))
+    
+    @tracing.traced('db.get_all_documents')
+    def get_all_documents(self, year=None):
+        """
+        الحصول على جميع الوثائق (أو وثائق السنة التي توجد صورها في مجلدها)
+        
+        تُرجع قائمة كاملة في الذاكرة؛ للأرشيفات الكبيرة يُفضَّل iter_documents()
+        أو stream_documents().
+        """
+        return list(self.stream_documents(year=year))
+    
+    def iter_document_pages(self, year=None, page_size=None, after=None):
+        """
+        وثائق get_all_documents صفحةً صفحة بمفتاح (created_date, id)
+        
+        كل صفحة تُقرأ باتصال قصير، فلا يبقى قفل قراءة مفتوحاً بين الصفحات
+        ويمكن للمستهلك معالجة الأحداث أو الكتابة في القاعدة أثناء المرور.
+        
+        Args:
+            page_size: عدد الوثائق في كل صفحة (الافتراضي ITER_ARRAYSIZE)
+            after: مفتاح document_key() لآخر وثيقة قُرئت سابقاً للمتابعة بعدها
+        
+        Yields:
+            list: صفوف وثائق الصفحة
+        """
+        query = DocumentQuery(year_from=year, year_to=year)
+        page_size = page_size or self.ITER_ARRAYSIZE
+        while True:
+            page = self.query_documents(query, limit=page_size, after=after)
+            if page['documents']:
+                yield page['documents']
+            after = page['next']
+            if after is None:
+                return
+    
+    def iter_documents(self, year=None, page_size=None, after=None):
+        """مُكرِّر الوثائق وثيقةً وثيقة فوق iter_document_pages()"""
+        for page in self.iter_document_pages(year=year, page_size=page_size, after=after):
+            yield from page
+    
+    @staticmethod
+    def document_key(doc):
+        """مفتاح الصفحات لوثيقة (created_date, id) لاستخدامه في after"""
+        return doc.created_date, doc.id
+    
+    def stream_documents(self, year=None, arraysize=None):
+        """
+        قراءة متدفقة للوثائق بمؤشر واحد على دفعات fetchmany(arraysize)
+        
+        أسرع من الصفحات لكنها تُبقي معاملة قراءة مفتوحة حتى نهاية المرور،
+        فتُستخدم في التصدير وخيوط العمل لا أثناء تفاعل المستخدم.
+        """
+        if year:
+            year = str(year)
+            yield from self._select(f'''
+                SELECT {DOCUMENT_COLUMNS} FROM documents
+                WHERE id IN (SELECT document_id FROM images WHERE year = ?)
+                ORDER BY created_date DESC, id DESC
+            ''', (year,), document_row, year, year, key=_recent_key, reverse=True, arraysize=arraysize)
+        else:
+            yield from self._select(
+                f'SELECT {DOCUMENT_COLUMNS} FROM documents ORDER BY created_date DESC, id DESC',
+                row_factory=document_row, key=_recent_key, reverse=True, arraysize=arraysize
+            )
+
+    @tracing.traced('db.get_recent_documents')
+    def get_recent_documents(self, limit):
+        """أحدث الوثائق بنفس ترتيب get_all_documents (للقطة الشاشة الأولى)"""
+        rows = self._select(
+            f'SELECT {DOCUMENT_COLUMNS} FROM documents ORDER BY created_date DESC, id DESC LIMIT ?', (limit,),
+            document_row, key=_recent_key, reverse=True
+        )
+        return list(itertools.islice(rows, limit))
+
+    @tracing.traced('db.get_image_counts')
+    def get_image_counts(self, doc_ids=None):
+        """
+        عدد صور كل وثيقة باستعلام واحد بدل استعلام لكل صف
+
+        Returns:
+            dict: معرف الوثيقة -> عدد الصور (الوثائق بلا صور غير موجودة)
+        """
+        # صور الوثيقة كلها في مصدر واحد، فنتائج المصادر لا تتداخل
+        if doc_ids is None:
+            return dict(self._select('SELECT document_id, COUNT(*) FROM images GROUP BY document_id'))
+        doc_ids = list(doc_ids)
+        results = []
+        for start in range(0, len(doc_ids), self.MAX_SQL_VARIABLES):
+            chunk = doc_ids[start:start + self.MAX_SQL_VARIABLES]
+            placeholders = ','.join('?' * len(chunk))
+            results.extend(self._select(
+                f'SELECT document_id, COUNT(*) FROM images WHERE document_id IN ({placeholders}) '
+                'GROUP BY document_id', chunk
+            ))
+        return dict(results)
+
+    def change_counter(self):
+        """
+        عدّاد تغييرات ملف قاعدة البيانات (ترويسة SQLite، البايتات 24-27)
+
+        يزداد مع كل معاملة كتابة في وضع journal الافتراضي، ويُقرأ من الملف
+        مباشرة دون فتح اتصال. يُضاف إليه حجم ملف WAL إن وُجد لأن الترويسة لا
+        تتغير قبل نقطة التفتيش في وضع WAL.
+
+        Returns:
+            tuple: (العداد، حجم الملف، حجم WAL) أو None إذا تعذرت القراءة
+        """
+        try:
+            with open(self.db_path, 'rb') as f:
+                header = f.read(100)
+            if len(header) < 100 or not header.startswith(b'SQLite format 3\x00'):
+                return None
+            wal_path = f'{self.db_path}-wal'
+            wal_size = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+            return int.from_bytes(header[24:28], 'big'), os.path.getsize(self.db_path), wal_size
+        except OSError:
+            return None
+
+    def get_change_sequence(self):
+        """
+        آخر رقم تسلسلي صدر في سجل تغييرات الوثائق (0 إذا لم يُسجَّل شيء)
+        
+        يُقرأ من sqlite_sequence لا من MAX(seq) حتى يبقى صحيحاً بعد تفريغ السجل
+        (AUTOINCREMENT لا يعيد استخدام الأرقام بعد الحذف).
+        """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        cursor.execute('SELECT * FROM documents WHERE id = ?', (doc_id,))
-        result = cursor.fetchone()
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'document_changes'")
+        row = cursor.fetchone()
+        result = row[0] if row else 0
         conn.close()
         return result
-    
-    def get_document_images(self, document_id):
-        """الحصول على صور الوثيقة"""
+
+    @tracing.traced('db.get_changes_since')
+    def get_changes_since(self, seq):
+        """
+        تغييرات الوثائق بعد رقم تسلسلي، مدمجة لكل وثيقة
+
+        Returns:
+            tuple: (آخر رقم تسلسلي، {معرف الوثيقة: 'insert' | 'update' | 'delete'})
+            أو None إذا قُلِّم السجل بعد seq (يلزم تحميل كامل)
+        """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        cursor.execute('SELECT * FROM images WHERE document_id = ? ORDER BY page_number', (document_id,))
-        results = cursor.fetchall()
+        cursor.execute('SELECT MIN(seq) FROM document_changes')
+        first_seq = cursor.fetchone()[0]
+        if first_seq is not None and seq < first_seq - 1:
+            conn.close()
+            return None
+        cursor.execute(
+            'SELECT seq, document_id, op FROM document_changes WHERE seq > ? ORDER BY seq', (seq,)
+        )
+        rows = cursor.fetchall()
         conn.close()
-        return results
-    
-    def get_all_documents(self):
-        """الحصول على جميع الوثائق"""
+
+        changes = {}
+        last_seq = seq
+        for last_seq, document_id, op in rows:
+            previous = changes.get(document_id)
+            if op == 'delete':
+                changes[document_id] = 'delete'
+            elif previous is None or previous == 'delete' and op == 'insert':
+                changes[document_id] = op
+            # insert ثم update تبقى insert، و update المتكرر يبقى update
+        return last_seq, changes
+
+    def prune_document_changes(self, keep=None):
+        """حذف أقدم سجلات التغيير مع الإبقاء على آخر keep سجل"""
+        keep = self.CHANGE_JOURNAL_KEEP if keep is None else keep
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        cursor.execute('SELECT * FROM documents ORDER BY created_date DESC')
-        results = cursor.fetchall()
+        cursor.execute('SELECT COALESCE(MAX(seq), 0), COUNT(*) FROM document_changes')
+        last_seq, total = cursor.fetchone()
+        removed = 0
+        if total > keep:
+            cursor.execute('DELETE FROM document_changes WHERE seq <= ?', (last_seq - keep,))
+            removed = cursor.rowcount
+            conn.commit()
         conn.close()
-        return results
+        return removed
 
-    def get_document_ids_by_image_year(self, year):
-        """إرجاع قائمة معرفات الوثائق التي تحتوي صورها داخل مجلد السنة المحدد"""
+    @tracing.traced('db.get_years')
+    def get_years(self):
+        """
+        السنوات التي توجد لها صور، تنازلياً
+        
+        مكافئ SELECT DISTINCT year لكن بالقفز في فهرس السنة (سنة أصغر في كل
+        خطوة) فتكون الكلفة بعدد السنوات لا بعدد الصور.
+        """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        # دعم كل من الفواصل \ و /
-        pattern1 = f'%documents/{year}/%'
-        pattern2 = f'%documents\\{year}\\%'
-        cursor.execute('SELECT DISTINCT document_id FROM images WHERE image_path LIKE ? OR image_path LIKE ?', (pattern1, pattern2))
-        rows = cursor.fetchall()
+        cursor.execute('''
+            WITH RECURSIVE years(year) AS (
+                SELECT MAX(year) FROM images
+                UNION ALL
+                SELECT (SELECT MAX(year) FROM images WHERE year < years.year)
+                FROM years WHERE years.year IS NOT NULL
+            )
+            SELECT year FROM years WHERE year IS NOT NULL
+        ''')
+        results = [row[0] for row in cursor.fetchall()]
         conn.close()
+        # السنوات المغلقة من سجلها دون فتح ملفاتها
+        if self._shards:
+            results = sorted(set(results) | set(self._shards), reverse=True)
+        return results
+
+    @tracing.traced('db.get_document_ids_by_image_year')
+    def get_document_ids_by_image_year(self, year, doc_ids=None):
+        """
+        إرجاع قائمة معرفات الوثائق التي تحتوي صورها داخل مجلد السنة المحدد
+        
+        doc_ids: حصر الفحص في هذه الوثائق (للتحديث التدريجي للجدول)
+        """
+        year = str(year)
+        query = 'SELECT DISTINCT document_id FROM images WHERE year = ?'
+        if doc_ids is None:
+            rows = self._select(query, (year,), year_from=year, year_to=year)
+        else:
+            doc_ids = list(doc_ids)
+            placeholders = ','.join('?' * len(doc_ids))
+            rows = self._select(f'{query} AND document_id IN ({placeholders})', [year] + doc_ids,
+                                year_from=year, year_to=year)
         return [r[0] for r in rows]
     
+    @tracing.traced('db.update_document')
     def update_document(self, doc_id, doc_name=None, doc_date=None, doc_title=None, 
                        issuing_dept=None, doc_classification=None, legal_paragraph=None):
         """تحديث بيانات الوثيقة"""
+        self._reject_closed([doc_id])
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
@@ -370,8 +1082,8 @@ class DatabaseManager:
             update_fields.append('doc_name = ?')
             params.append(doc_name)
         if doc_date:
-            update_fields.append('doc_date = ?')
-            params.append(doc_date)
+            update_fields.append('doc_date = ?, date_key = ?')
+            params.extend([doc_date, date_key(doc_date)])
         if doc_title:
             update_fields.append('doc_title = ?')
             params.append(doc_title)
@@ -394,19 +1106,440 @@ class DatabaseManager:
         conn.commit()
         conn.close()
     
-    def delete_document(self, doc_id):
-        """حذف وثيقة"""
+    def iter_integrity_targets(self, page_size=None):
+        """
+        كل الصور مع بصمتها المخزنة وآخر فحص سلامة لها، صفحةً صفحة بالمعرف
+        
+        كل صفحة باتصال مستقل يُغلق قبل تسليمها، فيمكن حفظ نتائج الفحص أثناء
+        المرور دون أن يحجبها قفل القراءة.
+        
+        Yields:
+            list: صفحة من IntegrityRecord
+        """
+        page_size = page_size or self.ITER_ARRAYSIZE
+        after = 0
+        while True:
+            rows = self._select('''
+                SELECT i.id, i.document_id, i.image_path, i.file_size, i.content_hash,
+                       d.id IS NOT NULL, c.checked_date, c.status
+                FROM images i
+                LEFT JOIN documents d ON d.id = i.document_id
+                LEFT JOIN integrity_checks c ON c.image_id = i.id
+                WHERE i.id > ?
+                ORDER BY i.id
+                LIMIT ?
+            ''', (after, page_size), integrity_row, key=lambda record: record.id)
+            page = list(itertools.islice(rows, page_size))
+            # إغلاق الاتصالات قبل تسليم الصفحة
+            del rows
+            if not page:
+                return
+            yield page
+            after = page[-1].id
+    
+    def save_integrity_results(self, results, content_hashes=None):
+        """
+        حفظ نتائج فحص السلامة في معاملة واحدة
+        
+        Args:
+            results: قائمة من (image_id, status, detail)
+            content_hashes: قائمة من (image_id, content_hash, file_size) لصور بلا بصمة مخزنة
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany(
+            'INSERT OR REPLACE INTO integrity_checks (image_id, checked_date, status, detail) '
+            'VALUES (?, CURRENT_TIMESTAMP, ?, ?)',
+            results
+        )
+        if content_hashes:
+            # لا تُستبدل بصمة موجودة: البصمة المخزنة هي مرجع كشف التلف
+            cursor.executemany(
+                'UPDATE images SET content_hash = ?, file_size = COALESCE(file_size, ?) '
+                'WHERE id = ? AND content_hash IS NULL',
+                [(content_hash, file_size, image_id) for image_id, content_hash, file_size in content_hashes]
+            )
+        conn.commit()
+        conn.close()
+    
+    def prune_integrity_checks(self):
+        """
+        حذف نتائج فحص صور لم تعد موجودة
+        
+        صور السنوات المغلقة ليست في القاعدة الرئيسية، فتُستثنى بإرفاق ملف كل
+        سنة بدوره (لا حد لعدد الملفات) قبل حذف الباقي.
+        
+        Returns:
+            int: عدد النتائج المحذوفة
+        """
+        conn = sqlite3.connect(self.db_path, uri=True, isolation_level=None)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TEMP TABLE stale AS
+                SELECT image_id FROM main.integrity_checks WHERE image_id NOT IN (SELECT id FROM main.images)
+            ''')
+            for path in self._shards.values():
+                cursor.execute('ATTACH DATABASE ? AS shard', (shards.shard_uri(path),))
+                cursor.execute('DELETE FROM temp.stale WHERE image_id IN (SELECT id FROM shard.images)')
+                cursor.execute('DETACH DATABASE shard')
+            cursor.execute('DELETE FROM main.integrity_checks WHERE image_id IN (SELECT image_id FROM temp.stale)')
+            return cursor.rowcount
+        finally:
+            conn.close()
+    
+    @tracing.traced('db.delete_document')
+    def delete_document(self, doc_id, undo_seconds=None):
+        """حذف وثيقة (إلى سلة المحذوفات، انظر delete_documents)"""
+        return self.delete_documents([doc_id], undo_seconds)
+    
+    @tracing.traced('db.delete_documents')
+    def delete_documents(self, doc_ids, undo_seconds=None):
+        """
+        حذف وثائق مع صورها في معاملة واحدة إلى سلة المحذوفات
+        
+        صفوف الوثائق والصور تُحفظ في trash_documents و trash_images ثم تُحذف الوثائق،
+        وتُحذف صورها بـ ON DELETE CASCADE. الملفات تبقى على القرص حتى تنتهي مهلة
+        التراجع فيحذفها file_gc، وحتى ذلك يُعيدها restore_trash كما كانت.
+        
+        Args:
+            doc_ids: معرفات الوثائق
+            undo_seconds: مهلة التراجع قبل حذف الملفات (الافتراضي TRASH_UNDO_SECONDS)
+        
+        Returns:
+            dict: {'trash_id', 'documents', 'images'} - trash_id هو None إذا لم يُحذف شيء
+        """
+        doc_ids = list(dict.fromkeys(doc_ids))
+        self._reject_closed(doc_ids)
+        if undo_seconds is None:
+            undo_seconds = self.TRASH_UNDO_SECONDS
+        result = {'trash_id': None, 'documents': 0, 'images': 0}
+        if not doc_ids:
+            return result
+        
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA foreign_keys = ON')
+        try:
+            with conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT INTO trash (purge_after, documents) VALUES (datetime('now', ?), 0)",
+                    (f'+{int(undo_seconds)} seconds',)
+                )
+                trash_id = cursor.lastrowid
+                for start in range(0, len(doc_ids), self.MAX_SQL_VARIABLES):
+                    chunk = doc_ids[start:start + self.MAX_SQL_VARIABLES]
+                    placeholders = ','.join('?' * len(chunk))
+                    # كل الأعمدة بأسمائها (لا بمواضعها) حتى تُستعاد في أي ترتيب أعمدة لاحق
+                    cursor.execute(f'SELECT * FROM documents WHERE id IN ({placeholders})', chunk)
+                    columns = [column[0] for column in cursor.description]
+                    documents = [
+                        (row[0], trash_id, json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                        for row in cursor.fetchall()
+                    ]
+                    cursor.executemany(
+                        'INSERT INTO trash_documents (document_id, trash_id, row) VALUES (?, ?, ?)',
+                        documents
+                    )
+                    cursor.execute(f'SELECT * FROM images WHERE document_id IN ({placeholders})', chunk)
+                    columns = [column[0] for column in cursor.description]
+                    images = []
+                    for row in cursor.fetchall():
+                        image = dict(zip(columns, row))
+                        images.append((image['id'], trash_id, image['image_path'], image.get('content_hash'),
+                                       json.dumps(image, ensure_ascii=False)))
+                    cursor.executemany(
+                        'INSERT INTO trash_images (image_id, trash_id, image_path, content_hash, row) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        images
+                    )
+                    # الصور تُحذف بالتتابع مع وثائقها
+                    cursor.execute(f'DELETE FROM documents WHERE id IN ({placeholders})', chunk)
+                    result['documents'] += len(documents)
+                    result['images'] += len(images)
+                cursor.execute(
+                    'DELETE FROM integrity_checks WHERE image_id IN '
+                    '(SELECT image_id FROM trash_images WHERE trash_id = ?)', (trash_id,)
+                )
+                if result['documents']:
+                    cursor.execute('UPDATE trash SET documents = ? WHERE id = ?', (result['documents'], trash_id))
+                    result['trash_id'] = trash_id
+                else:
+                    cursor.execute('DELETE FROM trash WHERE id = ?', (trash_id,))
+        finally:
+            conn.close()
+        return result
+    
+    def _insert_row(self, cursor, table, row, existing_columns):
+        """إدراج صف محفوظ كـ JSON بأعمدته الموجودة في الجدول الحالي"""
+        columns = [column for column in row if column in existing_columns]
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            [row[column] for column in columns]
+        )
+    
+    @tracing.traced('db.restore_trash')
+    def restore_trash(self, trash_id):
+        """
+        التراجع عن حذف: إعادة وثائق دفعة من السلة وصورها بمعرفاتها الأصلية
+        
+        Raises:
+            ValueError: الدفعة غير موجودة أو بدأ حذف ملفاتها
+        
+        Returns:
+            int: عدد الوثائق المستعادة
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA foreign_keys = ON')
+        try:
+            with conn:
+                cursor = conn.cursor()
+                # القفل يُؤخذ قبل القراءة فلا يبدأ file_gc حذف الدفعة أثناء استعادتها
+                cursor.execute('UPDATE trash SET purging = purging WHERE id = ? AND purging = 0', (trash_id,))
+                if cursor.rowcount == 0:
+                    raise ValueError(f'لا يمكن التراجع عن الحذف: الدفعة {trash_id} غير موجودة أو حُذفت ملفاتها')
+                document_columns = {column[1] for column in cursor.execute('PRAGMA table_info(documents)')}
+                image_columns = {column[1] for column in cursor.execute('PRAGMA table_info(images)')}
+                rows = [
+                    json.loads(row) for (row,) in cursor.execute(
+                        'SELECT row FROM trash_documents WHERE trash_id = ? ORDER BY document_id', (trash_id,)
+                    ).fetchall()
+                ]
+                closed = sorted({row.get('year') for row in rows} & set(self._shards))
+                if closed:
+                    raise ValueError(f"لا يمكن الاستعادة إلى سنة مغلقة: {', '.join(closed)}")
+                for row in rows:
+                    self._insert_row(cursor, 'documents', row, document_columns)
+                images = cursor.execute(
+                    'SELECT row FROM trash_images WHERE trash_id = ? ORDER BY image_id', (trash_id,)
+                ).fetchall()
+                for (row,) in images:
+                    self._insert_row(cursor, 'images', json.loads(row), image_columns)
+                cursor.execute('DELETE FROM trash WHERE id = ?', (trash_id,))
+        finally:
+            conn.close()
+        return len(rows)
+    
+    def get_trash(self):
+        """
+        دفعات سلة المحذوفات من الأحدث
+        
+        Returns:
+            list: (المعرف، تاريخ الحذف، موعد حذف الملفات، عدد الوثائق، قيد الحذف)
+        """
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        cursor.execute('SELECT id, deleted_date, purge_after, documents, purging FROM trash ORDER BY id DESC')
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+    
+    def claim_expired_trash(self, limit=None):
+        """
+        حجز دفعات السلة المنتهية مهلتها لحذف ملفاتها (لا يمكن التراجع عنها بعد الحجز)
         
-        # حذف الصور أولاً
-        cursor.execute('DELETE FROM images WHERE document_id = ?', (doc_id,))
-        # حذف الوثيقة
-        cursor.execute('DELETE FROM documents WHERE id = ?', (doc_id,))
+        الدفعات المحجوزة سابقاً ولم يكتمل حذفها (توقف البرنامج أثناءه) تُعاد أيضاً.
         
+        Returns:
+            list: معرفات الدفعات
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT id FROM trash WHERE purging = 1 OR purge_after <= datetime('now') "
+                    "ORDER BY id LIMIT ?", (limit or -1,)
+                )
+                trash_ids = [row[0] for row in cursor.fetchall()]
+                cursor.executemany('UPDATE trash SET purging = 1 WHERE id = ?', [(i,) for i in trash_ids])
+        finally:
+            conn.close()
+        return trash_ids
+    
+    def get_trash_files(self, trash_id):
+        """
+        ملفات دفعة محجوزة التي يمكن حذفها
+        
+        يُستثنى ما زال يشير إليه صف صورة حي أو دفعة أخرى في السلة (يمكن التراجع عنها):
+        مسار مشترك بين صورتين، أو بصمة تُستعمل صورها المصغرة لصورة أخرى. صور
+        السنوات المغلقة تُستثنى بإرفاق ملف كل سنة بدوره كما في prune_integrity_checks.
+        
+        Returns:
+            tuple: (مسارات الصور، بصمات الصور المصغرة)
+        """
+        conn = sqlite3.connect(self.db_path, uri=True, isolation_level=None)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TEMP TABLE trash_paths AS
+                SELECT DISTINCT t.image_path FROM main.trash_images t
+                WHERE t.trash_id = ?
+                  AND NOT EXISTS (SELECT 1 FROM main.images i WHERE i.image_path = t.image_path)
+                  AND NOT EXISTS (SELECT 1 FROM main.trash_images o
+                                  WHERE o.image_path = t.image_path AND o.trash_id != t.trash_id)
+            ''', (trash_id,))
+            cursor.execute('''
+                CREATE TEMP TABLE trash_digests AS
+                SELECT DISTINCT t.content_hash FROM main.trash_images t
+                WHERE t.trash_id = ? AND t.content_hash IS NOT NULL
+                  AND NOT EXISTS (SELECT 1 FROM main.images i WHERE i.content_hash = t.content_hash)
+                  AND NOT EXISTS (SELECT 1 FROM main.trash_images o
+                                  WHERE o.content_hash = t.content_hash AND o.trash_id != t.trash_id)
+            ''', (trash_id,))
+            for path in self._shards.values():
+                cursor.execute('ATTACH DATABASE ? AS shard', (shards.shard_uri(path),))
+                cursor.execute('DELETE FROM temp.trash_paths WHERE image_path IN (SELECT image_path FROM shard.images)')
+                cursor.execute('''
+                    DELETE FROM temp.trash_digests
+                    WHERE content_hash IN (SELECT content_hash FROM shard.images WHERE content_hash IS NOT NULL)
+                ''')
+                cursor.execute('DETACH DATABASE shard')
+            paths = [row[0] for row in cursor.execute('SELECT image_path FROM temp.trash_paths')]
+            digests = [row[0] for row in cursor.execute('SELECT content_hash FROM temp.trash_digests')]
+        finally:
+            conn.close()
+        return paths, digests
+    
+    def purge_trash(self, trash_id):
+        """حذف دفعة من السلة نهائياً بعد حذف ملفاتها"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA foreign_keys = ON')
+        conn.execute('DELETE FROM trash WHERE id = ?', (trash_id,))
         conn.commit()
         conn.close()
     
+    def get_closed_years(self):
+        """
+        السنوات المغلقة من الأحدث
+        
+        Returns:
+            list: (السنة، مسار الملف، عدد الوثائق، عدد الصور، تاريخ الإغلاق)
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT year, filename, documents, images, closed_date FROM year_shards ORDER BY year DESC')
+        directory = shards.shard_dir(self.db_path)
+        results = [
+            (year, os.path.join(directory, filename), documents, images, closed_date)
+            for year, filename, documents, images, closed_date in cursor.fetchall()
+        ]
+        conn.close()
+        return results
+    
+    @tracing.traced('db.close_year')
+    def close_year(self, year):
+        """
+        نقل وثائق سنة وصورها إلى ملف مستقل للقراءة فقط (shards.py)
+        
+        النسخ إلى الملف والحذف من القاعدة الرئيسية وتسجيل السنة في معاملة واحدة
+        على الملفين، والمعرفات تبقى كما هي. لا يُسجَّل النقل في سجل التغييرات لأن
+        ما يعرضه الجدول لا يتغير.
+        
+        Raises:
+            ValueError: السنة مغلقة مسبقاً، أو بلا وثائق، أو لوثائقها صور في سنوات أخرى
+        
+        Returns:
+            dict: {'year', 'path', 'documents', 'images'}
+        """
+        year = str(year)
+        if year in self._shards:
+            raise ValueError(f'السنة {year} مغلقة مسبقاً')
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM documents WHERE year = ?', (year,))
+            if not cursor.fetchone()[0]:
+                raise ValueError(f'لا توجد وثائق في السنة {year}')
+            # الوثيقة تُوجَّه بسنة صورها، فلا تُغلق سنة تتشارك وثائقها مع سنة أخرى
+            cursor.execute('''
+                SELECT COUNT(DISTINCT d.id) FROM documents d JOIN images i ON i.document_id = d.id
+                WHERE (d.year = ? OR i.year = ?) AND (COALESCE(d.year, '') = ?) != (COALESCE(i.year, '') = ?)
+            ''', (year, year, year, year))
+            mixed = cursor.fetchone()[0]
+            if mixed:
+                raise ValueError(f'{mixed} وثيقة لها صور في السنة {year} وفي سنة أخرى؛ يجب نقلها قبل إغلاق السنة')
+        finally:
+            conn.close()
+        
+        path = os.path.join(shards.shard_dir(self.db_path), shards.shard_filename(year))
+        shards.create_shard(self.db_path, path)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA foreign_keys = ON')
+        try:
+            conn.execute('ATTACH DATABASE ? AS shard', (path,))
+            with conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM document_changes')
+                last_seq = cursor.fetchone()[0]
+                cursor.execute('INSERT INTO shard.documents SELECT * FROM main.documents WHERE year = ?', (year,))
+                documents = cursor.rowcount
+                cursor.execute('''
+                    INSERT INTO shard.images SELECT * FROM main.images
+                    WHERE document_id IN (SELECT id FROM main.documents WHERE year = ?)
+                ''', (year,))
+                images = cursor.rowcount
+                # الصور تُحذف بالتتابع مع وثائقها
+                cursor.execute('DELETE FROM main.documents WHERE year = ?', (year,))
+                cursor.execute('DELETE FROM document_changes WHERE seq > ?', (last_seq,))
+                cursor.execute(
+                    'INSERT INTO year_shards (year, filename, documents, images) VALUES (?, ?, ?, ?)',
+                    (year, os.path.basename(path), documents, images)
+                )
+            conn.execute('DETACH DATABASE shard')
+        except Exception:
+            conn.close()
+            shards.remove_shard(path)
+            raise
+        conn.close()
+        
+        shards.set_readonly(path)
+        self._shards[year] = path
+        self._shards = dict(sorted(self._shards.items(), reverse=True))
+        print(f"[DB] أُغلقت السنة {year}: {documents} وثيقة و {images} صورة في {path}")
+        return {'year': year, 'path': path, 'documents': documents, 'images': images}
+    
+    @tracing.traced('db.reopen_year')
+    def reopen_year(self, year):
+        """
+        إعادة وثائق سنة مغلقة وصورها إلى القاعدة الرئيسية للتعديل ثم حذف ملفها
+        
+        Returns:
+            dict: {'year', 'documents', 'images'}
+        """
+        year = str(year)
+        path = self._shards.get(year)
+        if path is None:
+            raise ValueError(f'السنة {year} ليست مغلقة')
+        
+        conn = sqlite3.connect(self.db_path, uri=True)
+        conn.execute('PRAGMA foreign_keys = ON')
+        try:
+            conn.execute('ATTACH DATABASE ? AS shard', (shards.shard_uri(path),))
+            with conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM document_changes')
+                last_seq = cursor.fetchone()[0]
+                counts = {}
+                for table in shards.SHARD_TABLES:
+                    available = {column[1] for column in cursor.execute(f'PRAGMA shard.table_info({table})')}
+                    columns = ', '.join(column for column in self._table_columns[table] if column in available)
+                    cursor.execute(f'INSERT INTO main.{table} ({columns}) SELECT {columns} FROM shard.{table}')
+                    counts[table] = cursor.rowcount
+                cursor.execute('DELETE FROM document_changes WHERE seq > ?', (last_seq,))
+                cursor.execute('DELETE FROM year_shards WHERE year = ?', (year,))
+            conn.execute('DETACH DATABASE shard')
+        finally:
+            conn.close()
+        
+        shards.remove_shard(path)
+        del self._shards[year]
+        for table in shards.SHARD_TABLES:
+            self._shard_columns.pop((year, table), None)
+        print(f"[DB] أُعيد فتح السنة {year}: {counts['documents']} وثيقة و {counts['images']} صورة")
+        return {'year': year, 'documents': counts['documents'], 'images': counts['images']}
+    
     def delete_image_by_path(self, image_path):
         """حذف صورة من قاعدة البيانات بناءً على المسار"""
         conn = sqlite3.connect(self.db_path)
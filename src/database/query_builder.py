@@ -0,0 +1,210 @@
+"""
+بناء استعلامات الوثائق متعددة الشروط
+
+يجمع أي تركيبة من الشروط (الرقم، مدى التاريخ، مدى السنوات، الجهة، التصنيف،
+المادة القانونية، نص المضمون) في جملة SQL واحدة بمعاملات، مع ترتيب في SQL
+وتقسيم إلى صفحات بالمفتاح (keyset) بدل OFFSET، وعدّ الوجوه (facets) لكل حقل
+تصنيفي في استعلام واحد.
+
+الاستخدام:
+    query = DocumentQuery(departments=['قسم الحسابات'], year_from='2023', year_to='2024',
+                          title='رواتب', sort='date')
+    page = db.query_documents(query, limit=200, facets=True)
+    next_page = db.query_documents(query, limit=200, after=page['next'])
+"""
+
+import re
+
+from .records import DOCUMENT_COLUMNS
+
+
+# الحقول التصنيفية التي تُعدّ لها الوجوه -> اسم العمود
+FACET_FIELDS = {
+    'issuing_dept': 'issuing_dept',
+    'doc_classification': 'doc_classification',
+    'legal_paragraph': 'legal_paragraph',
+    'year': 'year',
+}
+
+# مفاتيح الترتيب -> تعبير SQL (بلا NULL حتى تعمل مقارنة المفتاح في الصفحات)
+SORT_KEYS = {
+    'created': 'created_date',
+    'date': "COALESCE(date_key, '')",
+    'title': "COALESCE(doc_title, '')",
+    'dept': "COALESCE(issuing_dept, '')",
+}
+
+_DATE_PATTERNS = (
+    # يوم-شهر-سنة كما يُكتب في الوثائق (23-3-2025 أو 23/3/2025)
+    (re.compile(r'^\s*(\d{1,2})[-/.\s](\d{1,2})[-/.\s](\d{4})\s*$'), (3, 2, 1)),
+    # سنة-شهر-يوم
+    (re.compile(r'^\s*(\d{4})[-/.](\d{1,2})[-/.](\d{1,2})\s*$'), (1, 2, 3)),
+)
+
+
+def date_key(doc_date):
+    """
+    تحويل تاريخ الوثيقة إلى مفتاح قابل للترتيب والمقارنة YYYY-MM-DD
+
+    Returns:
+        str أو None إذا لم يكن التاريخ بصيغة معروفة
+    """
+    for pattern, (year, month, day) in _DATE_PATTERNS:
+        match = pattern.match(doc_date or '')
+        if match:
+            y, m, d = int(match.group(year)), int(match.group(month)), int(match.group(day))
+            if 1 <= m <= 12 and 1 <= d <= 31:
+                return f'{y:04d}-{m:02d}-{d:02d}'
+    return None
+
+
+def _like_escape(text):
+    """تهريب محارف LIKE الخاصة في نص المستخدم (مع ESCAPE '\\')"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _as_list(values):
+    if values is None:
+        return []
+    if isinstance(values, str):
+        return [values] if values else []
+    return [value for value in values if value is not None]
+
+
+class DocumentQuery:
+    """
+    شروط فلترة الوثائق وترتيبها
+
+    كل الشروط اختيارية وتُجمع بـ AND؛ قوائم القيم (الجهات، التصنيفات، المواد)
+    تُجمع بـ OR داخل الحقل الواحد.
+
+    Args:
+        number: رقم الوثيقة (بداية اسم الوثيقة)
+        date_from, date_to: مدى تاريخ الوثيقة بأي صيغة يقبلها date_key()
+        year_from, year_to: مدى سنة المجلد (وثائق لها صور في تلك السنوات)
+        departments, classifications, legal_paragraphs: قيم مقبولة لكل حقل
+        title: نص يحتويه المضمون
+        sort: أحد مفاتيح SORT_KEYS
+        descending: ترتيب تنازلي (الافتراضي: الأحدث أولاً)
+    """
+
+    def __init__(self, number=None, date_from=None, date_to=None, year_from=None, year_to=None,
+                 departments=None, classifications=None, legal_paragraphs=None, title=None,
+                 sort='created', descending=True):
+        if sort not in SORT_KEYS:
+            raise ValueError(f'مفتاح ترتيب غير معروف: {sort}')
+        self.number = (number or '').strip() or None
+        self.date_from = date_from or None
+        self.date_to = date_to or None
+        self.year_from = str(year_from) if year_from else None
+        self.year_to = str(year_to) if year_to else None
+        self.departments = _as_list(departments)
+        self.classifications = _as_list(classifications)
+        self.legal_paragraphs = _as_list(legal_paragraphs)
+        self.title = (title or '').strip() or None
+        self.sort = sort
+        self.descending = descending
+
+    def is_empty(self):
+        """لا يوجد أي شرط (الترتيب وحده لا يُعد شرطاً)"""
+        return not self.where(None)[0]
+
+    def where(self, exclude_field=None):
+        """
+        شروط WHERE ومعاملاتها
+
+        Args:
+            exclude_field: حقل وجه يُستبعد شرطه (لعدّ قيمه مقابل بقية الشروط)
+
+        Returns:
+            tuple: (قائمة نصوص الشروط، قائمة المعاملات)
+        """
+        clauses = []
+        params = []
+
+        if self.number:
+            clauses.append("(doc_name = ? OR doc_name LIKE ? ESCAPE '\\')")
+            params.extend([self.number, f'{_like_escape(self.number)} %'])
+
+        key_from = date_key(self.date_from) if self.date_from else None
+        key_to = date_key(self.date_to) if self.date_to else None
+        if self.date_from and key_from is None or self.date_to and key_to is None:
+            raise ValueError('صيغة التاريخ غير صحيحة (مثال: 23-3-2025)')
+        if key_from:
+            clauses.append('date_key >= ?')
+            params.append(key_from)
+        if key_to:
+            clauses.append('date_key <= ?')
+            params.append(key_to)
+
+        if exclude_field != 'year' and (self.year_from or self.year_to):
+            # سنة المجلد من الصور عبر idx_images_year كما في فلتر السنة في الجدول
+            clauses.append('id IN (SELECT document_id FROM images WHERE year BETWEEN ? AND ?)')
+            params.extend([self.year_from or '0000', self.year_to or '9999'])
+
+        for field, values in (
+            ('issuing_dept', self.departments),
+            ('doc_classification', self.classifications),
+            ('legal_paragraph', self.legal_paragraphs),
+        ):
+            if values and field != exclude_field:
+                clauses.append(f"{FACET_FIELDS[field]} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+
+        if self.title:
+            clauses.append("doc_title LIKE ? ESCAPE '\\'")
+            params.append(f'%{_like_escape(self.title)}%')
+
+        return clauses, params
+
+    def page_sql(self, limit, after=None):
+        """
+        استعلام صفحة واحدة مرتبة بالمفتاح (تعبير الترتيب ثم المعرف)
+
+        Args:
+            after: مفتاح آخر صف في الصفحة السابقة (قيمة الترتيب، المعرف) أو None
+
+        Returns:
+            tuple: (SQL، المعاملات) - آخر عمود في كل صف هو قيمة الترتيب
+        """
+        clauses, params = self.where()
+        sort_expr = SORT_KEYS[self.sort]
+        direction = 'DESC' if self.descending else 'ASC'
+        if after is not None:
+            # مقارنة صفوف SQLite (3.15+) تكافئ: key < ? OR (key = ? AND id < ?)
+            clauses.append(f"({sort_expr}, id) {'<' if self.descending else '>'} (?, ?)")
+            params.extend(after)
+        where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        sql = (
+            f'SELECT {DOCUMENT_COLUMNS}, {sort_expr} FROM documents {where_sql} '
+            f'ORDER BY {sort_expr} {direction}, id {direction} LIMIT ?'
+        )
+        return sql, params + [limit]
+
+    def facets_sql(self, fields=None):
+        """
+        عدّ الوجوه والإجمالي في جملة واحدة (UNION ALL)
+
+        قيم كل حقل تُعدّ مقابل الشروط الأخرى دون شرط الحقل نفسه، فتبقى القيم
+        البديلة ظاهرة بأعدادها بعد اختيار قيمة منه.
+
+        Returns:
+            tuple: (SQL، المعاملات) - صفوف (الحقل، القيمة، العدد)؛ الإجمالي بحقل ''
+        """
+        fields = list(FACET_FIELDS) if fields is None else list(fields)
+        parts = []
+        params = []
+
+        clauses, where_params = self.where()
+        where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        parts.append(f"SELECT '', NULL, COUNT(*) FROM documents {where_sql}")
+        params.extend(where_params)
+
+        for field in fields:
+            column = FACET_FIELDS[field]
+            clauses, where_params = self.where(exclude_field=field)
+            where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+            parts.append(f"SELECT '{field}', {column}, COUNT(*) FROM documents {where_sql} GROUP BY {column}")
+            params.extend(where_params)
+
+        return ' UNION ALL '.join(parts), params
@@ -0,0 +1,81 @@
+"""
+سجلات صفوف قاعدة البيانات بحقول مسماة
+
+كل سجل namedtuple (بلا قاموس لكل صف) يُبنى مباشرة من المؤشر عبر row_factory،
+ويبقى قابلاً للفهرسة بالموضع كالصفوف القديمة. أعمدة كل سجل تُذكر صراحة في
+SELECT، فلا يتغير ترتيبها بإضافة أعمدة بـ ALTER TABLE في القواعد القديمة.
+
+الاستخدام:
+    cursor = conn.cursor()
+    cursor.row_factory = document_row
+    cursor.execute(f'SELECT {DOCUMENT_COLUMNS} FROM documents WHERE id = ?', (doc_id,))
+    doc = cursor.fetchone()
+    doc.doc_name, doc.issuing_dept
+"""
+
+from collections import namedtuple
+
+
+DOCUMENT_FIELDS = (
+    'id', 'doc_name', 'doc_date', 'doc_title', 'issuing_dept', 'doc_classification',
+    'legal_paragraph', 'created_date', 'updated_date', 'year', 'date_key',
+)
+
+# البيانات الوصفية للصور (الأبعاد، البصمة...) تُقرأ منفصلة بـ get_images_metadata()
+IMAGE_FIELDS = (
+    'id', 'document_id', 'image_path', 'original_filename', 'page_number',
+    'image_number', 'sides', 'notes', 'created_date', 'year',
+)
+
+DocumentRecord = namedtuple('DocumentRecord', DOCUMENT_FIELDS)
+ImageRecord = namedtuple('ImageRecord', IMAGE_FIELDS)
+# ملاحظات مرفق وجدها البحث في صور وثيقة، مع الوثيقة نفسها
+AttachmentRecord = namedtuple('AttachmentRecord', ('notes', 'document'))
+# صورة مع بصمتها المخزنة وآخر فحص سلامة لها (iter_integrity_targets)
+IntegrityRecord = namedtuple('IntegrityRecord', (
+    'id', 'document_id', 'image_path', 'file_size', 'content_hash',
+    'has_document', 'checked_date', 'status',
+))
+
+
+def select_list(fields, alias=None):
+    """قائمة أعمدة SELECT بالترتيب المطلوب (مع بادئة الجدول اختيارياً)"""
+    prefix = f'{alias}.' if alias else ''
+    return ', '.join(f'{prefix}{field}' for field in fields)
+
+
+DOCUMENT_COLUMNS = select_list(DOCUMENT_FIELDS)
+IMAGE_COLUMNS = select_list(IMAGE_FIELDS)
+
+
+# ----------------------------------------------------------------------
+# row_factory (تُسند إلى cursor.row_factory)
+# ----------------------------------------------------------------------
+
+_make_document = DocumentRecord._make
+_make_image = ImageRecord._make
+
+
+def document_row(cursor, row):
+    """صف SELECT {DOCUMENT_COLUMNS}"""
+    return _make_document(row)
+
+
+def image_row(cursor, row):
+    """صف SELECT {IMAGE_COLUMNS}"""
+    return _make_image(row)
+
+
+def keyed_document_row(cursor, row):
+    """صف SELECT {DOCUMENT_COLUMNS}, <مفتاح الترتيب> -> (الوثيقة، المفتاح)"""
+    return _make_document(row[:-1]), row[-1]
+
+
+def attachment_row(cursor, row):
+    """صف SELECT i.notes, {أعمدة الوثيقة بالبادئة d}"""
+    return AttachmentRecord(row[0], _make_document(row[1:]))
+
+
+def integrity_row(cursor, row):
+    """صف iter_integrity_targets"""
+    return IntegrityRecord._make(row)
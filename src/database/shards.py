@@ -0,0 +1,87 @@
+"""
+قواعد السنوات المغلقة (تجزئة القاعدة حسب السنة)
+
+السنة المغلقة تُنقل وثائقها وصورها من documents.db إلى ملف SQLite خاص بها
+في مجلد بجانب القاعدة (documents_years/2019.db) بنفس تعريف الجدولين وفهارسهما،
+ويصبح الملف للقراءة فقط. القاعدة الرئيسية تبقى للسنوات المفتوحة والجداول
+العامة (سجل التغييرات، ذاكرة OCR، السلة، فحص السلامة) وتحفظ سجل السنوات
+المغلقة في جدول year_shards.
+
+DatabaseManager يوجه الاستعلام المقيد بسنة مغلقة إلى ملفها وحده، ويجمع
+استعلامات كل السنوات بإرفاق ملفات السنوات (ATTACH) بالقاعدة الرئيسية خلف
+عروض مؤقتة بأسماء الجداول نفسها، فتعمل الاستعلامات الحالية دون تعديل.
+
+ملف السنة المغلقة لا يتغير، فيكفي نسخه احتياطياً مرة واحدة بعد الإغلاق:
+    python maintenance.py backup-db --year 2019
+"""
+
+import os
+import stat
+import sqlite3
+from pathlib import Path
+
+
+SHARDS_SUFFIX = '_years'
+SHARD_TABLES = ('documents', 'images')
+
+
+def shard_dir(db_path):
+    """مجلد ملفات السنوات المغلقة بجانب القاعدة (documents.db -> documents_years)"""
+    return f'{os.path.splitext(os.path.abspath(db_path))[0]}{SHARDS_SUFFIX}'
+
+
+def shard_filename(year):
+    return f'{year}.db'
+
+
+def shard_uri(path, readonly=True):
+    """مسار الملف بصيغة URI لـ ATTACH (mode=ro: لا يُفتح للكتابة أبداً)"""
+    uri = Path(path).resolve().as_uri()
+    return f'{uri}?mode=ro' if readonly else uri
+
+
+def create_shard(db_path, path):
+    """
+    إنشاء ملف سنة فارغ بتعريف جدولي الوثائق والصور وفهارسهما كما في القاعدة
+
+    التعريف يُنسخ من sqlite_master فيبقى ترتيب الأعمدة مطابقاً (INSERT ... SELECT *).
+    المشغلات لا تُنسخ: ملف السنة لا يُكتب فيه بعد الإغلاق.
+    """
+    source = sqlite3.connect(db_path)
+    try:
+        statements = source.execute(f'''
+            SELECT sql FROM sqlite_master
+            WHERE tbl_name IN ({','.join('?' * len(SHARD_TABLES))})
+              AND type IN ('table', 'index') AND sql IS NOT NULL
+            ORDER BY type = 'index', tbl_name != 'documents'
+        ''', SHARD_TABLES).fetchall()
+    finally:
+        source.close()
+
+    remove_shard(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    target = sqlite3.connect(path)
+    try:
+        for (sql,) in statements:
+            target.execute(sql)
+        target.commit()
+    finally:
+        target.close()
+
+
+def set_readonly(path, readonly=True):
+    """صلاحية الملف على القرص (حماية إضافية فوق mode=ro)"""
+    mode = os.stat(path).st_mode
+    if readonly:
+        mode &= ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+    else:
+        mode |= stat.S_IWUSR
+    os.chmod(path, mode)
+
+
+def remove_shard(path):
+    """حذف ملف سنة (مع ملف journal إن بقي) إذا وُجد"""
+    for candidate in (path, f'{path}-journal'):
+        if os.path.exists(candidate):
+            set_readonly(candidate, False)
+            os.remove(candidate)